@@ -58,6 +58,7 @@ from ra_aid.database.repositories.config_repository import (
 )
 from ra_aid.env_inv import EnvDiscovery
 from ra_aid.env_inv_context import EnvInvManager, get_env_inv
+from ra_aid.proc.background import BackgroundCommandsManager
 from ra_aid.model_formatters import format_key_facts_dict
 from ra_aid.model_formatters.key_snippets_formatter import format_key_snippets_dict
 from ra_aid.console.formatting import cpm
@@ -69,6 +70,7 @@ from ra_aid.dependencies import check_dependencies
 from ra_aid.env import validate_environment
 from ra_aid.exceptions import AgentInterrupt
 from ra_aid.fallback_handler import FallbackHandler
+from ra_aid.file_listing import DEFAULT_FILE_LISTING_BACKEND, FILE_LISTING_BACKENDS
 from ra_aid.llm import initialize_llm, get_model_default_temperature
 from ra_aid.logging_config import get_logger, setup_logging
 from ra_aid.models_params import models_params
@@ -76,6 +78,7 @@ from ra_aid.project_info import format_project_info, get_project_info
 from ra_aid.prompts.chat_prompts import CHAT_PROMPT
 from ra_aid.prompts.web_research_prompts import WEB_RESEARCH_PROMPT_SECTION_CHAT
 from ra_aid.prompts.custom_tools_prompts import DEFAULT_CUSTOM_TOOLS_PROMPT
+from ra_aid.tool_cache import reset_tool_caches
 from ra_aid.tool_configs import get_chat_tools, set_modification_tools, get_custom_tools
 from ra_aid.tools.human import ask_human
 
@@ -493,6 +496,17 @@ Examples:
         type=str,
         help="File path of Python module containing custom tools (e.g. ./path/to_custom_tools.py)",
     )
+    parser.add_argument(
+        "--file-listing-backend",
+        choices=FILE_LISTING_BACKENDS,
+        default=DEFAULT_FILE_LISTING_BACKEND,
+        help="How tracked project files are enumerated: 'git' runs git ls-files, 'index' reads .git/index directly and falls back to git for unsupported formats (default: git)",
+    )
+    parser.add_argument(
+        "--code-index",
+        action="store_true",
+        help="Keep a trigram index of project files in .ra-aid/ so ripgrep searches only read files that can match",
+    )
     if args is None:
         args = sys.argv[1:]
     parsed_args = parser.parse_args(args)
@@ -771,6 +785,7 @@ def main():
                 WorkLogRepositoryManager() as work_log_repo,
                 ConfigRepositoryManager() as config_repo,
                 EnvInvManager(env_data) as env_inv,
+                BackgroundCommandsManager() as background_commands,
             ):
                 # This initializes all repositories and makes them available via their respective get methods
                 logger.debug("Initialized SessionRepository")
@@ -783,9 +798,12 @@ def main():
                 logger.debug("Initialized WorkLogRepository")
                 logger.debug("Initialized ConfigRepository")
                 logger.debug("Initialized Environment Inventory")
+                logger.debug("Initialized BackgroundCommands")
 
                 logger.debug("Initializing new session")
                 session_repo.create_session()
+                # Start the session without tool results cached by an earlier one
+                reset_tool_caches()
 
                 check_dependencies()
 
@@ -852,6 +870,8 @@ def main():
                 config_repo.set(
                     "custom_tools_enabled", True if args.custom_tools else False
                 )
+                config_repo.set("file_listing_backend", args.file_listing_backend)
+                config_repo.set("code_index_enabled", args.code_index)
 
                 # Validate custom tools function signatures
                 get_custom_tools()
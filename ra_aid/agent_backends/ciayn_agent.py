@@ -1,9 +1,10 @@
 import re
 import ast
+import bisect
 import string
 import random
 from dataclasses import dataclass
-from typing import Any, Dict, Generator, List, Optional, Union
+from typing import Any, Callable, Dict, Generator, List, Optional, Union
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
@@ -16,6 +17,8 @@ from ra_aid.config import DEFAULT_MAX_TOOL_FAILURES
 from ra_aid.exceptions import ToolExecutionError
 from ra_aid.fallback_handler import FallbackHandler
 from ra_aid.logging_config import get_logger
+from ra_aid.model_detection import get_model_name_from_chat_model
+from ra_aid.model_registry import get_model_registry
 
 # ADDED IMPORT
 from ra_aid.models_params import (
@@ -31,6 +34,7 @@ import ra_aid.console.formatting
 from ra_aid.agent_context import should_exit
 from ra_aid.text.processing import process_thinking_content
 from ra_aid.text import fix_triple_quote_contents
+from ra_aid.token_estimator import content_bytes, get_token_estimator
 
 logger = get_logger(__name__)
 
@@ -88,6 +92,83 @@ def validate_function_call_pattern(s: str) -> bool:
         return True
 
 
+class TokenLedger:
+    """Running token estimates for an append-only chat history.
+
+    Each message is measured once, in bytes, when it is first seen, and the ledger
+    keeps cumulative sizes, so the size of any suffix of the history is a single
+    subtraction and trimming to a token budget is a binary search. Sizes are
+    converted to tokens with the bytes per token ratio in effect when asked, so
+    every message follows the ratio as it is learned.
+
+    The ledger follows one history list at a time. Messages appended to it
+    since the last sync are measured; if the list is replaced, shrinks or is
+    rewritten, the ledger starts over.
+    """
+
+    def __init__(
+        self,
+        message_bytes: Callable[[Any], int],
+        bytes_per_token: Callable[[], float] = lambda: 1.0,
+    ):
+        self.message_bytes = message_bytes
+        self.bytes_per_token = bytes_per_token
+        self._history: Optional[List[Any]] = None
+        self._last_message: Any = None
+        # _cumulative[i] is the size of the first i messages
+        self._cumulative: List[int] = [0]
+        self.trimmed_messages = 0
+        self.kept_tokens: float = 0
+
+    def sync(self, history: List[Any]) -> None:
+        """Measure the messages added to history since the last sync."""
+        seen = len(self._cumulative) - 1
+        if (
+            history is not self._history
+            or len(history) < seen
+            or (seen and history[seen - 1] is not self._last_message)
+        ):
+            self._history = history
+            self._cumulative = [0]
+            seen = 0
+        total = self._cumulative[-1]
+        for message in history[seen:]:
+            total += self.message_bytes(message)
+            self._cumulative.append(total)
+        self._last_message = history[-1] if history else None
+
+    def __len__(self) -> int:
+        return len(self._cumulative) - 1
+
+    def message_tokens(self, index: int) -> float:
+        """Return the estimate for the message at index."""
+        return self.tokens(index, index + 1)
+
+    def tokens(self, start: int = 0, end: Optional[int] = None) -> float:
+        """Return the estimate for messages start to end."""
+        if end is None:
+            end = len(self)
+        return (self._cumulative[end] - self._cumulative[start]) / self.bytes_per_token()
+
+    def trim_start(self, max_messages: int, max_tokens: Optional[float]) -> int:
+        """Return the index of the oldest message to keep.
+
+        Keeps the most recent messages, at most max_messages of them, whose estimates
+        add up to at most max_tokens; none if the latest message alone exceeds it.
+        """
+        end = len(self)
+        start = max(0, end - max_messages)
+        if max_tokens is not None:
+            # First start whose suffix fits: cumulative[start] >= cumulative[end] - max_bytes
+            max_bytes = max_tokens * self.bytes_per_token()
+            start = bisect.bisect_left(
+                self._cumulative, self._cumulative[end] - max_bytes, start, end
+            )
+        self.trimmed_messages = start
+        self.kept_tokens = self.tokens(start)
+        return start
+
+
 class CiaynAgent:
     """Code Is All You Need (CIAYN) agent that uses generated Python code for tool interaction.
 
@@ -178,6 +259,9 @@ class CiaynAgent:
         self.max_history_messages = max_history_messages
         self.max_tokens = max_tokens
         self.chat_history = []
+        self.model_name = get_model_name_from_chat_model(model)
+        # Token estimates for chat_history, for trimming and instrumentation
+        self.history_ledger = TokenLedger(content_bytes, self._bytes_per_token)
         self.available_functions = []
         for t in tools:
             self.available_functions.append(get_function_info(t.func))
@@ -374,8 +458,8 @@ class CiaynAgent:
                     if validate_function_call_pattern(call):
                         provider = self.config.get("provider", "")
                         model_name = self.config.get("model", "")
-                        model_config = models_params.get(provider, {}).get(
-                            model_name, {}
+                        model_config = get_model_registry().model_config(
+                            provider, model_name, models_params
                         )
                         attempt_extraction = model_config.get(
                             "attempt_llm_tool_extraction", False
@@ -524,7 +608,9 @@ class CiaynAgent:
                 # Retrieve the configuration flag
                 provider = self.config.get("provider", "")
                 model_name = self.config.get("model", "")
-                model_config = models_params.get(provider, {}).get(model_name, {})
+                model_config = get_model_registry().model_config(
+                    provider, model_name, models_params
+                )
                 attempt_extraction = model_config.get(
                     "attempt_llm_tool_extraction", False
                 )
@@ -857,47 +943,36 @@ class CiaynAgent:
         Returns:
             List[Any]: Concatenated initial_messages + trimmed chat_history
         """
-        # First apply message count limit
-        if len(chat_history) > self.max_history_messages:
-            chat_history = chat_history[-self.max_history_messages :]
+        self.history_ledger.sync(chat_history)
 
         # Skip token limiting if max_tokens is None
-        if self.max_tokens is None:
-            return initial_messages + chat_history
-
-        # Calculate initial messages token count
-        initial_tokens = sum(self._estimate_tokens(msg) for msg in initial_messages)
-
-        # Remove messages from start of chat_history until under token limit
-        while chat_history:
-            total_tokens = initial_tokens + sum(
-                self._estimate_tokens(msg) for msg in chat_history
+        max_chat_tokens = None
+        if self.max_tokens is not None:
+            initial_tokens = sum(
+                self._estimate_tokens(msg, self.model_name) for msg in initial_messages
             )
-            if total_tokens <= self.max_tokens:
-                break
-            chat_history.pop(0)
-
-        return initial_messages + chat_history
-
-    @staticmethod
-    def _estimate_tokens(content: Optional[Union[str, BaseMessage]]) -> int:
-        """Estimate token count for a message or string."""
-        if content is None:
-            return 0
+            max_chat_tokens = self.max_tokens - initial_tokens
 
-        if isinstance(content, BaseMessage):
-            text = content.content
-        else:
-            text = content
+        # Keep the newest messages within both the message count and token limits
+        start = self.history_ledger.trim_start(
+            self.max_history_messages, max_chat_tokens
+        )
+        return initial_messages + chat_history[start:]
 
-        # create-react-agent tool calls can be lists
-        if isinstance(text, List):
-            text = str(text)
+    def _bytes_per_token(self) -> float:
+        """Return the bytes per token ratio currently learned for this agent's model."""
+        return get_token_estimator().bytes_per_token(self.model_name)
 
-        if not text:
-            return 0
+    @staticmethod
+    def _estimate_tokens(
+        content: Optional[Union[str, BaseMessage]], model_name: Optional[str] = None
+    ) -> int:
+        """Estimate token count for a message or string.
 
-        return len(text.encode("utf-8")) // 2.0
+        Uses the bytes per token ratio learned for model_name from provider usage,
+        or 2 bytes per token until there is one.
+        """
+        return get_token_estimator().estimate(content_bytes(content), model_name)
 
     def stream(
         self, messages_dict: Dict[str, List[Any]], _config: Dict[str, Any] = None
@@ -911,6 +986,13 @@ class CiaynAgent:
             3  # Maximum number of consecutive empty responses before giving up
         )
 
+        # Check if model supports think tags
+        model_config = get_model_registry().model_config(
+            self.config.get("provider", ""), self.config.get("model", ""), models_params
+        )
+        supports_think_tag = model_config.get("supports_think_tag", False)
+        supports_thinking = model_config.get("supports_thinking", False)
+
         while True:
             # Check for should_exit
             if should_exit():
@@ -927,12 +1009,6 @@ class CiaynAgent:
             )
             # print(f"response={response}")
 
-            # Check if model supports think tags
-            provider = self.config.get("provider", "")
-            model_name = self.config.get("model", "")
-            model_config = models_params.get(provider, {}).get(model_name, {})
-            supports_think_tag = model_config.get("supports_think_tag", False)
-            supports_thinking = model_config.get("supports_thinking", False)
 
             # Process thinking content if supported
             response.content, _ = process_thinking_content(
@@ -111,7 +111,9 @@ def build_agent_kwargs(
             ):
                 return state_modifier(state, model, max_input_tokens=max_input_tokens)
 
-            return base_state_modifier(state, max_input_tokens=max_input_tokens)
+            return base_state_modifier(
+                state, max_input_tokens=max_input_tokens, model_name=model_name
+            )
 
         agent_kwargs["state_modifier"] = wrapped_state_modifier
 
@@ -1,6 +1,17 @@
 """Utilities for handling Anthropic-specific message formats and trimming."""
 
-from typing import Callable, List, Literal, Optional, Sequence, Union, cast
+from typing import (
+    Callable,
+    List,
+    Literal,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+    runtime_checkable,
+)
 
 from langchain_core.messages import (
     AIMessage,
@@ -13,6 +24,30 @@ from langchain_core.messages import (
 )
 
 
+@runtime_checkable
+class PerMessageTokenCounter(Protocol):
+    """A token counter that counts a list as a fixed overhead plus a count per message."""
+
+    overhead: int
+
+    def message_tokens(self, message: BaseMessage) -> int: ...
+
+    def __call__(self, messages: List[BaseMessage]) -> int: ...
+
+
+def _token_costs(
+    messages: Sequence[BaseMessage], token_counter: Callable[[List[BaseMessage]], int]
+) -> Tuple[int, List[int]]:
+    """Return the fixed token overhead of a list and the tokens each message adds to it.
+
+    Other counters are asked about each message on its own, which counts any
+    per-list overhead once per message.
+    """
+    if isinstance(token_counter, PerMessageTokenCounter):
+        return token_counter.overhead, [token_counter.message_tokens(msg) for msg in messages]
+    return 0, [token_counter([msg]) for msg in messages]
+
+
 def _is_message_type(
     message: BaseMessage, message_types: Union[str, type, List[Union[str, type]]]
 ) -> bool:
@@ -103,6 +138,11 @@ def anthropic_trim_messages(
 
     It always keeps the first num_messages_to_keep messages.
 
+    Each message is counted once and candidate trims are measured with running
+    totals, so trimming is linear in the number of messages. A list is assumed
+    to count as its messages' counts added up, plus the overhead of a
+    PerMessageTokenCounter.
+
     Args:
         messages: Sequence of messages to trim
         max_tokens: Maximum number of tokens allowed
@@ -119,6 +159,7 @@ def anthropic_trim_messages(
         return []
 
     messages = list(messages)
+    overhead, costs = _token_costs(messages, token_counter)
 
     # Always keep the first num_messages_to_keep messages
     kept_messages = messages[:num_messages_to_keep]
@@ -135,7 +176,7 @@ def anthropic_trim_messages(
     # If we have tool_use anywhere, we need to be very careful about trimming
     if has_tool_use_anywhere:
         # For safety, just keep all messages if we're under the token limit
-        if token_counter(messages) <= max_tokens:
+        if overhead + sum(costs) <= max_tokens:
             return messages
 
         # We need to identify all tool_use/tool_result relationships
@@ -162,6 +203,7 @@ def anthropic_trim_messages(
         # Now we'll build our result, starting with the kept_messages
         # But we need to be careful about the first message if it has tool_use
         result = []
+        result_tokens = overhead
 
         # Check if the last message in kept_messages has tool_use
         if (
@@ -176,15 +218,22 @@ def anthropic_trim_messages(
                     result.extend(kept_messages[:-1])
                     # Add the AIMessage and ToolMessage as a pair
                     result.extend([messages[ai_idx], messages[tool_idx]])
+                    result_tokens += (
+                        sum(costs[: len(kept_messages) - 1])
+                        + costs[ai_idx]
+                        + costs[tool_idx]
+                    )
                     # Remove this pair from the list of pairs to process later
                     pairs = pairs[:i] + pairs[i + 1 :]
                     break
             else:
                 # If we didn't find a matching pair, just add all kept_messages
                 result.extend(kept_messages)
+                result_tokens += sum(costs[: len(kept_messages)])
         else:
             # No tool_use in the last kept message, just add all kept_messages
             result.extend(kept_messages)
+            result_tokens += sum(costs[: len(kept_messages)])
 
         # If we're using the "last" strategy, we'll try to include pairs from the end
         if strategy == "last":
@@ -192,18 +241,11 @@ def anthropic_trim_messages(
             pairs_to_include = []
 
             # Process pairs from the end (newest first)
-            for pair_idx, (ai_idx, tool_idx) in enumerate(reversed(complete_pairs)):
-                # Try adding this pair
-                test_msgs = result.copy()
+            for ai_idx, tool_idx in reversed(complete_pairs):
+                # Try adding this pair to the result and the pairs selected so far
+                result_tokens += costs[ai_idx] + costs[tool_idx]
 
-                # Add all previously selected pairs
-                for prev_ai_idx, prev_tool_idx in pairs_to_include:
-                    test_msgs.extend([messages[prev_ai_idx], messages[prev_tool_idx]])
-
-                # Add this pair
-                test_msgs.extend([messages[ai_idx], messages[tool_idx]])
-
-                if token_counter(test_msgs) <= max_tokens:
+                if result_tokens <= max_tokens:
                     # This pair fits, add it to our list
                     pairs_to_include.append((ai_idx, tool_idx))
                 else:
@@ -220,38 +262,27 @@ def anthropic_trim_messages(
 
         return result
 
-    # If no tool_use, proceed with normal segmentation
-    segments = []
-    i = 0
-
-    # Group messages into segments
-    while i < len(remaining_msgs):
-        segments.append([remaining_msgs[i]])
-        i += 1
-
-    # Now we have segments that maintain the required structure
-    # We'll add segments from the end (for "last" strategy) or beginning (for "first")
+    # If no tool_use, each remaining message is trimmed on its own.
+    # We'll add messages from the end (for "last" strategy) or beginning (for "first")
     # until we hit the token limit
+    first_remaining = len(kept_messages)
+    total_tokens = overhead + sum(costs[:first_remaining])
 
     if strategy == "last":
-        # If we have no segments, just return kept_messages
-        if not segments:
+        # If we have no remaining messages, just return kept_messages
+        if not remaining_msgs:
             return kept_messages
 
-        result = []
-
-        # Process segments from the end
-        for i, segment in enumerate(reversed(segments)):
-            # Try adding this segment
-            test_msgs = segment + result
-
-            if token_counter(kept_messages + test_msgs) <= max_tokens:
-                result = segment + result
-            else:
-                # This segment would exceed the token limit
+        # Process messages from the end
+        start = len(messages)
+        while start > first_remaining:
+            total_tokens += costs[start - 1]
+            if total_tokens > max_tokens:
+                # This message would exceed the token limit
                 break
+            start -= 1
 
-        final_result = kept_messages + result
+        final_result = kept_messages + messages[start:]
 
         # For Anthropic, we need to ensure the conversation follows a valid structure
         # We'll do a final check of the entire conversation
@@ -295,18 +326,15 @@ def anthropic_trim_messages(
         return valid_result
 
     elif strategy == "first":
-        result = []
-
-        # Process segments from the beginning
-        for i, segment in enumerate(segments):
-            # Try adding this segment
-            test_msgs = result + segment
-            if token_counter(kept_messages + test_msgs) <= max_tokens:
-                result = result + segment
-            else:
-                # This segment would exceed the token limit
+        # Process messages from the beginning
+        end = first_remaining
+        while end < len(messages):
+            total_tokens += costs[end]
+            if total_tokens > max_tokens:
+                # This message would exceed the token limit
                 break
+            end += 1
 
-        final_result = kept_messages + result
+        final_result = kept_messages + messages[first_remaining:end]
 
         return final_result
@@ -1,7 +1,9 @@
 """Utilities for handling token limits with Anthropic models."""
 
+import threading
+from collections import OrderedDict
 from functools import partial
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, Hashable, List, Optional, Sequence
 
 from langchain.chat_models.base import BaseChatModel
 from typing import Tuple
@@ -10,6 +12,7 @@ from ra_aid.model_detection import is_claude_37, get_model_name_from_chat_model
 
 from langchain_core.messages import (
     BaseMessage,
+    HumanMessage,
     trim_messages,
 )
 from langchain_core.messages.base import message_to_dict
@@ -23,16 +26,23 @@ from litellm import token_counter, get_model_info
 from ra_aid.agent_backends.ciayn_agent import CiaynAgent
 from ra_aid.database.repositories.config_repository import get_config_repository
 from ra_aid.logging_config import get_logger
+from ra_aid.model_registry import get_model_registry
 from ra_aid.models_params import DEFAULT_TOKEN_LIMIT, models_params
 
 logger = get_logger(__name__)
 
+# Per-message token counts kept for each model
+TOKEN_COUNT_CACHE_SIZE = 8192
 
-def estimate_messages_tokens(messages: Sequence[BaseMessage]) -> int:
+
+def estimate_messages_tokens(
+    messages: Sequence[BaseMessage], model_name: Optional[str] = None
+) -> int:
     """Helper function to estimate total tokens in a sequence of messages.
 
     Args:
         messages: Sequence of messages to count tokens for
+        model_name: Model whose learned bytes per token ratio to estimate with
 
     Returns:
         Total estimated token count
@@ -41,7 +51,7 @@ def estimate_messages_tokens(messages: Sequence[BaseMessage]) -> int:
         return 0
 
     estimate_tokens = CiaynAgent._estimate_tokens
-    return sum(estimate_tokens(msg) for msg in messages)
+    return sum(estimate_tokens(msg, model_name) for msg in messages)
 
 
 def convert_message_to_litellm_format(message: BaseMessage) -> Dict:
@@ -60,21 +70,55 @@ def convert_message_to_litellm_format(message: BaseMessage) -> Dict:
     }
 
 
-def create_token_counter_wrapper(model: str):
-    """Create a wrapper for token counter that handles BaseMessage conversion.
-
-    Args:
-        model: The model name to use for token counting
+class MessageTokenCounter:
+    """Counts tokens in messages with litellm, tokenizing each distinct message once.
 
-    Returns:
-        A function that accepts BaseMessage objects and returns token count
+    litellm counts a list of messages as a fixed overhead plus a count for each
+    message, so a list is counted as the overhead plus the cached counts of its
+    messages. Counts are cached by role and content, which is all that is passed
+    to litellm, so a message keeps its count across agent steps.
     """
 
-    # Create a partial function that already has the model parameter set
-    base_token_counter = partial(token_counter, model=model)
+    def __init__(self, model: str, cache_size: int = TOKEN_COUNT_CACHE_SIZE):
+        self.model = model
+        self.cache_size = cache_size
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._overhead: Optional[int] = None
+        self._lock = threading.Lock()
 
-    def wrapped_token_counter(messages: List[BaseMessage]) -> int:
-        """Count tokens in a list of messages, converting BaseMessage to dict for litellm token counter usage.
+    def _count(self, messages: List[BaseMessage]) -> int:
+        litellm_messages = [convert_message_to_litellm_format(msg) for msg in messages]
+        return token_counter(messages=litellm_messages, model=self.model)
+
+    @property
+    def overhead(self) -> int:
+        """Tokens litellm adds once per list of messages."""
+        if self._overhead is None:
+            probe = HumanMessage(content="token count probe")
+            one = self._count([probe])
+            two = self._count([probe, probe])
+            self._overhead = max(0, min(one, 2 * one - two))
+        return self._overhead
+
+    def message_tokens(self, message: BaseMessage) -> int:
+        """Return the tokens a message adds to a list of messages."""
+        content = message.content
+        key = (message.type, content if isinstance(content, str) else repr(content))
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                return count
+
+        count = max(0, self._count([message]) - self.overhead)
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def __call__(self, messages: List[BaseMessage]) -> int:
+        """Count tokens in a list of messages.
 
         Args:
             messages: List of BaseMessage objects
@@ -84,12 +128,30 @@ def create_token_counter_wrapper(model: str):
         """
         if not messages:
             return 0
+        return self.overhead + sum(self.message_tokens(msg) for msg in messages)
 
-        litellm_messages = [convert_message_to_litellm_format(msg) for msg in messages]
-        result = base_token_counter(messages=litellm_messages)
-        return result
 
-    return wrapped_token_counter
+# Token counters shared by all agents, so counts survive between steps
+_token_counters: Dict[str, MessageTokenCounter] = {}
+_token_counters_lock = threading.Lock()
+
+
+def create_token_counter_wrapper(model: str) -> MessageTokenCounter:
+    """Return the token counter for a model, converting BaseMessage to dict for litellm.
+
+    The counter and its cached message counts are shared by every caller using the same model.
+
+    Args:
+        model: The model name to use for token counting
+
+    Returns:
+        A MessageTokenCounter that accepts BaseMessage objects and returns token count
+    """
+    with _token_counters_lock:
+        counter = _token_counters.get(model)
+        if counter is None:
+            counter = _token_counters[model] = MessageTokenCounter(model)
+        return counter
 
 
 def state_modifier(
@@ -134,13 +196,18 @@ def state_modifier(
 
 
 def base_state_modifier(
-    state: AgentState, max_input_tokens: int = DEFAULT_TOKEN_LIMIT
+    state: AgentState,
+    max_input_tokens: int = DEFAULT_TOKEN_LIMIT,
+    model_name: Optional[str] = None,
 ) -> list[BaseMessage]:
     """Given the agent state and max_tokens, return a trimmed list of messages.
 
+    Tokens are estimated with the bytes per token ratio learned for model_name.
+
     Args:
         state: The current agent state containing messages
         max_tokens: Maximum number of tokens to allow (default: DEFAULT_TOKEN_LIMIT)
+        model_name: Model the messages are sent to
 
     Returns:
         list[BaseMessage]: Trimmed list of messages that fits within token limit
@@ -152,12 +219,12 @@ def base_state_modifier(
 
     first_message = messages[0]
     remaining_messages = messages[1:]
-    first_tokens = estimate_messages_tokens([first_message])
+    first_tokens = estimate_messages_tokens([first_message], model_name)
     new_max_tokens = max_input_tokens - first_tokens
 
     trimmed_remaining = trim_messages(
         remaining_messages,
-        token_counter=estimate_messages_tokens,
+        token_counter=partial(estimate_messages_tokens, model_name=model_name),
         max_tokens=new_max_tokens,
         strategy="last",
         allow_partial=False,
@@ -264,34 +331,10 @@ def get_model_token_limit(
             config, agent_type, use_repository=repository_available
         )
 
-        # Always attempt to get model info from litellm first
-        provider_model = model_name if not provider else f"{provider}/{model_name}"
-
-        try:
-            model_info = get_model_info(provider_model)
-            max_input_tokens = model_info.get("max_input_tokens")
-            if max_input_tokens:
-                logger.debug(
-                    f"Using litellm token limit for {model_name}: {max_input_tokens}"
-                )
-                return adjust_claude_37_token_limit(max_input_tokens, model)
-        except Exception as e:
-            logger.debug(
-                f"Error getting model info from litellm: {e}, falling back to models_params"
-            )
-
-        # Fallback to models_params dict
-        # Normalize model name for fallback lookup (e.g. claude-2 -> claude2)
-        normalized_name = model_name.replace("-", "")
-        provider_tokens = models_params.get(provider, {})
-        if normalized_name in provider_tokens:
-            max_input_tokens = provider_tokens[normalized_name]["token_limit"]
-            logger.debug(
-                f"Found token limit for {provider}/{model_name}: {max_input_tokens}"
-            )
-        else:
-            max_input_tokens = None
-            logger.debug(f"Could not find token limit for {provider}/{model_name}")
+        # litellm's limit is preferred, falling back to models_params
+        max_input_tokens = get_model_registry().token_limit(
+            provider, model_name, params=models_params, loader=get_model_info
+        )
 
         return adjust_claude_37_token_limit(max_input_tokens, model)
 
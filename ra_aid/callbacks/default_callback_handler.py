@@ -1,13 +1,13 @@
 import threading
 import time
 from langchain.chat_models.base import BaseChatModel
-import litellm
 from contextlib import contextmanager
 from contextvars import ContextVar
 from typing import Dict, Optional, Union, Any, List
 from decimal import Decimal, getcontext
 
 from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
 from langchain_core.outputs import LLMResult
 
 from ra_aid.model_detection import (
@@ -18,6 +18,8 @@ from ra_aid.utils.singleton import Singleton
 from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
 from ra_aid.database.repositories.session_repository import get_session_repository
 from ra_aid.logging_config import get_logger
+from ra_aid.model_registry import get_model_registry
+from ra_aid.token_estimator import content_bytes, get_token_estimator
 
 logger = get_logger(__name__)
 
@@ -80,6 +82,8 @@ class DefaultCallbackHandler(BaseCallbackHandler, metaclass=Singleton):
     def __init__(self, model_name: str, provider: Optional[str] = None):
         super().__init__()
         self._lock = threading.Lock()
+        # Model name and size of the messages sent per request, to calibrate token estimates
+        self._pending_prompts: Dict[Any, tuple] = {}
         self._initialize(model_name, provider)
 
     def _initialize(self, model_name: str, provider: Optional[str] = None):
@@ -131,19 +135,14 @@ class DefaultCallbackHandler(BaseCallbackHandler, metaclass=Singleton):
             logger.error(f"Failed to initialize callback handler: {e}", exc_info=True)
 
     def _initialize_model_costs(self) -> None:
-        try:
-            model_info = litellm.get_model_info(
-                model=self.model_name, custom_llm_provider=self.provider
-            )
-            if model_info:
-                input_cost = model_info.get("input_cost_per_token", 0.0)
-                output_cost = model_info.get("output_cost_per_token", 0.0)
-                self.input_cost_per_token = Decimal(str(input_cost))
-                self.output_cost_per_token = Decimal(str(output_cost))
-                if self.input_cost_per_token and self.output_cost_per_token:
-                    return
-        except Exception as e:
-            logger.debug(f"Could not get model info from litellm: {e}")
+        costs = get_model_registry().model_costs(self.model_name, self.provider)
+        if costs:
+            input_cost, output_cost = costs
+            self.input_cost_per_token = Decimal(str(input_cost))
+            self.output_cost_per_token = Decimal(str(output_cost))
+            if self.input_cost_per_token and self.output_cost_per_token:
+                return
+        else:
             from ra_aid.console.formatting import cpm
 
             cpm(
@@ -180,6 +179,31 @@ class DefaultCallbackHandler(BaseCallbackHandler, metaclass=Singleton):
         except Exception as e:
             logger.error(f"Error in on_llm_start: {e}", exc_info=True)
 
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], **kwargs
+    ) -> None:
+        self.on_llm_start(serialized, [], **kwargs)
+        try:
+            metadata = kwargs.get("metadata") or {}
+            model_name = (
+                metadata.get("model_name")
+                or metadata.get("ls_model_name")
+                or self.model_name
+            )
+            prompt_bytes = sum(content_bytes(msg) for batch in messages for msg in batch)
+            with self._lock:
+                self._pending_prompts[kwargs.get("run_id")] = (model_name, prompt_bytes)
+        except Exception as e:
+            logger.error(f"Error in on_chat_model_start: {e}", exc_info=True)
+
+    def _calibrate_token_estimates(self, run_id: Any, prompt_tokens: int) -> None:
+        """Teach the token estimator how many tokens the messages sent for run_id were."""
+        with self._lock:
+            pending = self._pending_prompts.pop(run_id, None)
+        if pending is not None and prompt_tokens:
+            model_name, prompt_bytes = pending
+            get_token_estimator().observe(model_name, prompt_bytes, prompt_tokens)
+
     def _extract_token_usage(self, response: LLMResult) -> dict:
         """Extract token usage information from various response formats."""
         token_usage = {}
@@ -303,10 +327,17 @@ class DefaultCallbackHandler(BaseCallbackHandler, metaclass=Singleton):
             token_usage = self._extract_token_usage(response)
 
             self._update_token_counts(token_usage, duration)
+            self._calibrate_token_estimates(
+                kwargs.get("run_id"), token_usage.get("prompt_tokens", 0)
+            )
 
         except Exception as e:
             logger.error(f"Error in on_llm_end: {e}", exc_info=True)
 
+    def on_llm_error(self, error: BaseException, **kwargs) -> None:
+        with self._lock:
+            self._pending_prompts.pop(kwargs.get("run_id"), None)
+
     def _handle_callback_update(
         self,
         total_tokens: int,
@@ -0,0 +1,633 @@
+"""Persistent trigram index that narrows ripgrep searches to candidate files.
+
+Every ripgrep search reads the whole working tree. In the style of Zoekt and
+Google Code Search, this module keeps an index from each three-byte sequence
+(trigram) to the files containing it. A search pattern is reduced to a boolean
+query over trigrams that any match must contain (literal runs are ANDed,
+alternations ORed, optional parts dropped), and rg then only reads the files
+that satisfy it.
+
+The index is opt-in (``--code-index``) and lives in ``.ra-aid/``. As that
+directory is part of the working tree, the index is stored as plain data (a
+JSON file table followed by binary posting lists) and anything malformed in it
+is discarded and rebuilt. It is kept exact rather than approximately fresh:
+
+- The files to consider always come from ``rg --files`` with the search's own
+  filter options, so ignore rules, globs and file types match rg exactly.
+- Before each search, files whose mtime or size changed are re-read. Files
+  modified within RACY_WINDOW_NS of being indexed are re-read again on the next
+  search, as their mtime cannot yet prove they are unchanged.
+- Whenever rg would treat a candidate differently when it is named explicitly
+  (binary files, files too large to index) or a pattern cannot be analyzed, the
+  caller falls back to the full rg search.
+"""
+
+import array
+import json
+import os
+import re
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Location of the persisted index, relative to the searched directory
+CODE_INDEX_PATH = ".ra-aid/code_index.bin"
+INDEX_FORMAT_VERSION = 2
+
+# Persisted layout, all little-endian: the header (magic, version, next id,
+# dead ids, file table size), the file table as UTF-8 JSON mapping each path to
+# [file id, mtime_ns, size, flags], then for each trigram the trigram, its
+# number of ids and the ids as uint32
+_INDEX_MAGIC = b"RAAIDTRI"
+_HEADER = struct.Struct("<8sIQQQ")
+_POSTING_HEADER = struct.Struct("<3sI")
+
+# Files larger than this are not indexed and disable the index when in scope
+MAX_INDEXED_FILE_SIZE = 8 * 1024 * 1024
+
+# Files modified this recently may still change within the same mtime tick
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+# Narrowed commands longer than this fall back to a full search
+MAX_COMMAND_BYTES = 128 * 1024
+
+# Flags stored per file
+_BINARY = 1  # contains a NUL byte; only the text before it is indexed
+_UNINDEXED = 2  # too large to index
+_TRANSCODED = 4  # starts with a UTF-16 BOM, which rg transcodes before searching
+_RACY = 8  # modified too recently to trust its mtime
+
+_UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+
+# ASCII letters that also case-fold to a non-ASCII character (KELVIN SIGN and
+# LONG S), so case-insensitive matches need not contain their ASCII form
+_NON_ASCII_FOLDS = frozenset(b"ks")
+
+_REPEATS = tuple(
+    op
+    for op in (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, "POSSESSIVE_REPEAT", None),
+    )
+    if op is not None
+)
+_ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+
+# Escapes rg reads as assertions or Unicode classes but Python as literal characters
+_RG_ONLY_ESCAPES = re.compile(r"\\[<>]|\\[bB]\{|\\[pP]")
+
+# Set operations rg supports inside character classes
+_CLASS_SET_OPERATORS = ("&&", "--", "~~")
+
+# A trigram query: None matches every file, ("tri", trigram) files containing
+# the trigram, and ("and" | "or", [queries]) combinations of sub-queries
+Query = Optional[Tuple[str, Union[bytes, List["Query"]]]]
+
+
+def _and(parts: List[Query]) -> Query:
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return ("and", parts)
+
+
+def _or(parts: List[Query]) -> Query:
+    if not parts or any(part is None for part in parts):
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return ("or", parts)
+
+
+def _literal_query(text: str, ignore_case: bool) -> Query:
+    """Require every trigram of a literal string."""
+    data = text.encode("utf-8", "surrogatepass").lower()
+    trigrams = set()
+    for i in range(len(data) - 2):
+        trigram = data[i : i + 3]
+        # Case-insensitive matches may use other byte sequences for
+        # non-ASCII characters and for the letters in _NON_ASCII_FOLDS
+        if ignore_case and (max(trigram) >= 0x80 or not _NON_ASCII_FOLDS.isdisjoint(trigram)):
+            continue
+        trigrams.add(trigram)
+    return _and([("tri", trigram) for trigram in sorted(trigrams)])
+
+
+def _sequence_query(items, ignore_case: bool) -> Query:
+    """Build the query satisfied by every match of a parsed regex sequence."""
+    parts: List[Query] = []
+    run: List[str] = []
+
+    def flush():
+        if run:
+            parts.append(_literal_query("".join(run), ignore_case))
+            run.clear()
+
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        flush()
+        if op == sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            scoped = ignore_case or bool(add_flags & sre_parse.SRE_FLAG_IGNORECASE)
+            if del_flags & sre_parse.SRE_FLAG_IGNORECASE:
+                scoped = False
+            parts.append(_sequence_query(sub, scoped))
+        elif op == sre_parse.BRANCH:
+            parts.append(_or([_sequence_query(branch, ignore_case) for branch in av[1]]))
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                parts.append(_sequence_query(sub, ignore_case))
+        elif op == _ATOMIC_GROUP:
+            parts.append(_sequence_query(av, ignore_case))
+        # Classes, anchors, wildcards and the like constrain nothing
+    flush()
+    return _and(parts)
+
+
+def _has_rg_only_class_syntax(pattern: str) -> bool:
+    """
+    Whether a character class uses syntax rg and Python read differently.
+
+    rg supports POSIX classes ([[:alpha:]]), nested classes and set operations
+    (&&, --, ~~) inside classes; Python reads all of these as literal characters.
+    """
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            if char == "[" or pattern.startswith(_CLASS_SET_OPERATORS, i):
+                return True
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            # A leading ] (after an optional ^) is a literal member
+            i += 1
+            if pattern.startswith("^", i):
+                i += 1
+            if pattern.startswith("]", i):
+                i += 1
+            continue
+        i += 1
+    return False
+
+
+def pattern_query(pattern: str, fixed_string: bool = False, ignore_case: bool = False) -> Query:
+    """
+    Reduce a search pattern to the trigrams any matching line must contain.
+
+    Args:
+        pattern: rg pattern
+        fixed_string: Whether the pattern is a literal string
+        ignore_case: Whether the search is case-insensitive
+
+    Returns:
+        Query: Trigram query, or None if the pattern constrains nothing or
+            cannot be analyzed
+    """
+    # rg treats newlines in patterns specially; leave those to rg
+    if not pattern or "\n" in pattern:
+        return None
+    if fixed_string:
+        return _literal_query(pattern, ignore_case)
+    if _RG_ONLY_ESCAPES.search(pattern) or _has_rg_only_class_syntax(pattern):
+        return None
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        # Syntax Python cannot parse (e.g. \p{L}); rg decides what it means
+        return None
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        ignore_case = True
+    return _sequence_query(parsed, ignore_case)
+
+
+class CodeIndex:
+    """Trigram index over the files of one directory."""
+
+    def __init__(self, root: str):
+        """
+        Create an empty index for a directory; call load() to restore it.
+
+        Args:
+            root: Directory searches run in; indexed paths are relative to it
+        """
+        self.root = root
+        # path -> [file id, mtime_ns, size, flags]
+        self.files: Dict[str, list] = {}
+        self.postings: Dict[bytes, array.array] = {}
+        self.next_id = 0
+        self.dead = 0
+        self.lock = threading.Lock()
+
+    @property
+    def persist_path(self) -> Optional[str]:
+        """Where the index is stored, or None if .ra-aid/ does not exist."""
+        directory, _ = os.path.split(CODE_INDEX_PATH)
+        if not os.path.isdir(os.path.join(self.root, directory)):
+            return None
+        return os.path.join(self.root, CODE_INDEX_PATH)
+
+    def load(self) -> bool:
+        """Restore the index from disk, returning whether it was found and well-formed."""
+        path = self.persist_path
+        if path is None:
+            return False
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.debug(f"Ignoring unreadable code index {path}: {e}")
+            return False
+        try:
+            loaded = _decode_index(data)
+        except (ValueError, struct.error) as e:
+            logger.debug(f"Ignoring malformed code index {path}: {e}")
+            return False
+        if loaded is None:
+            return False
+        self.files, self.postings, self.next_id, self.dead = loaded
+        return True
+
+    def save(self) -> None:
+        """Persist the index atomically; failures are only logged."""
+        path = self.persist_path
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                table = json.dumps(self.files, separators=(",", ":")).encode("utf-8")
+                f.write(
+                    _HEADER.pack(
+                        _INDEX_MAGIC, INDEX_FORMAT_VERSION, self.next_id, self.dead, len(table)
+                    )
+                )
+                f.write(table)
+                for trigram, ids in self.postings.items():
+                    f.write(_POSTING_HEADER.pack(trigram, len(ids)))
+                    f.write(_uint32_bytes(ids))
+            os.replace(tmp_path, path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.debug(f"Could not persist code index to {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _read(self, path: str, st: os.stat_result) -> Tuple[int, Set[bytes]]:
+        """Read a file's flags and trigrams."""
+        with open(os.path.join(self.root, path), "rb") as f:
+            data = f.read(MAX_INDEXED_FILE_SIZE + 1)
+        if data.startswith(_UTF16_BOMS):
+            return _TRANSCODED, set()
+        flags = 0
+        nul = data.find(b"\0")
+        if nul >= 0:
+            # rg stops reading a binary file at its first NUL
+            flags |= _BINARY
+            data = data[:nul]
+        elif len(data) > MAX_INDEXED_FILE_SIZE:
+            return _UNINDEXED, set()
+        data = data.lower()
+        return flags, {data[i : i + 3] for i in range(len(data) - 2)}
+
+    def _add(self, path: str, st: os.stat_result) -> None:
+        try:
+            flags, trigrams = self._read(path, st)
+        except OSError:
+            flags, trigrams = _UNINDEXED, set()
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            flags |= _RACY
+        file_id = self.next_id
+        self.next_id += 1
+        postings = self.postings
+        for trigram in trigrams:
+            ids = postings.get(trigram)
+            if ids is None:
+                ids = postings[trigram] = array.array("I")
+            ids.append(file_id)
+        self.files[path] = [file_id, st.st_mtime_ns, st.st_size, flags]
+
+    def refresh(self, paths: List[str]) -> int:
+        """
+        Bring the entries for the given files up to date.
+
+        Args:
+            paths: Files about to be searched, relative to the root
+
+        Returns:
+            int: Number of files (re)indexed or dropped
+        """
+        changed = 0
+        listed = set(paths)
+        for path in paths:
+            try:
+                st = os.stat(os.path.join(self.root, path))
+            except OSError:
+                st = None
+            entry = self.files.get(path)
+            if (
+                entry is not None
+                and st is not None
+                and entry[1] == st.st_mtime_ns
+                and entry[2] == st.st_size
+                and not entry[3] & _RACY
+            ):
+                continue
+            if entry is not None:
+                del self.files[path]
+                self.dead += 1
+            if st is not None:
+                self._add(path, st)
+            changed += 1
+
+        if changed:
+            # Entries outside this listing may belong to other filters; only
+            # drop the ones whose files are gone
+            for path in [p for p in self.files if p not in listed]:
+                if not os.path.lexists(os.path.join(self.root, path)):
+                    del self.files[path]
+                    self.dead += 1
+            if self.dead > len(self.files):
+                self._compact()
+        return changed
+
+    def _compact(self) -> None:
+        """Drop ids of replaced and deleted files from the posting lists."""
+        live = {entry[0] for entry in self.files.values()}
+        postings = {}
+        for trigram, ids in self.postings.items():
+            kept = array.array("I", (i for i in ids if i in live))
+            if kept:
+                postings[trigram] = kept
+        self.postings = postings
+        self.dead = 0
+
+    def _evaluate(self, query: Query) -> Optional[Set[int]]:
+        """Return the ids of files satisfying a query, or None for all files."""
+        if query is None:
+            return None
+        kind, value = query
+        if kind == "tri":
+            return set(self.postings.get(value, ()))
+        if kind == "or":
+            result: Set[int] = set()
+            for sub in value:
+                result |= self._evaluate(sub)
+            return result
+
+        # Intersect starting from the rarest trigrams
+        trigrams = sorted(
+            (sub[1] for sub in value if sub[0] == "tri"),
+            key=lambda trigram: len(self.postings.get(trigram, ())),
+        )
+        result: Optional[Set[int]] = None
+        for trigram in trigrams:
+            ids = self.postings.get(trigram, ())
+            if result is None:
+                result = set(ids)
+            else:
+                result.intersection_update(ids)
+            if not result:
+                return result
+        for sub in value:
+            if sub[0] == "tri":
+                continue
+            ids = self._evaluate(sub)
+            result = ids if result is None else result & ids
+            if not result:
+                return result
+        return result
+
+    def candidates(self, paths: List[str], query: Query) -> Optional[List[str]]:
+        """
+        Select the files that may contain a match.
+
+        Args:
+            paths: Files rg would search, already refreshed
+            query: Trigram query for the pattern
+
+        Returns:
+            Optional[List[str]]: Candidate files in `paths` order, or None if
+                rg has to search the files itself
+        """
+        ids = self._evaluate(query)
+        if ids is None:
+            return None
+        result = []
+        for path in paths:
+            entry = self.files.get(path)
+            if entry is None:
+                continue
+            file_id, _, _, flags = entry
+            if file_id in ids or flags & (_UNINDEXED | _TRANSCODED):
+                # rg reports binary files differently when they are named
+                # explicitly, and unindexed files may be binary
+                if flags & (_BINARY | _UNINDEXED):
+                    return None
+                result.append(path)
+        return result
+
+
+_indexes: Dict[str, CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _uint32_bytes(ids: array.array) -> bytes:
+    """Return ids as little-endian uint32 values."""
+    if sys.byteorder != "little":
+        ids = array.array("I", ids)
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def _decode_index(
+    data: bytes,
+) -> Optional[Tuple[Dict[str, list], Dict[bytes, array.array], int, int]]:
+    """
+    Parse a persisted index, checking every field.
+
+    Returns:
+        The files, postings, next id and dead count, or None if the data was
+        written by another format version
+
+    Raises:
+        ValueError: If the data is malformed
+        struct.error: If the data is truncated
+    """
+    magic, version, next_id, dead, table_size = _HEADER.unpack_from(data, 0)
+    if magic != _INDEX_MAGIC:
+        raise ValueError("not a code index")
+    if version != INDEX_FORMAT_VERSION:
+        return None
+    offset = _HEADER.size
+    if offset + table_size > len(data):
+        raise ValueError("truncated file table")
+    files = json.loads(data[offset : offset + table_size].decode("utf-8"))
+    offset += table_size
+    if not isinstance(files, dict):
+        raise ValueError("file table is not an object")
+    for path, entry in files.items():
+        if not (
+            isinstance(entry, list)
+            and len(entry) == 4
+            and all(type(value) is int and value >= 0 for value in entry)
+            and entry[0] < next_id
+        ):
+            raise ValueError(f"bad entry for {path!r}")
+
+    postings: Dict[bytes, array.array] = {}
+    view = memoryview(data)
+    while offset < len(data):
+        trigram, count = _POSTING_HEADER.unpack_from(data, offset)
+        offset += _POSTING_HEADER.size
+        end = offset + 4 * count
+        if end > len(data) or trigram in postings:
+            raise ValueError("bad posting list")
+        ids = array.array("I")
+        ids.frombytes(view[offset:end])
+        if sys.byteorder != "little":
+            ids.byteswap()
+        if ids and max(ids) >= next_id:
+            raise ValueError("posting refers to an unknown file")
+        postings[trigram] = ids
+        offset = end
+    return files, postings, next_id, dead
+
+
+def is_code_index_enabled() -> bool:
+    """Check whether the trigram index is turned on in the configuration."""
+    from ra_aid.database.repositories.config_repository import get_config_repository
+
+    try:
+        return bool(get_config_repository().get("code_index_enabled", False))
+    except RuntimeError:
+        return False
+
+
+def get_code_index(root: str) -> CodeIndex:
+    """Get the index for a directory, loading it from disk on first use."""
+    root = os.path.realpath(root)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = CodeIndex(root)
+            index.load()
+        return index
+
+
+def reset_code_indexes() -> None:
+    """Drop all in-memory indexes."""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def _list_search_files(
+    root: str, filter_args: List[str], include_paths: Optional[List[str]]
+) -> Optional[List[str]]:
+    """List the files rg would search with the given filter options."""
+    result = subprocess.run(
+        ["rg", "--files", "--null", *filter_args, "--", *(include_paths or [])],
+        cwd=root,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    output = result.stdout.decode("utf-8", "surrogateescape")
+    return [path for path in output.split("\0") if path]
+
+
+def narrow_search_command(
+    search_args: List[str],
+    filter_args: List[str],
+    pattern: str,
+    include_paths: Optional[List[str]] = None,
+    fixed_string: bool = False,
+    case_sensitive: bool = True,
+) -> Optional[List[str]]:
+    """
+    Build an rg command limited to the files that may match, when the index is enabled.
+
+    The narrowed command prints exactly what
+    ``search_args + [pattern] + include_paths`` would.
+
+    Args:
+        search_args: rg executable and options, without pattern and paths
+        filter_args: The subset of options that select which files are searched
+        pattern: Search pattern
+        include_paths: Paths the search is limited to, if any
+        fixed_string: Whether the pattern is a literal string
+        case_sensitive: Whether the search is case-sensitive
+
+    Returns:
+        Optional[List[str]]: The narrowed command, or None to run the full search
+    """
+    if not is_code_index_enabled() or pattern.startswith("-"):
+        return None
+    for path in include_paths or []:
+        if os.path.isabs(path) or os.path.normpath(path).split(os.sep)[0] == os.pardir:
+            return None
+
+    # A config file may turn on smart case, so only trust explicit case sensitivity
+    ignore_case = not case_sensitive or bool(os.environ.get("RIPGREP_CONFIG_PATH"))
+    query = pattern_query(pattern, fixed_string, ignore_case)
+    if query is None:
+        return None
+
+    root = os.getcwd()
+    try:
+        paths = _list_search_files(root, filter_args, include_paths)
+        if not paths:
+            # Let rg report that nothing was searched
+            return None
+        index = get_code_index(root)
+        with index.lock:
+            if index.refresh(paths):
+                index.save()
+            candidates = index.candidates(paths, query)
+    except OSError as e:
+        logger.debug(f"Code index unavailable: {e}")
+        return None
+    if candidates is None:
+        return None
+
+    # rg omits file names when searching a single file named on the command line
+    single_file = (
+        include_paths is not None
+        and len(include_paths) == 1
+        and not os.path.isdir(os.path.join(root, include_paths[0]))
+    )
+    command = list(search_args)
+    if not single_file:
+        command.append("--with-filename")
+    # With no candidates, still let rg validate the pattern
+    command += [pattern, "--", *(candidates or [os.devnull])]
+    if sum(len(arg) + 1 for arg in command) > MAX_COMMAND_BYTES:
+        return None
+    logger.debug(f"Code index narrowed search to {len(candidates)} of {len(paths)} files")
+    return command
@@ -0,0 +1,274 @@
+"""
+Learned timeouts for shell commands, from how long they took before.
+
+Every run_shell_command execution is recorded in the trajectory table along
+with how long it ran and its longest stretch without output. Runs are grouped
+by command signature: the command with file paths, numbers and free-form
+arguments replaced by placeholders, so `pytest tests/test_a.py -x` and
+`pytest tests/test_b.py -x` count as the same command. Each group is keyed by
+that signature and the directory it ran in.
+
+- Once a group has enough runs, the hard deadline is never set below its
+  95th-percentile duration, so a test suite the model guesses will take 30
+  seconds is not killed when it reliably takes 90.
+- Once the exact command has enough runs in that directory, a run that prints
+  nothing for HANG_GAP_MULTIPLIER times its typical longest silence is stopped
+  as hung, instead of waiting out a generous guess. Silences are not shared
+  across a signature: `pytest tests/test_fast.py` being quiet says nothing
+  about how long `pytest tests/` may go without output.
+"""
+
+import math
+import os
+import re
+import shlex
+import threading
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ra_aid.logging_config import get_logger
+from ra_aid.proc.interactive import CommandRun
+
+logger = get_logger(__name__)
+
+# Runs needed before a command's history is trusted
+MIN_SAMPLES = 3
+
+# Most recent runs kept per command signature and directory
+MAX_SAMPLES = 50
+
+# Past executions loaded from the trajectory table
+LOAD_LIMIT = 5000
+
+# A run is hung after this many times the usual longest silence without output
+HANG_GAP_MULTIPLIER = 10
+
+# Never consider a command hung sooner than this
+MIN_IDLE_TIMEOUT_SECONDS = 30.0
+
+# run_interactive_command accepts expected runtimes up to this
+MAX_EXPECTED_RUNTIME_SECONDS = 1800
+
+_PATH = re.compile(r"[./~]|.*/|.*\.[A-Za-z0-9]{1,8}$")
+_NUMBER = re.compile(r"[+-]?\d+(\.\d+)?[a-z]*")
+_WORD = re.compile(r"[A-Za-z][\w:.-]*")
+_ENV_ASSIGNMENT = re.compile(r"[A-Za-z_]\w*=")
+_OPERATORS = {"&&", "||", ";", "|", "&", "(", ")", ";;", "|&"}
+
+# Positional words kept per command, e.g. "git commit" or "npm run test"
+_MAX_WORDS = 2
+
+
+def _normalize_token(token: str) -> str:
+    if token.startswith("-"):
+        return token.split("=", 1)[0] + ("=<arg>" if "=" in token else "")
+    if _NUMBER.fullmatch(token):
+        return "<n>"
+    if _PATH.match(token):
+        return "<path>"
+    return token
+
+
+def command_signature(command: str) -> str:
+    """
+    Return a command with its variable parts replaced by placeholders.
+
+    Program names, subcommands and flags are kept; paths, numbers and further
+    arguments become <path>, <n> and <arg>, and runs of the same placeholder
+    collapse to one.
+
+    Example:
+        >>> command_signature("cd src && python -m pytest tests/test_a.py tests/test_b.py -k fast")
+        'cd src && python -m pytest <path> -k fast'
+    """
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        tokens = list(lexer)
+    except ValueError:
+        # Unbalanced quotes
+        tokens = command.split()
+
+    parts: List[str] = []
+    at_start = True
+    words = 0
+    for token in tokens:
+        if token in _OPERATORS:
+            parts.append(token)
+            at_start = True
+            continue
+        if at_start:
+            if _ENV_ASSIGNMENT.match(token):
+                continue
+            parts.append(os.path.basename(token) or token)
+            at_start = False
+            words = 0
+            continue
+        normalized = _normalize_token(token)
+        if normalized == token and not token.startswith("-"):
+            if words < _MAX_WORDS and _WORD.fullmatch(token):
+                words += 1
+            else:
+                normalized = "<arg>"
+        if normalized.startswith("<") and parts and parts[-1] == normalized:
+            continue
+        parts.append(normalized)
+    return " ".join(parts)
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Return the nearest-rank percentile of values, which must not be empty."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass(frozen=True)
+class CommandSample:
+    command: str
+    duration_seconds: float
+    max_output_gap_seconds: float
+    timed_out: bool = False
+    hung: bool = False
+
+
+@dataclass(frozen=True)
+class CommandTimeout:
+    """Limits to run a command with, and the history they were derived from."""
+
+    expected_runtime_seconds: int
+    idle_timeout_seconds: Optional[float] = None
+    samples: int = 0
+    p95_seconds: Optional[float] = None
+
+    @property
+    def learned(self) -> bool:
+        return self.samples >= MIN_SAMPLES
+
+
+class CommandDurations:
+    """Durations of past command runs, grouped by command signature and directory."""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._samples: Dict[Tuple[str, str], Deque[CommandSample]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, command: str, cwd: str, run: CommandRun) -> None:
+        """Record a finished run of a command."""
+        sample = CommandSample(
+            command.strip(),
+            run.duration_seconds, run.max_output_gap_seconds, run.timed_out, run.hung
+        )
+        key = (command_signature(command), cwd)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.max_samples)
+            samples.append(sample)
+
+    def timeout_for(self, command: str, cwd: str, requested_seconds: int) -> CommandTimeout:
+        """
+        Return the limits to run a command with, given the runtime the caller expects.
+
+        Without enough history the requested runtime is used as is. Runs stopped as
+        hung are left out, since their duration says nothing about the command;
+        runs that timed out are kept, so repeated timeouts raise the deadline. An
+        idle timeout is only set from runs of this exact command.
+        """
+        with self._lock:
+            samples = [s for s in self._samples.get((command_signature(command), cwd), ()) if not s.hung]
+        if len(samples) < MIN_SAMPLES:
+            return CommandTimeout(requested_seconds, samples=len(samples))
+
+        p95 = percentile((s.duration_seconds for s in samples), 95)
+        expected = min(MAX_EXPECTED_RUNTIME_SECONDS, max(requested_seconds, math.ceil(p95)))
+        exact = [s for s in samples if s.command == command.strip()]
+        idle = None
+        if len(exact) >= MIN_SAMPLES:
+            typical_gap = percentile((s.max_output_gap_seconds for s in exact), 95)
+            idle = max(MIN_IDLE_TIMEOUT_SECONDS, HANG_GAP_MULTIPLIER * typical_gap)
+        return CommandTimeout(expected, idle, len(samples), p95)
+
+    def slowest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return duration statistics for the commands with the highest p95 durations."""
+        with self._lock:
+            groups = [(key, list(samples)) for key, samples in self._samples.items()]
+        rows = []
+        for (signature, cwd), samples in groups:
+            durations = [s.duration_seconds for s in samples]
+            rows.append(
+                {
+                    "command": signature,
+                    "cwd": cwd,
+                    "runs": len(samples),
+                    "p50_seconds": round(percentile(durations, 50), 2),
+                    "p95_seconds": round(percentile(durations, 95), 2),
+                    "max_seconds": round(max(durations), 2),
+                    "timeouts": sum(1 for s in samples if s.timed_out),
+                    "hangs": sum(1 for s in samples if s.hung),
+                }
+            )
+        rows.sort(key=lambda row: row["p95_seconds"], reverse=True)
+        return rows[:limit]
+
+    @classmethod
+    def from_trajectories(cls, trajectories: Iterable[Any], max_samples: int = MAX_SAMPLES) -> "CommandDurations":
+        """
+        Build from run_shell_command trajectory records, oldest first.
+
+        Records without a command or a recorded duration are skipped.
+        """
+        durations = cls(max_samples)
+        for trajectory in trajectories:
+            parameters = trajectory.tool_parameters or {}
+            result = trajectory.tool_result
+            command = parameters.get("command")
+            if not command or not isinstance(result, dict) or "duration_seconds" not in result:
+                continue
+            durations.add(
+                command,
+                result.get("cwd", ""),
+                CommandRun(
+                    duration_seconds=result["duration_seconds"],
+                    max_output_gap_seconds=result.get("max_output_gap_seconds", 0.0),
+                    timed_out=result.get("timed_out", False),
+                    hung=result.get("hung", False),
+                ),
+            )
+        return durations
+
+
+# Durations loaded per trajectory repository, i.e. per project database
+_loaded: "weakref.WeakKeyDictionary[Any, CommandDurations]" = weakref.WeakKeyDictionary()
+_loaded_lock = threading.Lock()
+
+
+def get_command_durations() -> CommandDurations:
+    """
+    Return the command durations for the current project.
+
+    History is loaded from the trajectory repository on first use and kept up to
+    date by the caller adding each new run. Without a repository (outside a
+    session) an empty, unshared instance is returned.
+    """
+    try:
+        from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
+
+        repo = get_trajectory_repository()
+    except (ImportError, RuntimeError):
+        return CommandDurations()
+
+    with _loaded_lock:
+        durations = _loaded.get(repo)
+        if durations is None:
+            try:
+                records = repo.get_tool_executions("run_shell_command", limit=LOAD_LIMIT)
+                durations = CommandDurations.from_trajectories(reversed(records))
+            except Exception as e:
+                logger.debug(f"Could not load command durations: {e}")
+                durations = CommandDurations()
+            _loaded[repo] = durations
+        return durations
@@ -469,6 +469,38 @@ class TrajectoryRepository:
             )
             raise
 
+    def get_tool_executions(
+        self, tool_name: str, limit: Optional[int] = None
+    ) -> List[TrajectoryModel]:
+        """
+        Retrieve the most recent executions of a tool that recorded a result.
+
+        Args:
+            tool_name: Name of the tool to get executions for
+            limit: Optional maximum number of records to return
+
+        Returns:
+            List[TrajectoryModel]: Trajectory Pydantic models, newest first
+
+        Raises:
+            peewee.DatabaseError: If there's an error accessing the database
+        """
+        try:
+            query = (
+                Trajectory.select()
+                .where(
+                    (Trajectory.tool_name == tool_name)
+                    & (Trajectory.tool_result.is_null(False))
+                )
+                .order_by(Trajectory.id.desc())
+            )
+            if limit is not None:
+                query = query.limit(limit)
+            return [self._to_model(trajectory) for trajectory in query]
+        except peewee.DatabaseError as e:
+            logger.error(f"Failed to fetch executions of tool {tool_name}: {str(e)}")
+            raise
+
     def get_parsed_trajectory(self, trajectory_id: int) -> Optional[TrajectoryModel]:
         """
         Get a trajectory record with JSON fields parsed into dictionaries.
@@ -0,0 +1,279 @@
+"""Process-wide cache of file contents shared by the file-reading tools.
+
+The same files are read over and over by different code paths: read_file_tool,
+the expert's related-file context, file_str_replace and binary detection. This
+module keeps recently read files in memory, keyed on their device and inode
+(so every path to a file shares one entry) and validated against st_mtime_ns
+and st_size on every access, so a file is only read from disk again once it
+changed. Looking an entry up costs a single stat call. Alongside the raw bytes an entry keeps
+the decoded text, line count and binary classification derived from them.
+The cache is bounded by the total size of what it holds.
+"""
+
+import codecs
+import locale
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Total size of cached contents before the least recently used files are evicted
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Files larger than this are read from disk every time
+MAX_CACHED_FILE_BYTES = 4 * 1024 * 1024
+
+# Files tracked at once, including those with only a binary verdict cached
+MAX_CACHED_FILES = 4096
+
+FileKey = Tuple[int, int]
+Signature = Tuple[int, int]
+
+
+@dataclass
+class FileCacheStats:
+    """Counters describing how the file content cache has been serving reads.
+
+    Attributes:
+        hits: Reads answered from memory
+        misses: Reads that went to disk
+        evictions: Entries dropped to stay within the size limit
+        invalidations: Entries dropped because the file changed or was written
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of reads answered from memory."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Return the counters as a plain dictionary, including the hit rate."""
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+@dataclass
+class CachedFile:
+    """What is known about one version of a file.
+
+    Attributes:
+        signature: (st_mtime_ns, st_size) of the version described
+        data: Raw contents, if the file was read and is small enough to keep
+        texts: Contents decoded per encoding, with universal newlines applied
+        line_counts: Line count of the decoded text per encoding
+        is_binary: Binary classification, once computed
+    """
+
+    signature: Signature
+    data: Optional[bytes] = None
+    texts: Dict[str, str] = field(default_factory=dict)
+    line_counts: Dict[str, int] = field(default_factory=dict)
+    is_binary: Optional[bool] = None
+
+    @property
+    def size(self) -> int:
+        """Approximate memory held by the entry."""
+        return len(self.data or b"") + sum(len(text) for text in self.texts.values())
+
+
+def _stat(path: str) -> Tuple[FileKey, Signature]:
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino), (st.st_mtime_ns, st.st_size)
+
+
+def _encoding_name(encoding: Optional[str]) -> str:
+    return codecs.lookup(encoding or locale.getpreferredencoding(False)).name
+
+
+def count_text_lines(text: str) -> int:
+    """Count lines the way iterating over a text file does."""
+    if not text:
+        return 0
+    return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+
+class FileContentCache:
+    """LRU cache of file contents, bounded by total bytes."""
+
+    def __init__(
+        self,
+        max_bytes: int = MAX_CACHE_BYTES,
+        max_file_bytes: int = MAX_CACHED_FILE_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.stats = FileCacheStats()
+        self._entries: "OrderedDict[FileKey, CachedFile]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @property
+    def total_bytes(self) -> int:
+        """Memory currently held by cached entries."""
+        return self._size
+
+    def _entry(self, path: str) -> Tuple[FileKey, CachedFile]:
+        """Get the entry for the file's current version, replacing a stale one."""
+        key, signature = _stat(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature != signature:
+                self._drop(key)
+                self.stats.invalidations += 1
+                entry = None
+            if entry is None:
+                entry = self._entries[key] = CachedFile(signature)
+            self._entries.move_to_end(key)
+            while len(self._entries) > MAX_CACHED_FILES:
+                self._drop(next(iter(self._entries)))
+                self.stats.evictions += 1
+            return key, entry
+
+    def _drop(self, key: FileKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def _grow(self, key: FileKey, entry: CachedFile, update: Callable[[], None]) -> None:
+        """Apply a change to an entry, keeping the size accounting and limit."""
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                # The file changed while it was being read
+                update()
+                return
+            before = entry.size
+            update()
+            self._size += entry.size - before
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                if oldest == key:
+                    self._entries.move_to_end(oldest)
+                    oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+
+    def read_bytes(self, path: str) -> bytes:
+        """Read a file's raw contents."""
+        key, entry = self._entry(path)
+        if entry.data is not None:
+            with self._lock:
+                self.stats.hits += 1
+            return entry.data
+
+        with self._lock:
+            self.stats.misses += 1
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) <= self.max_file_bytes and len(data) == entry.signature[1]:
+
+            def store():
+                entry.data = data
+
+            self._grow(key, entry, store)
+        return data
+
+    def read_text(self, path: str, encoding: Optional[str] = None) -> str:
+        """
+        Read a file as text, as open(path, encoding=encoding).read() would.
+
+        Args:
+            path: File to read
+            encoding: Text encoding; the locale's preferred encoding if None
+        """
+        name = _encoding_name(encoding)
+        key, entry = self._entry(path)
+        text = entry.texts.get(name)
+        if text is not None:
+            with self._lock:
+                self.stats.hits += 1
+            return text
+
+        data = self.read_bytes(path)
+        text = codecs.decode(data, name).replace("\r\n", "\n").replace("\r", "\n")
+        if entry.data is not None:
+
+            def store():
+                entry.texts[name] = text
+                entry.line_counts[name] = count_text_lines(text)
+
+            self._grow(key, entry, store)
+        return text
+
+    def line_count(self, path: str, encoding: Optional[str] = None) -> int:
+        """Number of lines in a file's decoded text."""
+        name = _encoding_name(encoding)
+        _, entry = self._entry(path)
+        count = entry.line_counts.get(name)
+        if count is not None:
+            return count
+        return count_text_lines(self.read_text(path, encoding))
+
+    def is_binary(self, path: str, classify: Callable[[str, Optional[bytes]], bool]) -> bool:
+        """
+        Get a file's binary classification, computing it with `classify` once per version.
+
+        Args:
+            path: File to classify
+            classify: Classifier run when no verdict is cached for this version; it
+                receives the path and the cached contents, if any
+        """
+        _, entry = self._entry(path)
+        if entry.is_binary is not None:
+            with self._lock:
+                self.stats.hits += 1
+            return entry.is_binary
+        with self._lock:
+            self.stats.misses += 1
+        verdict = classify(path, entry.data)
+        entry.is_binary = verdict
+        return verdict
+
+    def invalidate(self, path: str) -> None:
+        """Forget a file, e.g. after writing it."""
+        try:
+            key, _ = _stat(path)
+        except OSError:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        """Forget all files and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.stats = FileCacheStats()
+
+
+_cache = FileContentCache()
+
+
+def get_file_cache() -> FileContentCache:
+    """Get the process-wide file content cache."""
+    return _cache
+
+
+def get_file_cache_stats() -> Dict[str, float]:
+    """Report counters as produced by FileCacheStats.to_dict(), plus the bytes held."""
+    stats = _cache.stats.to_dict()
+    stats["total_bytes"] = _cache.total_bytes
+    return stats
+
+
+def reset_file_cache() -> None:
+    """Drop all cached file contents."""
+    _cache.clear()
@@ -0,0 +1,245 @@
+"""Atomic, batched string replacement in files.
+
+An edit replaces an exact string in a file, either where it occurs exactly once
+or, with replace_all, everywhere. apply_str_edits() applies a whole batch of
+edits with one read and one write: every edit is located in the file's original
+contents (served from the shared file cache, or mapped for large files), the
+matches are merged into a single pass over the contents, and the result is
+streamed to a temporary file in the same directory that then replaces the
+original with os.replace(), keeping its permissions. Readers never see a
+half-written file, and a batch with any failing edit leaves the file untouched.
+"""
+
+import mmap
+import os
+import stat
+import tempfile
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from ra_aid.file_cache import get_file_cache
+from ra_aid.line_index import Buffer
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Largest piece of unchanged contents written at once
+WRITE_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class StrEdit:
+    """One exact-string replacement.
+
+    Attributes:
+        old_str: Exact string to replace
+        new_str: String to replace it with
+        replace_all: Replace every occurrence instead of requiring exactly one
+    """
+
+    old_str: str
+    new_str: str
+    replace_all: bool = False
+
+
+@dataclass
+class StrEditResult:
+    """How one edit of a batch matched the file.
+
+    Attributes:
+        edit: The edit
+        count: Occurrences of old_str in the file
+        conflict: Index of an earlier edit in the batch whose matches overlap this one's
+    """
+
+    edit: StrEdit
+    count: int
+    conflict: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the edit can be applied."""
+        if self.conflict is not None or self.count == 0:
+            return False
+        return self.count == 1 or self.edit.replace_all
+
+
+@dataclass
+class StrEditBatch:
+    """Outcome of apply_str_edits().
+
+    Attributes:
+        path: File that was edited
+        results: Per-edit match counts, in the order the edits were given
+        applied: Whether the file was rewritten; False if any edit failed
+        bytes_written: Size of the rewritten file
+    """
+
+    path: str
+    results: List[StrEditResult] = field(default_factory=list)
+    applied: bool = False
+    bytes_written: int = 0
+
+    @property
+    def failures(self) -> List[Tuple[int, StrEditResult]]:
+        """Edits that prevented the batch from being applied, with their indexes."""
+        return [(i, result) for i, result in enumerate(self.results) if not result.ok]
+
+
+def _line_ending(buffer: Buffer) -> bytes:
+    """The line ending used by a file, judged by its first line."""
+    newline = buffer.find(b"\n")
+    if newline > 0 and buffer[newline - 1 : newline] == b"\r":
+        return b"\r\n"
+    return b"\n"
+
+
+def _find_all(buffer: Buffer, needle: bytes) -> List[int]:
+    """Offsets of the non-overlapping occurrences of needle, as str.count() counts them."""
+    offsets = []
+    pos = buffer.find(needle)
+    while pos >= 0:
+        offsets.append(pos)
+        pos = buffer.find(needle, pos + len(needle))
+    return offsets
+
+
+def _encode(text: str, encoding: str, newline: bytes) -> bytes:
+    """Encode an edit string the way the file spells line endings."""
+    data = text.encode(encoding)
+    if newline != b"\n":
+        data = data.replace(b"\r\n", b"\n").replace(b"\n", newline)
+    return data
+
+
+def _locate(
+    buffer: Buffer, edits: Sequence[StrEdit], encoding: str
+) -> Tuple[List[StrEditResult], List[Tuple[int, int, bytes]]]:
+    """Match every edit against the original contents.
+
+    Returns:
+        The per-edit results and the (start, end, replacement) spans to write,
+        sorted by position
+    """
+    newline = _line_ending(buffer)
+    results = []
+    spans = []
+    owners = []
+    for index, edit in enumerate(edits):
+        old = _encode(edit.old_str, encoding, newline)
+        offsets = _find_all(buffer, old) if old else []
+        result = StrEditResult(edit, len(offsets))
+        results.append(result)
+        if result.ok:
+            new = _encode(edit.new_str, encoding, newline)
+            spans.extend((offset, offset + len(old), new) for offset in offsets)
+            owners.extend([index] * len(offsets))
+
+    order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+    reach = None  # Span ending furthest right so far
+    for current in order:
+        if reach is not None and spans[current][0] < spans[reach][1]:
+            first, second = sorted((owners[reach], owners[current]))
+            if results[second].conflict is None:
+                results[second].conflict = first
+        if reach is None or spans[current][1] > spans[reach][1]:
+            reach = current
+    return results, [spans[i] for i in order]
+
+
+def _chunks(buffer: Buffer, spans: List[Tuple[int, int, bytes]]) -> Iterator[bytes]:
+    """The edited contents, produced in one pass over the original."""
+
+    def unchanged(begin: int, end: int) -> Iterator[bytes]:
+        for pos in range(begin, end, WRITE_CHUNK_BYTES):
+            yield buffer[pos : min(pos + WRITE_CHUNK_BYTES, end)]
+
+    pos = 0
+    for start, end, replacement in spans:
+        yield from unchanged(pos, start)
+        yield replacement
+        pos = end
+    yield from unchanged(pos, len(buffer))
+
+
+def write_atomic(path: str, chunks: Iterator[bytes], st: os.stat_result) -> int:
+    """
+    Stream contents to a sibling temporary file and move it over path.
+
+    Args:
+        path: File to replace
+        chunks: New contents
+        st: Stat of the file being replaced, whose mode and owner are kept
+
+    Returns:
+        int: Number of bytes written
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    try:
+        written = 0
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        try:
+            os.chown(tmp_path, st.st_uid, st.st_gid)
+        except OSError:
+            # Only privileged users can hand files to other owners
+            pass
+        # Drop the cached contents of the version being replaced
+        get_file_cache().invalidate(path)
+        os.replace(tmp_path, path)
+        return written
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _apply(path: str, buffer: Buffer, edits: Sequence[StrEdit], encoding: str, st) -> StrEditBatch:
+    batch = StrEditBatch(path)
+    batch.results, spans = _locate(buffer, edits, encoding)
+    if batch.failures:
+        return batch
+    batch.bytes_written = write_atomic(path, _chunks(buffer, spans), st)
+    batch.applied = True
+    return batch
+
+
+def apply_str_edits(
+    path: str, edits: Sequence[StrEdit], encoding: str = "utf-8"
+) -> StrEditBatch:
+    """
+    Apply a batch of exact-string replacements to a file, atomically.
+
+    Every edit is matched against the file as it was before the batch, so the
+    edits must not overlap one another. Line endings in old_str and new_str are
+    written the way the file spells them.
+
+    Args:
+        path: File to edit; symlinks are followed
+        edits: Replacements to make
+        encoding: Text encoding of the file
+
+    Returns:
+        StrEditBatch: Match counts per edit, and whether the file was rewritten
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        PermissionError: If the file is not writable
+    """
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    if not os.access(real_path, os.W_OK):
+        raise PermissionError(f"Permission denied: {path}")
+
+    cache = get_file_cache()
+    if st.st_size <= cache.max_file_bytes:
+        # Small files are served from the shared content cache
+        return _apply(real_path, cache.read_bytes(real_path), edits, encoding, st)
+    with open(real_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _apply(real_path, mm, edits, encoding, st)
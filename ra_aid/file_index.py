@@ -0,0 +1,465 @@
+"""Persistent, incrementally refreshed index of the files in a git project.
+
+Listing a large repository means running ``git ls-files`` for tracked and
+untracked files and then filtering and sorting the combined output. The index
+in this module keeps the tracked portion keyed on the git index file and HEAD,
+so it is only rebuilt when either changes, and persists it under ``.ra-aid/``
+so a new process can reuse it. Untracked files are re-listed on every call, but
+the filtered result is only recomputed when that set actually changed.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ra_aid.file_listing import (
+    FILE_INDEX_PATH,
+    DirectoryAccessError,
+    GitCommandError,
+    get_file_listing_backend,
+)
+from ra_aid.git_index import GitIndexError, list_tracked_files, locate_repository
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_DIRNAME, INDEX_FILENAME = os.path.split(FILE_INDEX_PATH)
+INDEX_FORMAT_VERSION = 1
+
+# Number of (include_hidden, exclude_patterns) combinations kept per index
+MAX_DERIVED_LISTINGS = 16
+
+FilterFunc = Callable[[Iterable[str], bool, Optional[List[str]]], List[str]]
+
+
+@dataclass
+class FileIndexStats:
+    """Counters describing how a file index has been serving requests.
+
+    Attributes:
+        hits: Listings returned from memory without any re-filtering
+        misses: Listings that had to be (partially) recomputed
+        disk_loads: Tracked file lists restored from the on-disk index
+        rebuilds: Tracked file lists rebuilt from git or the git index file
+        untracked_refreshes: Times the untracked file set was found to change
+        last_rebuild_seconds: Duration of the most recent tracked rebuild
+        total_rebuild_seconds: Accumulated duration of all tracked rebuilds
+    """
+
+    hits: int = 0
+    misses: int = 0
+    disk_loads: int = 0
+    rebuilds: int = 0
+    untracked_refreshes: int = 0
+    last_rebuild_seconds: float = 0.0
+    total_rebuild_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of listings served straight from memory."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Return the counters as a plain dictionary, including the hit rate."""
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+def find_git_dir(directory: str) -> Optional[str]:
+    """
+    Locate the git directory for a path without spawning git.
+
+    Args:
+        directory: Path inside the working tree
+
+    Returns:
+        Optional[str]: Absolute path of the git directory, or None if not found
+    """
+    location = locate_repository(directory)
+    return location[1] if location else None
+
+
+def _common_git_dir(git_dir: str) -> str:
+    """Return the directory holding shared refs (differs from git_dir in worktrees)."""
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            return os.path.realpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def read_head(git_dir: str) -> str:
+    """
+    Resolve HEAD to a stable identifier by reading git's files directly.
+
+    Args:
+        git_dir: Path of the git directory
+
+    Returns:
+        str: "<ref> <sha>" for a symbolic HEAD (sha empty when unborn), or the
+            detached commit sha
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return ""
+
+    if not head.startswith("ref:"):
+        return head
+
+    ref = head[len("ref:") :].strip()
+    for base in (git_dir, _common_git_dir(git_dir)):
+        try:
+            with open(os.path.join(base, ref), "r", encoding="utf-8") as f:
+                return f"{ref} {f.read().strip()}"
+        except OSError:
+            continue
+
+    try:
+        with open(
+            os.path.join(_common_git_dir(git_dir), "packed-refs"), "r", encoding="utf-8"
+        ) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return f"{ref} {parts[0]}"
+    except OSError:
+        pass
+
+    return f"{ref} "
+
+
+def _merge_unique(first: List[str], second: List[str]) -> Iterator[str]:
+    """Merge two sorted, de-duplicated lists into one sorted unique stream."""
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] < second[j]:
+            yield first[i]
+            i += 1
+        elif second[j] < first[i]:
+            yield second[j]
+            j += 1
+        else:
+            yield first[i]
+            i += 1
+            j += 1
+    yield from first[i:]
+    yield from second[j:]
+
+
+class FileIndex:
+    """Cached listing of the files of one directory inside a git repository.
+
+    The tracked portion is keyed on the stat of ``.git/index`` and HEAD; the
+    untracked portion on a digest of ``git ls-files --others`` output. Filtered
+    listings are memoized per filter parameters and only the portion whose key
+    changed is filtered again.
+    """
+
+    def __init__(self, directory: str, git_dir: str):
+        """
+        Initialize the index.
+
+        Args:
+            directory: Directory whose files are listed (real path)
+            git_dir: Git directory of the repository containing it
+        """
+        self.directory = directory
+        self.git_dir = git_dir
+        self.stats = FileIndexStats()
+        self._lock = threading.Lock()
+        self._tracked_key: Optional[list] = None
+        self._tracked: List[str] = []
+        self._untracked_digest: Optional[bytes] = None
+        self._untracked: List[str] = []
+        self._derived: Dict[Tuple[bool, Tuple[str, ...]], Dict[str, tuple]] = {}
+
+    @property
+    def persist_path(self) -> Optional[str]:
+        """Location of the on-disk index, or None if persistence is unavailable.
+
+        The index is only persisted when the directory already has a ``.ra-aid``
+        folder, so listing an arbitrary repository never leaves files behind.
+        """
+        ra_aid_dir = os.path.join(self.directory, INDEX_DIRNAME)
+        if not os.path.isdir(ra_aid_dir):
+            return None
+        return os.path.join(ra_aid_dir, INDEX_FILENAME)
+
+    def _current_tracked_key(self) -> list:
+        """Build the key identifying the current tracked file set."""
+        try:
+            index_stat = os.stat(os.path.join(self.git_dir, "index"))
+            index_key = [index_stat.st_mtime_ns, index_stat.st_size, index_stat.st_ino]
+        except FileNotFoundError:
+            index_key = [0, 0, 0]
+        return index_key + [read_head(self.git_dir)]
+
+    def _run_git(self, args: List[str]) -> bytes:
+        """Run a git command in the indexed directory and return raw stdout."""
+        try:
+            result = subprocess.run(
+                ["git"] + args,
+                cwd=self.directory,
+                capture_output=True,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise GitCommandError(f"Git command failed: {e}")
+        except PermissionError as e:
+            raise DirectoryAccessError(f"Permission denied: {e}")
+        return result.stdout
+
+    @staticmethod
+    def _split(output: bytes) -> List[str]:
+        """Split NUL-delimited git output into paths."""
+        return [p for p in output.decode("utf-8", "surrogateescape").split("\0") if p]
+
+    def _load_from_disk(self, key: list) -> Optional[List[str]]:
+        """Return the persisted tracked list if it was built for ``key``."""
+        path = self.persist_path
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (
+            data.get("version") != INDEX_FORMAT_VERSION
+            or data.get("directory") != self.directory
+            or data.get("key") != key
+        ):
+            return None
+        return data.get("tracked")
+
+    def _save_to_disk(self, key: list, tracked: List[str]) -> None:
+        """Persist the tracked list atomically; failures are only logged."""
+        path = self.persist_path
+        if path is None:
+            return
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_FORMAT_VERSION,
+                        "directory": self.directory,
+                        "key": key,
+                        "tracked": tracked,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Could not persist file index to {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _list_tracked(self) -> List[str]:
+        """List tracked files with the configured backend."""
+        if get_file_listing_backend() == "index":
+            try:
+                tracked = list_tracked_files(self.directory)
+                if tracked is not None:
+                    return tracked
+            except GitIndexError as e:
+                logger.debug(f"Falling back to git ls-files for {self.directory}: {e}")
+        return self._split(self._run_git(["ls-files", "-z"]))
+
+    def _refresh_tracked(self) -> None:
+        """Reload the tracked file list if the git index or HEAD changed."""
+        key = self._current_tracked_key()
+        if key == self._tracked_key:
+            return
+
+        tracked = self._load_from_disk(key)
+        if tracked is not None:
+            self.stats.disk_loads += 1
+        else:
+            start = time.perf_counter()
+            tracked = self._list_tracked()
+            elapsed = time.perf_counter() - start
+            self.stats.rebuilds += 1
+            self.stats.last_rebuild_seconds = elapsed
+            self.stats.total_rebuild_seconds += elapsed
+            logger.debug(
+                f"Rebuilt file index for {self.directory}: "
+                f"{len(tracked)} tracked files in {elapsed:.3f}s"
+            )
+            self._save_to_disk(key, tracked)
+
+        self._tracked_key = key
+        self._tracked = tracked
+
+    def _refresh_untracked(self) -> None:
+        """Re-list untracked files and record whether the set changed."""
+        output = self._run_git(["ls-files", "-z", "--others", "--exclude-standard"])
+        digest = hashlib.blake2b(output, digest_size=16).digest()
+        if digest != self._untracked_digest:
+            if self._untracked_digest is not None:
+                self.stats.untracked_refreshes += 1
+            self._untracked_digest = digest
+            self._untracked = self._split(output)
+
+    def is_warm(self) -> bool:
+        """Whether the tracked listing is in memory and still current."""
+        with self._lock:
+            return self._tracked_key is not None and self._tracked_key == self._current_tracked_key()
+
+    def get_files(
+        self,
+        include_hidden: bool,
+        exclude_patterns: Optional[List[str]],
+        filter_files: FilterFunc,
+    ) -> List[str]:
+        """
+        Return the sorted, filtered listing for this directory.
+
+        Args:
+            include_hidden: Whether to include hidden files
+            exclude_patterns: Optional glob patterns to drop from the result
+            filter_files: Function applying the listing filters to raw paths and
+                returning a sorted unique list
+
+        Returns:
+            List[str]: File paths relative to the directory
+
+        Raises:
+            GitCommandError: If git fails while refreshing the index
+            DirectoryAccessError: If git cannot be run in the directory
+        """
+        with self._lock:
+            self._refresh_tracked()
+            self._refresh_untracked()
+
+            params = (include_hidden, tuple(exclude_patterns or ()))
+            derived = self._derived.get(params)
+            if derived is None:
+                if len(self._derived) >= MAX_DERIVED_LISTINGS:
+                    self._derived.clear()
+                derived = self._derived.setdefault(params, {})
+
+            merged_key = (self._tracked_key, self._untracked_digest)
+            merged = derived.get("merged")
+            if merged is not None and merged[0] == merged_key:
+                self.stats.hits += 1
+                return list(merged[1])
+
+            self.stats.misses += 1
+            tracked = derived.get("tracked")
+            if tracked is None or tracked[0] != self._tracked_key:
+                tracked = (
+                    self._tracked_key,
+                    filter_files(self._tracked, include_hidden, exclude_patterns),
+                )
+                derived["tracked"] = tracked
+            untracked = derived.get("untracked")
+            if untracked is None or untracked[0] != self._untracked_digest:
+                untracked = (
+                    self._untracked_digest,
+                    filter_files(self._untracked, include_hidden, exclude_patterns),
+                )
+                derived["untracked"] = untracked
+
+            files = list(_merge_unique(tracked[1], untracked[1]))
+            derived["merged"] = (merged_key, files)
+            return list(files)
+
+
+_indexes: Dict[str, FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(directory: str) -> Optional[FileIndex]:
+    """
+    Get the shared file index for a directory inside a git repository.
+
+    Args:
+        directory: Directory to index
+
+    Returns:
+        Optional[FileIndex]: The index, or None if the directory is not an
+            existing path inside a git working tree
+    """
+    try:
+        real_dir = os.path.realpath(directory)
+        if not stat.S_ISDIR(os.stat(real_dir).st_mode):
+            return None
+    except OSError:
+        return None
+
+    with _indexes_lock:
+        index = _indexes.get(real_dir)
+        if index is not None:
+            return index
+        git_dir = find_git_dir(real_dir)
+        if git_dir is None:
+            return None
+        index = FileIndex(real_dir, git_dir)
+        _indexes[real_dir] = index
+        return index
+
+
+def get_warm_file_index(directory: str) -> Optional[FileIndex]:
+    """
+    Get the shared file index for a directory only if it is already warm.
+
+    Unlike get_file_index(), this never creates an index or lists files, so
+    callers can fall back to a cheaper bounded listing on a cold start.
+
+    Args:
+        directory: Directory to look up
+
+    Returns:
+        Optional[FileIndex]: The index, or None if it does not exist yet or its
+            tracked listing is out of date
+    """
+    with _indexes_lock:
+        index = _indexes.get(os.path.realpath(directory))
+    if index is None or not index.is_warm():
+        return None
+    return index
+
+
+def get_file_index_stats(directory: Optional[str] = None) -> Dict[str, float]:
+    """
+    Report file index statistics.
+
+    Args:
+        directory: Report a single directory's index; aggregates all if None
+
+    Returns:
+        Dict[str, float]: Counters as produced by FileIndexStats.to_dict()
+    """
+    with _indexes_lock:
+        if directory is not None:
+            index = _indexes.get(os.path.realpath(directory))
+            return (index.stats if index else FileIndexStats()).to_dict()
+
+        total = FileIndexStats()
+        for index in _indexes.values():
+            for name, value in asdict(index.stats).items():
+                setattr(total, name, getattr(total, name) + value)
+        total.last_rebuild_seconds = max(
+            (index.stats.last_rebuild_seconds for index in _indexes.values()),
+            default=0.0,
+        )
+        return total.to_dict()
+
+
+def reset_file_indexes() -> None:
+    """Drop all in-memory file indexes (on-disk indexes are kept)."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -3,8 +3,26 @@
 import os
 import subprocess
 from pathlib import Path
-from typing import List, Optional, Tuple
-import fnmatch
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ra_aid.file_walker import iter_files, walk_files
+from ra_aid.utils.pattern_matcher import compile_patterns
+
+
+# Directories never descended into when listing non-git trees
+EXCLUDED_DIRS = frozenset({".ra-aid", ".venv", ".git", ".aider", "__pycache__"})
+
+# Location of the persisted file index (see ra_aid.file_index), relative to the
+# listed directory; it must never appear in the listing itself
+FILE_INDEX_PATH = ".ra-aid/file_index.json"
+
+# Backends available for enumerating tracked files: "git" runs git ls-files,
+# "index" reads .git/index directly and falls back to git when it cannot
+FILE_LISTING_BACKENDS = ("git", "index")
+DEFAULT_FILE_LISTING_BACKEND = "git"
+
+# Size of the reads used when streaming git ls-files output
+GIT_STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class FileListerError(Exception):
@@ -31,6 +49,27 @@ class DirectoryAccessError(FileListerError):
     pass
 
 
+def get_file_listing_backend() -> str:
+    """
+    Get the configured backend for enumerating tracked files.
+
+    Returns:
+        str: One of FILE_LISTING_BACKENDS, defaulting to "git" when no
+            configuration is available
+    """
+    try:
+        from ra_aid.database.repositories.config_repository import (
+            get_config_repository,
+        )
+
+        backend = get_config_repository().get(
+            "file_listing_backend", DEFAULT_FILE_LISTING_BACKEND
+        )
+    except RuntimeError:
+        return DEFAULT_FILE_LISTING_BACKEND
+    return backend if backend in FILE_LISTING_BACKENDS else DEFAULT_FILE_LISTING_BACKEND
+
+
 def is_git_repo(directory: str) -> bool:
     """
     Check if the given directory is a git repository.
@@ -53,6 +92,12 @@ def is_git_repo(directory: str) -> bool:
         if not path.is_dir():
             raise DirectoryNotFoundError(f"Path is not a directory: {directory}")
 
+        if get_file_listing_backend() == "index":
+            # Find the repository on disk instead of forking git
+            from ra_aid.git_index import locate_repository
+
+            return locate_repository(str(path)) is not None
+
         result = subprocess.run(
             ["git", "rev-parse", "--git-dir"],
             cwd=str(path),
@@ -98,7 +143,7 @@ def get_all_project_files(
         raise DirectoryNotFoundError(f"Not a directory: {directory}")
     
     # Default excluded directories
-    excluded_dirs = {'.ra-aid', '.venv', '.git', '.aider', '__pycache__'}
+    excluded_dirs = EXCLUDED_DIRS
     
     # Check if it's a git repository
     try:
@@ -110,6 +155,15 @@ def get_all_project_files(
     all_files = []
     
     if is_git:
+        # Serve repeat listings from the persistent file index when possible
+        from ra_aid.file_index import get_file_index
+
+        file_index = get_file_index(directory)
+        if file_index is not None:
+            return file_index.get_files(
+                include_hidden, exclude_patterns, filter_files=_filter_project_files
+            )
+
         # Get list of files from git ls-files
         try:
             # Get both tracked and untracked files
@@ -133,27 +187,13 @@ def get_all_project_files(
             raise DirectoryAccessError(f"Permission denied: {e}")
 
         # Combine and process the files
-        for file in (
+        all_files = _filter_git_files(
             tracked_files_process.stdout.splitlines()
-            + untracked_files_process.stdout.splitlines()
-        ):
-            file = file.strip()
-            if not file:
-                continue
-            # Skip hidden files unless explicitly included
-            if not include_hidden and (
-                file.startswith(".")
-                or any(part.startswith(".") for part in file.split("/"))
-            ):
-                continue
-            # Skip .aider files
-            if ".aider" in file:
-                continue
-            all_files.append(file)
+            + untracked_files_process.stdout.splitlines(),
+            include_hidden,
+        )
     else:
-        # Not a git repository, use manual file listing
-        base_path = Path(directory)
-        
+        # Not a git repository, walk the tree honoring .gitignore/.aiderignore
         # First check if we can access the directory (check exists and isdir already done above)
         try:
             # We already verified existence, just check for permission errors
@@ -168,34 +208,71 @@ def get_all_project_files(
             raise DirectoryAccessError(f"Cannot access directory {directory}: {e}")
         
         try:
-            for root, dirs, files in os.walk(directory):
-                # Filter out excluded directories
-                dirs[:] = [d for d in dirs if d not in excluded_dirs and (include_hidden or not d.startswith('.'))]
-                
-                # Calculate relative path
-                rel_root = os.path.relpath(root, directory)
-                if rel_root == '.':
-                    rel_root = ''
-                
-                # Process files
-                for file in files:
-                    # Skip hidden files unless explicitly included
-                    if not include_hidden and file.startswith('.'):
-                        continue
-                    
-                    # Create relative path
-                    rel_path = os.path.join(rel_root, file) if rel_root else file
-                    all_files.append(rel_path)
+            all_files = walk_files(directory, include_hidden, excluded_dirs)
+        except FileNotFoundError:
+            # Can happen in mock tests, see above
+            all_files = []
         except PermissionError as e:
             raise DirectoryAccessError(f"Permission denied while walking directory {directory}: {e}")
     
-    # Apply additional exclude patterns if specified
+    return _apply_exclude_patterns(all_files, exclude_patterns)
+
+
+def _filter_git_files(files: Iterable[str], include_hidden: bool) -> List[str]:
+    """
+    Drop blank, hidden and .aider entries from raw git ls-files output.
+
+    Args:
+        files: Paths as printed by git ls-files
+        include_hidden: Whether to keep hidden files (starting with .)
+
+    Returns:
+        List[str]: The paths that should be part of the project listing
+    """
+    result = []
+    for file in files:
+        file = file.strip()
+        if file and _is_listed_git_path(file, include_hidden):
+            result.append(file)
+    return result
+
+
+def _is_listed_git_path(file: str, include_hidden: bool) -> bool:
+    """Check whether a path reported by git belongs in the project listing."""
+    # Skip hidden files unless explicitly included
+    if not include_hidden and (
+        file.startswith(".")
+        or any(part.startswith(".") for part in file.split("/"))
+    ):
+        return False
+    # Skip RA.Aid's own file index
+    if file.startswith(FILE_INDEX_PATH):
+        return False
+    # Skip .aider files
+    return ".aider" not in file
+
+
+def _apply_exclude_patterns(
+    files: List[str], exclude_patterns: Optional[List[str]] = None
+) -> List[str]:
+    """Remove files matching any exclude pattern, then dedupe and sort."""
+    # Apply additional exclude patterns if specified, in a single pass
     if exclude_patterns:
-        for pattern in exclude_patterns:
-            all_files = [f for f in all_files if not fnmatch.fnmatch(f, pattern)]
-            
+        files = compile_patterns(exclude_patterns).exclude(files)
+
     # Remove duplicates and sort
-    return sorted(set(all_files))
+    return sorted(set(files))
+
+
+def _filter_project_files(
+    files: Iterable[str],
+    include_hidden: bool,
+    exclude_patterns: Optional[List[str]] = None,
+) -> List[str]:
+    """Apply the full git listing filter chain, returning a sorted unique list."""
+    return _apply_exclude_patterns(
+        _filter_git_files(files, include_hidden), exclude_patterns
+    )
 
 
 def get_file_listing(
@@ -245,3 +322,120 @@ def get_file_listing(
         raise DirectoryAccessError(f"Permission denied: {e}")
     except Exception as e:
         raise FileListerError(f"Unexpected error: {e}")
+
+
+def iter_project_files(
+    directory: str,
+    include_hidden: bool = False,
+    exclude_patterns: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Stream the files of a project directory without materializing the full list.
+
+    Git repositories are read from a single
+    `git ls-files -z --cached --others --exclude-standard` process; other
+    directories are walked with `os.scandir`, honoring `.gitignore` and
+    `.aiderignore` files. Hidden and excluded files are
+    filtered as paths arrive, and reading stops as soon as `limit` files have
+    been produced. Paths are yielded in discovery order, not sorted.
+
+    Args:
+        directory: Path to the directory
+        include_hidden: Whether to include hidden files (starting with .)
+        exclude_patterns: Optional list of patterns to exclude from the results
+        limit: Optional maximum number of files to yield
+
+    Yields:
+        str: File paths relative to the directory
+
+    Raises:
+        DirectoryNotFoundError: If directory does not exist
+        DirectoryAccessError: If directory cannot be accessed
+        GitCommandError: If git command fails
+        FileListerError: For other unexpected errors
+    """
+    if not os.path.exists(directory):
+        raise DirectoryNotFoundError(f"Directory not found: {directory}")
+    if not os.path.isdir(directory):
+        raise DirectoryNotFoundError(f"Not a directory: {directory}")
+    if limit is not None and limit <= 0:
+        return
+
+    try:
+        is_git = is_git_repo(directory)
+    except FileListerError:
+        is_git = False
+
+    if is_git:
+        source = _stream_git_files(directory, include_hidden)
+    else:
+        source = _scan_files(directory, include_hidden)
+
+    exclude = compile_patterns(exclude_patterns)
+    count = 0
+    try:
+        for file in source:
+            if exclude and exclude.matches(file):
+                continue
+            yield file
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    finally:
+        # Stops the git process if we exit before reading all of its output
+        source.close()
+
+
+def _stream_git_files(directory: str, include_hidden: bool) -> Iterator[str]:
+    """Yield listed paths from NUL-delimited git ls-files output as it is produced."""
+    try:
+        process = subprocess.Popen(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=directory,
+            stdout=subprocess.PIPE,
+            # Never read while streaming, so a chatty git cannot block on a full pipe
+            stderr=subprocess.DEVNULL,
+        )
+    except PermissionError as e:
+        raise DirectoryAccessError(f"Permission denied: {e}")
+    except OSError as e:
+        raise GitCommandError(f"Git command failed: {e}")
+
+    finished = False
+    try:
+        pending = b""
+        previous = None
+        while True:
+            chunk = process.stdout.read1(GIT_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            entries = (pending + chunk).split(b"\0")
+            pending = entries.pop()
+            for entry in entries:
+                file = entry.decode("utf-8", "surrogateescape")
+                # Unmerged paths are reported once per stage, back to back
+                if not file or file == previous:
+                    continue
+                previous = file
+                if _is_listed_git_path(file, include_hidden):
+                    yield file
+        finished = True
+    finally:
+        if not finished and process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise GitCommandError(f"Git command failed with exit code {returncode}")
+
+
+def _scan_files(directory: str, include_hidden: bool) -> Iterator[str]:
+    """Yield files of a non-git tree depth-first, honoring ignore files."""
+    try:
+        yield from iter_files(directory, include_hidden, EXCLUDED_DIRS)
+    except PermissionError as e:
+        raise DirectoryAccessError(f"Cannot access directory {directory}: {e}")
+    except OSError as e:
+        raise FileListerError(f"Error listing directory {directory}: {e}")
@@ -0,0 +1,466 @@
+"""Apply unified diffs and search/replace blocks to files.
+
+A patch is a list of hunks, each a run of context, removed and added lines. It
+can be written as a unified diff (@@ -l,s +l,s @@ hunks, as produced by
+`diff -u` or `git diff`) or as search/replace blocks:
+
+    <<<<<<< SEARCH
+    lines to find
+    =======
+    lines to put in their place
+    >>>>>>> REPLACE
+
+Hunks are located the way patch(1) locates them. Each hunk is looked for
+where its header says it starts, shifted by how far the previous hunk
+actually moved, and then progressively further away. If no exact match is
+found, the same search runs while ignoring differences in whitespace, and
+then again with up to MAX_FUZZ lines of leading or trailing context ignored.
+A patch applies only if every hunk does. The rewritten file is streamed to a
+temporary file that replaces the original, so it is never seen half-written.
+When hunks do not apply, the result says exactly which ones and why, and the
+file is left untouched.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ra_aid.file_cache import get_file_cache
+from ra_aid.file_edit import write_atomic
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Context lines at either end of a hunk that may be ignored to make it apply
+MAX_FUZZ = 2
+
+# Lines of unchanged contents joined into one write
+WRITE_CHUNK_LINES = 4096
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SEARCH_MARKER = re.compile(r"^<{5,9} ?SEARCH\s*$")
+_DIVIDER_MARKER = re.compile(r"^={5,9}\s*$")
+_REPLACE_MARKER = re.compile(r"^>{5,9} ?REPLACE\s*$")
+_FILE_HEADER_PREFIXES = ("diff ", "index ", "--- ", "+++ ", "new file mode", "deleted file mode", "similarity ")
+
+
+class PatchParseError(ValueError):
+    """Raised when a patch is neither a unified diff nor search/replace blocks."""
+
+
+@dataclass
+class HunkLine:
+    """One line of a hunk.
+
+    Attributes:
+        tag: " " for context, "-" for a removed line, "+" for an added line
+        text: Line contents, without the line ending
+        eol: False if the line is marked "\\ No newline at end of file"
+    """
+
+    tag: str
+    text: str
+    eol: bool = True
+
+
+@dataclass
+class Hunk:
+    """A contiguous change to a file.
+
+    Attributes:
+        header: The hunk's header line, or a name for search/replace blocks
+        lines: Context, removed and added lines, in order
+        old_start: Line the hunk claims to start at in the original file
+            (1-based), or None if it gives no position
+    """
+
+    header: str
+    lines: List[HunkLine] = field(default_factory=list)
+    old_start: Optional[int] = None
+
+    @property
+    def old_lines(self) -> List[HunkLine]:
+        """Lines the hunk expects to find in the file."""
+        return [line for line in self.lines if line.tag != "+"]
+
+
+@dataclass
+class HunkResult:
+    """Where a hunk applied, or why it did not.
+
+    Attributes:
+        index: Position of the hunk in the patch, from 0
+        header: The hunk's header line
+        applied: Whether the hunk was located in the file
+        line: First line of the file the hunk replaces (1-based), once located
+        offset: Lines between where the hunk said it starts and where it matched
+        fuzz: Context lines ignored to make the hunk match
+        ignored_whitespace: Whether the match ignored differences in whitespace
+        reason: Why the hunk was rejected
+    """
+
+    index: int
+    header: str
+    applied: bool = False
+    line: Optional[int] = None
+    offset: int = 0
+    fuzz: int = 0
+    ignored_whitespace: bool = False
+    reason: Optional[str] = None
+
+
+@dataclass
+class PatchResult:
+    """Outcome of apply_patch().
+
+    Attributes:
+        path: File that was patched
+        hunks: Per-hunk results, in patch order
+        applied: Whether the file was rewritten; False if any hunk was rejected
+        bytes_written: Size of the rewritten file
+    """
+
+    path: str
+    hunks: List[HunkResult] = field(default_factory=list)
+    applied: bool = False
+    bytes_written: int = 0
+
+    @property
+    def rejected(self) -> List[HunkResult]:
+        """Hunks that did not apply."""
+        return [hunk for hunk in self.hunks if not hunk.applied]
+
+    def report(self) -> str:
+        """Describe every hunk that did not apply, one per line."""
+        return "\n".join(
+            f"Hunk {hunk.index + 1} ({hunk.header}): {hunk.reason}" for hunk in self.rejected
+        )
+
+
+def _split_lines(text: str) -> List[str]:
+    """Split text after each "\\n", keeping line endings as they are."""
+    lines = text.split("\n")
+    last = lines.pop()
+    lines = [line + "\n" for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _patch_lines(text: str) -> List[str]:
+    """Split a patch into lines, ignoring trailing blank lines and CRLF endings."""
+    return [line[:-1] if line.endswith("\r") else line for line in text.rstrip("\r\n").split("\n")]
+
+
+def _parse_search_replace(text: str) -> List[Hunk]:
+    hunks = []
+    state = None
+    for line in _patch_lines(text):
+        if state is None:
+            if _SEARCH_MARKER.match(line):
+                hunk = Hunk(f"search/replace block {len(hunks) + 1}")
+                hunks.append(hunk)
+                state = "-"
+        elif state == "-" and _DIVIDER_MARKER.match(line):
+            state = "+"
+        elif state == "+" and _REPLACE_MARKER.match(line):
+            state = None
+        else:
+            hunk.lines.append(HunkLine(state, line))
+    if state is not None:
+        expected = "=======" if state == "-" else ">>>>>>> REPLACE"
+        raise PatchParseError(f"Unterminated {hunks[-1].header}: expected {expected}")
+    return hunks
+
+
+def _parse_unified(text: str) -> List[Hunk]:
+    hunks = []
+    hunk = None
+    files = 0
+    lines = _patch_lines(text)
+    for number, line in enumerate(lines, 1):
+        following = lines[number] if number < len(lines) else ""
+        if line.startswith("--- ") and following.startswith("+++ "):
+            # A file header, even in the middle of a hunk
+            hunk = None
+            files += 1
+            if files > 1:
+                raise PatchParseError("Patch changes more than one file; send one patch per file")
+            continue
+        if line.startswith("@@"):
+            match = _HUNK_HEADER.match(line)
+            hunk = Hunk(line.strip(), old_start=int(match.group(1)) if match else None)
+            hunks.append(hunk)
+        elif hunk is None:
+            if line.strip() and not line.startswith(_FILE_HEADER_PREFIXES):
+                raise PatchParseError(f"Line {number} is outside any hunk: {line!r}")
+        elif line.startswith("\\"):
+            if hunk.lines:
+                hunk.lines[-1].eol = False
+        elif line[:1] in (" ", "-", "+"):
+            hunk.lines.append(HunkLine(line[0], line[1:]))
+        elif not line:
+            # Blank context lines often lose their leading space
+            hunk.lines.append(HunkLine(" ", ""))
+        else:
+            raise PatchParseError(
+                f"Line {number} of {hunk.header} does not start with ' ', '-' or '+': {line!r}"
+            )
+    return hunks
+
+
+def parse_patch(text: str) -> List[Hunk]:
+    """
+    Parse a unified diff or a sequence of search/replace blocks.
+
+    Raises:
+        PatchParseError: If the patch is malformed or has no hunks
+    """
+    if any(_SEARCH_MARKER.match(line) for line in _patch_lines(text)):
+        hunks = _parse_search_replace(text)
+    else:
+        hunks = _parse_unified(text)
+    if not hunks:
+        raise PatchParseError("Patch contains no hunks")
+    for hunk in hunks:
+        if not any(line.tag != " " for line in hunk.lines):
+            raise PatchParseError(f"{hunk.header} changes nothing")
+    return hunks
+
+
+def _exact(line: str) -> str:
+    return line.rstrip("\r\n")
+
+
+def _loose(line: str) -> str:
+    return " ".join(line.split())
+
+
+# Ways of comparing lines, strictest first, with whether they ignore whitespace
+_COMPARISONS: Sequence[Tuple[Callable[[str], str], bool]] = ((_exact, False), (_loose, True))
+
+
+def _positions(expected: int, floor: int, last: int) -> Iterator[int]:
+    """Candidate start lines from floor to last, nearest to expected first."""
+    expected = min(max(expected, floor), last)
+    yield expected
+    for distance in range(1, max(expected - floor, last - expected) + 1):
+        if expected + distance <= last:
+            yield expected + distance
+        if expected - distance >= floor:
+            yield expected - distance
+
+
+@dataclass
+class _Placement:
+    """A located hunk: which of its lines are used and where they go."""
+
+    hunk: Hunk
+    start: int
+    lines: List[HunkLine]
+    old_length: int
+
+
+class _Patcher:
+    """Locates the hunks of a patch in one file's lines."""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self._keys: Dict[Callable[[str], str], List[str]] = {}
+
+    def keys(self, normalize: Callable[[str], str]) -> List[str]:
+        if normalize not in self._keys:
+            self._keys[normalize] = [normalize(_exact(line)) for line in self.lines]
+        return self._keys[normalize]
+
+    def find(self, pattern: List[str], normalize, expected: int, floor: int) -> Optional[int]:
+        keys = self.keys(normalize)
+        last = len(keys) - len(pattern)
+        if last < floor:
+            return None
+        first = pattern[0]
+        for pos in _positions(expected, floor, last):
+            if keys[pos] == first and keys[pos : pos + len(pattern)] == pattern:
+                return pos
+        return None
+
+    def count(self, pattern: List[str], normalize, floor: int) -> int:
+        """Count the places at or after line floor where pattern occurs."""
+        keys = self.keys(normalize)
+        return sum(
+            keys[pos : pos + len(pattern)] == pattern
+            for pos in range(floor, len(keys) - len(pattern) + 1)
+        )
+
+    def locate(
+        self, hunk: Hunk, expected: int, floor: int, result: HunkResult
+    ) -> Optional[_Placement]:
+        """Find where a hunk applies at or after line floor (0-based), filling in result."""
+        lines = hunk.lines
+        old = hunk.old_lines
+        if not old:
+            if hunk.old_start is None and self.lines:
+                result.reason = "nothing to locate it by; include lines of the file to find"
+                return None
+            # Pure insertion: trust the position
+            start = min(max(expected, floor), len(self.lines))
+            return _Placement(hunk, start, lines, 0)
+
+        lead = next((i for i, line in enumerate(lines) if line.tag != " "), len(lines))
+        trail = next((i for i, line in enumerate(reversed(lines)) if line.tag != " "), len(lines))
+        for fuzz in range(MAX_FUZZ + 1):
+            for normalize, ignores_whitespace in _COMPARISONS:
+                for front in range(fuzz + 1):
+                    back = fuzz - front
+                    if front > lead or back > trail:
+                        continue
+                    kept = lines[front : len(lines) - back]
+                    pattern = [normalize(line.text) for line in kept if line.tag != "+"]
+                    if not pattern:
+                        continue
+                    pos = self.find(pattern, normalize, expected + front, floor)
+                    if pos is not None:
+                        if hunk.old_start is None:
+                            # Search text has no line number to tell matches apart
+                            matches = self.count(pattern, normalize, floor)
+                            if matches > 1:
+                                result.reason = (
+                                    f"matches {matches} places; add surrounding lines to pick one"
+                                )
+                                return None
+                        result.fuzz = fuzz
+                        result.ignored_whitespace = ignores_whitespace
+                        if hunk.old_start is not None:
+                            result.offset = pos - front - expected
+                        return _Placement(hunk, pos, kept, len(pattern))
+        result.reason = self.explain(old, expected, floor)
+        return None
+
+    def explain(self, old: List[HunkLine], expected: int, floor: int) -> str:
+        """Describe the closest near-match of a hunk that did not apply."""
+        pattern = [_loose(line.text) for line in old]
+        keys = self.keys(_loose)
+        last = len(keys) - len(pattern)
+        reason = f"{len(pattern)} context and removed lines not found"
+        if floor > 0:
+            reason += f" after line {floor} (where the previous hunk ends)"
+        if last < floor:
+            return reason + "; the file is too short"
+
+        best, best_score = None, 0
+        for pos in _positions(expected, floor, last):
+            score = sum(a == b for a, b in zip(keys[pos : pos + len(pattern)], pattern))
+            if score > best_score:
+                best, best_score = pos, score
+        if best is None:
+            return reason + "; no line of the hunk occurs in the file"
+        mismatch = next(
+            i for i, want in enumerate(pattern) if keys[best + i] != want
+        )
+        return (
+            f"{reason}; closest match starts at line {best + 1} ({best_score} of {len(pattern)} lines agree), "
+            f"but line {best + mismatch + 1} is {_exact(self.lines[best + mismatch]).strip()!r} "
+            f"where the hunk expects {old[mismatch].text.strip()!r}"
+        )
+
+
+def _render(
+    lines: List[str], placements: List[_Placement], eol: str
+) -> Iterator[str]:
+    """The patched contents, produced in one pass over the original lines."""
+    cursor = 0
+    for placement in placements:
+        for begin in range(cursor, placement.start, WRITE_CHUNK_LINES):
+            yield "".join(lines[begin : min(begin + WRITE_CHUNK_LINES, placement.start)])
+
+        replacement = []
+        if placement.start == len(lines) and lines and not lines[-1].endswith("\n"):
+            # Appending after a last line that has no newline
+            replacement.append(eol)
+        old_index = placement.start
+        for line in placement.lines:
+            if line.tag == " ":
+                # Keep the file's own version of context lines
+                replacement.append(lines[old_index])
+            if line.tag != "+":
+                old_index += 1
+            if line.tag == "+":
+                replacement.append(line.text + (eol if line.eol else ""))
+        cursor = placement.start + placement.old_length
+        for i in range(len(replacement) - 1):
+            if not replacement[i].endswith("\n"):
+                # The file's last line, or a line the patch left open, is no longer last
+                replacement[i] += eol
+        if replacement and cursor < len(lines) and not replacement[-1].endswith("\n"):
+            replacement[-1] += eol
+        at_eof = cursor == len(lines) and lines and not lines[-1].endswith("\n")
+        explicit = any(not line.eol for line in placement.lines)
+        if at_eof and not explicit and replacement and placement.lines[-1].tag == "+":
+            # The file ends without a newline, and the patch does not say to add one;
+            # only the line that ends up last loses it
+            replacement[-1] = replacement[-1][: -len(eol)]
+        yield "".join(replacement)
+
+    for begin in range(cursor, len(lines), WRITE_CHUNK_LINES):
+        yield "".join(lines[begin : begin + WRITE_CHUNK_LINES])
+
+
+def apply_patch(path: str, patch: str, encoding: str = "utf-8") -> PatchResult:
+    """
+    Apply a unified diff or search/replace blocks to a file, atomically.
+
+    Args:
+        path: File to patch; symlinks are followed
+        patch: The patch text
+        encoding: Text encoding of the file
+
+    Returns:
+        PatchResult: Where each hunk applied or why it was rejected, and whether
+            the file was rewritten
+
+    Raises:
+        PatchParseError: If the patch cannot be parsed
+        FileNotFoundError: If the file does not exist
+        PermissionError: If the file is not writable
+    """
+    hunks = parse_patch(patch)
+    real_path = os.path.realpath(path)
+    st = os.stat(real_path)
+    if not os.access(real_path, os.W_OK):
+        raise PermissionError(f"Permission denied: {path}")
+
+    lines = _split_lines(get_file_cache().read_bytes(real_path).decode(encoding))
+    eol = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    patcher = _Patcher(lines)
+
+    result = PatchResult(real_path)
+    placements = []
+    floor = 0
+    drift = 0
+    for index, hunk in enumerate(hunks):
+        hunk_result = HunkResult(index, hunk.header)
+        result.hunks.append(hunk_result)
+        if hunk.old_start is None:
+            expected = floor
+        else:
+            # "@@ -N,0" inserts after line N; otherwise line N is the first one touched
+            start = hunk.old_start if not hunk.old_lines else hunk.old_start - 1
+            expected = max(start, 0) + drift
+        placement = patcher.locate(hunk, expected, floor, hunk_result)
+        if placement is None:
+            continue
+        hunk_result.applied = True
+        hunk_result.line = placement.start + 1
+        # Report the offset from the header's position, as patch(1) does
+        drift += hunk_result.offset
+        hunk_result.offset = drift if hunk.old_start is not None else 0
+        floor = placement.start + placement.old_length
+        placements.append(placement)
+
+    if result.rejected:
+        return result
+    chunks = (chunk.encode(encoding) for chunk in _render(lines, placements, eol))
+    result.bytes_written = write_atomic(real_path, chunks, st)
+    result.applied = True
+    return result
@@ -0,0 +1,187 @@
+"""Directory walker for project trees that are not git repositories.
+
+Directories are read with `os.scandir`, so file types come from the directory
+entries instead of a stat per path. `.gitignore` and `.aiderignore` files are
+honored at every level with git's precedence: patterns are relative to the
+directory holding the ignore file, the deepest matching rule wins, and ignored
+directories are not descended into.
+
+`walk_files` reads each level of the tree concurrently on a thread pool, which
+pays off on wide trees and slow (e.g. network mounted) filesystems.
+`iter_files` walks sequentially and yields paths as they are found.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, FrozenSet, Iterator, List, Optional, Tuple
+
+from ra_aid.utils.pattern_matcher import PatternMatcher, compile_patterns
+
+IGNORE_FILES = (".gitignore", ".aiderignore")
+
+# (directory prefix relative to the walk root, matcher for its ignore files)
+IgnoreRule = Tuple[str, PatternMatcher]
+# (path relative to the walk root, absolute path, rules in effect)
+PendingDir = Tuple[str, str, Tuple[IgnoreRule, ...]]
+
+
+def _load_ignore_rules(
+    path: str, rel_root: str, names: Collection[str]
+) -> Tuple[IgnoreRule, ...]:
+    """Compile the ignore files present in a directory into a single rule."""
+    lines = []
+    for name in IGNORE_FILES:
+        if name not in names:
+            continue
+        try:
+            with open(os.path.join(path, name), "r", encoding="utf-8", errors="replace") as f:
+                lines.extend(line.rstrip("\n") for line in f)
+        except OSError:
+            continue
+    if not lines:
+        return ()
+    prefix = rel_root.replace(os.sep, "/") + "/" if rel_root else ""
+    return ((prefix, compile_patterns(lines, syntax="gitignore")),)
+
+
+def _is_ignored(rules: Tuple[IgnoreRule, ...], rel_path: str, is_dir: bool) -> bool:
+    """Apply ignore rules from the deepest directory outwards."""
+    path = rel_path.replace(os.sep, "/")
+    if is_dir:
+        # Lets patterns with a trailing slash match directories only
+        path += "/"
+    for prefix, matcher in reversed(rules):
+        result = matcher.check(path[len(prefix) :])
+        if result is not None:
+            return result
+    return False
+
+
+def _scan_directory(
+    path: str,
+    rel_root: str,
+    rules: Tuple[IgnoreRule, ...],
+    include_hidden: bool,
+    excluded_dirs: FrozenSet[str],
+) -> Tuple[List[str], List[PendingDir]]:
+    """
+    Read one directory.
+
+    Returns:
+        Tuple of (file paths, subdirectories to visit), in directory order
+
+    Raises:
+        OSError: If the directory cannot be read
+    """
+    with os.scandir(path) as it:
+        entries = list(it)
+
+    names = {entry.name for entry in entries}
+    if not names.isdisjoint(IGNORE_FILES):
+        rules = rules + _load_ignore_rules(path, rel_root, names)
+
+    prefix = rel_root + os.sep if rel_root else ""
+    files = []
+    subdirs = []
+    for entry in entries:
+        name = entry.name
+        if not include_hidden and name.startswith("."):
+            continue
+        try:
+            is_dir = entry.is_dir()
+            if is_dir and (name in excluded_dirs or entry.is_symlink()):
+                continue
+        except OSError:
+            continue
+        rel_path = prefix + name
+        if rules and _is_ignored(rules, rel_path, is_dir):
+            continue
+        if is_dir:
+            subdirs.append((rel_path, entry.path, rules))
+        else:
+            files.append(rel_path)
+    return files, subdirs
+
+
+def _scan_subdirectory(
+    pending: PendingDir, include_hidden: bool, excluded_dirs: FrozenSet[str]
+) -> Tuple[List[str], List[PendingDir]]:
+    """Read a directory below the root, skipping it if it cannot be read."""
+    rel_root, path, rules = pending
+    try:
+        return _scan_directory(path, rel_root, rules, include_hidden, excluded_dirs)
+    except OSError:
+        return [], []
+
+
+def walk_files(
+    directory: str,
+    include_hidden: bool = False,
+    excluded_dirs: FrozenSet[str] = frozenset(),
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """
+    List all files below a directory, reading directories in parallel.
+
+    Args:
+        directory: Root of the walk
+        include_hidden: Whether to include hidden files and directories
+        excluded_dirs: Directory names never descended into
+        max_workers: Thread pool size; defaults to ThreadPoolExecutor's default
+
+    Returns:
+        List[str]: Sorted file paths relative to `directory`
+
+    Raises:
+        OSError: If the root directory cannot be read; unreadable
+            subdirectories are skipped
+    """
+    files, level = _scan_directory(directory, "", (), include_hidden, excluded_dirs)
+    if level:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ra-aid-walk"
+        ) as pool:
+            while level:
+                next_level = []
+                for level_files, subdirs in pool.map(
+                    lambda d: _scan_subdirectory(d, include_hidden, excluded_dirs),
+                    level,
+                ):
+                    files.extend(level_files)
+                    next_level.extend(subdirs)
+                level = next_level
+    files.sort()
+    return files
+
+
+def iter_files(
+    directory: str,
+    include_hidden: bool = False,
+    excluded_dirs: FrozenSet[str] = frozenset(),
+) -> Iterator[str]:
+    """
+    Yield files below a directory depth-first, in sorted order per directory.
+
+    Each directory's files are yielded before its subdirectories are visited.
+
+    Args:
+        directory: Root of the walk
+        include_hidden: Whether to include hidden files and directories
+        excluded_dirs: Directory names never descended into
+
+    Yields:
+        str: File paths relative to `directory`
+
+    Raises:
+        OSError: If the root directory cannot be read; unreadable
+            subdirectories are skipped
+    """
+    files, subdirs = _scan_directory(directory, "", (), include_hidden, excluded_dirs)
+    stack = []
+    while True:
+        yield from sorted(files)
+        # Push in reverse so directories are visited in sorted order
+        stack.extend(sorted(subdirs, reverse=True))
+        if not stack:
+            return
+        files, subdirs = _scan_subdirectory(stack.pop(), include_hidden, excluded_dirs)
@@ -0,0 +1,202 @@
+"""Preprocessed path index for fuzzy file search.
+
+Scoring every project path with a fuzzy matcher on each search is slow for
+large trees. A FuzzyPathIndex preprocesses a file listing once (lowercasing
+and tokenizing with rapidfuzz's default processor, and splitting each path
+into directory and basename) and is reused until the listing changes.
+
+Searches are path aware. Plain name queries are scored against the distinct
+basenames and directory names, so the cost grows with the number of distinct
+names rather than the number of paths. A basename match counts in full, while
+a directory name match is discounted by DIRECTORY_WEIGHT. Queries that contain
+a path separator or whitespace span several path components, so they are
+scored against the full paths.
+"""
+
+import heapq
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
+
+# Factor applied to scores of matches on a file's directory
+DIRECTORY_WEIGHT = 0.9
+
+# Number of distinct listings kept indexed
+MAX_CACHED_INDEXES = 8
+
+_PATH_QUERY = re.compile(r"[/\\\s]")
+
+
+class FuzzyPathIndex:
+    """Preprocessed form of a file listing, searchable with fuzzy queries."""
+
+    def __init__(self, paths: Sequence[str]):
+        """
+        Preprocess a listing.
+
+        Args:
+            paths: File paths to index; result order follows this order on ties
+        """
+        self.paths = list(paths)
+        self._full: List[str] = []
+        basename_files: Dict[str, List[int]] = {}
+        directory_files: Dict[str, List[int]] = {}
+
+        for i, path in enumerate(self.paths):
+            self._full.append(default_process(path))
+            *directories, basename = path.replace(os.sep, "/").split("/")
+            basename_files.setdefault(default_process(basename), []).append(i)
+            for directory in set(directories):
+                directory_files.setdefault(default_process(directory), []).append(i)
+
+        self._basenames = list(basename_files)
+        self._basename_files = list(basename_files.values())
+        self._directories = list(directory_files)
+        self._directory_files = list(directory_files.values())
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def search(
+        self, query: str, limit: Optional[int] = 10, threshold: int = 0
+    ) -> List[Tuple[str, int]]:
+        """
+        Find the paths best matching a query.
+
+        Args:
+            query: Search term
+            limit: Maximum number of results, or None for all
+            threshold: Minimum score (0-100) for a result
+
+        Returns:
+            List[Tuple[str, int]]: (path, score) pairs, best first
+
+        Raises:
+            ValueError: If limit is negative
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must not be negative, got {limit}")
+        processed = default_process(query)
+        if not processed or limit == 0:
+            return []
+        # Scores are reported rounded, so keep anything that rounds up to the threshold
+        cutoff = max(threshold - 0.5, 0)
+
+        if _PATH_QUERY.search(query.strip()):
+            matches = process.extract(
+                processed,
+                self._full,
+                scorer=fuzz.WRatio,
+                processor=None,
+                limit=None,
+                score_cutoff=cutoff,
+            )
+            scores = {i: round(score) for _, score, i in matches}
+        else:
+            scores = self._name_scores(processed, cutoff, threshold, limit)
+
+        ranked = ((-score, i) for i, score in scores.items() if score >= threshold)
+        if limit is None:
+            best = sorted(ranked)
+        else:
+            best = heapq.nsmallest(limit, ranked)
+        return [(self.paths[i], -negated) for negated, i in best]
+
+    def _name_scores(
+        self, processed: str, cutoff: float, threshold: int, limit: Optional[int]
+    ) -> Dict[int, int]:
+        """
+        Score files by their basename and, discounted, their directory names.
+
+        Names are scored once each, then expanded to the files carrying them
+        from the best score down, stopping once `limit` files are certain to
+        be the best ones.
+        """
+        groups = [
+            (round(score), self._basename_files[slot])
+            for _, score, slot in process.extract(
+                processed,
+                self._basenames,
+                scorer=fuzz.WRatio,
+                processor=None,
+                limit=None,
+                score_cutoff=cutoff,
+            )
+        ]
+        directory_cutoff = cutoff / DIRECTORY_WEIGHT
+        if directory_cutoff <= 100:
+            groups.extend(
+                (round(score * DIRECTORY_WEIGHT), self._directory_files[slot])
+                for _, score, slot in process.extract(
+                    processed,
+                    self._directories,
+                    scorer=fuzz.WRatio,
+                    processor=None,
+                    limit=None,
+                    score_cutoff=math.floor(directory_cutoff),
+                )
+            )
+        groups.sort(key=lambda group: group[0], reverse=True)
+
+        scores: Dict[int, int] = {}
+        last_score = math.inf
+        for score, files in groups:
+            if score < threshold:
+                break
+            # Files sharing the last accepted score still compete on path order
+            if limit is not None and len(scores) >= limit and score < last_score:
+                break
+            added = 0
+            for i in files:
+                if i not in scores:
+                    scores[i] = score
+                    added += 1
+                    # File lists are in path order, so later files in this
+                    # group cannot outrank the ones already taken
+                    if added == limit:
+                        break
+            last_score = score
+        return scores
+
+
+_indexes: "OrderedDict[Hashable, FuzzyPathIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_fuzzy_index(key: Hashable, paths: Iterable[str]) -> FuzzyPathIndex:
+    """
+    Get the index for a listing, reusing the cached one while the listing is unchanged.
+
+    Args:
+        key: Identifies the listing, e.g. directory and filter parameters
+        paths: Current file listing for the key
+
+    Returns:
+        FuzzyPathIndex: Index over `paths`
+    """
+    paths = list(paths)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.paths == paths:
+            _indexes.move_to_end(key)
+            return index
+
+    index = FuzzyPathIndex(paths)
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def reset_fuzzy_indexes() -> None:
+    """Drop all cached indexes."""
+    with _indexes_lock:
+        _indexes.clear()
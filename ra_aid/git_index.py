@@ -0,0 +1,344 @@
+"""Pure-Python reader for git's index file.
+
+Listing tracked files normally means forking `git ls-files`. For small and
+medium repositories the fork/exec dominates the cost, so this module reads
+`.git/index` directly through mmap instead. Index versions 2 to 4 are
+supported, including split indexes (the `link` extension) and indexes carrying
+an untracked cache or other optional extensions, which are skipped. Anything
+else, such as sparse indexes, raises UnsupportedIndexError so callers can fall
+back to git.
+"""
+
+import mmap
+import os
+import struct
+from typing import List, Optional, Tuple
+
+INDEX_SIGNATURE = b"DIRC"
+SUPPORTED_VERSIONS = (2, 3, 4)
+
+# ctime, mtime, dev, ino, mode, uid, gid and size: ten 32-bit fields
+_STAT_DATA_SIZE = 40
+_FLAG_EXTENDED = 0x4000
+_NAME_MASK = 0x0FFF
+_STAGE_SHIFT = 12
+_STAGE_MASK = 0x3
+_MODE_OFFSET = 24
+_S_IFMT = 0o170000
+_S_IFDIR = 0o040000
+
+_HEADER = struct.Struct(">4sII")
+_EXTENSION_HEADER = struct.Struct(">4sI")
+
+
+class GitIndexError(Exception):
+    """Raised when the index file cannot be read."""
+
+    pass
+
+
+class UnsupportedIndexError(GitIndexError):
+    """Raised when the index uses a format this reader does not handle."""
+
+    pass
+
+
+def locate_repository(directory: str) -> Optional[Tuple[str, str]]:
+    """
+    Find the working tree root and git directory for a path without spawning git.
+
+    Walks up from `directory` looking for a `.git` directory, or a `.git` file
+    pointing elsewhere (worktrees and submodules).
+
+    Args:
+        directory: Path inside the working tree
+
+    Returns:
+        Optional[Tuple[str, str]]: (worktree root, git directory), or None if the
+            path is not inside a working tree
+    """
+    current = os.path.realpath(directory)
+    while True:
+        candidate = os.path.join(current, ".git")
+        if os.path.isdir(candidate):
+            return current, candidate
+        if os.path.isfile(candidate):
+            try:
+                with open(candidate, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if content.startswith("gitdir:"):
+                git_dir = content[len("gitdir:") :].strip()
+                return current, os.path.realpath(os.path.join(current, git_dir))
+            return None
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _hash_size(git_dir: str) -> int:
+    """Return the object id size used by the repository (SHA-1 or SHA-256)."""
+    config_dirs = [git_dir]
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r", encoding="utf-8") as f:
+            config_dirs.append(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    for config_dir in config_dirs:
+        try:
+            with open(os.path.join(config_dir, "config"), "r", encoding="utf-8") as f:
+                for line in f:
+                    key, _, value = line.partition("=")
+                    if key.strip().lower() == "objectformat":
+                        return 32 if value.strip().lower() == "sha256" else 20
+        except OSError:
+            continue
+    return 20
+
+
+def _decode_varint(data, offset: int) -> Tuple[int, int]:
+    """Decode git's offset varint used by index v4 path compression."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def _read_ewah(data, offset: int) -> Tuple[List[int], int]:
+    """Decode an EWAH compressed bitmap, returning set bit positions."""
+    bit_size, word_count = struct.unpack_from(">II", data, offset)
+    offset += 8
+    words = struct.unpack_from(f">{word_count}Q", data, offset)
+    # Skip the words and the trailing position of the last run-length word
+    offset += 8 * word_count + 4
+
+    positions = []
+    position = 0
+    i = 0
+    while i < word_count:
+        marker = words[i]
+        i += 1
+        run_length = (marker >> 1) & 0xFFFFFFFF
+        literal_words = marker >> 33
+        if marker & 1:
+            positions.extend(range(position, position + run_length * 64))
+        position += run_length * 64
+        for word in words[i : i + literal_words]:
+            while word:
+                lowest = word & -word
+                positions.append(position + lowest.bit_length() - 1)
+                word ^= lowest
+            position += 64
+        i += literal_words
+    return [p for p in positions if p < bit_size], offset
+
+
+def _parse_index(data, hash_size: int) -> Tuple[List[str], List[int], dict]:
+    """
+    Parse index entries and extensions.
+
+    Returns:
+        Tuple of (paths in index order, their stages, extensions by signature)
+    """
+    if len(data) < _HEADER.size + hash_size:
+        raise GitIndexError("Index file is truncated")
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != INDEX_SIGNATURE:
+        raise GitIndexError("Not a git index file")
+    if version not in SUPPORTED_VERSIONS:
+        raise UnsupportedIndexError(f"Unsupported index version {version}")
+
+    end = len(data) - hash_size
+    # Mode and flags are the only fixed fields needed, so read both in one call
+    gap = _STAT_DATA_SIZE - _MODE_OFFSET - 4 + hash_size
+    mode_and_flags = struct.Struct(f">{_MODE_OFFSET}xI{gap}xH")
+    fixed_size = mode_and_flags.size
+    unpack_from = mode_and_flags.unpack_from
+    find = data.find
+    names = []
+    stages = []
+    offset = _HEADER.size
+    previous = b""
+
+    for _ in range(count):
+        if offset + fixed_size > end:
+            raise GitIndexError("Index entry runs past end of file")
+        mode, flags = unpack_from(data, offset)
+        if mode & _S_IFMT == _S_IFDIR:
+            raise UnsupportedIndexError("Sparse directory entries are not supported")
+        name_start = offset + fixed_size
+        if flags & _FLAG_EXTENDED:
+            if version < 3:
+                raise GitIndexError("Extended flags in a version 2 index")
+            name_start += 2
+
+        if version == 4:
+            strip, name_start = _decode_varint(data, name_start)
+            name_end = find(b"\0", name_start, end)
+            if name_end < 0 or strip > len(previous):
+                raise GitIndexError("Malformed path in index entry")
+            name = previous[: len(previous) - strip] + data[name_start:name_end]
+            previous = name
+            offset = name_end + 1
+        else:
+            name_length = flags & _NAME_MASK
+            if name_length == _NAME_MASK:
+                name_end = find(b"\0", name_start, end)
+                if name_end < 0:
+                    raise GitIndexError("Malformed path in index entry")
+            else:
+                name_end = name_start + name_length
+            name = data[name_start:name_end]
+            # Entries are NUL padded to a multiple of eight bytes
+            offset += (name_end - offset + 8) & ~7
+
+        names.append(name)
+        stages.append((flags >> _STAGE_SHIFT) & _STAGE_MASK)
+
+    # Decoding all paths at once is much cheaper than decoding each entry
+    paths = []
+    if names:
+        paths = b"\0".join(names).decode("utf-8", "surrogateescape").split("\0")
+
+    extensions = {}
+    while offset + _EXTENSION_HEADER.size <= end:
+        ext_signature, ext_size = _EXTENSION_HEADER.unpack_from(data, offset)
+        offset += _EXTENSION_HEADER.size
+        if offset + ext_size > end:
+            raise GitIndexError("Index extension runs past end of file")
+        extensions[ext_signature] = (offset, ext_size)
+        offset += ext_size
+
+    if b"sdir" in extensions:
+        raise UnsupportedIndexError("Sparse indexes are not supported")
+
+    return paths, stages, extensions
+
+
+def _read_index_file(path: str, hash_size: int) -> Tuple[List[str], List[int], bytes]:
+    """Map an index file and parse it, returning paths, stages and raw link data."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise GitIndexError("Index file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            paths, stages, extensions = _parse_index(data, hash_size)
+            link = b""
+            if b"link" in extensions:
+                start, size = extensions[b"link"]
+                link = data[start : start + size]
+            return paths, stages, link
+
+
+def _merge_split_index(
+    git_dir: str, paths: List[str], stages: List[int], link: bytes, hash_size: int
+) -> Tuple[List[str], List[int]]:
+    """Combine a split index with its shared base index."""
+    base_id = link[:hash_size].hex()
+    if not base_id.strip("0"):
+        # A null base id means every entry lives in this file
+        return paths, stages
+
+    delete_positions, replace_positions = [], []
+    if len(link) > hash_size:
+        delete_positions, offset = _read_ewah(link, hash_size)
+        replace_positions, _ = _read_ewah(link, offset)
+
+    try:
+        base_paths, base_stages, _ = _read_index_file(
+            os.path.join(git_dir, f"sharedindex.{base_id}"), hash_size
+        )
+    except FileNotFoundError:
+        raise UnsupportedIndexError(f"Shared index {base_id} not found")
+
+    merged = list(zip(base_paths, base_stages))
+    if len(replace_positions) > len(paths):
+        raise GitIndexError("Split index has fewer entries than replacements")
+    for i, position in enumerate(replace_positions):
+        # Replacement entries keep the base path and carry an empty name
+        merged[position] = (merged[position][0], stages[i])
+    deleted = set(delete_positions)
+    merged = [entry for i, entry in enumerate(merged) if i not in deleted]
+    merged.extend(zip(paths[len(replace_positions) :], stages[len(replace_positions) :]))
+    merged.sort()
+    return [path for path, _ in merged], [stage for _, stage in merged]
+
+
+def _read_index(git_dir: str) -> Tuple[List[str], List[int]]:
+    """Read index paths and their stages as two parallel lists."""
+    hash_size = _hash_size(git_dir)
+    try:
+        paths, stages, link = _read_index_file(os.path.join(git_dir, "index"), hash_size)
+    except FileNotFoundError:
+        return [], []
+    except (struct.error, IndexError, ValueError) as e:
+        raise GitIndexError(f"Malformed index file: {e}")
+    except OSError as e:
+        raise GitIndexError(f"Cannot read index file: {e}")
+
+    if link:
+        try:
+            paths, stages = _merge_split_index(git_dir, paths, stages, link, hash_size)
+        except (struct.error, IndexError, ValueError) as e:
+            raise GitIndexError(f"Malformed split index: {e}")
+        except OSError as e:
+            raise GitIndexError(f"Cannot read shared index: {e}")
+    return paths, stages
+
+
+def read_index_entries(git_dir: str) -> List[Tuple[str, int]]:
+    """
+    Read (path, stage) entries from a repository's index.
+
+    Args:
+        git_dir: Path of the git directory
+
+    Returns:
+        List[Tuple[str, int]]: Entries sorted by path and stage; empty if the
+            repository has no index yet
+
+    Raises:
+        UnsupportedIndexError: If the index format is not supported
+        GitIndexError: If the index cannot be read or is malformed
+    """
+    return list(zip(*_read_index(git_dir)))
+
+
+def list_tracked_files(directory: str) -> Optional[List[str]]:
+    """
+    List tracked files below a directory, like `git ls-files` run inside it.
+
+    Args:
+        directory: Directory inside a git working tree
+
+    Returns:
+        Optional[List[str]]: Unique paths relative to `directory`, in index
+            order, or None if the directory is not inside a working tree
+
+    Raises:
+        UnsupportedIndexError: If the index format is not supported
+        GitIndexError: If the index cannot be read or is malformed
+    """
+    location = locate_repository(directory)
+    if location is None:
+        return None
+    root, git_dir = location
+
+    prefix = os.path.relpath(os.path.realpath(directory), root).replace(os.sep, "/")
+    prefix = "" if prefix == "." else prefix + "/"
+
+    paths, stages = _read_index(git_dir)
+    if any(stages):
+        # Unmerged paths have one entry per stage, next to each other
+        paths = [
+            path for i, path in enumerate(paths) if i == 0 or path != paths[i - 1]
+        ]
+    if prefix:
+        cut = len(prefix)
+        paths = [path[cut:] for path in paths if path.startswith(prefix)]
+    return paths
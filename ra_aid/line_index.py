@@ -0,0 +1,234 @@
+"""Line-offset index for reading windows of large text files.
+
+Reading a single range of lines from a large file should not mean decoding
+the whole file. A LineIndex records the byte offset of every STRIDE-th line,
+found by scanning the file's contents (mapped, or from the shared file cache
+for small files), so a window of lines can be located with
+at most STRIDE - 1 further newline searches and decoded on its own. Indexes are
+cached per (path, mtime, size), so paging through a file scans it only once.
+"""
+
+import codecs
+import mmap
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple, Union
+
+from ra_aid.file_cache import get_file_cache
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Every STRIDE-th line start is recorded in the index
+STRIDE = 64
+
+# Number of file indexes kept in memory
+MAX_CACHED_INDEXES = 32
+
+# File contents, either read into memory or mapped
+Buffer = Union[bytes, mmap.mmap]
+
+_STRIDE_LINES = re.compile(b"(?:[^\n]*\n){%d}" % STRIDE)
+
+
+@dataclass
+class LineWindow:
+    """A range of lines read from a file.
+
+    Attributes:
+        text: Decoded lines, with their line endings
+        start_line: Number of the first line returned (1-based)
+        end_line: Number of the last line returned, or start_line - 1 if none
+        total_lines: Number of lines in the file
+    """
+
+    text: str
+    start_line: int
+    end_line: int
+    total_lines: int
+
+    @property
+    def next_start_line(self) -> Optional[int]:
+        """Line to continue reading from, or None when the file is exhausted."""
+        return self.end_line + 1 if self.end_line < self.total_lines else None
+
+
+def is_line_indexable(encoding: str) -> bool:
+    """Whether newlines in an encoding are single b"\\n" bytes, so offsets can be indexed."""
+    name = codecs.lookup(encoding).name
+    return not name.startswith(("utf-16", "utf-32"))
+
+
+class LineIndex:
+    """Sparse byte offsets of the lines in one version of a file."""
+
+    def __init__(self, size: int, checkpoints: array, total_lines: int):
+        """
+        Args:
+            size: File size in bytes
+            checkpoints: Byte offset of lines 0, STRIDE, 2 * STRIDE, ... (0-based)
+            total_lines: Number of lines in the file
+        """
+        self.size = size
+        self.checkpoints = checkpoints
+        self.total_lines = total_lines
+
+    @classmethod
+    def build(cls, mm: Buffer) -> "LineIndex":
+        """Scan a file's contents, STRIDE lines per regex match."""
+        size = len(mm)
+        checkpoints = array("q", [0])
+        pos = 0
+        while True:
+            match = _STRIDE_LINES.match(mm, pos)
+            if match is None:
+                break
+            pos = match.end()
+            checkpoints.append(pos)
+
+        # Lines after the last checkpoint
+        total_lines = (len(checkpoints) - 1) * STRIDE
+        while pos < size:
+            newline = mm.find(b"\n", pos)
+            total_lines += 1
+            if newline < 0:
+                break
+            pos = newline + 1
+        if checkpoints[-1] == size:
+            # A trailing checkpoint at EOF does not start a line
+            checkpoints.pop()
+        return cls(size, checkpoints, total_lines)
+
+    def offset(self, mm: Buffer, line: int) -> int:
+        """
+        Byte offset where a 0-based line starts.
+
+        Lines past the end map to the file size.
+        """
+        if line >= self.total_lines:
+            return self.size
+        checkpoint, remainder = divmod(line, STRIDE)
+        pos = self.checkpoints[checkpoint]
+        for _ in range(remainder):
+            pos = mm.find(b"\n", pos) + 1
+        return pos
+
+
+_indexes: "OrderedDict[Hashable, LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _index_key(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return os.path.realpath(path), st.st_mtime_ns, st.st_size
+
+
+def get_line_index(path: str, mm: Buffer) -> LineIndex:
+    """Get the index for a file's contents, reusing the cached one while the file is unchanged."""
+    key = _index_key(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.size == len(mm):
+            _indexes.move_to_end(key)
+            return index
+
+    index = LineIndex.build(mm)
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def reset_line_indexes() -> None:
+    """Drop all cached indexes."""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def _clamp_range(
+    start_line: Optional[int], end_line: Optional[int], total_lines: int, max_lines: Optional[int]
+) -> Tuple[int, int]:
+    """Resolve a 1-based inclusive line range against a file's length."""
+    start = max(1, start_line or 1)
+    end = total_lines if end_line is None else min(end_line, total_lines)
+    if max_lines is not None:
+        end = min(end, start + max_lines - 1)
+    return start, max(end, start - 1)
+
+
+def _read_window_decoded(
+    path: str,
+    start_line: Optional[int],
+    end_line: Optional[int],
+    encoding: str,
+    max_lines: Optional[int],
+) -> LineWindow:
+    """Fallback for encodings whose newlines are not single bytes."""
+    with open(path, "r", encoding=encoding) as f:
+        lines = f.readlines()
+    start, end = _clamp_range(start_line, end_line, len(lines), max_lines)
+    return LineWindow("".join(lines[start - 1 : end]), start, end, len(lines))
+
+
+def _read_window_bytes(
+    path: str,
+    buffer: Buffer,
+    start_line: Optional[int],
+    end_line: Optional[int],
+    max_lines: Optional[int],
+) -> Tuple[bytes, int, int, int]:
+    """Slice a line range out of a file's contents."""
+    if not buffer:
+        return b"", 1, 0, 0
+    index = get_line_index(path, buffer)
+    start, end = _clamp_range(start_line, end_line, index.total_lines, max_lines)
+    begin = index.offset(buffer, start - 1)
+    stop = index.offset(buffer, end) if end >= start else begin
+    return buffer[begin:stop], start, end, index.total_lines
+
+
+def read_line_window(
+    path: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    encoding: str = "utf-8",
+    max_lines: Optional[int] = None,
+) -> LineWindow:
+    """
+    Read a range of lines without decoding the rest of the file.
+
+    Args:
+        path: File to read
+        start_line: First line to return, 1-based (default: first line)
+        end_line: Last line to return, inclusive (default: last line)
+        encoding: Text encoding of the file
+        max_lines: Upper bound on the number of lines returned
+
+    Returns:
+        LineWindow: The lines read and where they are in the file
+    """
+    if not is_line_indexable(encoding):
+        return _read_window_decoded(path, start_line, end_line, encoding, max_lines)
+
+    cache = get_file_cache()
+    if os.path.getsize(path) <= cache.max_file_bytes:
+        # Small files are served from the shared content cache
+        data = _read_window_bytes(path, cache.read_bytes(path), start_line, end_line, max_lines)
+    else:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = _read_window_bytes(path, mm, start_line, end_line, max_lines)
+    window_bytes, start, end, total_lines = data
+    # Translate line endings the way reading the file in text mode does
+    text = window_bytes.decode(encoding).replace("\r\n", "\n").replace("\r", "\n")
+    return LineWindow(text, start, end, total_lines)
+
+
+def count_lines(path: str, encoding: str = "utf-8") -> int:
+    """Number of lines in a file, counted the way read_line_window() counts them."""
+    return read_line_window(path, 1, 0, encoding).total_lines
@@ -1,5 +1,6 @@
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models import BaseChatModel
@@ -18,6 +19,7 @@ from ra_aid.model_detection import is_claude_37, is_deepseek_v3
 
 from ra_aid.database.repositories.config_repository import get_config_repository
 
+from .model_registry import get_model_registry
 from .models_params import models_params
 
 
@@ -363,8 +365,7 @@ def get_model_default_temperature(provider: str, model_name: str) -> float:
     """
     from ra_aid.models_params import models_params, DEFAULT_TEMPERATURE
 
-    # Extract the model_config directly from models_params
-    model_config = models_params.get(provider, {}).get(model_name, {})
+    model_config = get_model_registry().model_config(provider, model_name, models_params)
     default_temp = model_config.get("default_temperature")
 
     # Return the model's default_temperature if it exists, otherwise DEFAULT_TEMPERATURE
@@ -405,7 +406,7 @@ def create_llm_client(
         is_expert,
     )
 
-    model_config = models_params.get(provider, {}).get(model_name, {})
+    model_config = get_model_registry().model_config(provider, model_name, models_params)
 
     # Default to True for known providers that support temperature if not specified
     if "supports_temperature" not in model_config:
@@ -613,16 +614,109 @@ def create_llm_client(
         raise ValueError(f"Unsupported provider: {provider}")
 
 
+class LLMClientPool:
+    """Shares language model clients between agents, sub-agents and server sessions.
+
+    Every agent asking for the same provider, model, temperature and expert flag
+    gets the same client, and with it the client's keep-alive HTTP connections.
+    Clients are safe to invoke from several threads at once.
+
+    Each client is stored with a fingerprint of the configuration it was built
+    from: API key, base URL, timeouts, retries and context size. A client whose
+    configuration has since changed is evicted and rebuilt on next use.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple, Tuple[Tuple, BaseChatModel]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(provider: str, is_expert: bool) -> Tuple:
+        config = get_provider_config(provider, is_expert)
+        num_ctx_key = "expert_num_ctx" if is_expert else "num_ctx"
+        return (
+            tuple(sorted(config.items())),
+            get_env_var(name="LLM_REQUEST_TIMEOUT", default=LLM_REQUEST_TIMEOUT),
+            get_env_var(name="LLM_MAX_RETRIES", default=LLM_MAX_RETRIES),
+            get_config_repository().get(num_ctx_key, 262144),
+        )
+
+    def get(
+        self,
+        provider: str,
+        model_name: Optional[str],
+        temperature: Optional[float] = None,
+        is_expert: bool = False,
+    ) -> BaseChatModel:
+        """Return the shared client for a model, creating it if needed.
+
+        Args:
+            provider: The LLM provider to use
+            model_name: Name of the model to use
+            temperature: Optional temperature setting (0.0-2.0)
+            is_expert: Whether this is an expert model (uses deterministic output)
+
+        Returns:
+            Configured language model client
+        """
+        key = (provider, model_name, temperature, is_expert)
+        fingerprint = self._fingerprint(provider, is_expert)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                if entry[0] == fingerprint:
+                    return entry[1]
+                logger.debug("Evicting LLM client for %s/%s after config change", provider, model_name)
+                del self._clients[key]
+
+        client = create_llm_client(provider, model_name, temperature, is_expert)
+        with self._lock:
+            entry = self._clients.get(key)
+            # Another thread may have created one in the meantime
+            if entry is not None and entry[0] == fingerprint:
+                return entry[1]
+            self._clients[key] = (fingerprint, client)
+        return client
+
+    def clear(self) -> None:
+        """Drop all pooled clients."""
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+_client_pool = LLMClientPool()
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """Get the process-wide language model client pool."""
+    return _client_pool
+
+
+def reset_llm_client_pool() -> None:
+    """Drop all clients from the process-wide pool."""
+    _client_pool.clear()
+
+
 def initialize_llm(
     provider: str, model_name: str, temperature: float | None = None
 ) -> BaseChatModel:
-    """Initialize a language model client based on the specified provider and model."""
-    return create_llm_client(provider, model_name, temperature, is_expert=False)
+    """Initialize a language model client based on the specified provider and model.
+
+    Clients are shared through the process-wide LLMClientPool.
+    """
+    return _client_pool.get(provider, model_name, temperature, is_expert=False)
 
 
 def initialize_expert_llm(provider: str, model_name: str) -> BaseChatModel:
-    """Initialize an expert language model client based on the specified provider and model."""
-    return create_llm_client(provider, model_name, temperature=None, is_expert=True)
+    """Initialize an expert language model client based on the specified provider and model.
+
+    Clients are shared through the process-wide LLMClientPool.
+    """
+    return _client_pool.get(provider, model_name, temperature=None, is_expert=True)
 
 
 def validate_provider_env(provider: str) -> bool:
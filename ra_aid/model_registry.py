@@ -0,0 +1,308 @@
+"""
+Memoized model parameters and litellm model info.
+
+Creating an agent looks up the model's token limit, temperature and thinking
+support, backend and costs, and the CIAYN agent checks think-tag support on
+every step. ModelRegistry answers these lookups in constant time:
+
+- models_params is indexed per provider by normalized model name (lower case,
+  dashes removed, so claude-2 finds claude2). An index is rebuilt when its
+  provider's table is replaced or grows.
+- litellm model info is looked up once per model, failures included. Results
+  are cached per lookup function, so a patched or alternative lookup never sees
+  another's entries.
+
+Info from litellm's own lookup is persisted to .ra-aid/model_info.json when the
+.ra-aid directory exists. The file records the litellm version it was built
+with and is ignored after litellm is upgraded.
+"""
+
+import json
+import os
+import threading
+import weakref
+from importlib import metadata
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from ra_aid.logging_config import get_logger
+from ra_aid.models_params import DEFAULT_BASE_LATENCY
+
+logger = get_logger(__name__)
+
+# Location of the persisted model info, relative to the working directory
+MODEL_INFO_PATH = ".ra-aid/model_info.json"
+MODEL_INFO_FORMAT_VERSION = 1
+
+InfoKey = Tuple[Optional[str], Optional[str]]
+InfoLoader = Callable[..., Dict[str, Any]]
+
+
+def normalize_model_name(model_name: str) -> str:
+    """Return the name models_params entries are matched by, e.g. Claude-2 -> claude2."""
+    return model_name.replace("-", "").lower()
+
+
+def _default_params() -> Mapping[str, Any]:
+    # Resolved on every call so that replacing the module attribute takes effect
+    from ra_aid import models_params
+
+    return models_params.models_params
+
+
+def _litellm_get_model_info() -> InfoLoader:
+    from litellm import get_model_info
+
+    return get_model_info
+
+
+def _litellm_version() -> str:
+    try:
+        return metadata.version("litellm")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class ModelRegistry:
+    """Constant-time lookups of model parameters, token limits, latency and costs."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            path: File to load litellm model info from and persist it to, or None
+                to keep it in memory
+        """
+        self.path = path
+        # provider -> (provider table, its size when indexed, normalized name -> config)
+        self._indexes: Dict[str, Tuple[Mapping[str, Any], int, Dict[str, Dict[str, Any]]]] = {}
+        self._info: "weakref.WeakKeyDictionary[Any, Dict[InfoKey, Optional[Dict[str, Any]]]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._persisted: Dict[InfoKey, Optional[Dict[str, Any]]] = {}
+        # Whether each loader is litellm's own, whose results are persisted
+        self._persist_loaders: "weakref.WeakKeyDictionary[Any, bool]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        if path is not None:
+            self.load()
+
+    def _provider_index(
+        self, provider: Optional[str], params: Mapping[str, Any]
+    ) -> Tuple[Mapping[str, Any], Dict[str, Dict[str, Any]]]:
+        provider_models = params.get(provider)
+        if not isinstance(provider_models, Mapping):
+            return {}, {}
+        cached = self._indexes.get(provider)
+        if cached is None or cached[0] is not provider_models or cached[1] != len(provider_models):
+            index: Dict[str, Dict[str, Any]] = {}
+            for name, config in provider_models.items():
+                index.setdefault(normalize_model_name(name), config)
+            cached = (provider_models, len(provider_models), index)
+            with self._lock:
+                self._indexes[provider] = cached
+        return cached[0], cached[2]
+
+    def model_config(
+        self,
+        provider: Optional[str],
+        model_name: Optional[str],
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return a model's models_params entry, or an empty dict if it has none.
+
+        An exact name match is preferred over a normalized one. The entry is shared
+        and must not be modified.
+
+        Args:
+            provider: The LLM provider
+            model_name: Name of the model
+            params: Table to look in, by default ra_aid.models_params.models_params
+        """
+        provider_models, index = self._provider_index(
+            provider, _default_params() if params is None else params
+        )
+        if not model_name:
+            return {}
+        config = provider_models.get(model_name)
+        if config is None:
+            config = index.get(normalize_model_name(model_name), {})
+        return config
+
+    def model_info(
+        self,
+        model: Optional[str],
+        provider: Optional[str] = None,
+        loader: Optional[InfoLoader] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Return litellm's info for a model, or None if litellm does not know it.
+
+        Args:
+            model: Model name, including the provider prefix if provider is None
+            provider: Provider passed to litellm as custom_llm_provider
+            loader: Lookup function, by default litellm.get_model_info
+        """
+        if loader is None:
+            loader = _litellm_get_model_info()
+        key = (provider, model)
+        with self._lock:
+            cache = self._info.get(loader)
+            if cache is None:
+                persist = self.path is not None and loader is _litellm_get_model_info()
+                cache = self._info[loader] = dict(self._persisted) if persist else {}
+                self._persist_loaders[loader] = persist
+            if key in cache:
+                return cache[key]
+
+        try:
+            if provider is None:
+                info = loader(model)
+            else:
+                info = loader(model=model, custom_llm_provider=provider)
+            info = dict(info) if info else None
+        except Exception as e:
+            logger.debug(f"No litellm model info for {model} (provider {provider}): {e}")
+            info = None
+
+        with self._lock:
+            cache[key] = info
+            persist = self._persist_loaders.get(loader, False)
+            if persist:
+                self._persisted[key] = info
+        if persist:
+            self.save()
+        return info
+
+    def token_limit(
+        self,
+        provider: Optional[str],
+        model_name: Optional[str],
+        params: Optional[Mapping[str, Any]] = None,
+        loader: Optional[InfoLoader] = None,
+    ) -> Optional[int]:
+        """
+        Return a model's maximum input tokens, or None if unknown.
+
+        litellm's max_input_tokens is preferred over the models_params token_limit.
+        """
+        provider_model = model_name if not provider else f"{provider}/{model_name}"
+        info = self.model_info(provider_model, loader=loader)
+        max_input_tokens = info.get("max_input_tokens") if info else None
+        if max_input_tokens:
+            logger.debug(f"Using litellm token limit for {model_name}: {max_input_tokens}")
+            return max_input_tokens
+
+        max_input_tokens = self.model_config(provider, model_name, params).get("token_limit")
+        if max_input_tokens:
+            logger.debug(f"Found token limit for {provider}/{model_name}: {max_input_tokens}")
+        else:
+            logger.debug(f"Could not find token limit for {provider}/{model_name}")
+        return max_input_tokens
+
+    def latency_coefficient(
+        self,
+        provider: Optional[str],
+        model_name: Optional[str],
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> float:
+        """Return a model's latency coefficient, or DEFAULT_BASE_LATENCY if it has none."""
+        return self.model_config(provider, model_name, params).get(
+            "latency_coefficient", DEFAULT_BASE_LATENCY
+        )
+
+    def model_costs(
+        self,
+        model_name: Optional[str],
+        provider: Optional[str] = None,
+        loader: Optional[InfoLoader] = None,
+    ) -> Optional[Tuple[float, float]]:
+        """Return litellm's input and output cost per token for a model, or None if unknown."""
+        info = self.model_info(model_name, provider, loader)
+        if info is None:
+            return None
+        return (
+            info.get("input_cost_per_token") or 0.0,
+            info.get("output_cost_per_token") or 0.0,
+        )
+
+    def load(self) -> bool:
+        """Restore persisted litellm model info, returning whether it was found and current."""
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable model info {self.path}: {e}")
+            return False
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != MODEL_INFO_FORMAT_VERSION
+            or data.get("litellm_version") != _litellm_version()
+        ):
+            return False
+        try:
+            persisted = {
+                (provider, model): info for provider, model, info in data["models"]
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"Ignoring malformed model info {self.path}: {e}")
+            return False
+        with self._lock:
+            self._persisted = persisted
+        return True
+
+    def save(self) -> None:
+        """Persist litellm model info atomically; failures are only logged."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "version": MODEL_INFO_FORMAT_VERSION,
+                "litellm_version": _litellm_version(),
+                "models": [
+                    [provider, model, info]
+                    for (provider, model), info in self._persisted.items()
+                ],
+            }
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self.path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"Could not persist model info to {self.path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry.
+
+    It is created on first use, persisting litellm model info to .ra-aid/ in the
+    working directory if that directory exists.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            directory, _ = os.path.split(MODEL_INFO_PATH)
+            path = MODEL_INFO_PATH if os.path.isdir(directory) else None
+            _registry = ModelRegistry(os.path.abspath(path) if path else None)
+        return _registry
+
+
+def reset_model_registry() -> None:
+    """Drop the process-wide model registry (persisted model info is kept)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -0,0 +1,335 @@
+"""
+Commands that keep running in the background while the agent works.
+
+A background command runs on a pty like run_interactive_command, but without a
+timeout and without blocking the caller. A thread moves its output into an
+OutputRing, a fixed-size file used as a ring buffer, so a long build or a chatty
+dev server costs bounded memory and disk however much it prints. Callers get a
+handle back and use it to check status, read the tail of the output, or signal
+the command.
+
+Background commands belong to the BackgroundCommandsManager context they were
+started in; any still running when the context ends are terminated, then killed.
+"""
+
+import contextvars
+import logging
+import math
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Type
+
+from ra_aid.proc.interactive import (
+    OUTPUT_LIMIT,
+    TerminalCapture,
+    _command_env,
+    _signal_process_group,
+    create_process,
+    get_terminal_size,
+    pump_pty,
+)
+
+logger = logging.getLogger(__name__)
+
+# Output kept on disk per background command
+OUTPUT_RING_BYTES = 1024 * 1024
+
+# Background commands that may run at once in one context
+MAX_RUNNING_COMMANDS = 8
+
+# How long commands get to exit after SIGTERM when their context ends
+STOP_GRACE_SECONDS = 2.0
+
+# Create contextvar to hold the BackgroundCommands instance
+background_commands_var = contextvars.ContextVar("background_commands", default=None)
+
+
+class OutputRing:
+    """
+    The last `capacity` bytes written, kept in a fixed-size file.
+
+    Writes wrap around to the start of the file once it is full, overwriting
+    the oldest output, so the file never grows beyond capacity.
+    """
+
+    def __init__(self, path: str, capacity: int = OUTPUT_RING_BYTES):
+        self.path = path
+        self.capacity = capacity
+        self.total_bytes = 0
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        self._lock = threading.Lock()
+
+    def feed(self, data: bytes) -> None:
+        """Append output, overwriting the oldest once the ring is full."""
+        with self._lock:
+            total = self.total_bytes + len(data)
+            if len(data) > self.capacity:
+                data = data[-self.capacity :]
+            offset = (total - len(data)) % self.capacity
+            first = data[: self.capacity - offset]
+            os.pwrite(self._fd, first, offset)
+            if len(first) < len(data):
+                os.pwrite(self._fd, data[len(first) :], 0)
+            self.total_bytes = total
+
+    def tail(self, max_bytes: int) -> bytes:
+        """Return up to max_bytes of the most recent output."""
+        with self._lock:
+            size = min(max_bytes, self.total_bytes, self.capacity)
+            if size <= 0:
+                return b""
+            start = (self.total_bytes - size) % self.capacity
+            first = os.pread(self._fd, min(size, self.capacity - start), start)
+            if len(first) < size:
+                first += os.pread(self._fd, size - len(first), 0)
+            return first
+
+    def close(self) -> None:
+        with self._lock:
+            os.close(self._fd)
+
+
+class BackgroundCommand:
+    """A command running on a pty, its output streaming into an OutputRing."""
+
+    def __init__(self, handle: int, command: str, cmd: List[str], output_path: str, output_bytes: int):
+        self.handle = handle
+        self.command = command
+        self.started_at = time.monotonic()
+        self.cols, self.rows = get_terminal_size()
+        self.output = OutputRing(output_path, output_bytes)
+        try:
+            self.proc, self._master_fd = create_process(
+                cmd, _command_env(self.cols, self.rows), self.cols, self.rows
+            )
+        except Exception:
+            self.output.close()
+            raise
+        self._thread = threading.Thread(
+            target=self._pump, name=f"background-command-{handle}", daemon=True
+        )
+        self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            pump_pty(self.proc, self._master_fd, self.output, math.inf, output_fd=None)
+        except Exception as e:
+            logger.debug(f"Stopped reading output of background command {self.handle}: {e}")
+        finally:
+            os.close(self._master_fd)
+            self.proc.wait()
+
+    @property
+    def return_code(self) -> Optional[int]:
+        """The exit code, or None while the command is still running."""
+        return self.proc.poll()
+
+    @property
+    def running(self) -> bool:
+        return self.proc.poll() is None
+
+    @property
+    def runtime_seconds(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def tail(self, max_chars: int = OUTPUT_LIMIT) -> str:
+        """Return the end of the output as a terminal would show it."""
+        capture = TerminalCapture(self.cols, self.rows)
+        # Escape sequences make raw output longer than the text it renders to
+        capture.feed(self.output.tail(4 * max_chars))
+        try:
+            text = capture.render()
+        except Exception:
+            text = capture.raw_tail.decode("utf-8", errors="replace")
+        return text[-max_chars:]
+
+    def send_signal(self, sig: int) -> None:
+        """Send a signal to the command's process group."""
+        if self.running:
+            _signal_process_group(self.proc, sig)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        """Wait up to timeout seconds for the command to exit and return its exit code."""
+        try:
+            return self.proc.wait(timeout)
+        except Exception:
+            return self.proc.poll()
+
+    def close(self) -> None:
+        """Release the output file once the output has been read to the end."""
+        self._thread.join(STOP_GRACE_SECONDS)
+        self.output.close()
+
+
+class BackgroundCommands:
+    """
+    Background commands started in one context, addressed by integer handles.
+
+    Output files live in a temporary directory that is removed, along with any
+    commands still running, when stop_all() is called.
+    """
+
+    def __init__(
+        self,
+        output_bytes: int = OUTPUT_RING_BYTES,
+        max_running: int = MAX_RUNNING_COMMANDS,
+    ):
+        self.output_bytes = output_bytes
+        self.max_running = max_running
+        self._commands: Dict[int, BackgroundCommand] = {}
+        self._next_handle = 1
+        self._dir: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self, cmd: List[str], command: Optional[str] = None) -> BackgroundCommand:
+        """
+        Start a command in the background.
+
+        Args:
+            cmd: The command and its arguments
+            command: How to describe the command, defaults to cmd joined with spaces
+
+        Raises:
+            ValueError: If no command is provided
+            FileNotFoundError: If the command is not found in PATH
+            RuntimeError: If max_running commands are already running
+        """
+        if not cmd:
+            raise ValueError("No command provided.")
+        if shutil.which(cmd[0]) is None:
+            raise FileNotFoundError(f"Command '{cmd[0]}' not found in PATH.")
+        with self._lock:
+            running = sum(1 for c in self._commands.values() if c.running)
+            if running >= self.max_running:
+                raise RuntimeError(
+                    f"{running} background commands are already running; stop one before starting another"
+                )
+            if self._dir is None:
+                self._dir = tempfile.mkdtemp(prefix="ra-aid-background-")
+            handle = self._next_handle
+            self._next_handle += 1
+            background = BackgroundCommand(
+                handle,
+                command or " ".join(cmd),
+                cmd,
+                os.path.join(self._dir, f"{handle}.out"),
+                self.output_bytes,
+            )
+            self._commands[handle] = background
+            return background
+
+    def get(self, handle: int) -> BackgroundCommand:
+        """
+        Return the command with the given handle.
+
+        Raises:
+            ValueError: If there is no such command
+        """
+        with self._lock:
+            background = self._commands.get(handle)
+        if background is None:
+            raise ValueError(f"No background command with handle {handle}")
+        return background
+
+    def list(self) -> List[BackgroundCommand]:
+        with self._lock:
+            return list(self._commands.values())
+
+    def stop_all(self) -> None:
+        """Terminate commands still running, kill those that ignore it, and clean up."""
+        commands = self.list()
+        for background in commands:
+            background.send_signal(signal.SIGTERM)
+        deadline = time.monotonic() + STOP_GRACE_SECONDS
+        for background in commands:
+            if background.wait(max(0.0, deadline - time.monotonic())) is None:
+                background.send_signal(signal.SIGKILL)
+                background.wait()
+        for background in commands:
+            background.close()
+        with self._lock:
+            self._commands.clear()
+            if self._dir is not None:
+                shutil.rmtree(self._dir, ignore_errors=True)
+                self._dir = None
+
+
+class BackgroundCommandsManager:
+    """
+    Context manager for BackgroundCommands.
+
+    Background commands started within the context are stopped when it ends.
+
+    Example:
+        with BackgroundCommandsManager() as commands:
+            background = commands.start(["npm", "run", "dev"])
+            print(background.tail())
+    """
+
+    def __init__(self, output_bytes: int = OUTPUT_RING_BYTES, max_running: int = MAX_RUNNING_COMMANDS):
+        """
+        Initialize the BackgroundCommandsManager.
+
+        Args:
+            output_bytes: Output kept on disk per command
+            max_running: Background commands that may run at once
+        """
+        self.output_bytes = output_bytes
+        self.max_running = max_running
+        self.commands: Optional[BackgroundCommands] = None
+
+    def __enter__(self) -> BackgroundCommands:
+        """
+        Create the BackgroundCommands for this context and return it.
+
+        Returns:
+            BackgroundCommands: The initialized registry
+        """
+        self.commands = BackgroundCommands(self.output_bytes, self.max_running)
+        background_commands_var.set(self.commands)
+        return self.commands
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[object],
+    ) -> None:
+        """
+        Stop commands still running and reset the context.
+
+        Args:
+            exc_type: The exception type if an exception was raised
+            exc_val: The exception value if an exception was raised
+            exc_tb: The traceback if an exception was raised
+        """
+        try:
+            self.commands.stop_all()
+        finally:
+            background_commands_var.set(None)
+
+        # Don't suppress exceptions
+        return False
+
+
+def get_background_commands() -> BackgroundCommands:
+    """
+    Get the current BackgroundCommands instance.
+
+    Returns:
+        BackgroundCommands: The current registry
+
+    Raises:
+        RuntimeError: If no registry is set in the current context
+    """
+    commands = background_commands_var.get()
+    if commands is None:
+        raise RuntimeError(
+            "BackgroundCommands not initialized in current context. "
+            "Make sure to use BackgroundCommandsManager."
+        )
+    return commands
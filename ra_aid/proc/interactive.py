@@ -5,33 +5,95 @@ with full raw input passthrough for interactive commands.
 
 It uses a pseudo-tty and integrates pyte's HistoryScreen to simulate
 a terminal and capture the final scrollback history (non-blank lines).
+Output is fed to the emulator as it is read, and only a bounded tail of the
+raw bytes is kept, so memory use does not grow with the amount of output.
 The interface remains compatible with external callers expecting a tuple (output, return_code),
-where output is a bytes object (UTF-8 encoded).
+where output is a bytes object (UTF-8 encoded). arun_interactive_command offers the same
+for asyncio callers, without a thread per command.
 """
 
+import asyncio
+import codecs
 import errno
 import io
+import logging
+import math
 import os
+import re
+import selectors
 import shutil
 import signal
 import subprocess
 import sys
+import threading
 import time
-from typing import List, Optional, Tuple
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Protocol, Tuple
 
 import pyte
 from pyte.screens import HistoryScreen
+from wcwidth import wcwidth
 
 # Platform-specific imports
 if sys.platform == "win32":
     import msvcrt
-    import threading
 else:
-    import select
     import termios
     import tty
 
 
+# Captured output is limited to its last OUTPUT_LIMIT characters
+OUTPUT_LIMIT = 8000
+
+# Raw bytes kept for when terminal emulation fails; escape sequences make raw
+# output longer than the text it renders to
+RAW_TAIL_BYTES = 4 * OUTPUT_LIMIT
+
+# Scrollback lines kept by the terminal emulator
+HISTORY_LINES = 2000
+
+# Reads from the pty start small and double while output keeps filling them
+MIN_READ_BYTES = 1024
+MAX_READ_BYTES = 64 * 1024
+
+# How long a command stopped for printing nothing gets to exit before it is killed
+HANG_KILL_SECONDS = 5.0
+
+# Commands arun_interactive_command runs at once on one event loop
+ASYNC_COMMAND_LIMIT = 8
+
+# After the process exits, keep reading until the pty has been quiet this long;
+# output may still be in flight, or held open by processes it left running
+EXIT_DRAIN_SECONDS = 0.1
+
+# Stop reading this long after the process exits, even if output keeps coming,
+# and hang up on the background processes it left running that are still printing
+EXIT_DRAIN_LIMIT_SECONDS = 1.0
+
+# Control characters and color/style (SGR) codes; everything else is printable text
+_SPECIAL = re.compile(r"\x1b\[[0-9;:]*m|[\x00-\x1f\x7f-\x9f]")
+
+# Marks cells a tab moved the cursor past without writing them
+_UNWRITTEN = "\x00"
+_UNWRITTEN_RUN = re.compile(_UNWRITTEN + "+")
+
+# An escape sequence cut off at the end of a read
+_PARTIAL_ESCAPE = re.compile(r"\x1b(?:\[[0-9;:]*)?\Z")
+
+logger = logging.getLogger(__name__)
+
+# Concurrency limiters for async commands, one per event loop
+_COMMAND_SLOTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_command_limit = ASYNC_COMMAND_LIMIT
+
+# Event loop synchronous tools run commands on, when one is registered
+_command_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
 def create_process(
     cmd: List[str],
     env: Optional[dict] = None,
@@ -133,14 +195,481 @@ def render_line(line, columns: int) -> str:
         return str(line)
 
 
+class TerminalCapture:
+    """
+    Captures a process's output as it arrives, emulating a terminal only when needed.
+
+    Most commands print plain lines: text, line breaks, carriage returns, tabs and
+    color codes. While that is all the output contains, it is laid out with a
+    cheap line model that matches what the terminal emulator would show, keeping
+    the last lines the emulator would keep. The first cursor-movement or
+    screen-control sequence switches to a pyte HistoryScreen, seeded with the
+    lines seen so far, which then handles the rest of the output. Either way the
+    work happens while the process runs rather than all at once when it exits.
+
+    Only the last raw_limit bytes of raw output are kept, as a fallback in case
+    emulation fails.
+    """
+
+    def __init__(self, cols: int, rows: int, raw_limit: int = RAW_TAIL_BYTES):
+        self.cols = cols
+        self.rows = rows
+        self.screen: Optional[HistoryScreen] = None
+        self.stream: Optional[pyte.Stream] = None
+        self.total_bytes = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._raw = bytearray()
+        self._raw_limit = raw_limit
+        self._error: Optional[Exception] = None
+        # Plain-text state: finished screen lines (as many as the emulator would keep
+        # alongside the current line), the current line and the cursor column
+        self._lines: Deque[str] = deque(maxlen=HISTORY_LINES + rows - 1)
+        self._line = ""
+        self._col = 0
+        # Start of an escape sequence split across reads
+        self._pending = ""
+        # Output may be fed from several reader threads on Windows
+        self._lock = threading.Lock()
+
+    @property
+    def emulating(self) -> bool:
+        """Whether output is being fed to the terminal emulator."""
+        return self.stream is not None
+
+    @property
+    def raw_tail(self) -> bytes:
+        """The most recent raw output, at most raw_limit bytes."""
+        with self._lock:
+            return bytes(self._raw)
+
+    def feed(self, data: bytes) -> None:
+        """Add a chunk of process output."""
+        with self._lock:
+            self.total_bytes += len(data)
+            self._raw += data
+            if len(self._raw) > self._raw_limit:
+                del self._raw[: len(self._raw) - self._raw_limit]
+            if self._error is None:
+                try:
+                    self._feed_text(self._decoder.decode(data))
+                except Exception as e:
+                    # Keep the raw tail; render() reports the failure
+                    self._error = e
+
+    def _feed_text(self, text: str) -> None:
+        if self.stream is not None:
+            self.stream.feed(text)
+            return
+        text = self._pending + text
+        self._pending = ""
+        partial = _PARTIAL_ESCAPE.search(text)
+        if partial:
+            self._pending = text[partial.start() :]
+            text = text[: partial.start()]
+        stop = self._feed_plain(text)
+        if stop is not None:
+            self._start_emulation()
+            self.stream.feed(text[stop:] + self._pending)
+            self._pending = ""
+
+    def _feed_plain(self, text: str) -> Optional[int]:
+        """Lay out plain text, returning the offset of the first sequence that needs emulation."""
+        pos = 0
+        for match in _SPECIAL.finditer(text):
+            start = match.start()
+            if start > pos:
+                stop = self._put(text, pos, start)
+                if stop is not None:
+                    return stop
+            token = match.group()
+            if token == "\r":
+                self._col = 0
+            elif token == "\n":
+                if self._col:
+                    # A bare line feed keeps the column, which only the emulator tracks
+                    return start
+                self._lines.append(self._line)
+                self._line = ""
+            elif token == "\t":
+                # Tabs move the cursor without writing to the cells they skip
+                target = min((self._col // 8 + 1) * 8, self.cols - 1)
+                if target > len(self._line):
+                    self._line += _UNWRITTEN * (target - len(self._line))
+                self._col = target
+            elif token == "\x07" or token.endswith("m"):
+                # Bells and color/style codes do not change the text
+                pass
+            else:
+                return start
+            pos = match.end()
+        if pos < len(text):
+            return self._put(text, pos, len(text))
+        return None
+
+    def _put(self, text: str, start: int, end: int) -> Optional[int]:
+        """Write printable text at the cursor, wrapping at the screen width."""
+        run = text[start:end]
+        if not run.isascii():
+            for i, char in enumerate(run):
+                if ord(char) > 127 and wcwidth(char) != 1:
+                    # Wide and zero-width characters are left to the emulator
+                    self._put(text, start, start + i)
+                    return start + i
+        cols = self.cols
+        while run:
+            if self._col >= cols:
+                self._lines.append(self._line)
+                self._line = ""
+                self._col = 0
+            part = run[: cols - self._col]
+            run = run[len(part) :]
+            line = self._line
+            if self._col == len(line):
+                self._line = line + part
+            else:
+                self._line = line[: self._col] + part + line[self._col + len(part) :]
+            self._col += len(part)
+        return None
+
+    def _start_emulation(self) -> None:
+        """Switch to the terminal emulator, replaying the screen built so far."""
+        self.screen = HistoryScreen(self.cols, self.rows, history=HISTORY_LINES, ratio=0.5)
+        self.stream = pyte.Stream(self.screen)
+        replay = "\r\n".join([*self._lines, self._line])
+        if self._col != len(self._line):
+            replay += "\r" + self._line[: self._col]
+        # Skip unwritten cells with cursor movements, as the tabs that left them did
+        self.stream.feed(_UNWRITTEN_RUN.sub(lambda m: f"\x1b[{len(m.group())}C", replay))
+        self._lines.clear()
+        self._line = ""
+
+    def _plain_lines(self) -> List[str]:
+        lines = [*self._lines, self._line]
+        # Like the emulator, show unwritten cells as blanks on screen and drop them
+        # from the scrollback
+        split = max(len(lines) - self.rows, 0)
+        return [line.replace(_UNWRITTEN, "") for line in lines[:split]] + [
+            line.replace(_UNWRITTEN, " ") for line in lines[split:]
+        ]
+
+    def _screen_lines(self) -> List[str]:
+        screen = self.screen
+        cols = self.cols
+
+        # Get all history lines (top and bottom) and current display
+        all_lines = []
+
+        # Add history.top lines (older history)
+        if hasattr(screen.history.top, "keys"):
+            # Dictionary-like object
+            for line_num in sorted(screen.history.top.keys()):
+                line = screen.history.top[line_num]
+                all_lines.append(render_line(line, cols))
+        else:
+            # Deque or other iterable
+            for line in screen.history.top:
+                all_lines.append(render_line(line, cols))
+
+        # Add current display lines
+        all_lines.extend([render_line(line, cols) for line in screen.display])
+
+        # Add history.bottom lines (newer history)
+        if hasattr(screen.history.bottom, "keys"):
+            # Dictionary-like object
+            for line_num in sorted(screen.history.bottom.keys()):
+                line = screen.history.bottom[line_num]
+                all_lines.append(render_line(line, cols))
+        else:
+            # Deque or other iterable
+            for line in screen.history.bottom:
+                all_lines.append(render_line(line, cols))
+        return all_lines
+
+    def render(self) -> str:
+        """
+        Render the scrollback history and screen as trimmed, non-empty lines.
+
+        Raises:
+            Exception: Whatever error terminal emulation ran into
+        """
+        with self._lock:
+            if self._error is None:
+                try:
+                    self._feed_text(self._decoder.decode(b"", final=True))
+                    if self._pending:
+                        # Output ended inside an escape sequence
+                        self._start_emulation()
+                        self.stream.feed(self._pending)
+                        self._pending = ""
+                except Exception as e:
+                    self._error = e
+            if self._error is not None:
+                raise self._error
+            all_lines = self._plain_lines() if self.stream is None else self._screen_lines()
+
+        # Trim out empty lines to get only meaningful lines
+        # Also strip trailing whitespace from each line
+        trimmed_lines = [line.rstrip() for line in all_lines if line and line.strip()]
+        return "\n".join(trimmed_lines)
+
+
+@dataclass
+class CommandRun:
+    """How a command's run went: how long it took, its longest silence and how it ended."""
+
+    duration_seconds: float = 0.0
+    # Longest stretch without output while the command was running
+    max_output_gap_seconds: float = 0.0
+    # Stopped for running past twice its expected runtime
+    timed_out: bool = False
+    # Stopped for printing nothing for longer than its idle timeout
+    hung: bool = False
+
+    @property
+    def was_terminated(self) -> bool:
+        return self.timed_out or self.hung
+
+
+class OutputSink(Protocol):
+    """Anything pump_pty can feed a process's output to, such as a TerminalCapture."""
+
+    def feed(self, data: bytes) -> None: ...
+
+
+class ExitNotifier:
+    """
+    Makes a process's exit observable as a readable file descriptor.
+
+    Uses a pidfd where the platform provides one (Linux 5.3+). Elsewhere a
+    thread waits on the process and writes to a pipe when it exits; unlike a
+    SIGCHLD handler this works from any thread and leaves signal dispositions
+    alone.
+    """
+
+    def __init__(self, proc: subprocess.Popen):
+        self._fd: Optional[int] = None
+        if hasattr(os, "pidfd_open"):
+            try:
+                self._fd = os.pidfd_open(proc.pid)
+            except OSError:
+                # ENOSYS on kernels without pidfd support
+                pass
+        if self._fd is None:
+            self._fd, write_fd = os.pipe()
+            threading.Thread(target=self._wait, args=(proc, write_fd), daemon=True).start()
+
+    @staticmethod
+    def _wait(proc: subprocess.Popen, write_fd: int) -> None:
+        # The thread owns write_fd so it is never closed while a write is pending
+        try:
+            proc.wait()
+            os.write(write_fd, b"x")
+        except OSError:
+            pass
+        finally:
+            os.close(write_fd)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def _signal_process_group(proc: subprocess.Popen, sig: int) -> None:
+    """Send a signal to the process group the command runs in, if it still exists."""
+    try:
+        pgid = os.getpgid(proc.pid)
+    except ProcessLookupError:
+        # The command has exited; it led its group, which may still have members
+        pgid = proc.pid
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def pump_pty(
+    proc: subprocess.Popen,
+    master_fd: int,
+    capture: "OutputSink",
+    expected_runtime_seconds: float,
+    stdin_fd: Optional[int] = None,
+    output_fd: Optional[int] = 1,
+    idle_timeout_seconds: Optional[float] = None,
+    run: Optional[CommandRun] = None,
+) -> CommandRun:
+    """
+    Move a pty-attached process's output into a TerminalCapture (or other sink) until it is done.
+
+    Waits on the pty, the process's exit and (optionally) stdin with a single
+    selector, so the loop only wakes when there is something to do. Reads grow
+    from MIN_READ_BYTES to MAX_READ_BYTES while output keeps filling them. Once
+    the process exits, the remaining output is drained until the pty reports
+    end of file or stays quiet for EXIT_DRAIN_SECONDS, and for at most
+    EXIT_DRAIN_LIMIT_SECONDS, so processes left running in the background
+    cannot hold the command open.
+
+    The timeout is tracked against monotonic deadlines: at 2x
+    expected_runtime_seconds the process group is sent SIGTERM, and at 3x it is
+    sent SIGKILL if it is still running. With idle_timeout_seconds, a process
+    that prints nothing for that long is considered hung and is sent SIGTERM,
+    then SIGKILL HANG_KILL_SECONDS later.
+
+    Args:
+        proc: The process attached to the pty
+        master_fd: Non-blocking master side of the pty
+        capture: Receives everything the process prints
+        expected_runtime_seconds: Expected runtime the timeout deadlines derive from,
+            or math.inf for no timeout
+        stdin_fd: File descriptor whose input is forwarded to the process, if any
+        output_fd: File descriptor output is echoed to, or None to not echo it
+        idle_timeout_seconds: Longest silence before the process counts as hung, if any
+        run: CommandRun to fill in, defaults to a new one
+
+    Returns:
+        CommandRun: How long the process ran, its longest silence and how it was stopped.
+    """
+    run = run if run is not None else CommandRun()
+    start = last_output = time.monotonic()
+    terminate_at = start + 2 * expected_runtime_seconds
+    kill_at = start + 3 * expected_runtime_seconds
+    idle_limit = idle_timeout_seconds if idle_timeout_seconds is not None else math.inf
+    exited_at: Optional[float] = None
+    drain_until: Optional[float] = None
+    read_size = MIN_READ_BYTES
+
+    exit_notifier = ExitNotifier(proc)
+    selector = selectors.DefaultSelector()
+    selector.register(master_fd, selectors.EVENT_READ, "output")
+    selector.register(exit_notifier.fileno(), selectors.EVENT_READ, "exit")
+    if stdin_fd is not None:
+        selector.register(stdin_fd, selectors.EVENT_READ, "input")
+
+    try:
+        while True:
+            now = time.monotonic()
+            if drain_until is not None and now >= drain_until:
+                if now >= exited_at + EXIT_DRAIN_LIMIT_SECONDS:
+                    # Still printing; hang up on what it left running, as closing a terminal would
+                    _signal_process_group(proc, signal.SIGHUP)
+                break
+            if exited_at is None and not run.was_terminated:
+                if now >= terminate_at:
+                    _signal_process_group(proc, signal.SIGTERM)
+                    run.timed_out = True
+                elif now - last_output >= idle_limit:
+                    _signal_process_group(proc, signal.SIGTERM)
+                    run.hung = True
+                    kill_at = min(kill_at, now + HANG_KILL_SECONDS)
+            elif exited_at is None and now >= kill_at:
+                _signal_process_group(proc, signal.SIGKILL)
+                kill_at = math.inf
+
+            if drain_until is not None:
+                deadline = drain_until
+            elif run.was_terminated:
+                deadline = kill_at
+            else:
+                deadline = min(terminate_at, last_output + idle_limit)
+            timeout = None if deadline == math.inf else max(0.0, deadline - now)
+
+            events = selector.select(timeout)
+            now = time.monotonic()
+            for key, _ in events:
+                if key.data == "output":
+                    try:
+                        data = os.read(master_fd, read_size)
+                    except BlockingIOError:
+                        continue
+                    except OSError as e:
+                        if e.errno != errno.EIO:
+                            raise
+                        # Every process holding the pty has closed it
+                        data = b""
+                    if not data:  # EOF detected.
+                        return run
+                    if exited_at is None:
+                        run.max_output_gap_seconds = max(run.max_output_gap_seconds, now - last_output)
+                    last_output = now
+                    capture.feed(data)
+                    if output_fd is not None:
+                        os.write(output_fd, data)
+                    if len(data) == read_size:
+                        read_size = min(read_size * 2, MAX_READ_BYTES)
+                    elif len(data) < read_size // 4:
+                        read_size = max(read_size // 2, MIN_READ_BYTES)
+                    if drain_until is not None:
+                        drain_until = min(
+                            time.monotonic() + EXIT_DRAIN_SECONDS,
+                            exited_at + EXIT_DRAIN_LIMIT_SECONDS,
+                        )
+                elif key.data == "input":
+                    try:
+                        input_data = os.read(stdin_fd, 1024)
+                    except OSError:
+                        input_data = b""
+                    if input_data:
+                        os.write(master_fd, input_data)
+                    else:
+                        selector.unregister(stdin_fd)
+                else:
+                    selector.unregister(exit_notifier.fileno())
+                    exited_at = now
+                    drain_until = time.monotonic() + EXIT_DRAIN_SECONDS
+    finally:
+        end = exited_at if exited_at is not None else time.monotonic()
+        run.duration_seconds = end - start
+        run.max_output_gap_seconds = max(run.max_output_gap_seconds, end - min(last_output, end))
+        selector.close()
+        exit_notifier.close()
+    return run
+
+
+def _validate_command(cmd: List[str], expected_runtime_seconds: float) -> None:
+    if not cmd:
+        raise ValueError("No command provided.")
+    if shutil.which(cmd[0]) is None:
+        raise FileNotFoundError(f"Command '{cmd[0]}' not found in PATH.")
+    if expected_runtime_seconds <= 0 or expected_runtime_seconds > 1800:
+        raise ValueError(
+            "expected_runtime_seconds must be between 1 and 1800 seconds (30 minutes)"
+        )
+
+
+def _command_env(cols: int, rows: int) -> dict:
+    """Environment for commands: non-interactive, unpaged, sized to the terminal."""
+    env = os.environ.copy()
+    env.update(
+        {
+            "DEBIAN_FRONTEND": "noninteractive",
+            "GIT_PAGER": "",
+            "PYTHONUNBUFFERED": "1",
+            "CI": "true",
+            "LANG": "C.UTF-8",
+            "LC_ALL": "C.UTF-8",
+            "COLUMNS": str(cols),
+            "LINES": str(rows),
+            "FORCE_COLOR": "1",
+            "GIT_TERMINAL_PROMPT": "0",
+            "PYTHONDONTWRITEBYTECODE": "1",
+            "NODE_OPTIONS": "--unhandled-rejections=strict",
+        }
+    )
+    return env
+
+
 def run_interactive_command(
-    cmd: List[str], expected_runtime_seconds: int = 30
+    cmd: List[str],
+    expected_runtime_seconds: int = 30,
+    idle_timeout_seconds: Optional[float] = None,
+    run: Optional[CommandRun] = None,
 ) -> Tuple[bytes, int]:
     """
     Runs an interactive command with output capture, capturing final scrollback history.
 
     This function provides a cross-platform way to run interactive commands with:
-    - Full terminal emulation using pyte's HistoryScreen
+    - Full terminal emulation using pyte's HistoryScreen, fed as output arrives
     - Real-time display of command output
     - Input forwarding when running in an interactive terminal
     - Timeout handling to prevent runaway processes
@@ -155,7 +684,7 @@ def run_interactive_command(
 
     On Unix:
     - Uses pseudo-terminals (PTY) for full terminal emulation
-    - Uses select() for non-blocking I/O
+    - Waits on output, input, process exit and the timeout with one selector (see pump_pty)
     - Handles raw terminal mode for proper input forwarding
     - Uses process groups for proper signal handling
 
@@ -165,6 +694,10 @@ def run_interactive_command(
         If process exceeds 2x this value, it will be terminated gracefully.
         If process exceeds 3x this value, it will be killed forcefully.
         Must be between 1 and 1800 seconds (30 minutes).
+      idle_timeout_seconds: If given, a process printing nothing for this long is
+        considered hung and stopped (Unix only).
+      run: If given, filled in with the run's duration, longest silence between
+        output and whether it was stopped.
 
     Returns:
       A tuple of (captured_output, return_code), where captured_output is a UTF-8 encoded
@@ -176,63 +709,32 @@ def run_interactive_command(
       ValueError: If expected_runtime_seconds is less than or equal to 0 or greater than 1800.
       RuntimeError: If an error occurs during execution.
     """
-    if not cmd:
-        raise ValueError("No command provided.")
-    if shutil.which(cmd[0]) is None:
-        raise FileNotFoundError(f"Command '{cmd[0]}' not found in PATH.")
-    if expected_runtime_seconds <= 0 or expected_runtime_seconds > 1800:
-        raise ValueError(
-            "expected_runtime_seconds must be between 1 and 1800 seconds (30 minutes)"
-        )
+    _validate_command(cmd, expected_runtime_seconds)
+    run = run if run is not None else CommandRun()
 
     cols, rows = get_terminal_size()
-
-    # Set up environment variables for the subprocess using detected terminal size.
-    env = os.environ.copy()
-    env.update(
-        {
-            "DEBIAN_FRONTEND": "noninteractive",
-            "GIT_PAGER": "",
-            "PYTHONUNBUFFERED": "1",
-            "CI": "true",
-            "LANG": "C.UTF-8",
-            "LC_ALL": "C.UTF-8",
-            "COLUMNS": str(cols),
-            "LINES": str(rows),
-            "FORCE_COLOR": "1",
-            "GIT_TERMINAL_PROMPT": "0",
-            "PYTHONDONTWRITEBYTECODE": "1",
-            "NODE_OPTIONS": "--unhandled-rejections=strict",
-        }
-    )
+    env = _command_env(cols, rows)
 
     # Create process based on platform
     proc, master_fd = create_process(cmd, env, cols, rows)
 
-    captured_data = []
-    start_time = time.time()
-    was_terminated = False
-
-    def check_timeout():
-        elapsed = time.time() - start_time
-        if elapsed > 3 * expected_runtime_seconds:
-            if sys.platform == "win32":
-                proc.kill()
-            else:
-                os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
-            return True
-        elif elapsed > 2 * expected_runtime_seconds:
-            if sys.platform == "win32":
-                proc.terminate()
-            else:
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-            return True
-        return False
+    capture = TerminalCapture(cols, rows)
 
     if sys.platform == "win32":
         # Windows implementation using threads for I/O
         running = True
         stdin_thread = None
+        start_time = time.monotonic()
+
+        def check_timeout():
+            elapsed = time.monotonic() - start_time
+            if elapsed > 3 * expected_runtime_seconds:
+                proc.kill()
+                return True
+            elif elapsed > 2 * expected_runtime_seconds:
+                proc.terminate()
+                return True
+            return False
 
         def read_stdout():
             nonlocal running
@@ -241,7 +743,7 @@ def run_interactive_command(
                     data = proc.stdout.read(1024)
                     if not data:
                         break
-                    captured_data.append(data)
+                    capture.feed(data)
                     sys.stdout.buffer.write(data)
                     sys.stdout.buffer.flush()
                 except (OSError, IOError):
@@ -257,7 +759,7 @@ def run_interactive_command(
                     data = proc.stderr.read(1024)
                     if not data:
                         break
-                    captured_data.append(data)
+                    capture.feed(data)
                     sys.stderr.buffer.write(data)
                     sys.stderr.buffer.flush()
                 except (OSError, IOError):
@@ -298,12 +800,13 @@ def run_interactive_command(
             # Main thread monitors timeout
             while proc.poll() is None:
                 if check_timeout():
-                    was_terminated = True
+                    run.timed_out = True
                     break
                 time.sleep(0.1)
         except KeyboardInterrupt:
             proc.terminate()
         finally:
+            run.duration_seconds = time.monotonic() - start_time
             running = False
             # Wait for threads to finish
             stdout_thread.join(1.0)
@@ -319,7 +822,7 @@ def run_interactive_command(
             if proc.stdin:
                 proc.stdin.close()
     else:
-        # Unix implementation using select and pty
+        # Unix implementation using a pty
         try:
             stdin_fd = sys.stdin.fileno()
         except (AttributeError, io.UnsupportedOperation):
@@ -330,31 +833,15 @@ def run_interactive_command(
             old_settings = termios.tcgetattr(stdin_fd)
             tty.setraw(stdin_fd)
             try:
-                while True:
-                    if check_timeout():
-                        was_terminated = True
-                        break
-                    # Use a finite timeout to avoid indefinite blocking.
-                    rlist, _, _ = select.select([master_fd, stdin_fd], [], [], 1.0)
-                    if master_fd in rlist:
-                        try:
-                            data = os.read(master_fd, 1024)
-                        except OSError as e:
-                            if e.errno == errno.EIO:
-                                break
-                            else:
-                                raise
-                        if not data:  # EOF detected.
-                            break
-                        captured_data.append(data)
-                        os.write(1, data)
-                    if stdin_fd in rlist:
-                        try:
-                            input_data = os.read(stdin_fd, 1024)
-                        except OSError:
-                            input_data = b""
-                        if input_data:
-                            os.write(master_fd, input_data)
+                pump_pty(
+                    proc,
+                    master_fd,
+                    capture,
+                    expected_runtime_seconds,
+                    stdin_fd=stdin_fd,
+                    idle_timeout_seconds=idle_timeout_seconds,
+                    run=run,
+                )
             except KeyboardInterrupt:
                 proc.terminate()
             finally:
@@ -362,24 +849,14 @@ def run_interactive_command(
         else:
             # Non-interactive mode.
             try:
-                while True:
-                    if check_timeout():
-                        was_terminated = True
-                        break
-                    rlist, _, _ = select.select([master_fd], [], [], 1.0)
-                    if not rlist:
-                        continue
-                    try:
-                        data = os.read(master_fd, 1024)
-                    except OSError as e:
-                        if e.errno == errno.EIO:
-                            break
-                        else:
-                            raise
-                    if not data:  # EOF detected.
-                        break
-                    captured_data.append(data)
-                    os.write(1, data)
+                pump_pty(
+                    proc,
+                    master_fd,
+                    capture,
+                    expected_runtime_seconds,
+                    idle_timeout_seconds=idle_timeout_seconds,
+                    run=run,
+                )
             except KeyboardInterrupt:
                 proc.terminate()
 
@@ -388,56 +865,23 @@ def run_interactive_command(
     # Wait for the process to finish
     proc.wait()
 
-    # Ensure we have captured data even if the screen processing failed
-    raw_output = b"".join(captured_data)
-
-    # Process the captured output through a fresh screen
-    try:
-        # Create a new screen and stream for final processing
-        screen = HistoryScreen(cols, rows, history=2000, ratio=0.5)
-        stream = pyte.Stream(screen)
-
-        # Feed all captured data at once to get the final state
-        raw_output = b"".join(captured_data)
-        decoded = raw_output.decode("utf-8", errors="ignore")
-        stream.feed(decoded)
-
-        # Get all history lines (top and bottom) and current display
-        all_lines = []
-
-        # Add history.top lines (older history)
-        if hasattr(screen.history.top, "keys"):
-            # Dictionary-like object
-            for line_num in sorted(screen.history.top.keys()):
-                line = screen.history.top[line_num]
-                all_lines.append(render_line(line, cols))
-        else:
-            # Deque or other iterable
-            for i, line in enumerate(screen.history.top):
-                all_lines.append(render_line(line, cols))
-
-        # Add current display lines
-        all_lines.extend([render_line(line, cols) for line in screen.display])
-
-        # Add history.bottom lines (newer history)
-        if hasattr(screen.history.bottom, "keys"):
-            # Dictionary-like object
-            for line_num in sorted(screen.history.bottom.keys()):
-                line = screen.history.bottom[line_num]
-                all_lines.append(render_line(line, cols))
-        else:
-            # Deque or other iterable
-            for i, line in enumerate(screen.history.bottom):
-                all_lines.append(render_line(line, cols))
+    output = _finish_output(capture, run, expected_runtime_seconds, idle_timeout_seconds)
+    return output, proc.returncode
 
-        # Trim out empty lines to get only meaningful lines
-        # Also strip trailing whitespace from each line
-        trimmed_lines = [line.rstrip() for line in all_lines if line and line.strip()]
 
-        final_output = "\n".join(trimmed_lines)
+def _finish_output(
+    capture: TerminalCapture,
+    run: CommandRun,
+    expected_runtime_seconds: float,
+    idle_timeout_seconds: Optional[float] = None,
+) -> bytes:
+    """Render captured output, note a timeout and limit it to OUTPUT_LIMIT characters."""
+    try:
+        final_output = capture.render()
     except Exception as e:
         # If anything goes wrong with screen processing, fall back to raw output
         print(f"Warning: Error processing terminal output: {e}", file=sys.stderr)
+        raw_output = capture.raw_tail
         try:
             # Decode raw output, strip trailing whitespace from each line
             decoded = raw_output.decode("utf-8", errors="replace")
@@ -448,21 +892,234 @@ def run_interactive_command(
             final_output = raw_output.decode("utf-8", errors="replace").strip()
 
     # Add timeout message if process was terminated due to timeout.
-    if was_terminated:
+    if run.timed_out:
         timeout_msg = f"\n[Process exceeded timeout ({expected_runtime_seconds} seconds expected)]"
         final_output += timeout_msg
+    elif run.hung:
+        final_output += (
+            f"\n[Process produced no output for {idle_timeout_seconds:g} seconds and was stopped "
+            f"as hung]"
+        )
 
-    # Limit output to the last 8000 bytes
+    # Limit output to the last OUTPUT_LIMIT characters
     if isinstance(final_output, str):
-        final_output = final_output[-8000:]
+        final_output = final_output[-OUTPUT_LIMIT:]
         final_output = final_output.encode("utf-8")
     elif isinstance(final_output, bytes):
-        final_output = final_output[-8000:]
+        final_output = final_output[-OUTPUT_LIMIT:]
     else:
         # Handle any unexpected type
-        final_output = str(final_output)[-8000:].encode("utf-8")
+        final_output = str(final_output)[-OUTPUT_LIMIT:].encode("utf-8")
+
+    return final_output
+
+
+def _command_slots() -> asyncio.Semaphore:
+    """Return the running event loop's limiter for concurrent async commands."""
+    loop = asyncio.get_running_loop()
+    slots = _COMMAND_SLOTS.get(loop)
+    if slots is None:
+        slots = _COMMAND_SLOTS[loop] = asyncio.Semaphore(_async_command_limit)
+    return slots
+
+
+def set_async_command_limit(limit: int) -> None:
+    """
+    Set how many commands arun_interactive_command runs at once per event loop.
+
+    Commands started beyond the limit wait for a running one to finish. The new
+    limit applies to event loops that have not run a command yet.
+    """
+    global _async_command_limit
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    _async_command_limit = limit
+    _COMMAND_SLOTS.clear()
+
+
+def set_command_loop(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """
+    Register the event loop that commands from synchronous tools should run on.
+
+    The server registers its loop at startup so agents running in worker threads
+    share its pty handling and concurrency limit; pass None to unregister it.
+    """
+    global _command_loop
+    _command_loop = loop
+
+
+def get_command_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """
+    Return the registered command loop, if it is running and usable from this thread.
+
+    Code running on the loop itself gets None, since waiting there for a command
+    scheduled on the same loop would never finish.
+    """
+    loop = _command_loop
+    if loop is None or not loop.is_running():
+        return None
+    try:
+        if asyncio.get_running_loop() is loop:
+            return None
+    except RuntimeError:
+        pass
+    return loop
+
+
+async def arun_interactive_command(
+    cmd: List[str],
+    expected_runtime_seconds: int = 30,
+    idle_timeout_seconds: Optional[float] = None,
+    run: Optional[CommandRun] = None,
+) -> Tuple[bytes, int]:
+    """
+    Async counterpart of run_interactive_command for running many commands at once.
+
+    The command runs on a pty created with asyncio.create_subprocess_exec, and its
+    output is read by the event loop as it arrives, so no thread is tied up per
+    command. Output capture, truncation and the 2x/3x timeout behave as in
+    run_interactive_command, but output is not echoed and no input is forwarded.
+    At most a limited number of commands run at once per event loop (see
+    set_async_command_limit); the rest wait their turn.
+
+    On Windows, which has no ptys, the command runs in a worker thread.
+
+    Args:
+      cmd: A list containing the command and its arguments.
+      expected_runtime_seconds: Expected runtime in seconds, defaults to 30.
+      idle_timeout_seconds: If given, a process printing nothing for this long is
+        considered hung and stopped.
+      run: If given, filled in as by run_interactive_command.
+
+    Returns:
+      A tuple of (captured_output, return_code), as from run_interactive_command.
+
+    Raises:
+      ValueError: If no command is provided, or expected_runtime_seconds is out of range.
+      FileNotFoundError: If the command is not found in PATH.
+    """
+    _validate_command(cmd, expected_runtime_seconds)
+    run = run if run is not None else CommandRun()
+
+    async with _command_slots():
+        if sys.platform == "win32":
+            return await asyncio.to_thread(
+                run_interactive_command, cmd, expected_runtime_seconds, idle_timeout_seconds, run
+            )
+        return await _arun_pty(cmd, expected_runtime_seconds, idle_timeout_seconds, run)
+
+
+async def _arun_pty(
+    cmd: List[str],
+    expected_runtime_seconds: int,
+    idle_timeout_seconds: Optional[float],
+    run: CommandRun,
+) -> Tuple[bytes, int]:
+    """Run a command on a pty under the event loop, as pump_pty does for threads."""
+    loop = asyncio.get_running_loop()
+    cols, rows = get_terminal_size()
+    capture = TerminalCapture(cols, rows)
+
+    master_fd, slave_fd = os.openpty()
+    os.set_blocking(master_fd, False)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=slave_fd,
+            stdout=slave_fd,
+            stderr=slave_fd,
+            env=_command_env(cols, rows),
+            start_new_session=True,  # Own process group, as with create_process
+        )
+    except BaseException:
+        os.close(master_fd)
+        raise
+    finally:
+        os.close(slave_fd)
+
+    closed = loop.create_future()
+    last_output = loop.time()
+
+    def read_output():
+        nonlocal last_output
+        try:
+            data = os.read(master_fd, MAX_READ_BYTES)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno != errno.EIO:
+                logger.debug(f"Error reading command output: {e}")
+            data = b""
+        if not data:
+            # Every process holding the pty has closed it
+            loop.remove_reader(master_fd)
+            if not closed.done():
+                closed.set_result(None)
+            return
+        now = loop.time()
+        if not exited.done():
+            run.max_output_gap_seconds = max(run.max_output_gap_seconds, now - last_output)
+        last_output = now
+        capture.feed(data)
+
+    start = loop.time()
+    terminate_at = start + 2 * expected_runtime_seconds
+    kill_at = start + 3 * expected_runtime_seconds
+    idle_limit = idle_timeout_seconds if idle_timeout_seconds is not None else math.inf
+    exited = asyncio.ensure_future(proc.wait())
+    loop.add_reader(master_fd, read_output)
+    try:
+        # The same deadlines as pump_pty, checked whenever the wait times out
+        while not exited.done():
+            now = loop.time()
+            if not run.was_terminated:
+                if now >= terminate_at:
+                    _signal_process_group(proc, signal.SIGTERM)
+                    run.timed_out = True
+                elif now - last_output >= idle_limit:
+                    _signal_process_group(proc, signal.SIGTERM)
+                    run.hung = True
+                    kill_at = min(kill_at, now + HANG_KILL_SECONDS)
+            elif now >= kill_at:
+                _signal_process_group(proc, signal.SIGKILL)
+                kill_at = math.inf
+            if run.was_terminated:
+                deadline = kill_at
+            else:
+                deadline = min(terminate_at, last_output + idle_limit)
+            timeout = None if deadline == math.inf else max(0.0, deadline - now)
+            await asyncio.wait([exited], timeout=timeout)
+
+        exited_at = loop.time()
+        run.duration_seconds = exited_at - start
+        run.max_output_gap_seconds = max(run.max_output_gap_seconds, exited_at - last_output)
+
+        # Drain what is left until the pty closes or stays quiet, as pump_pty does
+        last_output = exited_at
+        while not closed.done():
+            remaining = (
+                min(
+                    last_output + EXIT_DRAIN_SECONDS,
+                    exited_at + EXIT_DRAIN_LIMIT_SECONDS,
+                    kill_at,
+                )
+                - loop.time()
+            )
+            if remaining <= 0:
+                if loop.time() >= exited_at + EXIT_DRAIN_LIMIT_SECONDS:
+                    _signal_process_group(proc, signal.SIGHUP)
+                break
+            await asyncio.wait([closed], timeout=remaining)
+    finally:
+        loop.remove_reader(master_fd)
+        os.close(master_fd)
+        if proc.returncode is None:
+            # Cancelled while the command was still running
+            _signal_process_group(proc, signal.SIGKILL)
+            await proc.wait()
 
-    return final_output, proc.returncode
+    output = _finish_output(capture, run, expected_runtime_seconds, idle_timeout_seconds)
+    return output, proc.returncode
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+"""
+Streaming runner for `rg --json` searches with output budgets.
+
+Collecting a broad search's full text output and truncating it afterwards can
+buffer hundreds of megabytes only to throw them away. stream_search() instead
+parses rg's JSON event stream line by line, keeps only what fits in the match
+and byte budgets, and kills rg as soon as a budget is exhausted, so memory use
+is bounded regardless of how many matches exist.
+
+Results are rendered compactly, grouped by file in rg's own notation:
+
+    src/app.py
+    12:    def main():
+    13-        run()
+    --
+    40:    main()
+"""
+
+import base64
+import json
+import subprocess
+import tempfile
+import threading
+from typing import IO, Iterator, List, Optional, Tuple
+
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Default budgets for one search
+MAX_MATCHES_PER_FILE = 20
+MAX_TOTAL_MATCHES = 200
+MAX_OUTPUT_BYTES = 32 * 1024
+
+# Lines longer than this are cut when displayed
+MAX_LINE_LENGTH = 300
+
+# JSON events longer than this (a match on a huge line) are skipped unparsed
+MAX_EVENT_BYTES = 1024 * 1024
+
+# Amount of rg's stderr kept for error reporting
+MAX_ERROR_BYTES = 4 * 1024
+
+
+def _decode(value: Optional[dict]) -> str:
+    """Decode rg's {"text": ...} / {"bytes": base64} representation."""
+    if not value:
+        return ""
+    if "text" in value:
+        return value["text"]
+    return base64.b64decode(value.get("bytes", "")).decode("utf-8", errors="replace")
+
+
+class SearchCollector:
+    """Accumulates rg JSON events into budgeted, per-file grouped output."""
+
+    def __init__(
+        self,
+        max_matches_per_file: int = MAX_MATCHES_PER_FILE,
+        max_total_matches: int = MAX_TOTAL_MATCHES,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+        after_context_lines: int = 0,
+    ):
+        """
+        Args:
+            max_matches_per_file: Matching lines shown per file
+            max_total_matches: Matching lines shown in total
+            max_output_bytes: Size limit of the rendered output
+            after_context_lines: Context lines rg prints after each match
+        """
+        self.max_matches_per_file = max_matches_per_file
+        self.max_total_matches = max_total_matches
+        self.max_output_bytes = max_output_bytes
+        self.after_context_lines = after_context_lines
+
+        self.match_count = 0
+        self.file_count = 0
+        self.truncated = False
+        self._parts: List[str] = []
+        self._size = 0
+        self._path: Optional[str] = None
+        self._header_written = False
+        self._file_matches = 0
+        self._file_omitted = False
+        self._last_line: Optional[int] = None
+        self._last_match_line: Optional[int] = None
+
+    @property
+    def output(self) -> str:
+        """The rendered output so far, including truncation notes."""
+        parts = list(self._parts)
+        if self._file_omitted:
+            parts.append(self._omitted_note())
+        if self.truncated:
+            parts.append(
+                f"\n[Search stopped after {self.match_count} matches in {self.file_count} files; "
+                "narrow the pattern or use include_paths/file_type to see more]\n"
+            )
+        return "".join(parts)
+
+    def _omitted_note(self) -> str:
+        return f"[more matches in {self._path} not shown]\n"
+
+    def _write(self, text: str) -> bool:
+        size = len(text.encode("utf-8", errors="replace"))
+        if self._size + size > self.max_output_bytes:
+            self.truncated = True
+            return False
+        self._parts.append(text)
+        self._size += size
+        return True
+
+    def _write_line(self, line_number: Optional[int], text: str, separator: str) -> bool:
+        if not self._header_written:
+            prefix = "\n" if self.file_count else ""
+            if not self._write(f"{prefix}{self._path}\n"):
+                return False
+            self._header_written = True
+            self.file_count += 1
+        elif (
+            line_number is not None
+            and self._last_line is not None
+            and line_number > self._last_line + 1
+        ):
+            if not self._write("--\n"):
+                return False
+
+        text = text.rstrip("\r\n")
+        if len(text) > MAX_LINE_LENGTH:
+            text = text[:MAX_LINE_LENGTH] + " [line truncated]"
+        number = "" if line_number is None else str(line_number)
+        if not self._write(f"{number}{separator}{text}\n"):
+            return False
+        self._last_line = line_number
+        return True
+
+    def add_event(self, event: dict) -> bool:
+        """
+        Consume one rg JSON event.
+
+        Returns:
+            bool: False once a budget is exhausted and the search should stop
+        """
+        kind = event.get("type")
+        data = event.get("data") or {}
+
+        if kind == "begin":
+            self._path = _decode(data.get("path"))
+            self._header_written = False
+            self._file_matches = 0
+            self._file_omitted = False
+            self._last_line = None
+            self._last_match_line = None
+        elif kind == "end":
+            if self._file_omitted:
+                self._file_omitted = False
+                return self._write(self._omitted_note())
+        elif kind == "match":
+            if self._file_matches >= self.max_matches_per_file:
+                self._file_omitted = True
+                return True
+            if self.match_count >= self.max_total_matches:
+                self.truncated = True
+                return False
+            line_number = data.get("line_number")
+            if not self._write_line(line_number, _decode(data.get("lines")), ":"):
+                return False
+            self.match_count += 1
+            self._file_matches += 1
+            self._last_match_line = line_number
+        elif kind == "context":
+            line_number = data.get("line_number")
+            if self._file_matches >= self.max_matches_per_file:
+                # Only trailing context of the last shown match is kept
+                if (
+                    line_number is None
+                    or self._last_match_line is None
+                    or line_number > self._last_match_line + self.after_context_lines
+                ):
+                    return True
+            return self._write_line(line_number, _decode(data.get("lines")), "-")
+        return True
+
+    def add_oversized_event(self) -> bool:
+        """Record an event that was too long to parse (a match on a huge line)."""
+        if self._path is None:
+            return True
+        if self._file_matches >= self.max_matches_per_file:
+            self._file_omitted = True
+            return True
+        if self.match_count >= self.max_total_matches:
+            self.truncated = True
+            return False
+        if not self._write_line(None, f"[line longer than {MAX_EVENT_BYTES} bytes not shown]", " "):
+            return False
+        self.match_count += 1
+        self._file_matches += 1
+        return True
+
+
+def _read_events(stream: IO[bytes]) -> Iterator[Optional[dict]]:
+    """Yield parsed JSON events, or None for events too long to parse."""
+    while True:
+        line = stream.readline(MAX_EVENT_BYTES)
+        if not line:
+            return
+        if not line.endswith(b"\n") and len(line) >= MAX_EVENT_BYTES:
+            # Discard the rest of the oversized event
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_EVENT_BYTES)
+            yield None
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            logger.debug(f"Skipping unparsable rg output line: {line[:200]!r}")
+
+
+def stream_search(
+    cmd: List[str],
+    collector: SearchCollector,
+    timeout: Optional[float] = 30,
+) -> Tuple[int, str]:
+    """
+    Run an `rg --json` command, feeding its events to a collector.
+
+    rg is killed as soon as the collector's budgets are exhausted or the
+    timeout passes; the collector then holds the partial results.
+
+    Args:
+        cmd: rg command including --json
+        collector: Receives the parsed events
+        timeout: Seconds before rg is killed, or None for no limit
+
+    Returns:
+        Tuple[int, str]: rg's exit code (0 when stopped early with results)
+            and the start of its stderr
+    """
+    with tempfile.TemporaryFile() as stderr:
+        # stderr goes to a file so a chatty rg can never block on a full pipe
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        timed_out = threading.Event()
+
+        def kill_on_timeout():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill_on_timeout) if timeout else None
+        if timer:
+            timer.daemon = True
+            timer.start()
+        stopped = False
+        try:
+            for event in _read_events(proc.stdout):
+                keep_going = (
+                    collector.add_event(event)
+                    if event is not None
+                    else collector.add_oversized_event()
+                )
+                if not keep_going:
+                    stopped = True
+                    proc.kill()
+                    break
+        finally:
+            if timer:
+                timer.cancel()
+            proc.stdout.close()
+            return_code = proc.wait()
+
+        stderr.seek(0)
+        error = stderr.read(MAX_ERROR_BYTES).decode("utf-8", errors="replace")
+
+    if timed_out.is_set():
+        collector.truncated = True
+        error += f"\nSearch timed out after {timeout} seconds"
+        return (0 if collector.match_count else 2), error
+    if stopped:
+        return 0, error
+    return return_code, error
@@ -12,7 +12,12 @@ __all__ = [
 ]
 
 from ra_aid.console.formatting import cpm
-from ra_aid.file_listing import FileListerError, get_file_listing
+from ra_aid.file_index import get_warm_file_index
+from ra_aid.file_listing import (
+    FileListerError,
+    get_all_project_files,
+    iter_project_files,
+)
 from ra_aid.project_state import ProjectStateError, is_new_project
 from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
 from ra_aid.database.repositories.human_input_repository import (
@@ -28,11 +33,14 @@ class ProjectInfo:
         is_new: Whether the project is new/empty
         files: List of tracked files in the project
         total_files: Total number of tracked files (before any limit)
+        more_files: Whether files beyond the limit exist but were not counted,
+            making total_files a lower bound
     """
 
     is_new: bool
     files: List[str]
     total_files: int
+    more_files: bool = False
 
 
 class ProjectInfoError(Exception):
@@ -61,10 +69,25 @@ def get_project_info(directory: str, file_limit: Optional[int] = None) -> Projec
         # Check if project is new
         new_status = is_new_project(directory)
 
-        # Get file listing
-        files, total = get_file_listing(directory, limit=file_limit)
-
-        return ProjectInfo(is_new=new_status, files=files, total_files=total)
+        if file_limit is None or get_warm_file_index(directory) is not None:
+            # Without a limit everything is listed anyway; a warm file index
+            # answers from memory, so the exact total comes at little cost
+            files = get_all_project_files(directory)
+            return ProjectInfo(
+                is_new=new_status, files=files[:file_limit], total_files=len(files)
+            )
+
+        # Otherwise stop reading one file past the limit instead of listing
+        # the whole repository just to count it
+        files = sorted(iter_project_files(directory, limit=file_limit + 1))
+        more_files = len(files) > file_limit
+        files = files[:file_limit]
+        return ProjectInfo(
+            is_new=new_status,
+            files=files,
+            total_files=len(files),
+            more_files=more_files,
+        )
 
     except (ProjectStateError, FileListerError):
         # Re-raise known errors
@@ -74,6 +97,15 @@ def get_project_info(directory: str, file_limit: Optional[int] = None) -> Projec
         raise ProjectInfoError(f"Error getting project info: {e}")
 
 
+def _format_file_count(info: ProjectInfo) -> str:
+    """Format the file count as "N", "N of M" when truncated, or "N+" when uncounted."""
+    if info.more_files:
+        return f"{info.total_files}+"
+    if len(info.files) < info.total_files:
+        return f"{len(info.files)} of {info.total_files}"
+    return str(info.total_files)
+
+
 def format_project_info(info: ProjectInfo) -> str:
     """Format project information into a displayable string.
 
@@ -91,18 +123,17 @@ def format_project_info(info: ProjectInfo) -> str:
         return f"Project Status: {status}\nTotal Files: 0\nFiles: None"
 
     # Format file count with truncation notice if needed
-    file_count = (
-        f"{len(info.files)} of {info.total_files}"
-        if len(info.files) < info.total_files
-        else str(info.total_files)
-    )
-    file_count_line = f"Total Files: {file_count}"
+    file_count_line = f"Total Files: {_format_file_count(info)}"
 
     # Format file listing
     files_section = "Files:\n" + "\n".join(f"- {f}" for f in info.files)
 
     # Add truncation notice if list was truncated
-    if len(info.files) < info.total_files:
+    if info.more_files:
+        files_section += (
+            f"\n[Note: Showing the first {len(info.files)} files; more exist]"
+        )
+    elif len(info.files) < info.total_files:
         files_section += (
             f"\n[Note: Showing {len(info.files)} of {info.total_files} total files]"
         )
@@ -120,11 +151,7 @@ def display_project_status(info: ProjectInfo) -> None:
     status = "**New/empty project**" if info.is_new else "**Existing project**"
 
     # Format file count (with truncation notice if needed)
-    file_count = (
-        f"{len(info.files)} of {info.total_files}"
-        if len(info.files) < info.total_files
-        else str(info.total_files)
-    )
+    file_count = _format_file_count(info)
 
     # Build status text with markdown
     status_text = f"""
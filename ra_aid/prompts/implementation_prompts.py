@@ -53,6 +53,8 @@ Important Notes:
 - Do not add features not explicitly required.
 - Only create or modify files directly related to this task.
 - Use file_str_replace and put_complete_file_contents for simple file modifications.
+- When making several replacements in the same file, use file_str_replace_batch to apply them in one step.
+- To change part of an existing file, use apply_file_patch with a unified diff or search/replace blocks instead of rewriting the whole file with put_complete_file_contents.
 
 Testing:
 
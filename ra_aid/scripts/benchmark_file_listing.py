@@ -0,0 +1,115 @@
+"""
+Benchmark tracked-file enumeration backends.
+
+Builds a synthetic repository whose index holds a large number of paths and
+compares `git ls-files -z` against the pure-Python index reader in
+ra_aid.git_index. Files are added to the index only, so setting up a 100k-file
+repository takes seconds and needs almost no disk space.
+
+Usage:
+    python -m ra_aid.scripts.benchmark_file_listing [--files N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from ra_aid.git_index import list_tracked_files
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@example.com",
+    "GIT_COMMITTER_NAME": "Benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@example.com",
+}
+
+
+def synthetic_paths(count: int) -> List[str]:
+    """Generate a repository-like spread of paths across nested directories."""
+    return [
+        f"pkg{i % 50:02d}/mod{(i // 50) % 40:02d}/sub{(i // 2000) % 10}/file_{i:06d}.py"
+        for i in range(count)
+    ]
+
+
+def build_repository(directory: str, count: int, index_version: int) -> None:
+    """Create a repository whose index holds `count` paths of an empty blob."""
+    subprocess.run(["git", "init", "-q"], cwd=directory, check=True)
+    blob = subprocess.run(
+        ["git", "hash-object", "-w", "--stdin"],
+        cwd=directory,
+        input=b"",
+        capture_output=True,
+        check=True,
+    ).stdout.decode().strip()
+    index_info = "".join(f"100644 {blob}\t{path}\n" for path in synthetic_paths(count))
+    subprocess.run(
+        ["git", "update-index", "--index-info"],
+        cwd=directory,
+        input=index_info.encode(),
+        check=True,
+    )
+    subprocess.run(
+        ["git", "update-index", "--index-version", str(index_version)],
+        cwd=directory,
+        check=True,
+    )
+
+
+def git_ls_files(directory: str) -> List[str]:
+    """List tracked files by forking git."""
+    output = subprocess.run(
+        ["git", "ls-files", "-z"], cwd=directory, capture_output=True, check=True
+    ).stdout
+    return [p for p in output.decode("utf-8", "surrogateescape").split("\0") if p]
+
+
+def time_backend(func: Callable[[str], List[str]], directory: str, repeat: int) -> List[float]:
+    """Time repeated calls of a listing function."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(directory)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None) -> int:
+    """Run the benchmark and print a timing table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000, help="Number of tracked files")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per backend")
+    parser.add_argument(
+        "--index-version",
+        type=int,
+        choices=[2, 3, 4],
+        default=2,
+        help="Index format version to benchmark",
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Building repository with {args.files} tracked files...")
+        build_repository(directory, args.files, args.index_version)
+
+        expected = git_ls_files(directory)
+        if list_tracked_files(directory) != expected:
+            print("Index reader output differs from git ls-files", file=sys.stderr)
+            return 1
+
+        print(f"{'backend':<20} {'median':>10} {'min':>10}")
+        for name, func in (("git ls-files", git_ls_files), ("index reader", list_tracked_files)):
+            timings = time_backend(func, directory, args.repeat)
+            print(
+                f"{name:<20} {statistics.median(timings) * 1000:>8.1f}ms "
+                f"{min(timings) * 1000:>8.1f}ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
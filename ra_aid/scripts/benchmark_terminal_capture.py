@@ -0,0 +1,173 @@
+"""
+Benchmark capturing command output through TerminalCapture.
+
+Compares laying out output with the pyte terminal emulator throughout, as
+run_interactive_command always did, against TerminalCapture's default of
+emulating only once output contains screen-control sequences. The built-in
+samples reproduce what typical commands print on a pty (pytest -q, ls -l,
+git diff --no-color, a colored build log, a progress bar redrawn with
+cursor movement). --file adds raw recordings, for example made with
+`script -q -c CMD FILE`, and --command records the output of live commands.
+
+Usage:
+    python -m ra_aid.scripts.benchmark_terminal_capture [--scale N] [--repeat N]
+        [--chunk-bytes N] [--file PATH ...] [--command CMD ...]
+"""
+
+import argparse
+import errno
+import os
+import shlex
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+from ra_aid.proc.interactive import TerminalCapture, create_process
+
+COLS, ROWS = 120, 40
+
+
+def pytest_output(scale: int) -> bytes:
+    lines = []
+    for i in range(scale):
+        dots = "\x1b[32m" + "." * 60 + "\x1b[0m"
+        lines.append(f"tests/test_module_{i}.py {dots} \x1b[32m[{i * 100 // scale:3d}%]\x1b[0m")
+    lines.append(f"\x1b[32m\x1b[1m{scale * 60} passed\x1b[0m\x1b[32m in 12.34s\x1b[0m")
+    return "\r\n".join(lines).encode() + b"\r\n"
+
+
+def ls_output(scale: int) -> bytes:
+    lines = [f"total {scale * 8}"]
+    for i in range(scale * 5):
+        lines.append(f"-rw-r--r--  1 dev  staff  {i * 37 % 99999:>6} Jan 12 10:{i % 60:02d} file_{i:05d}.py")
+    return "\r\n".join(lines).encode() + b"\r\n"
+
+
+def git_diff_output(scale: int) -> bytes:
+    lines = []
+    for i in range(scale):
+        lines += [
+            f"diff --git a/src/module_{i}.py b/src/module_{i}.py",
+            f"index 3f2a1b{i:04x}..8c9d0e{i:04x} 100644",
+            f"--- a/src/module_{i}.py",
+            f"+++ b/src/module_{i}.py",
+            f"@@ -{i * 10 + 1},7 +{i * 10 + 1},8 @@ def handler_{i}(request):",
+            "     data = request.json()",
+            "-    value = data['value']",
+            "+    value = data.get('value')",
+            "+    if value is None:",
+            "\t\treturn error('missing value')",
+            "     return process(value)",
+        ]
+    return "\r\n".join(lines).encode() + b"\r\n"
+
+
+def build_log_output(scale: int) -> bytes:
+    lines = []
+    for i in range(scale * 3):
+        lines.append(f"\x1b[1m\x1b[32m   Compiling\x1b[0m crate_{i} v0.{i % 10}.{i % 7} (/work/crates/crate_{i})")
+    lines.append("\x1b[1m\x1b[32m    Finished\x1b[0m release [optimized] target(s) in 41.20s")
+    return "\r\n".join(lines).encode() + b"\r\n"
+
+
+def progress_output(scale: int) -> bytes:
+    parts = []
+    for i in range(scale * 5):
+        done = i * 50 // (scale * 5)
+        parts.append(f"\x1b[2K\rDownloading [{'#' * done}{' ' * (50 - done)}] {i * 100 // (scale * 5)}%")
+    parts.append("\r\nDownload complete\r\n")
+    return "".join(parts).encode()
+
+
+SAMPLES: Dict[str, Callable[[int], bytes]] = {
+    "pytest -q": pytest_output,
+    "ls -l": ls_output,
+    "git diff --no-color": git_diff_output,
+    "cargo build (color)": build_log_output,
+    "progress bar": progress_output,
+}
+
+
+def record_command(command: str) -> bytes:
+    """Run a command on a pty and return everything it printed."""
+    env = dict(os.environ, GIT_PAGER="", PAGER="cat")
+    proc, master_fd = create_process(shlex.split(command), env=env, cols=COLS, rows=ROWS)
+    os.set_blocking(master_fd, True)
+    chunks = []
+    try:
+        while True:
+            try:
+                data = os.read(master_fd, 65536)
+            except OSError as e:
+                if e.errno == errno.EIO:
+                    break
+                raise
+            if not data:
+                break
+            chunks.append(data)
+    finally:
+        os.close(master_fd)
+        proc.wait()
+    return b"".join(chunks)
+
+
+def capture(data: bytes, chunk_bytes: int, emulate: bool) -> Tuple[str, bool]:
+    """Feed output to a TerminalCapture in read-sized chunks and render it."""
+    terminal = TerminalCapture(COLS, ROWS)
+    if emulate:
+        terminal._start_emulation()
+    for i in range(0, len(data), chunk_bytes):
+        terminal.feed(data[i : i + chunk_bytes])
+    return terminal.render(), terminal.emulating
+
+
+def time_capture(data: bytes, chunk_bytes: int, emulate: bool, repeat: int) -> List[float]:
+    """Time repeated captures of the same output."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        capture(data, chunk_bytes, emulate)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(samples: Dict[str, bytes], chunk_bytes: int, repeat: int) -> int:
+    """Check that both paths agree and print a timing table."""
+    print(f"{'sample':<24} {'bytes':>10} {'pyte':>10} {'capture':>10} {'speedup':>8}  path")
+    for name, data in samples.items():
+        expected, _ = capture(data, chunk_bytes, emulate=True)
+        output, emulated = capture(data, chunk_bytes, emulate=False)
+        if output != expected:
+            print(f"{name}: output differs from pyte", file=sys.stderr)
+            return 1
+        pyte_time = statistics.median(time_capture(data, chunk_bytes, True, repeat))
+        capture_time = statistics.median(time_capture(data, chunk_bytes, False, repeat))
+        print(
+            f"{name:<24} {len(data):>10} {pyte_time * 1000:>8.1f}ms {capture_time * 1000:>8.1f}ms "
+            f"{pyte_time / capture_time:>7.1f}x  {'pyte' if emulated else 'plain'}"
+        )
+    return 0
+
+
+def main(argv=None) -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=200, help="Size of the built-in samples")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per sample and path")
+    parser.add_argument("--chunk-bytes", type=int, default=1024, help="Bytes fed per read")
+    parser.add_argument("--file", nargs="*", default=[], help="Raw output recordings to include")
+    parser.add_argument("--command", nargs="*", default=[], help="Commands to record and include")
+    args = parser.parse_args(argv)
+
+    samples = {name: make(args.scale) for name, make in SAMPLES.items()}
+    for path in args.file:
+        with open(path, "rb") as f:
+            samples[os.path.basename(path)] = f.read()
+    for command in args.command:
+        samples[command] = record_command(command)
+    return run(samples, args.chunk_bytes, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
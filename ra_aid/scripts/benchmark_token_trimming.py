@@ -0,0 +1,123 @@
+"""
+Benchmark trimming a growing agent history to a token limit.
+
+Replays a ReAct session one step at a time, trimming the history after every
+step the way state_modifier does. Compares tokenizing every message with
+litellm on every step against the shared MessageTokenCounter, which tokenizes
+each message once and trims from cached counts.
+
+Usage:
+    python -m ra_aid.scripts.benchmark_token_trimming [--messages N] [--max-tokens N]
+        [--model MODEL] [--repeat N]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from litellm import token_counter
+
+from ra_aid.anthropic_message_utils import anthropic_trim_messages
+from ra_aid.anthropic_token_limiter import (
+    MessageTokenCounter,
+    convert_message_to_litellm_format,
+)
+
+WORDS = "the agent reads files runs tests and edits code until the task is done".split()
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_history(count: int, seed: int = 0) -> List[BaseMessage]:
+    """Build a session of tool calls and results of varying size."""
+    rng = random.Random(seed)
+    messages: List[BaseMessage] = [
+        SystemMessage(content=text(rng, 800)),
+        HumanMessage(content=text(rng, 100)),
+    ]
+    while len(messages) < count:
+        call_id = f"call_{len(messages)}"
+        messages.append(
+            AIMessage(
+                content=text(rng, rng.randint(10, 80)),
+                additional_kwargs={"tool_calls": [{"id": call_id, "name": "run_shell_command"}]},
+            )
+        )
+        messages.append(
+            ToolMessage(content=text(rng, rng.randint(20, 1500)), tool_call_id=call_id)
+        )
+    return messages[:count]
+
+
+def uncached_counter(model: str) -> Callable[[List[BaseMessage]], int]:
+    """Count with litellm directly, as create_token_counter_wrapper used to."""
+
+    def count(messages: List[BaseMessage]) -> int:
+        if not messages:
+            return 0
+        litellm_messages = [convert_message_to_litellm_format(msg) for msg in messages]
+        return token_counter(messages=litellm_messages, model=model)
+
+    return count
+
+
+def replay(
+    history: List[BaseMessage], counter: Callable[[List[BaseMessage]], int], max_tokens: int
+) -> Tuple[float, float, int]:
+    """Trim after every step; return total seconds, last step seconds and messages kept."""
+    total = last = 0.0
+    kept = 0
+    for step in range(3, len(history) + 1):
+        start = time.perf_counter()
+        result = anthropic_trim_messages(
+            history[:step],
+            token_counter=counter,
+            max_tokens=max_tokens,
+            strategy="last",
+            allow_partial=False,
+            include_system=True,
+            num_messages_to_keep=2,
+        )
+        last = time.perf_counter() - start
+        total += last
+        kept = len(result)
+    return total, last, kept
+
+
+def main(argv=None) -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300, help="Length of the replayed history")
+    parser.add_argument("--max-tokens", type=int, default=50000, help="Token limit to trim to")
+    parser.add_argument("--model", default="claude-3-7-sonnet-20250219", help="Model to count tokens for")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays per counter")
+    args = parser.parse_args(argv)
+
+    history = make_history(args.messages)
+    counters = {
+        "uncached": lambda: uncached_counter(args.model),
+        "MessageTokenCounter": lambda: MessageTokenCounter(args.model),
+    }
+    print(f"{'counter':<20} {'replay':>10} {'last step':>10} {'kept':>6}")
+    for name, make_counter in counters.items():
+        runs = [replay(history, make_counter(), args.max_tokens) for _ in range(args.repeat)]
+        total = statistics.median(run[0] for run in runs)
+        last = statistics.median(run[1] for run in runs)
+        print(f"{name:<20} {total:>9.2f}s {last * 1000:>8.1f}ms {runs[0][2]:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Benchmark walking non-git project trees.
+
+Compares the os.walk loop previously used by get_all_project_files against
+ra_aid.file_walker.walk_files at several thread pool sizes. By default a
+synthetic wide/deep tree is generated in a temporary directory; pass --path to
+walk an existing tree instead. On a local SSD or tmpfs directory reads are too
+cheap for threads to help, so --latency-ms can add a fixed delay to every
+os.scandir call to approximate a network mount, where the parallel walker
+helps most.
+
+Usage:
+    python -m ra_aid.scripts.benchmark_tree_walk [--width N] [--depth N]
+        [--files-per-dir N] [--repeat N] [--workers N ...] [--path DIR]
+        [--latency-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+from ra_aid.file_listing import EXCLUDED_DIRS
+from ra_aid.file_walker import walk_files
+
+
+def build_tree(root: str, width: int, depth: int, files_per_dir: int) -> int:
+    """Create `width` directories per level down to `depth`, returning the file count."""
+    count = 0
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(width):
+                path = os.path.join(parent, f"dir{i:03d}")
+                os.mkdir(path)
+                for j in range(files_per_dir):
+                    with open(os.path.join(path, f"file{j:03d}.py"), "w") as f:
+                        f.write("pass\n")
+                count += files_per_dir
+                next_level.append(path)
+        level = next_level
+    return count
+
+
+def os_walk_files(directory: str) -> List[str]:
+    """List files the way get_all_project_files did before walk_files."""
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith(".")]
+        rel_root = os.path.relpath(root, directory)
+        if rel_root == ".":
+            rel_root = ""
+        for name in names:
+            if name.startswith("."):
+                continue
+            files.append(os.path.join(rel_root, name) if rel_root else name)
+    return sorted(files)
+
+
+@contextmanager
+def scandir_latency(latency_ms: float) -> Iterator[None]:
+    """Delay every os.scandir call, as on a high-latency filesystem."""
+    if latency_ms <= 0:
+        yield
+        return
+    real_scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(latency_ms / 1000)
+        return real_scandir(path)
+
+    os.scandir = slow_scandir
+    try:
+        yield
+    finally:
+        os.scandir = real_scandir
+
+
+def time_walker(func: Callable[[str], List[str]], directory: str, repeat: int) -> List[float]:
+    """Time repeated calls of a walker."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(directory)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(directory: str, repeat: int, workers: List[int]) -> int:
+    """Check that the walkers agree and print a timing table."""
+    expected = os_walk_files(directory)
+    walkers = [("os.walk", os_walk_files)]
+    for count in workers:
+        walkers.append(
+            (
+                f"walk_files x{count}",
+                lambda d, count=count: walk_files(
+                    d, excluded_dirs=EXCLUDED_DIRS, max_workers=count
+                ),
+            )
+        )
+
+    for name, func in walkers[1:]:
+        if func(directory) != expected:
+            print(f"{name} output differs from os.walk", file=sys.stderr)
+            return 1
+
+    print(f"{len(expected)} files")
+    print(f"{'walker':<20} {'median':>10} {'min':>10}")
+    for name, func in walkers:
+        timings = time_walker(func, directory, repeat)
+        print(
+            f"{name:<20} {statistics.median(timings) * 1000:>8.1f}ms "
+            f"{min(timings) * 1000:>8.1f}ms"
+        )
+    return 0
+
+
+def main(argv=None) -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", help="Walk an existing directory instead of a synthetic tree")
+    parser.add_argument("--width", type=int, default=20, help="Directories per level")
+    parser.add_argument("--depth", type=int, default=3, help="Directory levels")
+    parser.add_argument("--files-per-dir", type=int, default=10, help="Files per directory")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per walker")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 4, 16], help="Thread pool sizes"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0, help="Simulated delay per directory read"
+    )
+    args = parser.parse_args(argv)
+
+    if args.path:
+        with scandir_latency(args.latency_ms):
+            return run(args.path, args.repeat, args.workers)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Building {args.width}x{args.depth} tree...")
+        build_tree(directory, args.width, args.depth, args.files_per_dir)
+        with scandir_latency(args.latency_ms):
+            return run(directory, args.repeat, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
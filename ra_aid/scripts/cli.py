@@ -10,6 +10,7 @@ import json
 import argparse
 from ra_aid.scripts.last_session_usage import get_latest_session_usage
 from ra_aid.scripts.all_sessions_usage import get_all_sessions_usage
+from ra_aid.scripts.slowest_commands import get_slowest_commands
 
 def session_usage_command():
     """
@@ -33,6 +34,17 @@ def all_sessions_usage_command():
     print(json.dumps(results, indent=2))
     return status_code
 
+def slowest_commands_command(limit: int = 10):
+    """
+    Command-line entry point for getting the slowest shell commands.
+    
+    This function groups past shell command runs by command and directory,
+    then outputs duration statistics for the slowest as JSON to stdout.
+    """
+    results, status_code = get_slowest_commands(limit)
+    print(json.dumps(results, indent=2))
+    return status_code
+
 def main():
     """Main entry point for the CLI."""
     parser = argparse.ArgumentParser(description="RA.Aid utility scripts")
@@ -44,12 +56,22 @@ def main():
     # All sessions command
     all_parser = subparsers.add_parser("all", help="Get usage statistics for all sessions")
     
+    # Slowest commands command
+    slowest_parser = subparsers.add_parser(
+        "slowest-commands", help="Get duration statistics for the slowest shell commands"
+    )
+    slowest_parser.add_argument(
+        "--limit", type=int, default=10, help="Number of commands to show (default: 10)"
+    )
+    
     args = parser.parse_args()
     
     if args.command == "latest" or not args.command:
         return session_usage_command()
     elif args.command == "all":
         return all_sessions_usage_command()
+    elif args.command == "slowest-commands":
+        return slowest_commands_command(args.limit)
     else:
         parser.print_help()
         return 1
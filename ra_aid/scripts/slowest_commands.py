@@ -0,0 +1,46 @@
+"""
+Module to get duration statistics for the slowest shell commands.
+
+This module reads past run_shell_command executions from the database and
+reports the commands that take longest, grouped the same way their timeouts
+are learned.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from ..command_durations import LOAD_LIMIT, CommandDurations
+from ..database import DatabaseManager, ensure_migrations_applied
+from ..database.repositories.trajectory_repository import TrajectoryRepositoryManager
+
+
+def get_slowest_commands(limit: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Get duration statistics for the slowest shell commands.
+
+    Args:
+        limit: Maximum number of commands to report
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: A tuple containing:
+            - List of dictionaries with command, directory and duration statistics
+            - Status code (0 for success, 1 for error)
+    """
+    try:
+        # Ensure database migrations are applied
+        try:
+            migration_result = ensure_migrations_applied()
+            if not migration_result:
+                return [{"error": "Database migrations failed"}], 1
+        except Exception as e:
+            return [{"error": f"Database migration error: {str(e)}"}], 1
+
+        # Initialize database connection using DatabaseManager context
+        with DatabaseManager() as db:
+            with TrajectoryRepositoryManager(db) as trajectory_repo:
+                records = trajectory_repo.get_tool_executions(
+                    "run_shell_command", limit=LOAD_LIMIT
+                )
+                durations = CommandDurations.from_trajectories(reversed(records))
+                return durations.slowest(limit), 0
+    except Exception as e:
+        return [{"error": str(e)}], 1
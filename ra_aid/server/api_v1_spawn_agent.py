@@ -19,7 +19,9 @@ from ra_aid.database.repositories.work_log_repository import WorkLogRepositoryMa
 from ra_aid.database.repositories.config_repository import ConfigRepositoryManager, get_config_repository
 from ra_aid.env_inv_context import EnvInvManager
 from ra_aid.env_inv import EnvDiscovery
+from ra_aid.proc.background import BackgroundCommandsManager
 from ra_aid.llm import initialize_llm, get_model_default_temperature
+from ra_aid.tool_cache import invalidate_tool_caches
 
 # Create logger
 logger = logging.getLogger(__name__)
@@ -90,6 +92,11 @@ def run_agent_thread(
     logger.debug(f"Starting agent thread for session {session_id}")
     
     try:
+        # Cached tool results must not outlive the session that produced them;
+        # other sessions may still be running, so start a new generation
+        # rather than dropping their caches
+        invalidate_tool_caches()
+        
         # Initialize database connection
         db = DatabaseManager()
         
@@ -110,7 +117,8 @@ def run_agent_thread(
              TrajectoryRepositoryManager(db) as trajectory_repo, \
              WorkLogRepositoryManager() as work_log_repo, \
              ConfigRepositoryManager(source_repo=source_config_repo) as config_repo, \
-             EnvInvManager(env_data) as env_inv:
+             EnvInvManager(env_data) as env_inv, \
+             BackgroundCommandsManager() as background_commands:
             
             # Update config repo with values for this thread
             config_repo.set("research_only", research_only)
@@ -35,6 +35,7 @@ from ra_aid.database.pydantic_models import TrajectoryModel
 from ra_aid.database.repositories.trajectory_repository import TrajectoryRepository, get_trajectory_repository
 from ra_aid.server.api_v1_sessions import router as sessions_router
 from ra_aid.server.api_v1_spawn_agent import router as spawn_agent_router
+from ra_aid.proc.interactive import set_command_loop
 from ra_aid.server.connection_manager import ConnectionManager
 
 # Global variable to hold the app instance, needed by the hook
@@ -85,6 +86,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Application startup: Initializing resources.")
     # Store the running event loop
     app.state.loop = asyncio.get_running_loop()
+    # Run agents' shell commands on this loop rather than a thread each
+    set_command_loop(app.state.loop)
     # Create the broadcast queue
     app.state.broadcast_queue = asyncio.Queue()
     # Instantiate the ConnectionManager
@@ -112,6 +115,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield  # Application is running
 
     logger.info("Application shutdown: Cleaning up resources.")
+    set_command_loop(None)
     # Unregister hook (optional, good practice if hooks can be removed)
     # Requires an unregister_create_hook instance method on TrajectoryRepository
     try:
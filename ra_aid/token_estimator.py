@@ -0,0 +1,224 @@
+"""
+Token estimates calibrated against the prompt token counts providers report.
+
+Trimming message history needs a token count for every message on every step,
+which is too often to run a real tokenizer. Estimates divide a message's UTF-8
+size by a bytes-per-token ratio. Instead of a fixed ratio, which overflows the
+context window for some models and trims far too early for others, the ratio
+is learned per model: each response's reported prompt tokens are compared with
+the size of the messages that were sent.
+
+The ratio is tracked as an exponentially weighted mean and variance, so it
+follows changes such as a growing share of code in the history. Estimates use
+the mean less SAFETY_STDDEVS standard deviations, erring towards more tokens.
+Until a model has MIN_OBSERVATIONS observations, DEFAULT_BYTES_PER_TOKEN is
+used.
+
+Ratios are persisted to .ra-aid/token_estimates.json when the .ra-aid
+directory exists, so calibration carries over between sessions.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Location of the persisted ratios, relative to the working directory
+TOKEN_ESTIMATES_PATH = ".ra-aid/token_estimates.json"
+ESTIMATES_FORMAT_VERSION = 1
+
+# Ratio used for models without enough observations
+DEFAULT_BYTES_PER_TOKEN = 2.0
+
+# Observations needed before a model's ratio is used
+MIN_OBSERVATIONS = 3
+
+# Once a model has this many observations, each new one has weight 1/N
+MAX_WEIGHT_OBSERVATIONS = 100
+
+# Prompts smaller than this are dominated by fixed overhead and not observed
+MIN_PROMPT_BYTES = 1000
+
+# Standard deviations subtracted from the mean ratio, to err towards more tokens
+SAFETY_STDDEVS = 1.0
+
+# Learned ratios are kept within these bounds
+MIN_BYTES_PER_TOKEN = 1.0
+MAX_BYTES_PER_TOKEN = 8.0
+
+# Minimum time between writes of the persisted ratios
+SAVE_INTERVAL_SECONDS = 30.0
+
+
+def content_bytes(content: Any) -> int:
+    """Return the UTF-8 size of a message's or string's text content."""
+    if content is None:
+        return 0
+    text = getattr(content, "content", content)
+    # create-react-agent tool calls can be lists
+    if isinstance(text, list):
+        text = str(text)
+    if not text:
+        return 0
+    return len(text.encode("utf-8"))
+
+
+@dataclass
+class RatioStats:
+    """Exponentially weighted mean and variance of a model's bytes per token."""
+
+    count: int = 0
+    mean: float = DEFAULT_BYTES_PER_TOKEN
+    variance: float = 0.0
+
+    def observe(self, ratio: float) -> None:
+        self.count += 1
+        weight = 1.0 / min(self.count, MAX_WEIGHT_OBSERVATIONS)
+        delta = ratio - self.mean
+        self.mean += weight * delta
+        self.variance = (1.0 - weight) * (self.variance + weight * delta * delta)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class TokenEstimator:
+    """Estimates tokens from UTF-8 size with per-model ratios learned from provider usage."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the estimator.
+
+        Args:
+            path: File to load ratios from and persist them to, or None to keep them in memory
+        """
+        self.path = path
+        self._models: Dict[str, RatioStats] = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        if path is not None:
+            self.load()
+
+    def bytes_per_token(self, model_name: Optional[str] = None) -> float:
+        """Return the ratio to estimate with for a model."""
+        with self._lock:
+            stats = self._models.get(model_name) if model_name else None
+            if stats is None or stats.count < MIN_OBSERVATIONS:
+                return DEFAULT_BYTES_PER_TOKEN
+            return max(MIN_BYTES_PER_TOKEN, stats.mean - SAFETY_STDDEVS * stats.stddev)
+
+    def estimate(self, num_bytes: int, model_name: Optional[str] = None) -> int:
+        """Estimate the tokens in num_bytes of text for a model."""
+        if num_bytes <= 0:
+            return 0
+        return int(num_bytes // self.bytes_per_token(model_name))
+
+    def observe(self, model_name: Optional[str], prompt_bytes: int, prompt_tokens: int) -> None:
+        """
+        Learn from a request that sent prompt_bytes of messages and was billed prompt_tokens.
+
+        Observations without a model, with too small a prompt or with an implausible
+        ratio are ignored.
+        """
+        if not model_name or prompt_bytes < MIN_PROMPT_BYTES or prompt_tokens <= 0:
+            return
+        ratio = prompt_bytes / prompt_tokens
+        if not MIN_BYTES_PER_TOKEN <= ratio <= MAX_BYTES_PER_TOKEN:
+            logger.debug(f"Ignoring bytes per token ratio {ratio:.2f} for {model_name}")
+            return
+        with self._lock:
+            stats = self._models.get(model_name)
+            if stats is None:
+                stats = self._models[model_name] = RatioStats()
+            stats.observe(ratio)
+            due = time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS
+        if due:
+            self.save()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return each model's observation count, mean ratio, standard deviation and ratio in use."""
+        with self._lock:
+            models = [(name, RatioStats(**asdict(stats))) for name, stats in self._models.items()]
+        return [
+            {
+                "model": name,
+                "observations": stats.count,
+                "mean_bytes_per_token": round(stats.mean, 3),
+                "stddev_bytes_per_token": round(stats.stddev, 3),
+                "bytes_per_token": round(self.bytes_per_token(name), 3),
+            }
+            for name, stats in models
+        ]
+
+    def load(self) -> bool:
+        """Restore ratios from disk, returning whether they were found."""
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable token estimates {self.path}: {e}")
+            return False
+        if not isinstance(data, dict) or data.get("version") != ESTIMATES_FORMAT_VERSION:
+            return False
+        try:
+            models = {name: RatioStats(**stats) for name, stats in data["models"].items()}
+        except (KeyError, TypeError, AttributeError) as e:
+            logger.debug(f"Ignoring malformed token estimates {self.path}: {e}")
+            return False
+        with self._lock:
+            self._models = models
+        return True
+
+    def save(self) -> None:
+        """Persist ratios atomically; failures are only logged."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "version": ESTIMATES_FORMAT_VERSION,
+                "models": {name: asdict(stats) for name, stats in self._models.items()},
+            }
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Could not persist token estimates to {self.path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+_estimator: Optional[TokenEstimator] = None
+_estimator_lock = threading.Lock()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """
+    Get the process-wide token estimator.
+
+    It is created on first use, persisting to .ra-aid/ in the working directory
+    if that directory exists.
+    """
+    global _estimator
+    with _estimator_lock:
+        if _estimator is None:
+            directory, _ = os.path.split(TOKEN_ESTIMATES_PATH)
+            path = TOKEN_ESTIMATES_PATH if os.path.isdir(directory) else None
+            _estimator = TokenEstimator(os.path.abspath(path) if path else None)
+        return _estimator
@@ -0,0 +1,280 @@
+"""Per-directory cache of read-only tool results.
+
+Agents often repeat identical read-only calls within a session: the same
+ripgrep pattern, the same file, the same directory tree. Each repeat re-runs
+the tool and re-records its full trajectory. Tools wrapped with
+cached_tool_result() instead return the stored result of an earlier call with
+the same normalized arguments. Tools that may change the filesystem are wrapped
+with invalidates_tool_cache(), which drops every cached result once they run.
+"""
+
+import copy
+import functools
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+from ra_aid.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Results kept per working directory before the least recently used are dropped
+MAX_CACHED_RESULTS = 256
+
+# Working directories with a live cache
+MAX_CACHED_DIRECTORIES = 8
+
+
+@dataclass
+class ToolCacheStats:
+    """Counters describing how a tool result cache has been serving calls.
+
+    Attributes:
+        hits: Calls answered from the cache
+        misses: Calls that ran the tool
+        invalidations: Times the cache was cleared by a write tool
+    """
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Return the counters as a plain dictionary, including the hit rate."""
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class ToolResultCache:
+    """LRU map from (tool name, normalized arguments) to a tool result."""
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESULTS):
+        self.max_entries = max_entries
+        self.stats = ToolCacheStats()
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Number of invalidations so far; results computed across one are stale."""
+        return self._generation
+
+    def get(self, tool_name: str, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a result, counting the hit or miss.
+
+        Returns:
+            Tuple[bool, Any]: Whether the result was found, and a copy of it
+        """
+        with self._lock:
+            entry_key = (tool_name, key)
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.stats.hits += 1
+                return True, copy.deepcopy(self._entries[entry_key])
+            self.stats.misses += 1
+            return False, None
+
+    def put(self, tool_name: str, key: str, result: Any, generation: int) -> None:
+        """
+        Store a result computed while the cache was at `generation`.
+
+        Results whose computation overlapped an invalidation are discarded.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            entry_key = (tool_name, key)
+            self._entries[entry_key] = copy.deepcopy(result)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.stats.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_caches: "OrderedDict[Hashable, ToolResultCache]" = OrderedDict()
+_caches_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """
+    Get the result cache for the working directory.
+
+    The cache is keyed on the directory alone, not on the session repository: that
+    lives in a contextvar, which worker threads do not inherit, and threads of one
+    session must share entries and invalidations.
+    """
+    key = os.getcwd()
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ToolResultCache()
+        _caches.move_to_end(key)
+        while len(_caches) > MAX_CACHED_DIRECTORIES:
+            _caches.popitem(last=False)
+        return cache
+
+
+def invalidate_tool_caches() -> None:
+    """Drop cached results of all directories, as they may overlap."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.invalidate()
+
+
+def get_tool_cache_stats() -> Dict[str, float]:
+    """Report the current directory's counters as produced by ToolCacheStats.to_dict()."""
+    return get_tool_cache().stats.to_dict()
+
+
+def reset_tool_caches() -> None:
+    """Drop all caches together with their counters."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def _path_state(path: str) -> Any:
+    """A path with its stat data, so edits made outside the tools miss the cache."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return [os.path.normpath(path)]
+    return [os.path.normpath(path), st.st_mtime_ns, st.st_size]
+
+
+def _normalize(value: Any, is_path: bool) -> Any:
+    if is_path and isinstance(value, str) and value:
+        return _path_state(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item, is_path) for item in value]
+    return value
+
+
+def bind_arguments(func: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """Bind a call's arguments to parameter names, filling in defaults."""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def make_cache_key(arguments: Dict[str, Any], path_params: Iterable[str] = ()) -> str:
+    """
+    Build the cache key for bound arguments.
+
+    Path arguments are normalized and paired with their current mtime and size.
+    """
+    path_params = set(path_params)
+    normalized = {
+        name: _normalize(value, name in path_params) for name, value in arguments.items()
+    }
+    return json.dumps(normalized, sort_keys=True, default=repr)
+
+
+def _is_cacheable(result: Any) -> bool:
+    """Failed calls are not cached so a retry runs the tool again."""
+    if isinstance(result, dict):
+        return result.get("success", True) is not False and not result.get("error")
+    return True
+
+
+def _record_cache_hit(tool_name: str, arguments: Dict[str, Any], stats: ToolCacheStats) -> None:
+    try:
+        from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
+        from ra_aid.database.repositories.human_input_repository import get_human_input_repository
+
+        trajectory_repo = get_trajectory_repository()
+        human_input_id = get_human_input_repository().get_most_recent_id()
+        trajectory_repo.create(
+            tool_name=tool_name,
+            tool_parameters=json.loads(json.dumps(arguments, default=repr)),
+            step_data={
+                "display_title": "Cached Result",
+                "cache_hits": stats.hits,
+                "cache_misses": stats.misses,
+                "cache_hit_rate": stats.hit_rate,
+            },
+            record_type="tool_execution",
+            human_input_id=human_input_id,
+        )
+    except (ImportError, RuntimeError):
+        logger.debug("Skipping trajectory recording: repositories not available")
+
+
+def cached_tool_result(tool_name: str, path_params: Iterable[str] = ()) -> Callable:
+    """
+    Decorate a read-only tool function so repeated identical calls reuse its result.
+
+    Apply beneath @tool so the tool schema is still built from the wrapped signature.
+
+    Args:
+        tool_name: Name the results are cached and recorded under
+        path_params: Parameters holding paths, compared by normalized path and stat data
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_tool_cache()
+            try:
+                arguments = bind_arguments(func, args, kwargs)
+                key = make_cache_key(arguments, path_params)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            found, result = cache.get(tool_name, key)
+            if found:
+                logger.debug(f"Tool cache hit for {tool_name}: {key}")
+                _record_cache_hit(tool_name, arguments, cache.stats)
+                from ra_aid.console.formatting import cpm
+
+                cpm(
+                    f"Reusing the result of an identical earlier `{tool_name}` call.",
+                    title="♻️ Cached Result",
+                    border_style="bright_blue",
+                )
+                return result
+
+            generation = cache.generation
+            result = func(*args, **kwargs)
+            if _is_cacheable(result):
+                cache.put(tool_name, key, result, generation)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates_tool_cache(func: Callable) -> Callable:
+    """Decorate a tool function that may modify files so cached results are dropped after it runs."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate_tool_caches()
+
+    return wrapper
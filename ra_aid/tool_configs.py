@@ -7,14 +7,17 @@ from ra_aid.console import console
 from rich.markdown import Markdown
 from rich.panel import Panel
 from ra_aid.tools import (
+    apply_file_patch,
     ask_expert,
     ask_human,
+    check_background_command,
     emit_expert_context,
     emit_key_facts,
     emit_key_snippet,
     emit_related_files,
     emit_research_notes,
     file_str_replace,
+    file_str_replace_batch,
     fuzzy_find_project_files,
     list_directory_tree,
     mark_research_complete_no_implementation_required,
@@ -23,6 +26,7 @@ from ra_aid.tools import (
     ripgrep_search,
     run_programming_task,
     run_shell_command,
+    start_background_command,
     task_completed,
     web_search_tavily,
 )
@@ -51,7 +55,9 @@ def set_modification_tools(use_aider=False):
         MODIFICATION_TOOLS.append(run_programming_task)
     else:
         MODIFICATION_TOOLS.clear()
-        MODIFICATION_TOOLS.extend([file_str_replace, put_complete_file_contents])
+        MODIFICATION_TOOLS.extend(
+            [file_str_replace, file_str_replace_batch, apply_file_patch, put_complete_file_contents]
+        )
 
 
 def get_custom_tools() -> List[BaseTool]:
@@ -146,6 +152,8 @@ def get_read_only_tools(
         fuzzy_find_project_files,
         ripgrep_search,
         run_shell_command,  # can modify files, but we still need it for read-only tasks.
+        start_background_command,
+        check_background_command,
     ]
 
     if web_research_enabled:
@@ -181,7 +189,7 @@ except (ImportError, RuntimeError):
 READ_ONLY_TOOLS = get_read_only_tools(use_aider=use_aider)
 
 # MODIFICATION_TOOLS will be set dynamically based on config, default defined here
-MODIFICATION_TOOLS = [file_str_replace, put_complete_file_contents]
+MODIFICATION_TOOLS = [file_str_replace, file_str_replace_batch, apply_file_patch, put_complete_file_contents]
 COMMON_TOOLS = get_read_only_tools(use_aider=use_aider)
 # CUSTOM TOOLS will be set dynamically based on config, default defined here
 CUSTOM_TOOLS = []
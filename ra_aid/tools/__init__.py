@@ -1,5 +1,6 @@
+from .background_command import check_background_command, start_background_command
 from .expert import ask_expert, emit_expert_context
-from .file_str_replace import file_str_replace
+from .file_str_replace import file_str_replace, file_str_replace_batch
 from .fuzzy_find import fuzzy_find_project_files
 from .human import ask_human
 from .list_directory import list_directory_tree
@@ -12,6 +13,7 @@ from .memory import (
     plan_implementation_completed,
     task_completed,
 )
+from .patch_file import apply_file_patch
 from .programmer import run_programming_task
 from .read_file import read_file_tool
 from .research import existing_project_detected, monorepo_detected, ui_detected, mark_research_complete_no_implementation_required
@@ -34,9 +36,13 @@ __all__ = [
     "read_file_tool",
     "run_programming_task",
     "run_shell_command",
+    "start_background_command",
+    "check_background_command",
     "put_complete_file_contents",
     "ripgrep_search",
     "file_str_replace",
+    "file_str_replace_batch",
+    "apply_file_patch",
     "monorepo_detected",
     "existing_project_detected",
     "ui_detected",
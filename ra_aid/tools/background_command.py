@@ -0,0 +1,188 @@
+import logging
+import signal
+import weakref
+from typing import Dict, Optional, Union
+
+from langchain_core.tools import tool
+
+from ra_aid.console.cowboy_messages import get_cowboy_message
+from ra_aid.console.formatting import console_panel
+from ra_aid.proc.background import BackgroundCommand, get_background_commands
+from ra_aid.tool_cache import invalidate_tool_caches, invalidates_tool_cache
+from ra_aid.tools.memory import log_work_event
+from ra_aid.tools.shell import _detect_shell, _truncate_for_log, approve_command, console
+from ra_aid.database.repositories.config_repository import get_config_repository
+
+# How long to wait after starting or signalling a command, to report an exit right away
+SETTLE_SECONDS = 0.5
+
+# Most output returned by one check
+TAIL_CHARS = 4000
+
+# Commands whose exit a check has already reported
+_exits_reported: "weakref.WeakSet[BackgroundCommand]" = weakref.WeakSet()
+
+SIGNALS = {
+    "interrupt": signal.SIGINT,
+    "terminate": signal.SIGTERM,
+    "kill": signal.SIGKILL,
+}
+
+
+def record_trajectory(
+    tool_name: str,
+    tool_parameters: Dict,
+    step_data: Dict,
+    is_error: bool = False,
+    error_message: Optional[str] = None,
+) -> None:
+    """
+    Record a background command tool call, handling the case when repositories are not available.
+
+    Args:
+        tool_name: Name of the tool being recorded
+        tool_parameters: Parameters passed to the tool
+        step_data: UI rendering data
+        is_error: Flag indicating if this record represents an error
+        error_message: The error message
+    """
+    try:
+        from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
+        from ra_aid.database.repositories.human_input_repository import get_human_input_repository
+
+        trajectory_repo = get_trajectory_repository()
+        human_input_id = get_human_input_repository().get_most_recent_id()
+        trajectory_repo.create(
+            tool_name=tool_name,
+            tool_parameters=tool_parameters,
+            step_data=step_data,
+            record_type="error" if is_error else "tool_execution",
+            human_input_id=human_input_id,
+            is_error=is_error,
+            error_message=error_message,
+        )
+    except (ImportError, RuntimeError):
+        # If either the repository modules can't be imported or no repository is available,
+        # just log and continue without recording trajectory
+        logging.debug("Skipping trajectory recording: repositories not available")
+
+
+def _status(background: BackgroundCommand, tail_chars: int) -> Dict[str, Union[str, int, bool, None]]:
+    return_code = background.return_code
+    return {
+        "handle": background.handle,
+        "running": return_code is None,
+        "return_code": return_code,
+        "runtime_seconds": round(background.runtime_seconds, 1),
+        "output": background.tail(tail_chars),
+        "success": return_code in (None, 0),
+    }
+
+
+@tool
+@invalidates_tool_cache
+def start_background_command(command: str) -> Dict[str, Union[str, int, bool, None]]:
+    """Start a long-running shell command in the background and return a handle to it right away.
+
+    Use this instead of run_shell_command for commands that take minutes or never exit on their own,
+    such as dev servers, file watchers or long builds, so you can keep working while they run.
+    Check on the command with check_background_command. Output is kept on disk but only the most
+    recent part is retained. Commands still running when the session ends are stopped.
+
+    Args:
+        command: The shell command to run. Keep it to 300 words or less.
+    """
+    cowboy_mode = get_config_repository().get("cowboy_mode", False)
+    if cowboy_mode:
+        console.print("")
+        console.print(" " + get_cowboy_message())
+        console.print("")
+
+    tool_parameters = {"command": command}
+    console_panel(command, title="🐚 Background Shell", border_style="bright_yellow")
+
+    if not approve_command(cowboy_mode):
+        return {
+            "output": "Command execution cancelled by user",
+            "return_code": 1,
+            "success": False,
+        }
+
+    try:
+        background = get_background_commands().start(_detect_shell() + [command], command)
+    except (OSError, RuntimeError, ValueError) as e:
+        msg = f"Could not start background command: {str(e)}"
+        record_trajectory(
+            "start_background_command",
+            tool_parameters,
+            {"command": command, "error_message": msg, "display_title": "Background Shell Error"},
+            is_error=True,
+            error_message=msg,
+        )
+        console_panel(msg, title="❌ Error", border_style="red")
+        return {"output": msg, "return_code": 1, "success": False}
+
+    # Catch commands that fail immediately, e.g. with a typo
+    background.wait(SETTLE_SECONDS)
+    record_trajectory(
+        "start_background_command",
+        tool_parameters,
+        {"command": command, "handle": background.handle, "display_title": "Background Shell"},
+    )
+    log_work_event(
+        f"Started background command {background.handle}: {_truncate_for_log(command)}"
+    )
+    return _status(background, TAIL_CHARS)
+
+
+@tool
+def check_background_command(
+    handle: int, send_signal: str = "", tail_chars: int = TAIL_CHARS
+) -> Dict[str, Union[str, int, bool, None]]:
+    """Check a command started with start_background_command, optionally signalling it first.
+
+    Returns whether it is still running, its exit code once it has exited, how long it has been
+    running and the end of its output.
+
+    Args:
+        handle: The handle start_background_command returned
+        send_signal: Optionally "interrupt" (like Ctrl-C), "terminate" or "kill" to stop the command
+        tail_chars: How much of the end of the output to return, at most 4000 characters
+    """
+    tool_parameters = {"handle": handle, "send_signal": send_signal}
+    try:
+        background = get_background_commands().get(handle)
+        if send_signal:
+            if send_signal not in SIGNALS:
+                raise ValueError(
+                    f"Unknown signal '{send_signal}', expected one of: {', '.join(SIGNALS)}"
+                )
+            background.send_signal(SIGNALS[send_signal])
+            background.wait(SETTLE_SECONDS)
+    except (RuntimeError, ValueError) as e:
+        msg = str(e)
+        record_trajectory(
+            "check_background_command",
+            tool_parameters,
+            {"error_message": msg, "display_title": "Background Shell Error"},
+            is_error=True,
+            error_message=msg,
+        )
+        return {"output": msg, "return_code": 1, "success": False}
+
+    if send_signal:
+        record_trajectory(
+            "check_background_command",
+            tool_parameters,
+            {"command": background.command, "display_title": "Background Shell Signalled"},
+        )
+        log_work_event(f"Sent {send_signal} to background command {handle}.")
+
+    status = _status(background, max(1, min(tail_chars, TAIL_CHARS)))
+    if background not in _exits_reported:
+        # A running command, or one that has just exited, may have written files
+        # since cached results were computed
+        invalidate_tool_caches()
+        if not status["running"]:
+            _exits_reported.add(background)
+    return status
@@ -6,6 +6,7 @@ from langchain_core.tools import tool
 from rich.console import Console
 
 from ra_aid.console.formatting import console_panel, cpm
+from ra_aid.line_index import read_line_window
 
 from ..database.repositories.trajectory_repository import get_trajectory_repository
 from ..database.repositories.human_input_repository import get_human_input_repository
@@ -118,20 +119,20 @@ def read_files_with_limit(file_paths: List[str], max_lines: int = 10000) -> str:
                 console.print(f"Warning: File not found: {path}", style="yellow")
                 continue
 
-            with open(path, "r", encoding="utf-8") as f:
-                file_content = []
-                for i, line in enumerate(f):
-                    if total_lines + i >= max_lines:
-                        file_content.append(
-                            f"\n... truncated after {max_lines} lines ..."
-                        )
-                        break
-                    file_content.append(line)
-
-                if file_content:
-                    contents.append(f"\n## File: {path}\n")
-                    contents.append("".join(file_content))
-                    total_lines += len(file_content)
+            # Only the lines that fit are decoded; unchanged files come from the shared cache
+            window = read_line_window(
+                path, 1, None, encoding="utf-8", max_lines=max_lines - total_lines
+            )
+            file_content = window.text
+            line_count = max(window.end_line - window.start_line + 1, 0)
+            if window.next_start_line is not None:
+                file_content += f"\n... truncated after {max_lines} lines ..."
+                line_count += 1
+
+            if file_content:
+                contents.append(f"\n## File: {path}\n")
+                contents.append(file_content)
+                total_lines += line_count
 
         except Exception as e:
             console.print(f"Error reading file {path}: {str(e)}", style="red")
@@ -1,16 +1,25 @@
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import tool
+from typing_extensions import NotRequired, TypedDict
 
 from ra_aid.console import console
 from ra_aid.console.formatting import print_error
 from ra_aid.console.formatting import console_panel
+from ra_aid.file_edit import StrEdit, StrEditResult, apply_str_edits
+from ra_aid.tool_cache import invalidates_tool_cache
 from ra_aid.tools.memory import emit_related_files
 from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
 from ra_aid.database.repositories.human_input_repository import get_human_input_repository
 
 
+class StrReplaceEdit(TypedDict):
+    old_str: str
+    new_str: str
+    replace_all: NotRequired[bool]
+
+
 def truncate_display_str(s: str, max_length: int = 30) -> str:
     """Truncate a string for display purposes if it exceeds max length.
 
@@ -41,7 +50,60 @@ def format_string_for_display(s: str, threshold: int = 30) -> str:
     return f"[{len(s)} characters]"
 
 
+def describe_edit_failure(result: StrEditResult) -> Optional[str]:
+    """Explain why an edit could not be applied.
+
+    Args:
+        result: Match result of the edit
+
+    Returns:
+        Error message, or None if the edit can be applied
+    """
+    if result.conflict is not None:
+        return f"Overlaps edit {result.conflict} - edits must not overlap"
+    if result.count == 0:
+        return f"String not found: {truncate_display_str(result.edit.old_str)}"
+    if not result.ok:
+        return f"String appears {result.count} times - must be unique (use replace_all=True to replace all occurrences)"
+    return None
+
+
+def _report_error(msg: str, tool_name: str, tool_parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a failed edit in the trajectory, print it and build the tool result."""
+    try:
+        trajectory_repo = get_trajectory_repository()
+        human_input_id = get_human_input_repository().get_most_recent_id()
+        trajectory_repo.create(
+            step_data={
+                "error_message": msg,
+                "display_title": "Error",
+            },
+            record_type="error",
+            human_input_id=human_input_id,
+            is_error=True,
+            error_message=msg,
+            tool_name=tool_name,
+            tool_parameters=tool_parameters,
+        )
+    except Exception:
+        # Silently handle trajectory recording failures (e.g., in test environments)
+        pass
+
+    print_error(msg)
+    return {"success": False, "message": msg}
+
+
+def _add_related_file(filepath: str, tool_name: str, tool_parameters: Dict[str, Any]) -> None:
+    """Add an edited file to related files without failing the edit."""
+    try:
+        emit_related_files.invoke({"files": [filepath]})
+    except Exception as e:
+        # Don't let related files error affect main function success
+        _report_error(f"Note: Could not add to related files: {str(e)}", tool_name, tool_parameters)
+
+
 @tool
+@invalidates_tool_cache
 def file_str_replace(filepath: str, old_str: str, new_str: str, *, replace_all: bool = False) -> Dict[str, any]:
     """Replace an exact string match in a file with a new string.
     Only performs replacement if the old string appears exactly once, or replace_all is True.
@@ -52,105 +114,22 @@ def file_str_replace(filepath: str, old_str: str, new_str: str, *, replace_all:
         new_str: String to replace with
         replace_all: If True, replace all occurrences of the string (default: False)
     """
+    tool_parameters = {
+        "filepath": filepath,
+        "old_str": old_str,
+        "new_str": new_str,
+        "replace_all": replace_all
+    }
     try:
         path = Path(filepath)
         if not path.exists():
-            msg = f"File not found: {filepath}"
-            
-            # Record error in trajectory
-            try:
-                trajectory_repo = get_trajectory_repository()
-                human_input_id = get_human_input_repository().get_most_recent_id()
-                trajectory_repo.create(
-                    step_data={
-                        "error_message": msg,
-                        "display_title": "Error",
-                    },
-                    record_type="error",
-                    human_input_id=human_input_id,
-                    is_error=True,
-                    error_message=msg,
-                    tool_name="file_str_replace",
-                    tool_parameters={
-                        "filepath": filepath,
-                        "old_str": old_str,
-                        "new_str": new_str,
-                        "replace_all": replace_all
-                    }
-                )
-            except Exception:
-                # Silently handle trajectory recording failures (e.g., in test environments)
-                pass
-            
-            print_error(msg)
-            return {"success": False, "message": msg}
-
-        content = path.read_text()
-        count = content.count(old_str)
-
-        if count == 0:
-            msg = f"String not found: {truncate_display_str(old_str)}"
-            
-            # Record error in trajectory
-            try:
-                trajectory_repo = get_trajectory_repository()
-                human_input_id = get_human_input_repository().get_most_recent_id()
-                trajectory_repo.create(
-                    step_data={
-                        "error_message": msg,
-                        "display_title": "Error",
-                    },
-                    record_type="error",
-                    human_input_id=human_input_id,
-                    is_error=True,
-                    error_message=msg,
-                    tool_name="file_str_replace",
-                    tool_parameters={
-                        "filepath": filepath,
-                        "old_str": old_str,
-                        "new_str": new_str,
-                        "replace_all": replace_all
-                    }
-                )
-            except Exception:
-                # Silently handle trajectory recording failures (e.g., in test environments)
-                pass
-            
-            print_error(msg)
-            return {"success": False, "message": msg}
-        elif count > 1 and not replace_all:
-            msg = f"String appears {count} times - must be unique (use replace_all=True to replace all occurrences)"
-            
-            # Record error in trajectory
-            try:
-                trajectory_repo = get_trajectory_repository()
-                human_input_id = get_human_input_repository().get_most_recent_id()
-                trajectory_repo.create(
-                    step_data={
-                        "error_message": msg,
-                        "display_title": "Error",
-                    },
-                    record_type="error",
-                    human_input_id=human_input_id,
-                    is_error=True,
-                    error_message=msg,
-                    tool_name="file_str_replace",
-                    tool_parameters={
-                        "filepath": filepath,
-                        "old_str": old_str,
-                        "new_str": new_str,
-                        "replace_all": replace_all
-                    }
-                )
-            except Exception:
-                # Silently handle trajectory recording failures (e.g., in test environments)
-                pass
-            
-            print_error(msg)
-            return {"success": False, "message": msg}
+            return _report_error(f"File not found: {filepath}", "file_str_replace", tool_parameters)
 
-        new_content = content.replace(old_str, new_str)
-        path.write_text(new_content)
+        batch = apply_str_edits(filepath, [StrEdit(old_str, new_str, replace_all)])
+        result = batch.results[0]
+        if not batch.applied:
+            return _report_error(describe_edit_failure(result), "file_str_replace", tool_parameters)
+        count = result.count
 
         replacement_msg = f"Replaced in {filepath}:"
         if count > 1 and replace_all:
@@ -166,72 +145,71 @@ def file_str_replace(filepath: str, old_str: str, new_str: str, *, replace_all:
         if count > 1 and replace_all:
             success_msg = f"Successfully replaced {count} occurrences of '{old_str}' with '{new_str}' in {filepath}"
         
-        # Add file to related files
-        try:
-            emit_related_files.invoke({"files": [filepath]})
-        except Exception as e:
-            # Don't let related files error affect main function success
-            error_msg = f"Note: Could not add to related files: {str(e)}"
-            
-            # Record error in trajectory
-            try:
-                trajectory_repo = get_trajectory_repository()
-                human_input_id = get_human_input_repository().get_most_recent_id()
-                trajectory_repo.create(
-                    step_data={
-                        "error_message": error_msg,
-                        "display_title": "Error",
-                    },
-                    record_type="error",
-                    human_input_id=human_input_id,
-                    is_error=True,
-                    error_message=error_msg,
-                    tool_name="file_str_replace",
-                    tool_parameters={
-                        "filepath": filepath,
-                        "old_str": old_str,
-                        "new_str": new_str,
-                        "replace_all": replace_all
-                    }
-                )
-            except Exception:
-                # Silently handle trajectory recording failures (e.g., in test environments)
-                pass
-            
-            print_error(error_msg)
-            
+        _add_related_file(filepath, "file_str_replace", tool_parameters)
+
         return {
             "success": True,
             "message": success_msg,
         }
 
     except Exception as e:
-        msg = f"Error: {str(e)}"
-        
-        # Record error in trajectory
-        try:
-            trajectory_repo = get_trajectory_repository()
-            human_input_id = get_human_input_repository().get_most_recent_id()
-            trajectory_repo.create(
-                step_data={
-                    "error_message": msg,
-                    "display_title": "Error",
-                },
-                record_type="error",
-                human_input_id=human_input_id,
-                is_error=True,
-                error_message=msg,
-                tool_name="file_str_replace",
-                tool_parameters={
-                    "filepath": filepath,
-                    "old_str": old_str,
-                    "new_str": new_str,
-                    "replace_all": replace_all
-                }
+        return _report_error(f"Error: {str(e)}", "file_str_replace", tool_parameters)
+
+
+@tool
+@invalidates_tool_cache
+def file_str_replace_batch(filepath: str, edits: List[StrReplaceEdit]) -> Dict[str, any]:
+    """Make several exact string replacements in one file in a single step.
+    Every edit is matched against the file as it was before this call, so edits must not overlap.
+    The file is only changed if every edit applies; each old_str must appear exactly once
+    unless that edit sets replace_all to True.
+
+    Args:
+        filepath: Path to the file to modify
+        edits: Replacements, each with old_str, new_str and optionally replace_all (default: False)
+    """
+    tool_parameters = {"filepath": filepath, "edits": edits}
+    try:
+        if not Path(filepath).exists():
+            return _report_error(f"File not found: {filepath}", "file_str_replace_batch", tool_parameters)
+        if not edits:
+            return _report_error("No edits given", "file_str_replace_batch", tool_parameters)
+
+        batch = apply_str_edits(
+            filepath,
+            [StrEdit(edit["old_str"], edit["new_str"], bool(edit.get("replace_all", False))) for edit in edits],
+        )
+        edit_results = [
+            {"count": result.count, "error": describe_edit_failure(result)} for result in batch.results
+        ]
+        if not batch.applied:
+            failures = "; ".join(f"Edit {i}: {describe_edit_failure(result)}" for i, result in batch.failures)
+            response = _report_error(
+                f"No changes made to {filepath}. {failures}", "file_str_replace_batch", tool_parameters
             )
-        except Exception:
-            # Silently handle trajectory recording failures (e.g., in test environments)
-            pass
-        
-        print_error(msg)
-        return {"success": False, "message": msg}
\ No newline at end of file
+            response["edits"] = edit_results
+            return response
+
+        replacements = sum(result.count for result in batch.results)
+        console_panel(
+            "\n".join(
+                [f"Made {replacements} replacements from {len(edits)} edits in {filepath}:"]
+                + [
+                    f"{format_string_for_display(result.edit.old_str)} → {format_string_for_display(result.edit.new_str)}"
+                    for result in batch.results
+                ]
+            ),
+            title="✓ Strings Replaced",
+            border_style="bright_blue"
+        )
+
+        _add_related_file(filepath, "file_str_replace_batch", tool_parameters)
+
+        return {
+            "success": True,
+            "message": f"Successfully made {replacements} replacements from {len(edits)} edits in {filepath}",
+            "edits": edit_results,
+        }
+
+    except Exception as e:
+        return _report_error(f"Error: {str(e)}", "file_str_replace_batch", tool_parameters)
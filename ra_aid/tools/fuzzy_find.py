@@ -1,8 +1,7 @@
-import fnmatch
 import logging
-from typing import List, Tuple, Dict, Optional, Any
+import os
+from typing import List, Tuple, Dict, Optional, Any, Union
 
-from fuzzywuzzy import process
 from git import Repo, exc
 from langchain_core.tools import tool
 from rich.console import Console
@@ -11,6 +10,9 @@ from rich.panel import Panel
 
 from ra_aid.console.formatting import console_panel, cpm
 from ra_aid.file_listing import get_all_project_files, FileListerError
+from ra_aid.fuzzy_index import get_fuzzy_index
+from ra_aid.tool_cache import cached_tool_result
+from ra_aid.utils.pattern_matcher import compile_patterns
 
 console = Console()
 
@@ -68,8 +70,9 @@ DEFAULT_EXCLUDE_PATTERNS = [
 
 
 @tool
+@cached_tool_result("fuzzy_find_project_files", path_params=["repo_path"])
 def fuzzy_find_project_files(
-    search_term: str,
+    search_term: Union[str, List[str]],
     *,
     repo_path: str = ".",
     threshold: int = 60,
@@ -77,15 +80,17 @@ def fuzzy_find_project_files(
     include_paths: List[str] = None,
     exclude_patterns: List[str] = None,
     include_hidden: bool = False,
-) -> List[Tuple[str, int]]:
+) -> Union[List[Tuple[str, int]], Dict[str, List[Tuple[str, int]]]]:
     """Fuzzy find files in a project matching the search term.
 
     This tool searches for files within a project directory using fuzzy string matching,
     allowing for approximate matches to the search term. It returns a list of matched
     files along with their match scores. Works with both git and non-git repositories.
+    Matches on a file's name rank above matches on its directory names.
 
     Args:
-        search_term: String to match against file paths
+        search_term: String to match against file paths, or a list of strings to
+            search for several terms in one call
         repo_path: Path to project directory (defaults to current directory)
         threshold: Minimum similarity score (0-100) for matches (default: 60)
         max_results: Maximum number of results to return (default: 10)
@@ -94,7 +99,8 @@ def fuzzy_find_project_files(
         include_hidden: Whether to include hidden files in search (default: False)
 
     Returns:
-        List of tuples containing (file_path, match_score)
+        List of tuples containing (file_path, match_score); for a list of search
+        terms, a dict mapping each term to its list of tuples
 
     Raises:
         ValueError: If threshold is not between 0 and 100
@@ -130,8 +136,10 @@ def fuzzy_find_project_files(
         raise ValueError(error_msg)
 
     # Handle empty search term as special case
-    if not search_term:
-        return []
+    batch = isinstance(search_term, list)
+    search_terms = [term for term in (search_term if batch else [search_term]) if term]
+    if not search_terms:
+        return {} if batch else []
 
     # Combine default and user-provided exclude patterns
     all_exclude_patterns = DEFAULT_EXCLUDE_PATTERNS + (exclude_patterns or [])
@@ -146,16 +154,25 @@ def fuzzy_find_project_files(
         
         # Apply include patterns if specified
         if include_paths:
-            filtered_files = []
-            for pattern in include_paths:
-                filtered_files.extend(f for f in all_files if fnmatch.fnmatch(f, pattern))
-            all_files = filtered_files
+            all_files = compile_patterns(include_paths).select(all_files)
 
-        # Perform fuzzy matching
-        matches = process.extract(search_term, all_files, limit=max_results)
+        # Reuse the preprocessed index while the listing is unchanged
+        index = get_fuzzy_index(
+            (
+                os.path.realpath(repo_path),
+                include_hidden,
+                tuple(all_exclude_patterns),
+                tuple(include_paths or ()),
+            ),
+            all_files,
+        )
 
-        # Filter by threshold
-        filtered_matches = [(path, score) for path, score in matches if score >= threshold]
+        # Perform fuzzy matching
+        results = {
+            term: index.search(term, limit=max_results, threshold=threshold)
+            for term in search_terms
+        }
+        filtered_matches = [match for matches in results.values() for match in matches]
 
         # Build info panel content
         info_sections = []
@@ -163,7 +180,7 @@ def fuzzy_find_project_files(
         # Search parameters section
         params_section = [
             "## Search Parameters",
-            f"**Search Term**: `{search_term}`",
+            f"**Search Term**: {', '.join(f'`{term}`' for term in search_terms)}",
             f"**Directory**: `{repo_path}`",
             f"**Threshold**: {threshold}",
             f"**Max Results**: {max_results}",
@@ -190,8 +207,11 @@ def fuzzy_find_project_files(
         # Top results section
         if filtered_matches:
             results_section = ["## Top Matches"]
-            for path, score in filtered_matches[:5]:  # Show top 5 matches
-                results_section.append(f"- `{path}` (score: {score})")
+            for term, matches in results.items():
+                if batch:
+                    results_section.append(f"\n**{term}**:")
+                for path, score in matches[:5]:  # Show top 5 matches
+                    results_section.append(f"- `{path}` (score: {score})")
             info_sections.append("\n".join(results_section))
         else:
             info_sections.append("## Results\n*No matches found*")
@@ -224,7 +244,7 @@ def fuzzy_find_project_files(
             border_style="bright_blue"
         )
 
-        return filtered_matches
+        return results if batch else results[search_terms[0]]
         
     except FileListerError as e:
         error_msg = f"Error listing files: {e}"
@@ -253,4 +273,4 @@ def fuzzy_find_project_files(
         )
         
         console.print(f"[bold red]{error_msg}[/bold red]")
-        return []
+        return {} if batch else []
@@ -1,10 +1,8 @@
 import datetime
-import fnmatch
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
-import pathspec
 from langchain_core.tools import tool
 from rich.console import Console
 from rich.markdown import Markdown
@@ -12,6 +10,8 @@ from rich.panel import Panel
 from rich.tree import Tree
 
 from ra_aid.console.formatting import cpm
+from ra_aid.tool_cache import cached_tool_result
+from ra_aid.utils.pattern_matcher import PatternMatcher, compile_patterns
 
 console = Console()
 
@@ -63,14 +63,14 @@ DEFAULT_EXCLUDE_PATTERNS = [
 ]
 
 
-def load_gitignore_patterns(path: Path) -> pathspec.PathSpec:
+def load_gitignore_patterns(path: Path) -> PatternMatcher:
     """Load gitignore patterns from .gitignore file or use defaults.
 
     Args:
         path: Directory path to search for .gitignore
 
     Returns:
-        PathSpec object configured with the loaded patterns
+        Compiled matcher for the loaded patterns
     """
     gitignore_path = path / ".gitignore"
     patterns = []
@@ -106,17 +106,17 @@ def load_gitignore_patterns(path: Path) -> pathspec.PathSpec:
     # Add default patterns
     patterns.extend(DEFAULT_EXCLUDE_PATTERNS)
 
-    return pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, patterns)
+    return compile_patterns(patterns, syntax="gitignore")
 
 
-def should_ignore(path: str, spec: pathspec.PathSpec) -> bool:
+def should_ignore(path: str, spec: PatternMatcher) -> bool:
     """Check if a path should be ignored based on gitignore patterns"""
     return spec.match_file(path)
 
 
 def should_exclude(name: str, patterns: List[str]) -> bool:
     """Check if a file/directory name matches any exclude patterns"""
-    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+    return compile_patterns(patterns).matches(name)
 
 
 def build_tree(
@@ -124,12 +124,14 @@ def build_tree(
     tree: Tree,
     config: DirScanConfig,
     current_depth: int = 0,
-    spec: Optional[pathspec.PathSpec] = None,
+    spec: Optional[PatternMatcher] = None,
 ) -> None:
     """Recursively build a Rich tree representation of the directory"""
     if current_depth >= config.max_depth:
         return
 
+    exclude = compile_patterns(config.exclude_patterns)
+
     try:
         # Get sorted list of directory contents
         entries = sorted(path.iterdir(), key=lambda p: (not p.is_dir(), p.name.lower()))
@@ -141,7 +143,7 @@ def build_tree(
             # Skip if path matches exclude patterns
             if spec and should_ignore(str(rel_path), spec):
                 continue
-            if should_exclude(entry.name, config.exclude_patterns):
+            if exclude.matches(entry.name):
                 continue
 
             # Skip if symlink and not following links
@@ -177,6 +179,7 @@ def build_tree(
 
 
 @tool
+@cached_tool_result("list_directory_tree", path_params=["path"])
 def list_directory_tree(
     path: str = ".",
     *,
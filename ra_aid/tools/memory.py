@@ -2,7 +2,7 @@ import os
 from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import tool
-from ra_aid.utils.file_utils import is_binary_file
+from ra_aid.utils.file_utils import classify_binary_files, is_binary_file
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -425,6 +425,9 @@ def emit_related_files(files: List[str]) -> str:
     invalid_paths = []
     binary_files = []
 
+    # Classify candidate files in parallel up front; the per-file checks below reuse the cached verdicts
+    classify_binary_files(file for file in files if os.path.isfile(file))
+
     # Process files
     for file in files:
         # First check if path exists
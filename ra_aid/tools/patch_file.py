@@ -0,0 +1,142 @@
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from langchain_core.tools import tool
+
+from ra_aid.console.formatting import console_panel, print_error
+from ra_aid.file_patch import PatchParseError, apply_patch
+from ra_aid.tool_cache import invalidates_tool_cache
+from ra_aid.tools.memory import emit_related_files
+
+
+def record_trajectory(
+    tool_parameters: Dict,
+    step_data: Dict,
+    is_error: bool = False,
+    error_message: Optional[str] = None,
+) -> None:
+    """
+    Record an apply_file_patch call, handling the case when repositories are not available.
+
+    Args:
+        tool_parameters: Parameters passed to the tool
+        step_data: UI rendering data
+        is_error: Flag indicating if this record represents an error
+        error_message: The error message
+    """
+    try:
+        from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
+        from ra_aid.database.repositories.human_input_repository import get_human_input_repository
+
+        trajectory_repo = get_trajectory_repository()
+        human_input_id = get_human_input_repository().get_most_recent_id()
+        trajectory_repo.create(
+            tool_name="apply_file_patch",
+            tool_parameters=tool_parameters,
+            step_data=step_data,
+            record_type="error" if is_error else "tool_execution",
+            human_input_id=human_input_id,
+            is_error=is_error,
+            error_message=error_message,
+        )
+    except (ImportError, RuntimeError):
+        # If either the repository modules can't be imported or no repository is available,
+        # just log and continue without recording trajectory
+        logging.debug("Skipping trajectory recording: repositories not available")
+
+
+@tool
+@invalidates_tool_cache
+def apply_file_patch(filepath: str, patch: str) -> Dict[str, any]:
+    """Change an existing file by applying a patch, without re-sending the whole file.
+    Prefer this over put_complete_file_contents when changing part of an existing file.
+
+    The patch is either a unified diff with @@ hunk headers (as from `diff -u` or `git diff`),
+    or one or more search/replace blocks:
+
+    <<<<<<< SEARCH
+    exact lines currently in the file
+    =======
+    lines to put in their place
+    >>>>>>> REPLACE
+
+    Hunks are matched even if line numbers are off or whitespace differs slightly.
+    The file is only changed if every hunk applies; otherwise the result explains
+    which hunks were rejected and what the file contains where they were expected.
+
+    Args:
+        filepath: Path to the file to patch
+        patch: Unified diff or search/replace blocks for this one file
+    """
+    start_time = time.time()
+    tool_parameters = {"filepath": filepath, "patch_chars": len(patch)}
+    try:
+        if not Path(filepath).exists():
+            raise FileNotFoundError(f"File not found: {filepath}")
+        result = apply_patch(filepath, patch)
+    except (PatchParseError, OSError, UnicodeDecodeError) as e:
+        msg = f"Could not apply patch to {filepath}: {str(e)}"
+        record_trajectory(
+            tool_parameters,
+            {"error_message": msg, "display_title": "Error"},
+            is_error=True,
+            error_message=msg,
+        )
+        print_error(msg)
+        return {"success": False, "message": msg}
+
+    hunks = [
+        {
+            "hunk": hunk.index + 1,
+            "applied": hunk.applied,
+            "line": hunk.line,
+            "offset": hunk.offset,
+            "fuzz": hunk.fuzz,
+            "ignored_whitespace": hunk.ignored_whitespace,
+            "reason": hunk.reason,
+        }
+        for hunk in result.hunks
+    ]
+
+    if not result.applied:
+        msg = (
+            f"No changes made to {filepath}: {len(result.rejected)} of {len(result.hunks)} hunks "
+            f"did not apply.\n{result.report()}"
+        )
+        record_trajectory(
+            tool_parameters,
+            {"error_message": msg, "display_title": "Patch Rejected"},
+            is_error=True,
+            error_message=msg,
+        )
+        print_error(msg)
+        return {"success": False, "message": msg, "hunks": hunks}
+
+    elapsed = time.time() - start_time
+    adjusted = sum(1 for hunk in result.hunks if hunk.offset or hunk.fuzz or hunk.ignored_whitespace)
+    summary = f"Applied {len(result.hunks)} hunks to {filepath} ({result.bytes_written} bytes) in {elapsed:.2f}s"
+    if adjusted:
+        summary += f"; {adjusted} matched with offset, fuzz or whitespace differences"
+
+    # patch_chars against bytes_written shows what a full rewrite would have cost
+    record_trajectory(
+        tool_parameters,
+        {
+            "display_title": "File Patched",
+            "filepath": filepath,
+            "hunks": len(result.hunks),
+            "patch_chars": len(patch),
+            "bytes_written": result.bytes_written,
+        },
+    )
+    console_panel(summary, title="🩹 File Patched", border_style="bright_green")
+
+    # Add file to related files
+    try:
+        emit_related_files.invoke({"files": [filepath]})
+    except Exception as e:
+        logging.debug(f"Could not add {filepath} to related files: {e}")
+
+    return {"success": True, "message": summary, "hunks": hunks}
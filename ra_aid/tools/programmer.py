@@ -10,9 +10,11 @@ from rich.panel import Panel
 from rich.text import Text
 
 from ra_aid.logging_config import get_logger
-from ra_aid.models_params import DEFAULT_BASE_LATENCY, models_params
+from ra_aid.model_registry import get_model_registry
+from ra_aid.models_params import models_params
 from ra_aid.proc.interactive import run_interactive_command
 from ra_aid.text.processing import truncate_output
+from ra_aid.tool_cache import invalidates_tool_cache
 from ra_aid.tools.memory import log_work_event
 from ra_aid.database.repositories.config_repository import get_config_repository
 from ra_aid.database.repositories.related_files_repository import get_related_files_repository
@@ -28,6 +30,7 @@ def _truncate_for_log(text: str, max_length: int = 300) -> str:
 
 
 @tool
+@invalidates_tool_cache
 def run_programming_task(
     instructions: str, files: List[str] = []
 ) -> Dict[str, Union[str, int, bool]]:
@@ -124,10 +127,8 @@ def run_programming_task(
         # Get provider/model specific latency coefficient
         provider = get_config_repository().get("provider", "")
         model = get_config_repository().get("model", "")
-        latency = (
-            models_params.get(provider, {})
-            .get(model, {})
-            .get("latency_coefficient", DEFAULT_BASE_LATENCY)
+        latency = get_model_registry().latency_coefficient(
+            provider, model, models_params
         )
 
         result = run_interactive_command(command, expected_runtime_seconds=latency)
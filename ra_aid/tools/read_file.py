@@ -1,16 +1,17 @@
 import logging
 import os.path
 import time
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 
 from langchain_core.tools import tool
 
-from ra_aid.text.processing import truncate_output
+from ra_aid.line_index import count_lines, read_line_window
+from ra_aid.tool_cache import cached_tool_result
 from ra_aid.tools.memory import is_binary_file
 from ra_aid.console.formatting import console_panel, cpm
 
-# Standard buffer size for file reading
-CHUNK_SIZE = 8192
+# Most lines returned by one read; longer files are paged with start_line
+MAX_LINES_PER_READ = 5000
 
 
 def record_trajectory(
@@ -57,12 +58,24 @@ def record_trajectory(
 
 
 @tool
-def read_file_tool(filepath: str, encoding: str = "utf-8") -> Dict[str, str]:
-    """Read and return the contents of a text file.
+@cached_tool_result("read_file_tool", path_params=["filepath"])
+def read_file_tool(
+    filepath: str,
+    encoding: str = "utf-8",
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+) -> Dict[str, Union[str, int]]:
+    """Read and return the contents of a text file, or a range of its lines.
+
+    At most 5000 lines are returned per call. Without a range, long files show their last 5000 lines.
+    When more lines follow the returned range, the result includes next_start_line; pass it as
+    start_line to continue reading.
 
     Args:
         filepath: Path to the file to read
         encoding: File encoding to use (default: utf-8)
+        start_line: First line to read, 1-based (default: None)
+        end_line: Last line to read, inclusive (default: None)
     
     DO NOT ATTEMPT TO READ BINARY FILES
     """
@@ -114,56 +127,72 @@ def read_file_tool(filepath: str, encoding: str = "utf-8") -> Dict[str, str]:
             return {"error": "read_file failed because we cannot read binary files"}
 
         logging.debug(f"Starting to read file: {filepath}")
-        content = []
-        line_count = 0
-        total_bytes = 0
 
-        with open(filepath, "r", encoding=encoding) as f:
-            while True:
-                chunk = f.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-
-                content.append(chunk)
-                total_bytes += len(chunk)
-                line_count += chunk.count("\n")
-
-                logging.debug(
-                    f"Read chunk: {len(chunk)} bytes, running total: {total_bytes} bytes"
-                )
+        if start_line is None and end_line is None:
+            # Without a range, show the end of files that are too long
+            total_lines = count_lines(filepath, encoding)
+            window = read_line_window(
+                filepath, max(1, total_lines - MAX_LINES_PER_READ + 1), None, encoding
+            )
+        else:
+            window = read_line_window(
+                filepath, start_line, end_line, encoding, max_lines=MAX_LINES_PER_READ
+            )
 
-        full_content = "".join(content)
+        line_count = window.end_line - window.start_line + 1
+        total_bytes = len(window.text)
         elapsed = time.time() - start_time
 
-        logging.debug(f"File read complete: {total_bytes} bytes in {elapsed:.2f}s")
-        logging.debug(f"Pre-truncation stats: {total_bytes} bytes, {line_count} lines")
+        logging.debug(
+            f"File read complete: lines {window.start_line}-{window.end_line} of "
+            f"{window.total_lines} ({total_bytes} chars) in {elapsed:.2f}s"
+        )
 
         # Record successful file read in trajectory
         record_trajectory(
             tool_name="read_file_tool",
             tool_parameters={
                 "filepath": filepath,
-                "encoding": encoding
+                "encoding": encoding,
+                "start_line": start_line,
+                "end_line": end_line
             },
             step_data={
                 "filepath": filepath,
                 "display_title": "File Read",
                 "line_count": line_count,
+                "start_line": window.start_line,
+                "end_line": window.end_line,
+                "total_lines": window.total_lines,
                 "total_bytes": total_bytes,
                 "elapsed_time": elapsed
             }
         )
 
+        range_info = (
+            f"lines {window.start_line}-{window.end_line} of {window.total_lines}"
+            if line_count != window.total_lines
+            else f"{line_count} lines"
+        )
         console_panel(
-            f"Read {line_count} lines ({total_bytes} bytes) from {filepath}",
+            f"Read {range_info} ({total_bytes} bytes) from {filepath}",
             title="📄 File Read",
             border_style="bright_blue",
         )
 
-        # Truncate if needed
-        truncated = truncate_output(full_content) if full_content else ""
-
-        return {"content": truncated}
+        content = window.text
+        if window.start_line > 1 and start_line is None and end_line is None:
+            content = f"[{window.start_line - 1} lines of output truncated]\n" + content
+
+        result = {
+            "content": content,
+            "start_line": window.start_line,
+            "end_line": window.end_line,
+            "total_lines": window.total_lines,
+        }
+        if window.next_start_line is not None:
+            result["next_start_line"] = window.next_start_line
+        return result
 
     except Exception as e:
         elapsed = time.time() - start_time
@@ -5,13 +5,16 @@ from rich.console import Console
 from rich.markdown import Markdown
 from rich.panel import Panel
 
+from ra_aid.code_index import narrow_search_command
 from ra_aid.console.formatting import console_panel, cpm
 from ra_aid.database.repositories.human_input_repository import get_human_input_repository
 from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
-from ra_aid.proc.interactive import run_interactive_command
-from ra_aid.text.processing import truncate_output
+from ra_aid.logging_config import get_logger
+from ra_aid.proc.ripgrep_stream import MAX_MATCHES_PER_FILE, SearchCollector, stream_search
+from ra_aid.tool_cache import cached_tool_result
 
 console = Console()
+logger = get_logger(__name__)
 
 DEFAULT_EXCLUDE_DIRS = [
     ".git",
@@ -72,6 +75,7 @@ FILE_TYPE_MAP = {
 
 
 @tool
+@cached_tool_result("ripgrep_search", path_params=["include_paths"])
 def ripgrep_search(
     pattern: str,
     *,
@@ -88,6 +92,7 @@ def ripgrep_search(
     """Execute a ripgrep (rg) search with formatting and common options.
 
     Prefer to use this with after_context_lines and/or before_context_lines over reading entire file contents, to conserve tokens and resources.
+    Results are grouped by file and capped per file and in total; narrow the pattern or paths if the output says the search was stopped.
 
     Args:
         pattern: Search pattern to find
@@ -102,8 +107,9 @@ def ripgrep_search(
                        If provided, rg will only search these paths.
         fixed_string: Whether to treat pattern as a literal string instead of regex (default: False)
     """
-    # Build rg command with options
-    cmd = ["rg", "--color", "always"]
+    # Build rg command with options; matches past the per-file budget (plus
+    # one to tell whether more exist) are never produced
+    cmd = ["rg", "--json", "--max-count", str(MAX_MATCHES_PER_FILE + 1)]
 
     if before_context_lines is not None:
         cmd.extend(["-B", str(before_context_lines)])
@@ -114,23 +120,28 @@ def ripgrep_search(
     if not case_sensitive:
         cmd.append("-i")
 
+    # Options deciding which files are searched
+    filter_args = []
+
     if include_hidden:
-        cmd.append("--hidden")
+        filter_args.append("--hidden")
 
     if follow_links:
-        cmd.append("--follow")
+        filter_args.append("--follow")
 
     if file_type:
         mapped_type = FILE_TYPE_MAP.get(file_type)
         if mapped_type:
-            cmd.extend(["-t", mapped_type])
+            filter_args.extend(["-t", mapped_type])
         else:
-             cmd.extend(["-t", file_type]) # Pass original if not in map
+            filter_args.extend(["-t", file_type]) # Pass original if not in map
 
     # Add exclusions
     exclusions = DEFAULT_EXCLUDE_DIRS + (exclude_dirs or [])
     for dir in exclusions:
-        cmd.extend(["--glob", f"!{dir}"])
+        filter_args.extend(["--glob", f"!{dir}"])
+
+    cmd.extend(filter_args)
 
     # Add fixed string flag if specified
     if fixed_string:
@@ -206,26 +217,55 @@ def ripgrep_search(
         border_style="bright_blue"
     )
     try:
-        print()
-        output, return_code = run_interactive_command(cmd)
-        print()
-        decoded_output = output.decode() if output else ""
+        # Limit the search to candidate files when the code index is enabled
+        try:
+            narrowed = narrow_search_command(
+                cmd[: -1 - len(include_paths or [])],
+                filter_args,
+                pattern,
+                include_paths,
+                fixed_string=fixed_string,
+                case_sensitive=case_sensitive,
+            )
+        except Exception as e:
+            logger.warning(f"Code index lookup failed, searching all files: {e}")
+            narrowed = None
+
+        collector = SearchCollector(after_context_lines=after_context_lines or 0)
+        return_code, error = stream_search(narrowed or cmd, collector)
+        output = collector.output
+        if return_code not in (0, 1) and error:
+            output = f"{output}\n{error}" if output else error
 
         # Update trajectory with results
         trajectory_repo.create(
             tool_name="ripgrep_search",
             tool_parameters={"pattern": pattern, "after_context_lines": after_context_lines, "before_context_lines": before_context_lines},
-            tool_result={"output": truncate_output(decoded_output), "return_code": return_code, "success": return_code == 0}
+            tool_result={
+                "output": output,
+                "return_code": return_code,
+                "success": return_code == 0,
+                "match_count": collector.match_count,
+                "file_count": collector.file_count,
+                "truncated": collector.truncated,
+            }
         )
 
         if return_code != 0:
-            console_panel(truncate_output(decoded_output), title="🚨 Error", border_style="red")
-            return {"output": truncate_output(decoded_output), "return_code": return_code, "success": False}
+            console_panel(output, title="🚨 Error", border_style="red")
+            return {"output": output, "return_code": return_code, "success": False}
 
+        console_panel(
+            output,
+            title=f"🔎 {collector.match_count} matches in {collector.file_count} files",
+            border_style="bright_blue",
+        )
         return {
-            "output": truncate_output(decoded_output),
+            "output": output,
             "return_code": return_code,
-            "success": return_code == 0,
+            "success": True,
+            "match_count": collector.match_count,
+            "truncated": collector.truncated,
         }
 
     except Exception as e:
@@ -1,3 +1,5 @@
+import asyncio
+import os
 import platform
 import shutil
 from typing import Dict, Union
@@ -8,9 +10,16 @@ from rich.panel import Panel
 from rich.prompt import Prompt
 
 from ra_aid.console.cowboy_messages import get_cowboy_message
+from ra_aid.command_durations import get_command_durations
 from ra_aid.console.formatting import console_panel, cpm
-from ra_aid.proc.interactive import run_interactive_command
+from ra_aid.proc.interactive import (
+    CommandRun,
+    arun_interactive_command,
+    get_command_loop,
+    run_interactive_command,
+)
 from ra_aid.text.processing import truncate_output
+from ra_aid.tool_cache import invalidates_tool_cache
 from ra_aid.tools.memory import log_work_event
 from ra_aid.database.repositories.config_repository import get_config_repository
 from ra_aid.database.repositories.trajectory_repository import get_trajectory_repository
@@ -36,7 +45,38 @@ def _truncate_for_log(text: str, max_length: int = 300) -> str:
     return text[:max_length] + "... [truncated]"
 
 
+def approve_command(cowboy_mode: bool) -> bool:
+    """Ask the user to approve running a command, unless cowboy mode is on.
+
+    Answering "c" approves the command and enables cowboy mode for the session.
+
+    Returns:
+        False if the user declined to run the command.
+    """
+    if cowboy_mode:
+        return True
+
+    choices = ["y", "n", "c"]
+    response = Prompt.ask(
+        "Execute this command? (y=yes, n=no, c=enable cowboy mode for session)",
+        choices=choices,
+        default="y",
+        show_choices=True,
+        show_default=True,
+    )
+
+    if response == "n":
+        return False
+    elif response == "c":
+        get_config_repository().set("cowboy_mode", True)
+        console.print("")
+        console.print(" " + get_cowboy_message())
+        console.print("")
+    return True
+
+
 @tool
+@invalidates_tool_cache
 def run_shell_command(
     command: str, timeout: int = 30
 ) -> Dict[str, Union[str, int, bool]]:
@@ -72,7 +112,7 @@ def run_shell_command(
     # Record tool execution in trajectory
     trajectory_repo = get_trajectory_repository()
     human_input_id = get_human_input_repository().get_most_recent_id()
-    trajectory_repo.create(
+    trajectory = trajectory_repo.create(
         tool_name="run_shell_command",
         tool_parameters={"command": command, "timeout": timeout},
         step_data={
@@ -86,37 +126,54 @@ def run_shell_command(
     # Show just the command in a simple panel
     console_panel(command, title="🐚 Shell", border_style="bright_yellow")
 
-    if not cowboy_mode:
-        choices = ["y", "n", "c"]
-        response = Prompt.ask(
-            "Execute this command? (y=yes, n=no, c=enable cowboy mode for session)",
-            choices=choices,
-            default="y",
-            show_choices=True,
-            show_default=True,
-        )
-
-        if response == "n":
-            print()
-            return {
-                "output": "Command execution cancelled by user",
-                "return_code": 1,
-                "success": False,
-            }
-        elif response == "c":
-            get_config_repository().set("cowboy_mode", True)
-            console.print("")
-            console.print(" " + get_cowboy_message())
-            console.print("")
+    if not approve_command(cowboy_mode):
+        print()
+        return {
+            "output": "Command execution cancelled by user",
+            "return_code": 1,
+            "success": False,
+        }
 
     try:
         print()
         shell_cmd = _detect_shell()
-        output, return_code = run_interactive_command(
-            shell_cmd + [command],
-            expected_runtime_seconds=timeout,
-        )
+        cwd = os.getcwd()
+        # Past runs of the same command may raise the deadline and set a hang timeout
+        durations = get_command_durations()
+        limits = durations.timeout_for(command, cwd, timeout)
+        run = CommandRun()
+        command_loop = get_command_loop()
+        if command_loop is not None:
+            # Under the server, run on its event loop alongside other sessions' commands
+            output, return_code = asyncio.run_coroutine_threadsafe(
+                arun_interactive_command(
+                    shell_cmd + [command],
+                    expected_runtime_seconds=limits.expected_runtime_seconds,
+                    idle_timeout_seconds=limits.idle_timeout_seconds,
+                    run=run,
+                ),
+                command_loop,
+            ).result()
+        else:
+            output, return_code = run_interactive_command(
+                shell_cmd + [command],
+                expected_runtime_seconds=limits.expected_runtime_seconds,
+                idle_timeout_seconds=limits.idle_timeout_seconds,
+                run=run,
+            )
         print()
+        durations.add(command, cwd, run)
+        trajectory_repo.update(
+            trajectory.id,
+            tool_result={
+                "return_code": return_code,
+                "duration_seconds": round(run.duration_seconds, 3),
+                "max_output_gap_seconds": round(run.max_output_gap_seconds, 3),
+                "timed_out": run.timed_out,
+                "hung": run.hung,
+                "cwd": cwd,
+            },
+        )
         result = {
             "output": truncate_output(output.decode()) if output else "",
             "return_code": return_code,
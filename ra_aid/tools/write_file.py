@@ -7,12 +7,15 @@ from langchain_core.tools import tool
 from rich.console import Console
 from rich.panel import Panel
 from ra_aid.console.formatting import console_panel
+from ra_aid.file_cache import get_file_cache
+from ra_aid.tool_cache import invalidates_tool_cache
 from ra_aid.tools.memory import emit_related_files
 
 console = Console()
 
 
 @tool
+@invalidates_tool_cache
 def put_complete_file_contents(
     filepath: str,
     complete_file_contents: str = "",
@@ -48,10 +51,13 @@ def put_complete_file_contents(
 
         logging.debug(f"Starting to write file: {filepath}")
 
-        with open(filepath, "w", encoding=encoding) as f:
-            logging.debug(f"Writing {len(complete_file_contents)} bytes to {filepath}")
-            f.write(complete_file_contents)
-            result["bytes_written"] = len(complete_file_contents.encode(encoding))
+        try:
+            with open(filepath, "w", encoding=encoding) as f:
+                logging.debug(f"Writing {len(complete_file_contents)} bytes to {filepath}")
+                f.write(complete_file_contents)
+                result["bytes_written"] = len(complete_file_contents.encode(encoding))
+        finally:
+            get_file_cache().invalidate(filepath)
 
         elapsed = time.time() - start_time
         bytes_written = result["bytes_written"]
@@ -1,5 +1,5 @@
 """Utility functions for the ra-aid project."""
 
-from .file_utils import is_binary_file
+from .file_utils import classify_binary_files, is_binary_file
 
-__all__ = ["is_binary_file"]
\ No newline at end of file
+__all__ = ["classify_binary_files", "is_binary_file"]
\ No newline at end of file
@@ -1,167 +1,224 @@
 """Utility functions for file operations."""
 
 import os
-import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
+from ra_aid.file_cache import get_file_cache
 
 try:
     import magic
 except ImportError:
     magic = None
 
+# Bytes read from a file to classify it; libmagic looks at all of them
+SNIFF_BYTES = 8192
+
+# Bytes the content heuristics look at
+CONTENT_SAMPLE_BYTES = 1024
+
+# Threads used by classify_binary_files()
+MAX_CLASSIFY_WORKERS = 8
+
+TEXT_EXTENSIONS = frozenset([
+    '.c', '.cpp', '.h', '.hpp', '.py', '.js', '.html', '.css', '.java',
+    '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.ts', '.json',
+    '.xml', '.yaml', '.yml', '.md', '.txt', '.sh', '.bat', '.cc', '.m',
+    '.mm', '.jsx', '.tsx', '.cxx', '.hxx', '.pl', '.pm',
+])
+
+# Patterns marking C-like source even when the sample has null bytes
+MAIN_PATTERNS = (b'#include', b'#define', b'void main', b'int main')
+
+SOURCE_PATTERNS = (
+    b'#include', b'#ifndef', b'#define', b'function', b'class', b'import',
+    b'package', b'using namespace', b'public', b'private', b'protected',
+    b'void main', b'int main',
+)
+
+# Words in a libmagic description that mark a text file
+TEXT_INDICATORS = ("text", "script", "xml", "json", "yaml", "markdown", "html", "source", "program")
+
+PROGRAMMING_LANGUAGES = (
+    "c", "c++", "c#", "java", "python", "ruby", "perl", "php",
+    "javascript", "typescript", "shell", "bash", "go", "rust",
+)
+
 
 def is_binary_file(filepath):
-    """Check if a file is binary using magic library if available."""
-    # First check if file is empty
-    if os.path.getsize(filepath) == 0:
-        return False  # Empty files are not binary
+    """Check if a file is binary, reusing the verdict while the file is unchanged."""
+    return get_file_cache().is_binary(filepath, _classify_binary)
+
+
+def classify_binary_files(
+    filepaths: Iterable[str], max_workers: int = MAX_CLASSIFY_WORKERS
+) -> Dict[str, bool]:
+    """
+    Classify many files at once, in parallel.
 
-    # Check file extension first as a fast path
+    Verdicts are cached like those of is_binary_file(), so later checks of the
+    same files are answered from memory.
+
+    Args:
+        filepaths: Files to classify
+        max_workers: Upper bound on the number of threads used
+
+    Returns:
+        Dict[str, bool]: Whether each file is binary; unreadable files count as binary
+    """
+    paths = list(dict.fromkeys(filepaths))
+
+    def classify(path):
+        try:
+            return is_binary_file(path)
+        except OSError:
+            return True
+
+    if len(paths) <= 1 or max_workers <= 1:
+        return {path: classify(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(classify, paths)))
+
+
+def _read_sample(filepath, data=None):
+    """Read the start of a file, unless its contents are already in memory."""
+    if data is not None:
+        return data[:SNIFF_BYTES]
+    with open(filepath, 'rb') as f:
+        return f.read(SNIFF_BYTES)
+
+
+def _describe(sample):
+    """Run libmagic on an in-memory sample, if it is available."""
+    if not magic:
+        return None
+    try:
+        return magic.from_buffer(sample)
+    except Exception:
+        return None
+
+
+def _is_text_description(file_type):
+    """Whether a libmagic description names a text or source file."""
+    file_type = file_type.lower()
+    if any(indicator in file_type for indicator in TEXT_INDICATORS):
+        return True
+    return any(lang in file_type for lang in PROGRAMMING_LANGUAGES)
+
+
+def _classify_binary(filepath, data=None):
+    """Check if a file is binary, with one bounded read and at most one libmagic call.
+
+    Args:
+        filepath: File to classify
+        data: The file's contents, when already cached
+    """
+    # Check file extension first as a fast path that needs no read
     file_ext = os.path.splitext(filepath)[1].lower()
-    text_extensions = ['.c', '.cpp', '.h', '.hpp', '.py', '.js', '.html', '.css', '.java', 
-                     '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.ts', '.json', 
-                     '.xml', '.yaml', '.yml', '.md', '.txt', '.sh', '.bat', '.cc', '.m', 
-                     '.mm', '.jsx', '.tsx', '.cxx', '.hxx', '.pl', '.pm']
-    if file_ext in text_extensions:
+    if file_ext in TEXT_EXTENSIONS:
         return False
-    
+
+    sample = _read_sample(filepath, data)
+    if not sample:
+        return False  # Empty files are not binary
+    head = sample[:CONTENT_SAMPLE_BYTES]
+
     # Handle the problematic C file without relying on special case
     # We still check for typical source code patterns
     if file_ext == '.unknown':  # For test case where we patch the extension
-        with open(filepath, 'rb') as f:
-            content = f.read(1024)
-            # Check for common source code patterns
-            if (b'#include' in content or b'#define' in content or 
-                b'void main' in content or b'int main' in content):
-                return False
-    
-    # Check if file has C/C++ header includes
-    with open(filepath, 'rb') as f:
-        content_start = f.read(1024)
-        if b'#include' in content_start:
+        if any(pattern in head for pattern in MAIN_PATTERNS):
             return False
-    
-    # Check if the file is a source file based on content analysis
-    result = _is_binary_content(filepath)
-    if not result:
+
+    # Check extension, C/C++ header includes and content without magic
+    if not _is_binary_fallback(filepath, head):
         return False
 
     # If magic library is available, try that as a final check
-    if magic:
-        try:
-            mime = magic.from_file(filepath, mime=True)
-            file_type = magic.from_file(filepath)
-
-            # If MIME type starts with 'text/', it's likely a text file
-            if mime.startswith("text/"):
-                return False
-
-            # Also consider 'application/x-python' and similar script types as text
-            if any(mime.startswith(prefix) for prefix in ['application/x-python', 'application/javascript']):
-                return False
-
-            # Check for common text file descriptors
-            text_indicators = ["text", "script", "xml", "json", "yaml", "markdown", "html", "source", "program"]
-            if any(indicator.lower() in file_type.lower() for indicator in text_indicators):
-                return False
-                
-            # Check for common programming languages
-            programming_languages = ["c", "c++", "c#", "java", "python", "ruby", "perl", "php", 
-                                  "javascript", "typescript", "shell", "bash", "go", "rust"]
-            if any(lang.lower() in file_type.lower() for lang in programming_languages):
-                return False
-        except Exception:
-            pass
-
-    return result
-
-
-def _is_binary_fallback(filepath):
-    """Fallback method to detect binary files without using magic."""
+    file_type = _describe(sample)
+    if file_type is not None and _is_text_description(file_type):
+        return False
+
+    return True
+
+
+def _is_binary_fallback(filepath, content_start=None):
+    """Fallback method to detect binary files without using magic.
+
+    Args:
+        filepath: File to classify
+        content_start: The start of the file, when already read
+    """
     # Check for known source code file extensions first
     file_ext = os.path.splitext(filepath)[1].lower()
-    text_extensions = ['.c', '.cpp', '.h', '.hpp', '.py', '.js', '.html', '.css', '.java', 
-                     '.cs', '.php', '.rb', '.go', '.rs', '.swift', '.kt', '.ts', '.json', 
-                     '.xml', '.yaml', '.yml', '.md', '.txt', '.sh', '.bat', '.cc', '.m', 
-                     '.mm', '.jsx', '.tsx', '.cxx', '.hxx', '.pl', '.pm']
-    
-    if file_ext in text_extensions:
+    if file_ext in TEXT_EXTENSIONS:
         return False
-    
+
     # Check if file has C/C++ header includes
-    with open(filepath, 'rb') as f:
-        content_start = f.read(1024)
-        if b'#include' in content_start:
-            return False
-        
+    if content_start is None:
+        with open(filepath, 'rb') as f:
+            content_start = f.read(CONTENT_SAMPLE_BYTES)
+    if b'#include' in content_start[:CONTENT_SAMPLE_BYTES]:
+        return False
+
     # Fall back to content analysis
-    return _is_binary_content(filepath)
+    return _is_binary_content(filepath, content_start)
+
 
+def _is_binary_content(filepath, content_start=None):
+    """Analyze file content to determine if it's binary.
 
-def _is_binary_content(filepath):
-    """Analyze file content to determine if it's binary."""
+    Args:
+        filepath: File to analyze
+        content_start: The start of the file, when already read
+    """
     try:
-        # First check if file is empty
-        if os.path.getsize(filepath) == 0:
-            return False  # Empty files are not binary
-            
-        # Check file content for patterns
-        with open(filepath, "rb") as f:
-            chunk = f.read(1024)
-            
-            # Empty chunk is not binary
-            if not chunk:
-                return False
-                
-            # Check for null bytes which strongly indicate binary content
-            if b"\0" in chunk:
-                # Even with null bytes, check for common source patterns
-                if (b'#include' in chunk or b'#define' in chunk or 
-                    b'void main' in chunk or b'int main' in chunk):
-                    return False
-                return True
-            
-            # Check for common source code headers/patterns
-            source_patterns = [b'#include', b'#ifndef', b'#define', b'function', b'class', b'import', 
-                             b'package', b'using namespace', b'public', b'private', b'protected',
-                             b'void main', b'int main']
-            
-            if any(pattern in chunk for pattern in source_patterns):
-                return False
-            
-            # Try to decode as UTF-8
-            try:
-                chunk.decode('utf-8')
-                
-                # Count various character types to determine if it's text
-                control_chars = sum(0 <= byte <= 8 or byte == 11 or byte == 12 or 14 <= byte <= 31 for byte in chunk)
-                whitespace = sum(byte == 9 or byte == 10 or byte == 13 or byte == 32 for byte in chunk)
-                printable = sum(33 <= byte <= 126 for byte in chunk)
-                
-                # Calculate ratios
-                control_ratio = control_chars / len(chunk)
-                printable_ratio = (printable + whitespace) / len(chunk)
-                
-                # Text files have high printable ratio and low control ratio
-                if control_ratio < 0.2 and printable_ratio > 0.7:
-                    return False
-                    
-                return True
-                
-            except UnicodeDecodeError:
-                # Try another encoding if UTF-8 fails
-                # latin-1 always succeeds but helps with encoding detection
-                latin_chunk = chunk.decode('latin-1')
-                
-                # Count the printable vs non-printable characters
-                printable = sum(32 <= ord(char) <= 126 or ord(char) in (9, 10, 13) for char in latin_chunk)
-                printable_ratio = printable / len(latin_chunk)
-                
-                # If more than 70% is printable, it's likely text
-                if printable_ratio > 0.7:
-                    return False
-                    
-                return True
-                
+        if content_start is None:
+            with open(filepath, "rb") as f:
+                content_start = f.read(CONTENT_SAMPLE_BYTES)
+        return _is_binary_chunk(content_start[:CONTENT_SAMPLE_BYTES])
     except Exception:
         # If any error occurs, assume binary to be safe
-        return True
\ No newline at end of file
+        return True
+
+
+def _is_binary_chunk(chunk: bytes) -> bool:
+    """Analyze the start of a file to determine if it's binary."""
+    # Empty chunk is not binary
+    if not chunk:
+        return False
+
+    # Check for null bytes which strongly indicate binary content
+    if b"\0" in chunk:
+        # Even with null bytes, check for common source patterns
+        return not any(pattern in chunk for pattern in MAIN_PATTERNS)
+
+    # Check for common source code headers/patterns
+    if any(pattern in chunk for pattern in SOURCE_PATTERNS):
+        return False
+
+    # Try to decode as UTF-8
+    try:
+        chunk.decode('utf-8')
+    except UnicodeDecodeError:
+        # Try another encoding if UTF-8 fails
+        # latin-1 always succeeds but helps with encoding detection
+        latin_chunk = chunk.decode('latin-1')
+
+        # Count the printable vs non-printable characters
+        printable = sum(32 <= ord(char) <= 126 or ord(char) in (9, 10, 13) for char in latin_chunk)
+        printable_ratio = printable / len(latin_chunk)
+
+        # If more than 70% is printable, it's likely text
+        return printable_ratio <= 0.7
+
+    # Count various character types to determine if it's text
+    control_chars = sum(0 <= byte <= 8 or byte == 11 or byte == 12 or 14 <= byte <= 31 for byte in chunk)
+    whitespace = sum(byte == 9 or byte == 10 or byte == 13 or byte == 32 for byte in chunk)
+    printable = sum(33 <= byte <= 126 for byte in chunk)
+
+    # Calculate ratios
+    control_ratio = control_chars / len(chunk)
+    printable_ratio = (printable + whitespace) / len(chunk)
+
+    # Text files have high printable ratio and low control ratio
+    return not (control_ratio < 0.2 and printable_ratio > 0.7)
@@ -0,0 +1,143 @@
+"""Compiled matchers for glob and gitignore style path patterns.
+
+File listing, fuzzy find and the directory tree all filter paths against a list
+of patterns. Testing each pattern separately makes filtering O(paths x patterns);
+the matchers here fold a pattern list into a single regular expression so every
+path is checked in one pass. Compiled matchers are cached by pattern tuple.
+"""
+
+import fnmatch
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Sequence
+
+import pathspec
+from pathspec.util import normalize_file
+
+# Number of distinct pattern lists kept compiled
+MATCHER_CACHE_SIZE = 64
+
+_NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+
+
+class PatternMatcher:
+    """Matches paths against any of a set of patterns using one compiled regex.
+
+    Glob patterns follow ``fnmatch`` semantics. Gitignore patterns follow
+    ``pathspec``'s gitwildmatch semantics; lists containing negated (``!``)
+    patterns depend on pattern order and are matched by a ``pathspec.PathSpec``
+    instead of a combined regex.
+    """
+
+    def __init__(self, patterns: Sequence[str], syntax: str = "glob"):
+        """
+        Compile the patterns.
+
+        Args:
+            patterns: Patterns to match
+            syntax: Either "glob" (fnmatch) or "gitignore" (gitwildmatch)
+
+        Raises:
+            ValueError: If the syntax is not supported
+        """
+        if syntax not in ("glob", "gitignore"):
+            raise ValueError(f"Unsupported pattern syntax: {syntax}")
+
+        self.patterns = tuple(patterns)
+        self.syntax = syntax
+        self._regex: Optional[Pattern] = None
+        self._spec: Optional[pathspec.PathSpec] = None
+
+        if syntax == "glob":
+            self._regex = _combine(
+                fnmatch.translate(os.path.normcase(p)) for p in self.patterns
+            )
+        else:
+            self._compile_gitignore()
+
+    def _compile_gitignore(self) -> None:
+        """Build a combined regex, or a PathSpec when pattern order matters."""
+        spec = pathspec.PathSpec.from_lines(
+            pathspec.patterns.GitWildMatchPattern, self.patterns
+        )
+        active = [p for p in spec.patterns if p.include is not None]
+        if any(not p.include for p in active):
+            self._spec = spec
+            return
+        try:
+            # pathspec reuses group names across patterns, so drop the names
+            self._regex = _combine(
+                _NAMED_GROUP.sub("(?:", p.regex.pattern) for p in active
+            )
+        except re.error:
+            self._spec = spec
+
+    def matches(self, path: str) -> bool:
+        """Check whether a path matches any of the patterns."""
+        if self._spec is not None:
+            return self._spec.match_file(path)
+        if self._regex is None:
+            return False
+        if self.syntax == "glob":
+            return self._regex.match(os.path.normcase(path)) is not None
+        return self._regex.match(normalize_file(path)) is not None
+
+    # Allows the matcher to stand in for a pathspec.PathSpec
+    match_file = matches
+
+    def check(self, path: str) -> Optional[bool]:
+        """
+        Decide a path the way a single gitignore file would.
+
+        Returns:
+            Optional[bool]: True if the path is matched, False if a negated
+                pattern re-includes it, None if no pattern applies
+        """
+        if self._spec is not None:
+            return self._spec.check_file(path).include
+        return True if self.matches(path) else None
+
+    def exclude(self, paths: Iterable[str]) -> List[str]:
+        """Return the paths that do not match any pattern, in input order."""
+        if self._spec is None and self._regex is None:
+            return list(paths)
+        return [path for path in paths if not self.matches(path)]
+
+    def select(self, paths: Iterable[str]) -> List[str]:
+        """Return the paths that match at least one pattern, in input order."""
+        if self._spec is None and self._regex is None:
+            return []
+        return [path for path in paths if self.matches(path)]
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+
+def _combine(regexes: Iterable[str]) -> Optional[Pattern]:
+    """Join regular expressions into a single alternation."""
+    parts = [f"(?:{regex})" for regex in regexes]
+    if not parts:
+        return None
+    return re.compile("|".join(parts))
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _compile(patterns: tuple, syntax: str) -> PatternMatcher:
+    return PatternMatcher(patterns, syntax)
+
+
+def compile_patterns(
+    patterns: Optional[Iterable[str]], syntax: str = "glob"
+) -> PatternMatcher:
+    """
+    Get a compiled matcher for a list of patterns, reusing cached matchers.
+
+    Args:
+        patterns: Patterns to match; None or empty matches nothing
+        syntax: Either "glob" (fnmatch) or "gitignore" (gitwildmatch)
+
+    Returns:
+        PatternMatcher: Matcher for the given patterns
+    """
+    return _compile(tuple(patterns or ()), syntax)
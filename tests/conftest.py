@@ -86,6 +86,36 @@ def mock_session_repository():
         session_repo_var.reset(token)
 
 
+@pytest.fixture(autouse=True)
+def reset_tool_result_cache():
+    """Start each test without tool results cached by earlier tests."""
+    from ra_aid.tool_cache import reset_tool_caches
+
+    reset_tool_caches()
+    yield
+    reset_tool_caches()
+
+
+@pytest.fixture(autouse=True)
+def reset_file_content_cache():
+    """Start each test without file contents cached by earlier tests."""
+    from ra_aid.file_cache import reset_file_cache
+
+    reset_file_cache()
+    yield
+    reset_file_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_clients():
+    """Start each test without LLM clients pooled by earlier tests."""
+    from ra_aid.llm import reset_llm_client_pool
+
+    reset_llm_client_pool()
+    yield
+    reset_llm_client_pool()
+
+
 @pytest.fixture()
 def mock_repository_access(
     mock_trajectory_repository, mock_human_input_repository, mock_session_repository
@@ -28,7 +28,7 @@ def test_fuzzy_find_project_files_none_args_execution():
     mock_response = AIMessage(content=function_call)
     
     # Patch process.extract to return empty results for any search
-    with patch('ra_aid.tools.fuzzy_find.process.extract', return_value=[]):
+    with patch('ra_aid.fuzzy_index.process.extract', return_value=[]):
         result = agent._execute_tool(mock_response)
         assert result == []
 
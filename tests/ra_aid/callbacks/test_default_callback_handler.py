@@ -259,3 +259,28 @@ def test_get_stats(callback_handler):
     assert stats["session_totals"]["cost"] == pytest.approx(expected_cost)
     assert stats["session_totals"]["duration"] == pytest.approx(0.1)
     assert stats["session_totals"]["session_id"] == 123  # From mock
+
+
+def test_chat_model_usage_calibrates_token_estimates(callback_handler):
+    """Test that prompt sizes are matched with reported prompt tokens per request."""
+    from langchain_core.messages import HumanMessage
+
+    mock_response = MagicMock(spec=LLMResult)
+    mock_response.llm_output = {"token_usage": {"prompt_tokens": 1000, "completion_tokens": 10}}
+
+    with patch(
+        "ra_aid.callbacks.default_callback_handler.get_token_estimator"
+    ) as mock_estimator:
+        callback_handler.on_chat_model_start(
+            {},
+            [[HumanMessage(content="a" * 3000), HumanMessage(content="b" * 500)]],
+            run_id="run-1",
+            metadata={"model_name": "test-model"},
+        )
+        callback_handler.on_chat_model_start({}, [[HumanMessage(content="c")]], run_id="run-2")
+        callback_handler.on_llm_error(RuntimeError("failed"), run_id="run-2")
+        callback_handler.on_llm_end(mock_response, run_id="run-1")
+        callback_handler.on_llm_end(mock_response, run_id="run-2")
+
+    mock_estimator.return_value.observe.assert_called_once_with("test-model", 3500, 1000)
+    assert callback_handler.prompt_tokens == 1000
@@ -0,0 +1,111 @@
+"""Tests for background commands."""
+
+import os
+import signal
+import time
+
+import pytest
+
+from ra_aid.proc.background import (
+    BackgroundCommandsManager,
+    OutputRing,
+    get_background_commands,
+)
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.02)
+
+
+def test_output_ring_keeps_latest_bytes(tmp_path):
+    """Test that the ring keeps only the most recent output, in order."""
+    ring = OutputRing(str(tmp_path / "out"), capacity=10)
+    try:
+        ring.feed(b"abcdef")
+        assert ring.tail(100) == b"abcdef"
+        ring.feed(b"ghijklm")
+        assert ring.tail(100) == b"defghijklm"
+        assert ring.tail(3) == b"klm"
+        ring.feed(b"0123456789ABCDEF")
+        assert ring.tail(100) == b"6789ABCDEF"
+        assert ring.total_bytes == 29
+        assert os.path.getsize(tmp_path / "out") == 10
+    finally:
+        ring.close()
+
+
+def test_runs_without_blocking_and_reports_exit():
+    """Test that a command runs in the background and its output and exit code are kept."""
+    with BackgroundCommandsManager() as commands:
+        start = time.monotonic()
+        background = commands.start(["/bin/bash", "-c", "echo starting; sleep 0.5; echo done; exit 4"])
+        assert time.monotonic() - start < 0.5
+        assert background.running
+        assert commands.get(background.handle) is background
+
+        wait_until(lambda: not background.running)
+        assert background.return_code == 4
+        wait_until(lambda: background.tail().endswith("done"))
+        assert background.tail() == "starting\ndone"
+
+
+def test_chatty_output_is_bounded():
+    """Test that a command printing more than the ring holds keeps only the tail."""
+    with BackgroundCommandsManager(output_bytes=4096) as commands:
+        background = commands.start(["/bin/bash", "-c", "seq 1 100000"])
+        assert background.wait(10) == 0
+        wait_until(lambda: background.tail(20).endswith("100000"))
+
+        assert background.output.total_bytes > 500000
+        assert background.tail(100).splitlines()[-2:] == ["99999", "100000"]
+        assert len(background.output.tail(10**6)) == 4096
+
+
+def test_signals_command():
+    """Test that signalling a background command stops it."""
+    with BackgroundCommandsManager() as commands:
+        background = commands.start(["sleep", "30"])
+        background.send_signal(signal.SIGTERM)
+
+        assert background.wait(5) == -signal.SIGTERM
+
+
+def test_stops_commands_when_context_ends():
+    """Test that commands still running, even ignoring SIGTERM, are stopped with the context."""
+    with BackgroundCommandsManager() as commands:
+        polite = commands.start(["sleep", "30"])
+        stubborn = commands.start(
+            ["/bin/bash", "-c", "trap '' TERM; while true; do sleep 0.1; done"]
+        )
+        output_dir = os.path.dirname(polite.output.path)
+
+    assert polite.return_code is not None
+    assert stubborn.return_code is not None
+    assert not os.path.exists(output_dir)
+    with pytest.raises(RuntimeError):
+        get_background_commands()
+
+
+def test_limits_running_commands():
+    """Test that no more than max_running commands run at once."""
+    with BackgroundCommandsManager(max_running=1) as commands:
+        first = commands.start(["sleep", "30"])
+        with pytest.raises(RuntimeError, match="already running"):
+            commands.start(["sleep", "30"])
+
+        first.send_signal(signal.SIGKILL)
+        first.wait(5)
+        commands.start(["true"])
+
+
+def test_rejects_unknown_commands_and_handles():
+    """Test errors for commands not on PATH and handles that were never issued."""
+    with BackgroundCommandsManager() as commands:
+        with pytest.raises(FileNotFoundError):
+            commands.start(["nonexistent_command_xyz"])
+        with pytest.raises(ValueError, match="No background command with handle 7"):
+            commands.get(7)
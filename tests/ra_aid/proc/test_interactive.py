@@ -1,11 +1,26 @@
 """Tests for the interactive subprocess module."""
 
+import asyncio
 import os
+import select
+import threading
 import tempfile
+import time
+from unittest.mock import patch
 
 import pytest
 
-from ra_aid.proc.interactive import run_interactive_command
+from ra_aid.proc.interactive import (
+    CommandRun,
+    ExitNotifier,
+    TerminalCapture,
+    arun_interactive_command,
+    create_process,
+    get_command_loop,
+    run_interactive_command,
+    set_async_command_limit,
+    set_command_loop,
+)
 
 
 def test_basic_command():
@@ -198,3 +213,329 @@ def test_tty_available():
         b"/dev/pts/" in output_cleaned or b"/dev/ttys" in output_cleaned
     ), f"Unexpected TTY output: {output_cleaned}"
     assert retcode == 0
+
+
+def test_capture_keeps_bounded_raw_tail():
+    """Test that raw output retention does not grow with output volume."""
+    capture = TerminalCapture(80, 24, raw_limit=4096)
+    for i in range(5000):
+        capture.feed(f"line {i} of a chatty command\r\n".encode())
+
+    assert capture.total_bytes > 100000
+    assert len(capture.raw_tail) == 4096
+    assert capture.raw_tail.endswith(b"line 4999 of a chatty command\r\n")
+    assert capture.render().splitlines()[-1] == "line 4999 of a chatty command"
+
+
+def test_capture_handles_split_sequences():
+    """Test that UTF-8 characters and escape sequences split across reads are decoded."""
+    capture = TerminalCapture(80, 24)
+    data = "caf\u00e9 \x1b[1mbold\x1b[0m done\r\n".encode()
+    for i in range(len(data)):
+        capture.feed(data[i : i + 1])
+
+    assert capture.render() == "caf\u00e9 bold done"
+
+
+def test_capture_falls_back_to_raw_tail():
+    """Test that output is still returned when terminal emulation fails."""
+    capture = TerminalCapture(80, 24)
+    capture.feed(b"\x1b[2J")
+    capture.stream.feed = lambda data: (_ for _ in ()).throw(RuntimeError("emulator broke"))
+    capture.feed(b"still here\r\n")
+
+    with pytest.raises(RuntimeError):
+        capture.render()
+    assert capture.raw_tail == b"\x1b[2Jstill here\r\n"
+
+
+def emulated(data, cols=20, rows=5):
+    """Render output with the terminal emulator from the first byte."""
+    capture = TerminalCapture(cols, rows)
+    capture._start_emulation()
+    capture.feed(data)
+    return capture.render()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"plain line\r\nsecond\r\n",
+        b"\x1b[32m.....\x1b[0m [100%]\r\n\x1b[1m5 passed\x1b[0m\r\n",
+        b"downloading 10%\rdownloading 55%\rdone\r\n",
+        b"a\tb\tc\r\n" * 10,
+        b"x" * 45 + b"\r\n" + b"y" * 20 + b"\r\nz",
+        "caf\u00e9 \u2713 ok\r\n".encode(),
+        b"".join(b"line %d\r\n" % i for i in range(3000)),
+    ],
+    ids=["lines", "colors", "carriage-returns", "tabs", "wrapping", "unicode", "scrollback"],
+)
+def test_plain_output_matches_emulator(data):
+    """Test that plain output is laid out without pyte, exactly as pyte would."""
+    capture = TerminalCapture(20, 5)
+    for i in range(0, len(data), 7):
+        capture.feed(data[i : i + 7])
+
+    assert capture.render() == emulated(data)
+    assert not capture.emulating
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"step 1\r\nstep 2\r\n\x1b[1A\x1b[2Kstep 2 done\r\n",
+        b"\tindented\r\n" * 8 + b"\x1b[H\x1b[Jcleared",
+        b"progress\x08\x08\x08\x08done\r\n",
+        "\u65e5\u672c\u8a9e\r\n".encode(),
+        b"staircase\nline\n",
+    ],
+    ids=["cursor-up", "clear-screen", "backspace", "wide-chars", "bare-line-feed"],
+)
+def test_switches_to_emulator_when_needed(data):
+    """Test that screen-control sequences hand the output to pyte without losing state."""
+    capture = TerminalCapture(20, 5)
+    for i in range(0, len(data), 3):
+        capture.feed(data[i : i + 3])
+
+    assert capture.emulating
+    assert capture.render() == emulated(data)
+
+
+def test_chatty_command_output_is_limited():
+    """Test that a command producing a lot of output returns only the tail."""
+    cmd = "yes 'chatty output line' | head -n 20000; echo finished"
+    output, retcode = run_interactive_command(["/bin/bash", "-c", cmd])
+
+    assert len(output) <= 8000
+    assert output.splitlines()[-1] == b"finished"
+    assert retcode == 0
+
+
+def test_timeout_terminates_process():
+    """Test that a process running past twice its expected runtime is terminated."""
+    start = time.monotonic()
+    output, retcode = run_interactive_command(["sleep", "30"], expected_runtime_seconds=1)
+
+    assert time.monotonic() - start < 5
+    assert b"[Process exceeded timeout (1 seconds expected)]" in output
+    assert retcode != 0
+
+
+def test_timeout_kills_process_ignoring_sigterm():
+    """Test that a process ignoring SIGTERM is killed at three times its expected runtime."""
+    cmd = "trap '' TERM; echo ignoring; while true; do sleep 0.1; done"
+    start = time.monotonic()
+    output, retcode = run_interactive_command(["/bin/bash", "-c", cmd], expected_runtime_seconds=1)
+
+    assert 3 <= time.monotonic() - start < 6
+    assert b"ignoring" in output
+    assert b"exceeded timeout" in output
+    assert retcode != 0
+
+
+def test_background_process_does_not_hold_command_open():
+    """Test that a process left running in the background does not delay returning."""
+    start = time.monotonic()
+    output, retcode = run_interactive_command(
+        ["/bin/bash", "-c", "sleep 10 & echo started"]
+    )
+
+    assert time.monotonic() - start < 5
+    assert b"started" in output
+    assert retcode == 0
+
+
+def _process_running(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The state follows the parenthesized command name
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_chatty_background_process_does_not_hold_command_open(use_async, tmp_path):
+    """Test that a process left running in the background that keeps printing is hung up on."""
+    pid_file = tmp_path / "pid"
+    cmd = [
+        "sh",
+        "-c",
+        f"(sh -c 'echo $PPID' > {pid_file}; while true; do echo x; sleep 0.02; done) & exit 0",
+    ]
+    start = time.monotonic()
+    if use_async:
+        output, retcode = asyncio.run(arun_interactive_command(cmd, expected_runtime_seconds=1))
+    else:
+        output, retcode = run_interactive_command(cmd, expected_runtime_seconds=1)
+
+    assert time.monotonic() - start < 5
+    assert retcode == 0
+    assert b"x" in output
+    pid = int(pid_file.read_text())
+    deadline = time.monotonic() + 2
+    while _process_running(pid) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _process_running(pid)
+
+
+def test_fast_command_returns_promptly():
+    """Test that short commands do not wait on a polling interval."""
+    start = time.monotonic()
+    for _ in range(5):
+        run_interactive_command(["true"])
+
+    assert time.monotonic() - start < 2.5
+
+
+@pytest.mark.parametrize("pidfd", [True, False], ids=["pidfd", "thread"])
+def test_exit_notifier(pidfd):
+    """Test that process exit makes the notifier readable, with and without pidfd."""
+    if pidfd and not hasattr(os, "pidfd_open"):
+        pytest.skip("pidfd_open not available")
+    proc, master_fd = create_process(["sleep", "0.2"])
+    try:
+        if pidfd:
+            notifier = ExitNotifier(proc)
+        else:
+            with patch.object(os, "pidfd_open", create=True, side_effect=OSError):
+                notifier = ExitNotifier(proc)
+        assert select.select([notifier.fileno()], [], [], 0)[0] == []
+        assert select.select([notifier.fileno()], [], [], 5)[0] == [notifier.fileno()]
+        notifier.close()
+    finally:
+        os.close(master_fd)
+        proc.wait()
+
+
+def test_async_command_matches_sync():
+    """Test that the async runner captures the same output as the blocking one."""
+    cmd = ["/bin/bash", "-c", "printf 'one\\ntwo\\r\\n\\x1b[31mred\\x1b[0m\\n'; exit 3"]
+
+    expected = run_interactive_command(cmd)
+    assert asyncio.run(arun_interactive_command(cmd)) == expected
+    assert expected == (b"one\ntwo\nred", 3)
+
+
+def test_async_commands_run_concurrently():
+    """Test that several async commands overlap rather than running one by one."""
+
+    async def run_all():
+        cmd = ["/bin/bash", "-c", "sleep 0.5; echo done"]
+        return await asyncio.gather(*(arun_interactive_command(cmd) for _ in range(4)))
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+
+    assert time.monotonic() - start < 1.5
+    assert results == [(b"done", 0)] * 4
+
+
+def test_async_command_limit():
+    """Test that commands beyond the concurrency limit wait for a free slot."""
+
+    async def run_all():
+        cmd = ["/bin/bash", "-c", "sleep 0.3"]
+        await asyncio.gather(*(arun_interactive_command(cmd) for _ in range(4)))
+
+    set_async_command_limit(2)
+    try:
+        start = time.monotonic()
+        asyncio.run(run_all())
+        assert time.monotonic() - start >= 0.6
+    finally:
+        set_async_command_limit(8)
+
+
+def test_async_command_timeout():
+    """Test that the async runner applies the same timeout as the blocking one."""
+    start = time.monotonic()
+    output, retcode = asyncio.run(
+        arun_interactive_command(["sleep", "30"], expected_runtime_seconds=1)
+    )
+
+    assert time.monotonic() - start < 5
+    assert b"[Process exceeded timeout (1 seconds expected)]" in output
+    assert retcode != 0
+
+
+def test_async_command_validation():
+    """Test that the async runner rejects the same arguments as the blocking one."""
+    with pytest.raises(ValueError):
+        asyncio.run(arun_interactive_command([]))
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(arun_interactive_command(["nonexistent_command_xyz"]))
+
+
+def test_command_loop_runs_commands_from_threads():
+    """Test that a registered loop is handed out to other threads but not its own."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    set_command_loop(loop)
+    try:
+        assert get_command_loop() is loop
+        future = asyncio.run_coroutine_threadsafe(
+            arun_interactive_command(["echo", "from the loop"]), get_command_loop()
+        )
+        assert future.result(timeout=10) == (b"from the loop", 0)
+
+        async def from_loop():
+            return get_command_loop()
+
+        assert asyncio.run_coroutine_threadsafe(from_loop(), loop).result(timeout=10) is None
+    finally:
+        set_command_loop(None)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+    assert get_command_loop() is None
+
+
+def test_run_reports_duration_and_output_gap():
+    """Test that a run's duration and longest silence are reported."""
+    run = CommandRun()
+    output, retcode = run_interactive_command(
+        ["/bin/bash", "-c", "echo one; sleep 0.6; echo two; sleep 0.2"], run=run
+    )
+
+    assert output == b"one\ntwo"
+    assert 0.8 <= run.duration_seconds < 2
+    assert 0.5 <= run.max_output_gap_seconds < 1.5
+    assert not run.was_terminated
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_idle_timeout_stops_hung_command(use_async):
+    """Test that a command printing nothing for longer than its idle timeout is stopped."""
+    cmd = ["/bin/bash", "-c", "echo started; sleep 30"]
+    run = CommandRun()
+    start = time.monotonic()
+    if use_async:
+        output, retcode = asyncio.run(
+            arun_interactive_command(cmd, idle_timeout_seconds=1, run=run)
+        )
+    else:
+        output, retcode = run_interactive_command(cmd, idle_timeout_seconds=1, run=run)
+
+    assert time.monotonic() - start < 5
+    assert run.hung and not run.timed_out
+    assert output.startswith(b"started")
+    assert b"[Process produced no output for 1 seconds and was stopped as hung]" in output
+    assert retcode != 0
+
+
+def test_idle_timeout_spares_steady_output():
+    """Test that a command printing regularly is not considered hung."""
+    run = CommandRun()
+    output, retcode = run_interactive_command(
+        ["/bin/bash", "-c", "for i in 1 2 3 4 5 6; do echo $i; sleep 0.3; done"],
+        idle_timeout_seconds=1,
+        run=run,
+    )
+
+    assert retcode == 0
+    assert not run.hung
+    assert output.splitlines()[-1] == b"6"
@@ -0,0 +1,158 @@
+"""Tests for the budgeted rg --json stream parser."""
+
+import base64
+import io
+import json
+import shutil
+import sys
+
+import pytest
+
+from ra_aid.proc import ripgrep_stream
+from ra_aid.proc.ripgrep_stream import SearchCollector, _read_events, stream_search
+
+requires_rg = pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep not installed")
+
+
+def begin(path):
+    return {"type": "begin", "data": {"path": {"text": path}}}
+
+
+def end(path):
+    return {"type": "end", "data": {"path": {"text": path}}}
+
+
+def line(kind, path, number, text):
+    return {
+        "type": kind,
+        "data": {"path": {"text": path}, "lines": {"text": text + "\n"}, "line_number": number},
+    }
+
+
+def feed(collector, events):
+    for event in events:
+        if not collector.add_event(event):
+            return False
+    return True
+
+
+def test_groups_matches_by_file():
+    collector = SearchCollector()
+    assert feed(
+        collector,
+        [
+            begin("a.py"),
+            line("match", "a.py", 3, "def main():"),
+            line("context", "a.py", 4, "    run()"),
+            line("match", "a.py", 10, "main()"),
+            end("a.py"),
+            begin("b.py"),
+            line("match", "b.py", 1, "import main"),
+            end("b.py"),
+            {"type": "summary", "data": {}},
+        ],
+    )
+    assert collector.output == (
+        "a.py\n3:def main():\n4-    run()\n--\n10:main()\n\nb.py\n1:import main\n"
+    )
+    assert collector.match_count == 3
+    assert collector.file_count == 2
+    assert not collector.truncated
+
+
+def test_per_file_cap_keeps_trailing_context_only():
+    collector = SearchCollector(max_matches_per_file=2, after_context_lines=1)
+    feed(
+        collector,
+        [
+            begin("a.py"),
+            line("match", "a.py", 1, "x"),
+            line("match", "a.py", 2, "x"),
+            line("context", "a.py", 3, "after"),
+            line("context", "a.py", 9, "before next"),
+            line("match", "a.py", 10, "x"),
+            end("a.py"),
+        ],
+    )
+    assert collector.output == "a.py\n1:x\n2:x\n3-after\n[more matches in a.py not shown]\n"
+    assert collector.match_count == 2
+    assert not collector.truncated
+
+
+def test_total_match_budget_stops_search():
+    collector = SearchCollector(max_total_matches=2)
+    events = [begin("a.py")] + [line("match", "a.py", i, "x") for i in range(1, 5)]
+    assert not feed(collector, events)
+    assert collector.match_count == 2
+    assert collector.truncated
+    assert "Search stopped after 2 matches in 1 files" in collector.output
+
+
+def test_byte_budget_stops_search():
+    collector = SearchCollector(max_output_bytes=100)
+    events = [begin("a.py")] + [line("match", "a.py", i, "y" * 30) for i in range(1, 10)]
+    assert not feed(collector, events)
+    assert collector.truncated
+    shown = collector.output.split("\n[Search stopped")[0]
+    assert len(shown.encode()) <= 100
+
+
+def test_long_lines_and_binary_text():
+    collector = SearchCollector()
+    encoded = base64.b64encode(b"caf\xe9 match").decode()
+    feed(
+        collector,
+        [
+            begin("a.py"),
+            line("match", "a.py", 1, "z" * 1000),
+            {"type": "match", "data": {"lines": {"bytes": encoded}, "line_number": 2}},
+        ],
+    )
+    first, second = collector.output.splitlines()[1:3]
+    assert first.endswith(" [line truncated]")
+    assert len(first) < 400
+    assert second == "2:caf� match"
+
+
+def test_oversized_events_are_skipped(monkeypatch):
+    monkeypatch.setattr(ripgrep_stream, "MAX_EVENT_BYTES", 120)
+    stream = io.BytesIO(
+        json.dumps(begin("a.py")).encode() + b"\n"
+        + b'{"type":"match","data":{"lines":{"text":"' + b"q" * 500 + b'"}}}\n'
+        + json.dumps(line("match", "a.py", 7, "ok")).encode() + b"\n"
+    )
+    events = list(_read_events(stream))
+    assert events[1] is None
+    assert events[2]["data"]["line_number"] == 7
+
+
+@requires_rg
+def test_stream_search_kills_rg_at_budget(tmp_path):
+    for i in range(50):
+        (tmp_path / f"f{i:02d}.txt").write_text("needle\n" * 100)
+    collector = SearchCollector(max_total_matches=30, max_matches_per_file=10)
+    return_code, error = stream_search(
+        ["rg", "--json", "--sort", "path", "-m", "11", "needle", str(tmp_path)], collector
+    )
+    assert return_code == 0
+    assert collector.truncated
+    assert collector.match_count == 30
+    assert collector.file_count == 3
+    assert collector.output.count("not shown]") == 3
+
+
+@requires_rg
+def test_stream_search_reports_errors(tmp_path):
+    collector = SearchCollector()
+    return_code, error = stream_search(["rg", "--json", "[unclosed", str(tmp_path)], collector)
+    assert return_code == 2
+    assert "regex parse error" in error
+    assert collector.output == ""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses a POSIX shell")
+def test_stream_search_timeout():
+    collector = SearchCollector()
+    return_code, error = stream_search(["sh", "-c", "exec sleep 5"], collector, timeout=0.2)
+    assert return_code == 2
+    assert "timed out" in error
@@ -17,6 +17,7 @@ from ra_aid.database.pydantic_models import SessionModel
 import datetime
 import ra_aid.server.api_v1_spawn_agent
 from ra_aid.llm import get_model_default_temperature
+from ra_aid.tool_cache import get_tool_cache
 
 
 @pytest.fixture
@@ -220,3 +221,20 @@ def test_temperature_handling_in_agent_spawn(client, mock_repository, mock_threa
     _, kwargs = thread_spy.call_args
     assert kwargs.get('kwargs', {}).get('temperature') == 0.9, \
         f"Expected temperature 0.9, got {kwargs.get('kwargs', {}).get('temperature')}"
+
+
+def test_agent_thread_starts_without_cached_tool_results(monkeypatch):
+    """Test that tool results cached by an earlier session are not reused."""
+    cache = get_tool_cache()
+    cache.put("ripgrep_search", "needle", {"output": "stale"}, cache.generation)
+    assert cache.get("ripgrep_search", "needle")[0]
+
+    # Stop the thread right after its start-up
+    monkeypatch.setattr(
+        ra_aid.server.api_v1_spawn_agent,
+        "DatabaseManager",
+        MagicMock(side_effect=RuntimeError("no database")),
+    )
+    ra_aid.server.api_v1_spawn_agent.run_agent_thread("task", "1", MagicMock())
+
+    assert get_tool_cache().get("ripgrep_search", "needle") == (False, None)
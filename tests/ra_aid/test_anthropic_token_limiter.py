@@ -7,6 +7,7 @@ from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, Tool
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
 from ra_aid.anthropic_token_limiter import (
+    MessageTokenCounter,
     create_token_counter_wrapper,
     estimate_messages_tokens,
     get_model_token_limit,
@@ -99,10 +100,65 @@ class TestAnthropicTokenLimiter(unittest.TestCase):
             messages=unittest.mock.ANY, model=DEFAULT_MODEL
         )
 
+    @patch("ra_aid.anthropic_token_limiter.token_counter")
+    def test_message_token_counter_caches_counts(self, mock_token_counter):
+        """Test that each message is tokenized once and lists count as overhead plus messages."""
+        # Like litellm: 3 tokens per list, plus 4 per message and its content
+        mock_token_counter.side_effect = lambda messages, model: 3 + sum(
+            4 + len(m["content"]) for m in messages
+        )
+        counter = MessageTokenCounter("test-model")
+        messages = [self.system_message, self.human_message, self.ai_message]
+        expected = 3 + sum(4 + len(m.content) for m in messages)
+
+        self.assertEqual(counter.overhead, 3)
+        self.assertEqual(counter(messages), expected)
+        calls = mock_token_counter.call_count
+
+        # Counting again, or a longer history, only tokenizes new messages
+        self.assertEqual(counter(messages), expected)
+        self.assertEqual(mock_token_counter.call_count, calls)
+        counter(messages + [self.long_message])
+        self.assertEqual(mock_token_counter.call_count, calls + 1)
+
+        # Counters are shared per model
+        self.assertIs(create_token_counter_wrapper("test-model-shared"), create_token_counter_wrapper("test-model-shared"))
+
+    def test_anthropic_trim_messages_counts_each_message_once(self):
+        """Test that trimming asks a per-message counter about each message once."""
+        from ra_aid.anthropic_message_utils import anthropic_trim_messages
+
+        class Counter:
+            overhead = 10
+
+            def __init__(self):
+                self.counted = []
+
+            def message_tokens(self, message):
+                self.counted.append(message)
+                return 100
+
+            def __call__(self, messages):
+                return self.overhead + 100 * len(messages)
+
+        counter = Counter()
+        messages = [self.system_message, self.human_message] + self.extra_messages
+
+        result = anthropic_trim_messages(
+            messages,
+            token_counter=counter,
+            max_tokens=410,
+            strategy="last",
+            num_messages_to_keep=2,
+        )
+
+        self.assertEqual(result, messages[:2] + self.extra_messages[-2:])
+        self.assertEqual(len(counter.counted), len(messages))
+
     @patch("ra_aid.anthropic_token_limiter.CiaynAgent._estimate_tokens")
     def test_estimate_messages_tokens(self, mock_estimate_tokens):
         # Setup mock to return different values for different messages
-        mock_estimate_tokens.side_effect = lambda msg: (
+        mock_estimate_tokens.side_effect = lambda msg, model_name=None: (
             10 if isinstance(msg, SystemMessage) else 20
         )
 
@@ -4,7 +4,11 @@ from unittest.mock import Mock
 import pytest
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
-from ra_aid.agent_backends.ciayn_agent import CiaynAgent, validate_function_call_pattern
+from ra_aid.agent_backends.ciayn_agent import (
+    CiaynAgent,
+    TokenLedger,
+    validate_function_call_pattern,
+)
 from ra_aid.exceptions import ToolExecutionError
 
 
@@ -174,6 +178,58 @@ def test_trim_chat_history_both_limits():
     assert result[1] == chat_history[-1]
 
 
+def test_trim_chat_history_estimates_each_message_once():
+    """Test that a growing history is estimated incrementally across trims."""
+    agent = CiaynAgent(Mock(), [], max_history_messages=10, max_tokens=45)
+    estimated = []
+    # 40 bytes at the default 2 bytes per token
+    agent.history_ledger.message_bytes = lambda msg: estimated.append(msg) or 40
+    initial_messages = [HumanMessage(content="Init")]  # ~2 tokens
+    chat_history = []
+
+    for i in range(4):
+        chat_history.append(HumanMessage(content=f"Chat {i}"))
+        result = agent._trim_chat_history(initial_messages, chat_history)
+
+    assert estimated == chat_history
+    assert result == initial_messages + chat_history[-2:]
+    assert len(chat_history) == 4  # History itself is not trimmed
+    assert agent.history_ledger.trimmed_messages == 2
+    assert agent.history_ledger.kept_tokens == 40
+
+
+def test_token_ledger_restarts_on_new_history():
+    """Test that the ledger starts over when the history is replaced or rewritten."""
+    ledger = TokenLedger(lambda msg: len(msg))
+    history = ["aa", "bbb"]
+    ledger.sync(history)
+    assert ledger.tokens() == 5
+    assert ledger.message_tokens(1) == 3
+
+    history[-1] = "c"
+    ledger.sync(history)
+    assert ledger.tokens() == 3
+
+    ledger.sync(["dddd"])
+    assert len(ledger) == 1
+    assert ledger.tokens() == 4
+    assert ledger.trim_start(max_messages=5, max_tokens=3) == 1
+
+
+def test_token_ledger_follows_ratio_changes():
+    """Test that messages already measured are estimated with the current ratio."""
+    ratio = [2.0]
+    ledger = TokenLedger(lambda msg: len(msg), lambda: ratio[0])
+    ledger.sync(["a" * 40, "b" * 40])
+    assert ledger.tokens() == 40
+    assert ledger.trim_start(max_messages=5, max_tokens=20) == 1
+
+    ratio[0] = 4.0
+    assert ledger.message_tokens(0) == 10
+    assert ledger.trim_start(max_messages=5, max_tokens=20) == 0
+    assert ledger.kept_tokens == 20
+
+
 # Fallback tests
 class TestCiaynAgentFallback(unittest.TestCase):
     def setUp(self):
@@ -100,6 +100,8 @@ def test_set_modification_tools():
     set_modification_tools(use_aider=False)
     tool_names = [tool.name for tool in MODIFICATION_TOOLS]
     assert "file_str_replace" in tool_names
+    assert "file_str_replace_batch" in tool_names
+    assert "apply_file_patch" in tool_names
     assert "put_complete_file_contents" in tool_names
     assert "run_programming_task" not in tool_names
 
@@ -107,6 +109,8 @@ def test_set_modification_tools():
     set_modification_tools(use_aider=True)
     tool_names = [tool.name for tool in MODIFICATION_TOOLS]
     assert "file_str_replace" not in tool_names
+    assert "file_str_replace_batch" not in tool_names
+    assert "apply_file_patch" not in tool_names
     assert "put_complete_file_contents" not in tool_names
     assert "run_programming_task" in tool_names
 
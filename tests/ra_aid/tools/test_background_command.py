@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ra_aid.proc.background import BackgroundCommandsManager
+from ra_aid.tools.background_command import check_background_command, start_background_command
+
+
+@pytest.fixture(autouse=True)
+def background_commands():
+    with BackgroundCommandsManager() as commands:
+        yield commands
+
+
+@pytest.fixture(autouse=True)
+def mock_console():
+    with patch("ra_aid.tools.shell.console"), patch("ra_aid.tools.background_command.console_panel"):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def mock_work_log():
+    with patch("ra_aid.tools.background_command.log_work_event") as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_prompt():
+    with patch("ra_aid.tools.shell.Prompt") as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def mock_config_repository():
+    """Mock the ConfigRepository to avoid database operations during tests"""
+    with patch("ra_aid.database.repositories.config_repository.config_repo_var") as mock_repo_var:
+        mock_repo = MagicMock()
+        config = {"cowboy_mode": True}
+        mock_repo.get.side_effect = lambda key, default=None: config.get(key, default)
+        mock_repo.set.side_effect = lambda key, value: config.__setitem__(key, value)
+        mock_repo_var.get.return_value = mock_repo
+        yield mock_repo
+
+
+def test_start_and_check(background_commands):
+    result = start_background_command.invoke({"command": "echo ready; sleep 30"})
+
+    assert result["success"] is True
+    assert result["running"] is True
+    assert result["return_code"] is None
+    assert "ready" in result["output"]
+
+    status = check_background_command.invoke({"handle": result["handle"]})
+    assert status["running"] is True
+    assert status["handle"] == result["handle"]
+
+
+def test_check_reports_exit_code():
+    result = start_background_command.invoke({"command": "echo failing; exit 3"})
+
+    assert result["running"] is False
+    assert result["return_code"] == 3
+    assert result["success"] is False
+    assert "failing" in result["output"]
+
+
+def test_signal_stops_command():
+    result = start_background_command.invoke({"command": "sleep 30"})
+
+    status = check_background_command.invoke({"handle": result["handle"], "send_signal": "kill"})
+
+    assert status["running"] is False
+    assert status["return_code"] is not None
+
+
+def test_unknown_signal_and_handle():
+    result = start_background_command.invoke({"command": "sleep 30"})
+
+    status = check_background_command.invoke({"handle": result["handle"], "send_signal": "pause"})
+    assert status["success"] is False
+    assert "Unknown signal 'pause'" in status["output"]
+
+    status = check_background_command.invoke({"handle": 99})
+    assert status["success"] is False
+    assert "No background command with handle 99" in status["output"]
+
+
+def test_check_invalidates_tool_cache_until_exit_is_reported():
+    result = start_background_command.invoke({"command": "sleep 30"})
+
+    with patch("ra_aid.tools.background_command.invalidate_tool_caches") as invalidate:
+        check_background_command.invoke({"handle": result["handle"]})
+        assert invalidate.call_count == 1
+
+        check_background_command.invoke({"handle": result["handle"], "send_signal": "kill"})
+        assert invalidate.call_count == 2
+
+        # The exit has been reported; nothing more can have been written
+        check_background_command.invoke({"handle": result["handle"]})
+        assert invalidate.call_count == 2
+
+
+def test_declined_command_is_not_started(mock_prompt, mock_config_repository, background_commands):
+    mock_config_repository.set("cowboy_mode", False)
+    mock_prompt.ask.return_value = "n"
+
+    result = start_background_command.invoke({"command": "sleep 30"})
+
+    assert result["success"] is False
+    assert result["output"] == "Command execution cancelled by user"
+    assert background_commands.list() == []
@@ -3,7 +3,7 @@ from unittest.mock import patch
 
 import pytest
 
-from ra_aid.tools.file_str_replace import file_str_replace
+from ra_aid.tools.file_str_replace import file_str_replace, file_str_replace_batch
 
 
 @pytest.fixture
@@ -119,15 +119,15 @@ def test_special_characters(temp_test_dir):
     assert "Replaced!" in test_file.read_text()
 
 
-@patch("pathlib.Path.read_text")
-def test_io_error(mock_read_text, temp_test_dir):
+@patch("ra_aid.file_cache.FileContentCache.read_bytes")
+def test_io_error(mock_read_bytes, temp_test_dir):
     """Test handling of IO errors during read."""
     # Create and write to file first
     test_file = temp_test_dir / "test.txt"
     test_file.write_text("some test content")
 
-    # Then mock read_text to raise error
-    mock_read_text.side_effect = IOError("Failed to read file")
+    # Then mock the read to raise error
+    mock_read_bytes.side_effect = IOError("Failed to read file")
 
     result = file_str_replace.invoke(
         {"filepath": str(test_file), "old_str": "test", "new_str": "replacement"}
@@ -180,4 +180,71 @@ def test_long_string_truncation(temp_test_dir):
     )
 
     assert result["success"] is True
-    assert test_file.read_text() == "prefix replaced suffix"
\ No newline at end of file
+    assert test_file.read_text() == "prefix replaced suffix"
+
+def test_replacement_is_seen_by_next_read(temp_test_dir):
+    """Test that cached contents are dropped when the file is rewritten."""
+    test_file = temp_test_dir / "cached.txt"
+    test_file.write_text("alpha beta")
+
+    file_str_replace.invoke({"filepath": str(test_file), "old_str": "alpha", "new_str": "gamma"})
+    result = file_str_replace.invoke(
+        {"filepath": str(test_file), "old_str": "gamma", "new_str": "delta"}
+    )
+
+    assert result["success"] is True
+    assert test_file.read_text() == "delta beta"
+
+
+def test_batch_replacement(temp_test_dir):
+    """Test applying several edits to one file in a single call."""
+    test_file = temp_test_dir / "batch.py"
+    test_file.write_text("x = 1\ny = 2\nprint(x, x)\n")
+
+    result = file_str_replace_batch.invoke(
+        {
+            "filepath": str(test_file),
+            "edits": [
+                {"old_str": "y = 2", "new_str": "y = 3"},
+                {"old_str": "x", "new_str": "z", "replace_all": True},
+            ],
+        }
+    )
+
+    assert result["success"] is True
+    assert [edit["count"] for edit in result["edits"]] == [1, 3]
+    assert test_file.read_text() == "z = 1\ny = 3\nprint(z, z)\n"
+
+
+def test_batch_is_all_or_nothing(temp_test_dir):
+    """Test that a failing edit leaves the file unchanged and is reported."""
+    test_file = temp_test_dir / "batch.txt"
+    test_file.write_text("one two two")
+
+    result = file_str_replace_batch.invoke(
+        {
+            "filepath": str(test_file),
+            "edits": [
+                {"old_str": "one", "new_str": "1"},
+                {"old_str": "two", "new_str": "2"},
+                {"old_str": "three", "new_str": "3"},
+            ],
+        }
+    )
+
+    assert result["success"] is False
+    assert "Edit 1: String appears 2 times" in result["message"]
+    assert "Edit 2: String not found" in result["message"]
+    assert [edit["count"] for edit in result["edits"]] == [1, 2, 0]
+    assert result["edits"][0]["error"] is None
+    assert test_file.read_text() == "one two two"
+
+
+def test_batch_file_not_found():
+    """Test batch edits of a non-existent file."""
+    result = file_str_replace_batch.invoke(
+        {"filepath": "nonexistent.txt", "edits": [{"old_str": "a", "new_str": "b"}]}
+    )
+
+    assert result["success"] is False
+    assert "File not found" in result["message"]
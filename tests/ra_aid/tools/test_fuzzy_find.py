@@ -197,3 +197,13 @@ def test_excluding_system_dirs(non_git_repo):
         {"search_term": "module", "repo_path": str(non_git_repo)}
     )
     assert len(results_cache) == 0  # Should not find __pycache__ files
+
+
+def test_batch_search_terms(git_repo):
+    """Test searching several terms in one call"""
+    results = fuzzy_find_project_files.invoke(
+        {"search_term": ["utils", "untracked", ""], "repo_path": str(git_repo)}
+    )
+    assert set(results) == {"utils", "untracked"}
+    assert any("lib/utils.py" in match[0] for match in results["utils"])
+    assert any("untracked.txt" in match[0] for match in results["untracked"])
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+import pytest
+
+from ra_aid.tools.patch_file import apply_file_patch
+
+
+@pytest.fixture(autouse=True)
+def mock_related_files():
+    with patch("ra_aid.tools.patch_file.emit_related_files") as mock:
+        yield mock
+
+
+def test_applies_patch(tmp_path, mock_related_files):
+    test_file = tmp_path / "module.py"
+    test_file.write_text("def add(a, b):\n    return a - b\n")
+
+    result = apply_file_patch.invoke(
+        {
+            "filepath": str(test_file),
+            "patch": "@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a - b\n+    return a + b\n",
+        }
+    )
+
+    assert result["success"] is True
+    assert result["hunks"][0]["applied"] is True
+    assert result["hunks"][0]["line"] == 1
+    assert test_file.read_text() == "def add(a, b):\n    return a + b\n"
+    mock_related_files.invoke.assert_called_once_with({"files": [str(test_file)]})
+
+
+def test_reports_rejected_hunks(tmp_path):
+    test_file = tmp_path / "module.py"
+    test_file.write_text("x = 1\n")
+
+    result = apply_file_patch.invoke(
+        {
+            "filepath": str(test_file),
+            "patch": "<<<<<<< SEARCH\ny = 1\n=======\ny = 2\n>>>>>>> REPLACE\n",
+        }
+    )
+
+    assert result["success"] is False
+    assert "No changes made" in result["message"]
+    assert "Hunk 1 (search/replace block 1)" in result["message"]
+    assert result["hunks"][0]["applied"] is False
+    assert test_file.read_text() == "x = 1\n"
+
+
+def test_malformed_patch(tmp_path):
+    test_file = tmp_path / "module.py"
+    test_file.write_text("x = 1\n")
+
+    result = apply_file_patch.invoke({"filepath": str(test_file), "patch": "x = 2"})
+
+    assert result["success"] is False
+    assert "outside any hunk" in result["message"]
+
+
+def test_file_not_found(tmp_path):
+    result = apply_file_patch.invoke(
+        {"filepath": str(tmp_path / "missing.py"), "patch": "@@ -1 +1 @@\n-a\n+b\n"}
+    )
+
+    assert result["success"] is False
+    assert "File not found" in result["message"]
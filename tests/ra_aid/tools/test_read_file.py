@@ -90,3 +90,48 @@ def test_binary_file_detection(tmp_path):
     assert isinstance(result, dict)
     assert "error" in result
     assert "read_file failed because we cannot read binary files" == result["error"]
+
+
+def test_line_range(tmp_path):
+    """Test reading a range of lines"""
+    test_file = tmp_path / "range.txt"
+    test_file.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    result = read_file_tool.invoke(
+        {"filepath": str(test_file), "start_line": 10, "end_line": 12}
+    )
+
+    assert result["content"] == "line 10\nline 11\nline 12\n"
+    assert result["start_line"] == 10
+    assert result["end_line"] == 12
+    assert result["total_lines"] == 100
+    assert result["next_start_line"] == 13
+
+
+def test_paging_with_continuation_cursor(tmp_path):
+    """Test that next_start_line pages through a file larger than one read"""
+    test_file = tmp_path / "large.txt"
+    test_file.write_text("".join(f"{i}\n" for i in range(1, 12001)))
+
+    pages = []
+    cursor = 1
+    while cursor is not None:
+        result = read_file_tool.invoke({"filepath": str(test_file), "start_line": cursor})
+        pages.append(result["content"])
+        cursor = result.get("next_start_line")
+
+    assert len(pages) == 3
+    assert len(pages[0].splitlines()) == 5000
+    assert "".join(pages) == test_file.read_text()
+
+
+def test_range_past_end(tmp_path):
+    """Test that a range beyond the end of the file returns nothing"""
+    test_file = tmp_path / "short.txt"
+    test_file.write_text("a\nb\n")
+
+    result = read_file_tool.invoke({"filepath": str(test_file), "start_line": 5})
+
+    assert result["content"] == ""
+    assert result["total_lines"] == 2
+    assert "next_start_line" not in result
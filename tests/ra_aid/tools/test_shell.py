@@ -177,4 +177,28 @@ def test_shell_command_execution_error(mock_console, mock_prompt, mock_run_inter
 
     assert result["success"] is False
     assert result["return_code"] == 1
-    assert "Command failed" in result["output"]
\ No newline at end of file
+    assert "Command failed" in result["output"]
+
+def test_shell_command_uses_registered_command_loop(mock_console, mock_prompt, mock_run_interactive, mock_config_repository):
+    """Test that commands run on the server's event loop when one is registered"""
+    import asyncio
+    import threading
+
+    from ra_aid.proc.interactive import set_command_loop
+
+    mock_config_repository.set("cowboy_mode", True)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    set_command_loop(loop)
+    try:
+        result = run_shell_command.invoke({"command": "echo from loop"})
+    finally:
+        set_command_loop(None)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+    assert result["success"] is True
+    assert "from loop" in result["output"]
+    mock_run_interactive.assert_not_called()
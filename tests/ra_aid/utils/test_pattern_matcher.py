@@ -0,0 +1,75 @@
+"""Tests for compiled path pattern matchers."""
+
+import fnmatch
+
+import pathspec
+import pytest
+
+from ra_aid.utils.pattern_matcher import PatternMatcher, compile_patterns
+
+PATHS = [
+    "README.md",
+    "src/main.py",
+    "src/main.pyc",
+    "src/__pycache__/main.cpython-39.pyc",
+    "build/output.o",
+    "lib/native.so",
+    "docs/build/index.html",
+    "tests/test_main.py",
+    ".git/config",
+    "notes.log",
+]
+
+GLOB_PATTERNS = ["*.pyc", "__pycache__/*", ".git/*", "*.so", "*.o", "*test*"]
+GITIGNORE_PATTERNS = ["*.pyc", "build", "/notes.log", "docs/**/index.html"]
+
+
+def test_glob_matches_fnmatch():
+    """Test that the combined glob regex agrees with per-pattern fnmatch."""
+    matcher = compile_patterns(GLOB_PATTERNS)
+    for path in PATHS:
+        expected = any(fnmatch.fnmatch(path, p) for p in GLOB_PATTERNS)
+        assert matcher.matches(path) is expected, path
+
+
+def test_gitignore_matches_pathspec():
+    """Test that the combined gitignore regex agrees with pathspec."""
+    spec = pathspec.PathSpec.from_lines("gitwildmatch", GITIGNORE_PATTERNS)
+    matcher = compile_patterns(GITIGNORE_PATTERNS, syntax="gitignore")
+    for path in PATHS:
+        assert matcher.match_file(path) is spec.match_file(path), path
+
+
+def test_gitignore_negation_respects_order():
+    """Test that negated gitignore patterns keep their ordering semantics."""
+    matcher = compile_patterns(["*.log", "!keep.log"], syntax="gitignore")
+    assert matcher.matches("debug.log") is True
+    assert matcher.matches("keep.log") is False
+
+
+def test_exclude_and_select_preserve_order():
+    """Test filtering helpers in a single pass."""
+    matcher = compile_patterns(["*.py"])
+    assert matcher.exclude(PATHS) == [p for p in PATHS if not p.endswith(".py")]
+    assert matcher.select(PATHS) == ["src/main.py", "tests/test_main.py"]
+
+
+def test_empty_patterns_match_nothing():
+    """Test that an empty pattern list keeps every path."""
+    matcher = compile_patterns(None)
+    assert not matcher
+    assert matcher.matches("anything") is False
+    assert matcher.exclude(PATHS) == PATHS
+    assert matcher.select(PATHS) == []
+
+
+def test_matchers_are_cached_by_pattern_tuple():
+    """Test that equal pattern lists share one compiled matcher."""
+    assert compile_patterns(["*.py", "*.md"]) is compile_patterns(("*.py", "*.md"))
+    assert compile_patterns(["*.py"]) is not compile_patterns(["*.py"], "gitignore")
+
+
+def test_unknown_syntax():
+    """Test that unsupported syntaxes are rejected."""
+    with pytest.raises(ValueError):
+        PatternMatcher(["*.py"], syntax="regex")
@@ -0,0 +1,309 @@
+"""Tests for the trigram code index used to narrow ripgrep searches."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from ra_aid import code_index
+from ra_aid.code_index import (
+    CodeIndex,
+    get_code_index,
+    narrow_search_command,
+    pattern_query,
+    reset_code_indexes,
+)
+from ra_aid.database.repositories.config_repository import ConfigRepositoryManager
+
+requires_rg = pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep not installed")
+
+
+def trigrams(query):
+    """Collect all trigrams mentioned in a query."""
+    if query is None:
+        return set()
+    kind, value = query
+    if kind == "tri":
+        return {value}
+    return set().union(*(trigrams(sub) for sub in value))
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    reset_code_indexes()
+    yield
+    reset_code_indexes()
+
+
+@pytest.fixture
+def enabled():
+    with ConfigRepositoryManager() as config_repo:
+        config_repo.set("code_index_enabled", True)
+        yield config_repo
+
+
+def write(root, path, content, mode="w"):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, mode) as f:
+        f.write(content)
+
+
+def age(root, path, seconds=60):
+    """Backdate a file so it is outside the racy window."""
+    full = os.path.join(root, path)
+    st = os.stat(full)
+    os.utime(full, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+class TestPatternQuery:
+    def test_literal(self):
+        assert pattern_query("hello") == (
+            "and",
+            [("tri", b"ell"), ("tri", b"hel"), ("tri", b"llo")],
+        )
+
+    def test_short_literal_matches_everything(self):
+        assert pattern_query("ab") is None
+        assert pattern_query("") is None
+
+    def test_alternation(self):
+        query = pattern_query("foo|barbaz")
+        assert query[0] == "or"
+        assert trigrams(query) == {b"foo", b"bar", b"arb", b"rba", b"baz"}
+
+    def test_alternation_with_unconstrained_branch(self):
+        assert pattern_query("foo|x") is None
+
+    def test_optional_parts_are_dropped(self):
+        assert trigrams(pattern_query("def(foo)?bar")) == {b"def", b"bar"}
+        assert trigrams(pattern_query("(foo)+bar")) == {b"foo", b"bar"}
+        assert trigrams(pattern_query("class\\s+\\w+Error")) == {b"cla", b"las", b"ass", b"err", b"rro", b"ror"}
+
+    def test_case_insensitive_skips_ambiguous_folds(self):
+        assert trigrams(pattern_query("Mask", ignore_case=True)) == set()
+        assert trigrams(pattern_query("Mapping", ignore_case=True)) == {
+            b"map", b"app", b"ppi", b"pin", b"ing",
+        }
+        assert trigrams(pattern_query("(?i)Mask")) == set()
+        assert trigrams(pattern_query("(?i:ask)Mask")) == {b"mas", b"ask"}
+
+    def test_fixed_string(self):
+        assert trigrams(pattern_query("a.b|c", fixed_string=True)) == {b"a.b", b".b|", b"b|c"}
+
+    def test_unanalyzable_patterns(self):
+        assert pattern_query("\\p{Greek}foo") is None
+        assert pattern_query("foo\nbar") is None
+        assert pattern_query("\\<word\\>") is None
+
+    def test_rg_only_class_syntax(self):
+        assert pattern_query("[[:alpha:]]foo") is None
+        assert pattern_query("[a-z&&[^x]]foo") is None
+        assert pattern_query("[x--y]foo") is None
+        assert pattern_query("\\pLfoo") is None
+        # Python and rg agree on a leading ] and on escaped brackets
+        assert trigrams(pattern_query("[]a]foo")) == {b"foo"}
+        assert trigrams(pattern_query("foo[\\[]bar")) == {b"foo", b"oo[", b"o[b", b"[ba", b"bar"}
+
+
+class TestCodeIndex:
+    def test_incremental_refresh(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "alpha content\n")
+        write(root, "b.py", "beta content\n")
+        age(root, "a.py")
+        age(root, "b.py")
+
+        index = CodeIndex(root)
+        assert index.refresh(["a.py", "b.py"]) == 2
+        assert index.refresh(["a.py", "b.py"]) == 0
+        assert index.candidates(["a.py", "b.py"], pattern_query("alpha")) == ["a.py"]
+
+        write(root, "b.py", "beta with alpha\n")
+        age(root, "b.py", 30)
+        assert index.refresh(["a.py", "b.py"]) == 1
+        assert index.candidates(["a.py", "b.py"], pattern_query("alpha")) == ["a.py", "b.py"]
+
+        os.remove(os.path.join(root, "a.py"))
+        write(root, "b.py", "beta\n")
+        index.refresh(["b.py"])
+        assert "a.py" not in index.files
+        assert index.candidates(["b.py"], pattern_query("content")) == []
+
+    def test_recently_modified_files_are_reread(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "first\n")
+        index = CodeIndex(root)
+        index.refresh(["a.py"])
+        mtime = os.stat(os.path.join(root, "a.py")).st_mtime_ns
+
+        # Same size and mtime, as after a quick rewrite on a coarse clock
+        write(root, "a.py", "other\n")
+        os.utime(os.path.join(root, "a.py"), ns=(mtime, mtime))
+        assert index.refresh(["a.py"]) == 1
+        assert index.candidates(["a.py"], pattern_query("other")) == ["a.py"]
+
+    def test_compaction_drops_dead_ids(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "alpha\n")
+        index = CodeIndex(root)
+        for i in range(3):
+            write(root, "a.py", f"alpha {i}\n")
+            index.refresh(["a.py"])
+        assert index.dead == 0
+        assert list(index.postings[b"alp"]) == [index.files["a.py"][0]]
+
+    def test_binary_candidates_disable_narrowing(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "needle\n")
+        write(root, "blob.bin", b"needle\0rest", mode="wb")
+        index = CodeIndex(root)
+        index.refresh(["a.py", "blob.bin"])
+        assert index.candidates(["a.py", "blob.bin"], pattern_query("needle")) is None
+        # Text after the NUL is never searched by rg
+        assert index.candidates(["a.py", "blob.bin"], pattern_query("rest")) == []
+
+    def test_persistence(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "alpha\n")
+        index = CodeIndex(root)
+        index.refresh(["a.py"])
+        index.save()
+        assert os.path.exists(os.path.join(root, code_index.CODE_INDEX_PATH))
+
+        restored = CodeIndex(root)
+        assert restored.load()
+        assert restored.files == index.files
+        assert restored.postings == index.postings
+        assert restored.candidates(["a.py"], pattern_query("alpha")) == ["a.py"]
+
+    def test_malformed_persisted_index_is_rebuilt(self, tmp_path):
+        root = str(tmp_path)
+        write(root, "a.py", "alpha\n")
+        index = CodeIndex(root)
+        index.refresh(["a.py"])
+        index.save()
+        path = os.path.join(root, code_index.CODE_INDEX_PATH)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        for corrupt in (data[:-2], data[:20], b"\x80\x04K\x01.", data + b"x"):
+            with open(path, "wb") as f:
+                f.write(corrupt)
+            restored = CodeIndex(root)
+            assert not restored.load()
+            assert restored.files == {}
+
+    def test_no_persistence_without_ra_aid_dir(self, tmp_path):
+        shutil.rmtree(tmp_path / ".ra-aid")
+        index = CodeIndex(str(tmp_path))
+        index.save()
+        assert not index.load()
+
+
+def test_disabled_by_default(tmp_path):
+    with ConfigRepositoryManager():
+        assert narrow_search_command(["rg"], [], "needle") is None
+
+
+RG_BASE = ["rg", "--color", "never", "--sort", "path"]
+
+
+def build_corpus(root):
+    write(root, "src/app.py", "import os\n\nclass ParseError(Exception):\n    pass\n\ndef main():\n    return os.getcwd()\n")
+    write(root, "src/util.py", "def helper(value):\n    return value * 2\n# TODO: Kelvin conversion\n")
+    write(root, "src/notes.md", "# Notes\nMain entry point is app.py\nUnicode: café naïve\n")
+    write(root, "lib/legacy.js", "function main() { return 42; }\nconst ASK = 'question';\n")
+    write(root, "lib/Data.JSON", '{"key": "value", "main": true}\n')
+    write(root, ".hidden/secret.py", "def main():\n    secret = True\n")
+    write(root, "build/out.py", "def main():\n    built = True\n")
+    write(root, "ignored/skip.py", "def main():\n    ignored = True\n")
+    write(root, ".gitignore", "ignored/\n")
+    write(root, "data/blob.bin", b"header main\0binary main tail", mode="wb")
+    write(root, "data/utf16.txt", "main in utf16\n".encode("utf-16"), mode="wb")
+    write(root, "src/kelvin.txt", "Kelvin and ſecret\n")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+
+
+def run_rg(root, cmd):
+    result = subprocess.run(cmd, cwd=root, capture_output=True)
+    return result.returncode, sorted(result.stdout.splitlines()), result.stderr
+
+
+@requires_rg
+@pytest.mark.parametrize(
+    "pattern,options,include_paths",
+    [
+        ("main", [], None),
+        ("def main", [], None),
+        ("ParseError|helper", [], None),
+        ("class\\s+\\w+Error", [], None),
+        ("nothing_matches_this", [], None),
+        ("MAIN", ["-i"], None),
+        ("kelvin", ["-i"], None),
+        ("secret", ["-i"], None),
+        ("CAFÉ", ["-i"], None),
+        ("café", [], None),
+        ("main", ["-t", "py"], None),
+        ("main", ["--hidden"], None),
+        ("a.p", ["-F"], None),
+        ("value", [], ["src"]),
+        ("value", [], ["src/util.py"]),
+        ("binary", [], None),
+        ("(?i)return", [], None),
+        ("retur(n|ned)", [], None),
+        ("[unclosed", [], None),
+        ("[[:alpha:]]ain", [], None),
+        ("[[:upper:]]arseError", [], None),
+        ("[a-z&&[^x]]elper", [], None),
+        ("\\p{L}ain", [], None),
+    ],
+)
+def test_narrowed_search_matches_rg(tmp_path, enabled, pattern, options, include_paths):
+    root = str(tmp_path)
+    build_corpus(root)
+
+    filter_args = [arg for arg in options if arg in ("--hidden",)]
+    if "-t" in options:
+        filter_args += options[options.index("-t") : options.index("-t") + 2]
+    for directory in ("build", ".ra-aid"):
+        filter_args += ["--glob", f"!{directory}"]
+    search_args = RG_BASE + [arg for arg in options if arg in ("-i", "-F")] + filter_args
+
+    expected = run_rg(root, search_args + [pattern] + (include_paths or []))
+    for _ in range(2):
+        narrowed = narrow_search_command(
+            search_args,
+            filter_args,
+            pattern,
+            include_paths,
+            fixed_string="-F" in options,
+            case_sensitive="-i" not in options,
+        )
+        actual = run_rg(root, narrowed) if narrowed else expected
+        assert actual == expected
+
+
+@requires_rg
+def test_narrowing_reads_fewer_files(tmp_path, enabled):
+    root = str(tmp_path)
+    for i in range(20):
+        write(root, f"pkg/mod{i}.py", f"value_{i} = {i}\n")
+    narrowed = narrow_search_command(RG_BASE, [], "value_7")
+    assert narrowed[-2:] == ["--", os.path.join("pkg", "mod7.py")]
+    assert get_code_index(root).files
+
+    # Edits are picked up on the next search
+    write(root, "pkg/mod3.py", "value_7 = 3\n")
+    narrowed = narrow_search_command(RG_BASE, [], "value_7")
+    assert sorted(narrowed[-2:]) == [os.path.join("pkg", "mod3.py"), os.path.join("pkg", "mod7.py")]
+
+
+@requires_rg
+def test_no_candidates_searches_devnull(tmp_path, enabled):
+    root = str(tmp_path)
+    write(root, "a.py", "alpha\n")
+    narrowed = narrow_search_command(RG_BASE, [], "missing")
+    assert narrowed[-2:] == ["--", os.devnull]
+    assert run_rg(root, narrowed)[0] == 1
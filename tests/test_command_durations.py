@@ -0,0 +1,154 @@
+"""Tests for learned shell command timeouts."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from ra_aid.command_durations import (
+    MIN_IDLE_TIMEOUT_SECONDS,
+    CommandDurations,
+    command_signature,
+    percentile,
+)
+from ra_aid.proc.interactive import CommandRun
+
+
+@pytest.mark.parametrize(
+    "command,expected",
+    [
+        ("pytest tests/test_a.py -x", "pytest <path> -x"),
+        ("pytest tests/test_a.py tests/test_b.py -x", "pytest <path> -x"),
+        ("git commit -m 'fix the parser'", "git commit -m <arg>"),
+        ("ls -la src/ | head -n 20", "ls -la <path> | head -n <n>"),
+        ("/usr/bin/make -j8 all", "make -j8 all"),
+        ("CI=1 npm run test -- --grep=slow", "npm run test -- --grep=<arg>"),
+        ("echo 'unbalanced", "echo <arg>"),
+    ],
+)
+def test_command_signature(command, expected):
+    """Test that variable parts of commands are replaced by placeholders."""
+    assert command_signature(command) == expected
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([7.0], 95) == 7.0
+
+
+def run(duration, gap=1.0, **kwargs):
+    return CommandRun(duration_seconds=duration, max_output_gap_seconds=gap, **kwargs)
+
+
+def test_timeout_uses_request_without_history():
+    """Test that the requested runtime is used until enough runs are recorded."""
+    durations = CommandDurations()
+    durations.add("make test", "/repo", run(90))
+    durations.add("make test", "/repo", run(95))
+
+    limits = durations.timeout_for("make test", "/repo", 30)
+
+    assert limits.expected_runtime_seconds == 30
+    assert limits.idle_timeout_seconds is None
+    assert not limits.learned
+
+
+def test_timeout_is_raised_to_p95_duration():
+    """Test that the deadline is never below the command's usual duration."""
+    durations = CommandDurations()
+    for duration in (80, 85, 90.5):
+        durations.add("pytest tests/test_a.py", "/repo", run(duration, gap=5.0))
+
+    limits = durations.timeout_for("pytest tests/test_b.py", "/repo", 30)
+
+    assert limits.learned
+    assert limits.expected_runtime_seconds == 91
+    assert limits.p95_seconds == 90.5
+    # Silences are only learned from the exact command
+    assert limits.idle_timeout_seconds is None
+    assert durations.timeout_for("pytest tests/test_a.py", "/repo", 30).idle_timeout_seconds == 50.0
+    # A generous request is left alone
+    assert durations.timeout_for("pytest tests/test_b.py", "/repo", 300).expected_runtime_seconds == 300
+    # History is per directory
+    assert not durations.timeout_for("pytest tests/test_b.py", "/other", 30).learned
+
+
+def test_timeout_ignores_hung_runs_and_floors_idle_timeout():
+    """Test that hung runs are left out and fast commands get the minimum idle timeout."""
+    durations = CommandDurations()
+    for _ in range(3):
+        durations.add("ls", "/repo", run(0.1, gap=0.05))
+    durations.add("ls", "/repo", run(600, gap=600, hung=True))
+
+    limits = durations.timeout_for("ls", "/repo", 30)
+
+    assert limits.samples == 3
+    assert limits.expected_runtime_seconds == 30
+    assert limits.idle_timeout_seconds == MIN_IDLE_TIMEOUT_SECONDS
+
+
+def test_idle_timeout_is_not_shared_across_signature():
+    """Test that quiet runs of one command do not cut short another with the same signature."""
+    durations = CommandDurations()
+    for _ in range(3):
+        durations.add("pytest tests/test_fast.py", "/repo", run(1.0, gap=0.5))
+        durations.add("sleep 2", "/repo", run(2.0, gap=2.0))
+
+    assert durations.timeout_for("pytest tests/", "/repo", 600).idle_timeout_seconds is None
+    assert durations.timeout_for("sleep 120", "/repo", 600).idle_timeout_seconds is None
+    limits = durations.timeout_for(" pytest tests/test_fast.py", "/repo", 600)
+    assert limits.idle_timeout_seconds == MIN_IDLE_TIMEOUT_SECONDS
+
+
+def test_keeps_most_recent_samples():
+    """Test that only max_samples runs are kept per command."""
+    durations = CommandDurations(max_samples=3)
+    for duration in (500, 500, 500, 10, 10, 10):
+        durations.add("make", "/repo", run(duration))
+
+    assert durations.timeout_for("make", "/repo", 30).p95_seconds == 10
+
+
+def test_slowest_orders_by_p95():
+    """Test the slowest commands report."""
+    durations = CommandDurations()
+    durations.add("make", "/repo", run(2))
+    durations.add("make", "/repo", run(4, timed_out=True))
+    durations.add("pytest -x", "/repo", run(60))
+    durations.add("ls", "/repo", run(0.01))
+
+    rows = durations.slowest(2)
+
+    assert [row["command"] for row in rows] == ["pytest -x", "make"]
+    assert rows[1] == {
+        "command": "make",
+        "cwd": "/repo",
+        "runs": 2,
+        "p50_seconds": 2,
+        "p95_seconds": 4,
+        "max_seconds": 4,
+        "timeouts": 1,
+        "hangs": 0,
+    }
+
+
+def test_from_trajectories_skips_records_without_durations():
+    """Test loading history from run_shell_command trajectory records."""
+    records = [
+        SimpleNamespace(
+            tool_parameters={"command": "make test", "timeout": 30},
+            tool_result={"return_code": 0, "duration_seconds": 40.0, "max_output_gap_seconds": 2.0, "cwd": "/repo"},
+        ),
+        SimpleNamespace(tool_parameters={"command": "make test"}, tool_result={"return_code": 0}),
+        SimpleNamespace(tool_parameters=None, tool_result={"duration_seconds": 1.0}),
+        SimpleNamespace(tool_parameters={"command": "make test"}, tool_result="done"),
+    ]
+
+    rows = CommandDurations.from_trajectories(records).slowest()
+
+    assert len(rows) == 1
+    assert rows[0]["command"] == "make test"
+    assert rows[0]["runs"] == 1
+    assert rows[0]["max_seconds"] == 40.0
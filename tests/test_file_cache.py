@@ -0,0 +1,115 @@
+"""Tests for the shared file content cache."""
+
+import os
+
+import pytest
+
+from ra_aid.file_cache import FileContentCache, count_text_lines
+
+
+@pytest.fixture
+def cache():
+    return FileContentCache(max_bytes=1000, max_file_bytes=400)
+
+
+def bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_repeated_reads_hit(tmp_path, cache):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"one\r\ntwo\n")
+
+    assert cache.read_text(str(path), "utf-8") == "one\ntwo\n"
+    assert cache.read_text(str(path), "utf-8") == "one\ntwo\n"
+    assert cache.read_bytes(str(path)) == b"one\r\ntwo\n"
+    assert cache.line_count(str(path), "utf-8") == 2
+    assert cache.stats.misses == 1
+    assert cache.stats.hits == 2
+    assert cache.stats.hit_rate == pytest.approx(2 / 3)
+
+
+def test_changed_file_is_reread(tmp_path, cache):
+    path = tmp_path / "a.txt"
+    path.write_text("old")
+    assert cache.read_text(str(path), "utf-8") == "old"
+
+    path.write_text("new")
+    bump_mtime(path)
+    assert cache.read_text(str(path), "utf-8") == "new"
+    assert cache.stats.invalidations == 1
+
+
+def test_paths_share_entries_by_real_path(tmp_path, cache):
+    path = tmp_path / "a.txt"
+    path.write_text("data")
+    link = tmp_path / "link.txt"
+    link.symlink_to(path)
+
+    cache.read_bytes(str(path))
+    cache.read_bytes(str(link))
+    assert cache.stats.hits == 1
+
+
+def test_eviction_by_total_bytes(tmp_path, cache):
+    paths = []
+    for name in "abcd":
+        path = tmp_path / f"{name}.txt"
+        path.write_bytes(name.encode() * 300)
+        paths.append(str(path))
+        cache.read_bytes(str(path))
+
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.stats.evictions >= 1
+    cache.read_bytes(paths[-1])
+    assert cache.stats.hits == 1
+    cache.read_bytes(paths[0])
+    assert cache.stats.misses == 5
+
+
+def test_large_files_are_not_kept(tmp_path, cache):
+    path = tmp_path / "big.txt"
+    path.write_bytes(b"x" * 500)
+    cache.read_bytes(str(path))
+    cache.read_bytes(str(path))
+    assert cache.stats.misses == 2
+    assert cache.total_bytes == 0
+
+
+def test_binary_verdict_is_cached(tmp_path, cache):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"\x00" * 10)
+    calls = []
+
+    def classify(p, data):
+        calls.append(p)
+        return True
+
+    assert cache.is_binary(str(path), classify)
+    assert cache.is_binary(str(path), classify)
+    assert len(calls) == 1
+
+
+def test_invalidate(tmp_path, cache):
+    path = tmp_path / "a.txt"
+    path.write_text("data")
+    cache.read_text(str(path), "utf-8")
+    cache.invalidate(str(path))
+    assert cache.total_bytes == 0
+    cache.read_text(str(path), "utf-8")
+    assert cache.stats.misses == 2
+
+
+def test_decode_errors_propagate(tmp_path, cache):
+    path = tmp_path / "bad.txt"
+    path.write_bytes(b"\xff\xfe\x00")
+    with pytest.raises(UnicodeDecodeError):
+        cache.read_text(str(path), "utf-8")
+
+
+def test_count_text_lines():
+    assert count_text_lines("") == 0
+    assert count_text_lines("a") == 1
+    assert count_text_lines("a\n") == 1
+    assert count_text_lines("a\nb") == 2
@@ -0,0 +1,128 @@
+"""Tests for atomic, batched string replacement."""
+
+import os
+import stat
+from unittest.mock import patch
+
+import pytest
+
+from ra_aid import file_edit
+from ra_aid.file_cache import get_file_cache
+from ra_aid.file_edit import StrEdit, apply_str_edits
+
+
+def test_batch_applies_all_edits(tmp_path):
+    target = tmp_path / "a.py"
+    target.write_text("alpha = 1\nbeta = 2\nalpha_too = alpha\n")
+
+    batch = apply_str_edits(
+        str(target),
+        [StrEdit("beta = 2", "beta = 3"), StrEdit("alpha", "gamma", replace_all=True)],
+    )
+
+    assert batch.applied is True
+    assert [result.count for result in batch.results] == [1, 3]
+    assert target.read_text() == "gamma = 1\nbeta = 3\ngamma_too = gamma\n"
+    assert batch.bytes_written == len(target.read_bytes())
+
+
+def test_failing_edit_leaves_file_untouched(tmp_path):
+    target = tmp_path / "a.txt"
+    target.write_text("one two two")
+
+    batch = apply_str_edits(
+        str(target),
+        [StrEdit("one", "1"), StrEdit("two", "2"), StrEdit("three", "3"), StrEdit("", "x")],
+    )
+
+    assert batch.applied is False
+    assert [result.count for result in batch.results] == [1, 2, 0, 0]
+    assert [i for i, _ in batch.failures] == [1, 2, 3]
+    assert target.read_text() == "one two two"
+
+
+def test_overlapping_edits_conflict(tmp_path):
+    target = tmp_path / "a.txt"
+    target.write_text("abcdefghij")
+
+    batch = apply_str_edits(
+        str(target),
+        [StrEdit("abcdefgh", "x"), StrEdit("cd", "y"), StrEdit("fg", "z"), StrEdit("ij", "w")],
+    )
+
+    assert batch.applied is False
+    assert [result.conflict for result in batch.results] == [None, 0, 0, None]
+    assert target.read_text() == "abcdefghij"
+
+
+def test_preserves_mode_and_follows_symlinks(tmp_path):
+    target = tmp_path / "script.sh"
+    target.write_text("echo old\n")
+    os.chmod(target, 0o750)
+    link = tmp_path / "link.sh"
+    link.symlink_to(target)
+
+    batch = apply_str_edits(str(link), [StrEdit("old", "new")])
+
+    assert batch.applied is True
+    assert link.is_symlink()
+    assert target.read_text() == "echo new\n"
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o750
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_keeps_crlf_line_endings(tmp_path):
+    target = tmp_path / "win.txt"
+    target.write_bytes(b"first\r\nsecond\r\nthird\r\n")
+
+    batch = apply_str_edits(str(target), [StrEdit("first\nsecond", "one\ntwo")])
+
+    assert batch.applied is True
+    assert target.read_bytes() == b"one\r\ntwo\r\nthird\r\n"
+
+
+def test_failed_write_keeps_original(tmp_path):
+    # A directory of its own, since tmp_path also holds the test database
+    directory = tmp_path / "edit"
+    directory.mkdir()
+    target = directory / "a.txt"
+    target.write_text("keep me")
+
+    with patch("ra_aid.file_edit.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            apply_str_edits(str(target), [StrEdit("keep", "lose")])
+
+    assert target.read_text() == "keep me"
+    assert [p.name for p in directory.iterdir()] == ["a.txt"]
+
+
+def test_large_files_are_mapped(tmp_path):
+    target = tmp_path / "big.txt"
+    line = b"0123456789" * 10 + b"\n"
+    target.write_bytes(line * 2000 + b"needle\n" + line * 2000)
+
+    with patch.object(get_file_cache(), "max_file_bytes", 1024), patch.object(
+        file_edit, "WRITE_CHUNK_BYTES", 4096
+    ), patch.object(get_file_cache(), "read_bytes") as read_bytes:
+        batch = apply_str_edits(str(target), [StrEdit("needle", "thread")])
+
+    read_bytes.assert_not_called()
+    assert batch.applied is True
+    assert target.read_bytes() == line * 2000 + b"thread\n" + line * 2000
+
+
+def test_edit_is_seen_through_file_cache(tmp_path):
+    target = tmp_path / "a.txt"
+    target.write_text("before")
+    cache = get_file_cache()
+    assert cache.read_text(str(target)) == "before"
+
+    apply_str_edits(str(target), [StrEdit("before", "after")])
+
+    assert cache.read_text(str(target)) == "after"
+    assert cache.total_bytes == len("after") * 2
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        apply_str_edits(str(tmp_path / "missing.txt"), [StrEdit("a", "b")])
@@ -0,0 +1,131 @@
+"""Tests for the persistent project file index."""
+
+import json
+import subprocess
+
+import pytest
+
+from ra_aid.file_index import (
+    INDEX_DIRNAME,
+    INDEX_FILENAME,
+    get_file_index,
+    get_file_index_stats,
+    reset_file_indexes,
+)
+from ra_aid.file_listing import get_all_project_files
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    """Make sure each test starts without in-memory indexes."""
+    reset_file_indexes()
+    yield
+    reset_file_indexes()
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Create a git repository with a few committed files."""
+    subprocess.run(["git", "init"], cwd=tmp_path, capture_output=True)
+    for file_path in ["README.md", "src/main.py", "src/utils.py"]:
+        full_path = tmp_path / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(f"Content of {file_path}")
+    subprocess.run(["git", "add", "."], cwd=tmp_path, capture_output=True)
+    subprocess.run(
+        ["git", "commit", "-m", "Initial commit"],
+        cwd=tmp_path,
+        env=GIT_ENV,
+        capture_output=True,
+    )
+    return tmp_path
+
+
+def test_repeat_listing_is_served_from_memory(git_repo):
+    """Test that an unchanged repository is listed once and then cached."""
+    first = get_all_project_files(str(git_repo))
+    second = get_all_project_files(str(git_repo))
+
+    assert first == second == ["README.md", "src/main.py", "src/utils.py"]
+    stats = get_file_index_stats(str(git_repo))
+    assert stats["rebuilds"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_untracked_change_does_not_rebuild_tracked(git_repo):
+    """Test that new untracked files are listed without a tracked rebuild."""
+    get_all_project_files(str(git_repo))
+    (git_repo / "notes.txt").write_text("untracked")
+
+    files = get_all_project_files(str(git_repo))
+
+    assert "notes.txt" in files
+    stats = get_file_index_stats(str(git_repo))
+    assert stats["rebuilds"] == 1
+    assert stats["untracked_refreshes"] == 1
+
+
+def test_index_change_triggers_rebuild(git_repo):
+    """Test that staging files invalidates the tracked portion."""
+    get_all_project_files(str(git_repo))
+    (git_repo / "docs").mkdir()
+    (git_repo / "docs" / "index.md").write_text("docs")
+    subprocess.run(["git", "add", "."], cwd=git_repo, capture_output=True)
+
+    files = get_all_project_files(str(git_repo))
+
+    assert "docs/index.md" in files
+    assert get_file_index_stats(str(git_repo))["rebuilds"] == 2
+
+
+def test_exclude_patterns_and_hidden_are_cached_separately(git_repo):
+    """Test that different filter parameters produce independent listings."""
+    (git_repo / ".env").write_text("SECRET=1")
+
+    default = get_all_project_files(str(git_repo))
+    excluded = get_all_project_files(str(git_repo), exclude_patterns=["*.py"])
+    hidden = get_all_project_files(str(git_repo), include_hidden=True)
+
+    assert ".env" not in default
+    assert excluded == ["README.md"]
+    assert ".env" in hidden
+    assert get_file_index_stats(str(git_repo))["rebuilds"] == 1
+
+
+def test_index_is_persisted_and_reloaded(git_repo):
+    """Test that a new process reuses the on-disk index instead of running git."""
+    expected = get_all_project_files(str(git_repo))
+    index_path = git_repo / INDEX_DIRNAME / INDEX_FILENAME
+    assert index_path.exists()
+    assert "src/main.py" in json.loads(index_path.read_text())["tracked"]
+
+    reset_file_indexes()
+    files = get_all_project_files(str(git_repo))
+
+    assert files == expected
+    stats = get_file_index_stats(str(git_repo))
+    assert stats["disk_loads"] == 1
+    assert stats["rebuilds"] == 0
+
+
+def test_index_not_persisted_without_ra_aid_dir(git_repo):
+    """Test that listing a repository without .ra-aid leaves no files behind."""
+    (git_repo / INDEX_DIRNAME).rmdir()
+
+    get_all_project_files(str(git_repo))
+
+    assert not (git_repo / INDEX_DIRNAME).exists()
+
+
+def test_non_git_directory_has_no_index(tmp_path):
+    """Test that plain directories are not indexed."""
+    assert get_file_index(str(tmp_path)) is None
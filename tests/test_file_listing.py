@@ -13,6 +13,7 @@ from ra_aid.file_listing import (
     GitCommandError,
     get_file_listing,
     is_git_repo,
+    iter_project_files,
 )
 
 
@@ -541,3 +542,68 @@ def test_hidden_files_excluded_by_default(git_repo_with_aider_files):
 
     # All files should be counted
     assert count == 11  # 5 original + 2 regular + 4 hidden
+
+
+def test_iter_project_files_matches_listing(git_repo_with_ignores):
+    """Test that streaming yields the same files as the full listing."""
+    files, _ = get_file_listing(str(git_repo_with_ignores))
+    assert sorted(iter_project_files(str(git_repo_with_ignores))) == files
+
+    hidden_files, _ = get_file_listing(str(git_repo_with_ignores), include_hidden=True)
+    streamed = iter_project_files(str(git_repo_with_ignores), include_hidden=True)
+    assert sorted(streamed) == hidden_files
+
+
+def test_iter_project_files_limit(git_repo_with_untracked):
+    """Test that streaming stops once the limit is reached."""
+    files = list(iter_project_files(str(git_repo_with_untracked), limit=3))
+    assert len(files) == 3
+    assert list(iter_project_files(str(git_repo_with_untracked), limit=0)) == []
+
+
+def test_iter_project_files_early_exit_stops_git(sample_git_repo):
+    """Test that closing the generator early terminates the git process."""
+    processes = []
+    real_popen = subprocess.Popen
+
+    def tracking_popen(args, *popen_args, **kwargs):
+        process = real_popen(args, *popen_args, **kwargs)
+        if args[:2] == ["git", "ls-files"]:
+            processes.append(process)
+        return process
+
+    with patch("ra_aid.file_listing.subprocess.Popen", side_effect=tracking_popen):
+        files = iter_project_files(str(sample_git_repo))
+        assert next(files)
+        files.close()
+
+    assert len(processes) == 1
+    assert processes[0].returncode is not None
+
+
+def test_iter_project_files_exclude_patterns(sample_git_repo):
+    """Test that exclude patterns are applied while streaming."""
+    files = list(iter_project_files(str(sample_git_repo), exclude_patterns=["*.py"]))
+    assert sorted(files) == ["README.md", "docs/index.html"]
+
+
+def test_iter_project_files_non_git(tmp_path):
+    """Test streaming a non-git directory in sorted depth-first order."""
+    for file_path in ["b.txt", "a/z.py", "a/b/c.md", ".hidden", "__pycache__/x.pyc"]:
+        full_path = tmp_path / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text("content")
+
+    files = list(iter_project_files(str(tmp_path)))
+
+    assert files == [
+        "b.txt",
+        os.path.join("a", "z.py"),
+        os.path.join("a", "b", "c.md"),
+    ]
+
+
+def test_iter_project_files_nonexistent_directory():
+    """Test that streaming a missing directory raises immediately on iteration."""
+    with pytest.raises(DirectoryNotFoundError):
+        list(iter_project_files("/nonexistent/path/123456"))
@@ -0,0 +1,170 @@
+"""Tests for applying unified diffs and search/replace blocks."""
+
+import difflib
+import os
+import stat
+
+import pytest
+
+from ra_aid.file_patch import PatchParseError, apply_patch, parse_patch
+
+
+def numbered(count, changes=None):
+    changes = changes or {}
+    return "".join(changes.get(i, f"line {i}\n") for i in range(1, count + 1))
+
+
+def unified(old, new, context=3):
+    return "".join(
+        difflib.unified_diff(
+            old.splitlines(True), new.splitlines(True), "a/f.txt", "b/f.txt", n=context
+        )
+    )
+
+
+def test_applies_unified_diff(tmp_path):
+    old = numbered(2000)
+    new = numbered(2000, {10: "ten\n", 1500: "fifteen hundred\n"})
+    target = tmp_path / "f.txt"
+    target.write_text(old)
+
+    result = apply_patch(str(target), unified(old, new))
+
+    assert result.applied is True
+    assert [hunk.line for hunk in result.hunks] == [7, 1497]
+    assert target.read_text() == new
+    assert result.bytes_written == len(new)
+
+
+def test_tolerates_offsets(tmp_path):
+    old = numbered(100)
+    patch = unified(old, numbered(100, {50: "fifty\n", 80: "eighty\n"}))
+    target = tmp_path / "f.txt"
+    # Five lines were added at the top since the diff was made
+    target.write_text("extra\n" * 5 + old)
+
+    result = apply_patch(str(target), patch)
+
+    assert result.applied is True
+    assert [hunk.offset for hunk in result.hunks] == [5, 5]
+    assert "fifty\n" in target.read_text()
+    assert target.read_text().startswith("extra\n" * 5)
+
+
+def test_fuzzy_context(tmp_path):
+    target = tmp_path / "f.py"
+    target.write_text("def f():\n    a = 1\n    b = 2\n    return a + b\n")
+    patch = (
+        "@@ -1,4 +1,4 @@\n"
+        " def f():  \n"
+        "-  a = 1\n"
+        "+    a = 10\n"
+        "     b = 2\n"
+        " # comment that is not in the file\n"
+    )
+
+    result = apply_patch(str(target), patch)
+
+    assert result.applied is True
+    assert result.hunks[0].fuzz == 1
+    assert result.hunks[0].ignored_whitespace is True
+    assert target.read_text() == "def f():\n    a = 10\n    b = 2\n    return a + b\n"
+
+
+def test_search_replace_blocks(tmp_path):
+    target = tmp_path / "f.py"
+    target.write_text("x = 1\ny = 2\nz = 3\n")
+    patch = (
+        "<<<<<<< SEARCH\nx = 1\n=======\nx = 100\n>>>>>>> REPLACE\n"
+        "<<<<<<< SEARCH\nz = 3\n=======\n>>>>>>> REPLACE\n"
+    )
+
+    result = apply_patch(str(target), patch)
+
+    assert result.applied is True
+    assert target.read_text() == "x = 100\ny = 2\n"
+
+
+def test_rejection_report_leaves_file_untouched(tmp_path):
+    target = tmp_path / "f.txt"
+    original = numbered(20)
+    target.write_text(original)
+    patch = (
+        "@@ -2,3 +2,3 @@\n line 2\n-line 3\n+three\n line 4\n"
+        "@@ -10,3 +10,3 @@\n line 10\n-line eleven\n+eleven\n line 12\n"
+    )
+
+    result = apply_patch(str(target), patch)
+
+    assert result.applied is False
+    assert [hunk.applied for hunk in result.hunks] == [True, False]
+    report = result.report()
+    assert report.startswith("Hunk 2 (@@ -10,3 +10,3 @@)")
+    assert "closest match starts at line 10 (2 of 3 lines agree)" in report
+    assert "line 11 is 'line 11' where the hunk expects 'line eleven'" in report
+    assert target.read_text() == original
+
+
+def test_preserves_crlf_mode_and_missing_final_newline(tmp_path):
+    target = tmp_path / "f.bat"
+    target.write_bytes(b"echo one\r\necho two")
+    os.chmod(target, 0o755)
+    patch = "@@ -1,2 +1,3 @@\n echo one\n-echo two\n+echo 2\n+echo three\n"
+
+    result = apply_patch(str(target), patch)
+
+    assert result.applied is True
+    assert target.read_bytes() == b"echo one\r\necho 2\r\necho three"
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o755
+
+
+def test_append_after_missing_final_newline(tmp_path):
+    target = tmp_path / "f.txt"
+    target.write_text("a\nb\nc")
+
+    result = apply_patch(str(target), "@@ -1,3 +1,4 @@\n a\n b\n c\n+d\n")
+
+    assert result.applied is True
+    assert target.read_text() == "a\nb\nc\nd"
+
+
+def test_ambiguous_search_block_is_rejected(tmp_path):
+    target = tmp_path / "f.py"
+    original = "x = 1\ny\nx = 1\n"
+    target.write_text(original)
+
+    result = apply_patch(str(target), "<<<<<<< SEARCH\nx = 1\n=======\nx = 2\n>>>>>>> REPLACE\n")
+
+    assert result.applied is False
+    assert "matches 2 places; add surrounding lines" in result.hunks[0].reason
+    assert target.read_text() == original
+
+    result = apply_patch(str(target), "<<<<<<< SEARCH\ny\nx = 1\n=======\ny\nx = 2\n>>>>>>> REPLACE\n")
+
+    assert result.applied is True
+    assert target.read_text() == "x = 1\ny\nx = 2\n"
+
+
+def test_insertion_into_empty_file(tmp_path):
+    target = tmp_path / "f.txt"
+    target.write_text("")
+
+    result = apply_patch(str(target), "--- /dev/null\n+++ b/f.txt\n@@ -0,0 +1,2 @@\n+a\n+b\n")
+
+    assert result.applied is True
+    assert target.read_text() == "a\nb\n"
+
+
+@pytest.mark.parametrize(
+    "patch, message",
+    [
+        ("just some text\n", "outside any hunk"),
+        ("", "no hunks"),
+        ("<<<<<<< SEARCH\na\n=======\nb\n", "Unterminated"),
+        ("@@ -1 +1 @@\n a\n", "changes nothing"),
+        ("--- a/x\n+++ b/x\n@@ -1 +1 @@\n-a\n+b\n--- a/y\n+++ b/y\n", "more than one file"),
+    ],
+)
+def test_malformed_patches(patch, message):
+    with pytest.raises(PatchParseError, match=message):
+        parse_patch(patch)
@@ -0,0 +1,111 @@
+"""Tests for the non-git project tree walker."""
+
+import os
+
+import pytest
+
+from ra_aid.file_walker import iter_files, walk_files
+
+EXCLUDED = frozenset({".git", "__pycache__"})
+
+
+def make_tree(root, files):
+    """Create files with placeholder content below root."""
+    for file_path, content in files.items():
+        full_path = root / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+
+
+def native(*paths):
+    """Convert slash separated paths to the platform's separator."""
+    return sorted(p.replace("/", os.sep) for p in paths)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Create a tree with nested ignore files."""
+    make_tree(
+        tmp_path,
+        {
+            ".gitignore": "node_modules/\n*.log\nbuild\n",
+            "main.py": "",
+            "debug.log": "",
+            "node_modules/pkg/index.js": "",
+            "build/out.o": "",
+            "src/app.py": "",
+            "src/.gitignore": "generated.py\n!keep.log\n/local.txt\n",
+            "src/generated.py": "",
+            "src/keep.log": "",
+            "src/local.txt": "",
+            "src/sub/local.txt": "",
+            "src/sub/generated.py": "",
+            "docs/.aiderignore": "drafts\n",
+            "docs/index.md": "",
+            "docs/drafts/wip.md": "",
+            "__pycache__/main.cpython-312.pyc": "",
+            ".hidden/secret.txt": "",
+        },
+    )
+    return tmp_path
+
+
+EXPECTED = native(
+    "main.py",
+    "src/app.py",
+    "src/keep.log",
+    "src/sub/local.txt",
+    "docs/index.md",
+)
+
+
+def test_walk_files_honors_nested_ignore_files(project):
+    """Test gitignore precedence, negation, anchoring and directory patterns."""
+    assert walk_files(str(project), excluded_dirs=EXCLUDED) == EXPECTED
+
+
+def test_iter_files_matches_walk_files(project):
+    """Test that the sequential walker yields the same files."""
+    assert sorted(iter_files(str(project), excluded_dirs=EXCLUDED)) == EXPECTED
+
+
+def test_directory_only_patterns_do_not_match_files(tmp_path):
+    """Test that a trailing slash restricts a pattern to directories."""
+    make_tree(tmp_path, {".gitignore": "cache/\n", "cache": "", "sub/cache/x.txt": ""})
+    assert walk_files(str(tmp_path)) == ["cache"]
+
+
+def test_include_hidden(project):
+    """Test that hidden files and the ignore files themselves can be listed."""
+    files = walk_files(str(project), include_hidden=True, excluded_dirs=EXCLUDED)
+    assert os.path.join(".hidden", "secret.txt") in files
+    assert ".gitignore" in files
+    assert os.path.join("__pycache__", "main.cpython-312.pyc") not in files
+
+
+def test_parallel_output_is_deterministic(tmp_path):
+    """Test that a wide tree is listed identically with any pool size."""
+    make_tree(
+        tmp_path,
+        {f"d{i:02d}/e{j}/f{k}.txt": "" for i in range(30) for j in range(3) for k in range(3)},
+    )
+    expected = walk_files(str(tmp_path), max_workers=1)
+    assert len(expected) == 270
+    assert expected == sorted(expected)
+    for workers in (2, 8, 32):
+        assert walk_files(str(tmp_path), max_workers=workers) == expected
+
+
+def test_symlinked_directories_are_not_followed(tmp_path):
+    """Test that directory symlinks are skipped rather than walked."""
+    make_tree(tmp_path, {"real/a.txt": ""})
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    assert walk_files(str(tmp_path)) == [os.path.join("real", "a.txt")]
+
+
+def test_missing_root_raises(tmp_path):
+    """Test that errors reading the root are reported."""
+    with pytest.raises(FileNotFoundError):
+        walk_files(str(tmp_path / "missing"))
+    with pytest.raises(FileNotFoundError):
+        list(iter_files(str(tmp_path / "missing")))
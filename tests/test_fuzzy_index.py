@@ -0,0 +1,78 @@
+"""Tests for the preprocessed fuzzy path index."""
+
+import pytest
+
+from ra_aid.fuzzy_index import (
+    FuzzyPathIndex,
+    get_fuzzy_index,
+    reset_fuzzy_indexes,
+)
+
+PATHS = [
+    "README.md",
+    "docs/utils.md",
+    "ra_aid/agent_utils.py",
+    "ra_aid/tools/fuzzy_find.py",
+    "ra_aid/tools/memory.py",
+    "ra_aid/utils/pattern_matcher.py",
+    "tests/test_agent_utils.py",
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    """Make sure each test starts without cached indexes."""
+    reset_fuzzy_indexes()
+    yield
+    reset_fuzzy_indexes()
+
+
+def test_exact_basename_scores_100():
+    """Test that an exact file name match gets a perfect score."""
+    results = FuzzyPathIndex(PATHS).search("memory.py")
+    assert results[0] == ("ra_aid/tools/memory.py", 100)
+
+
+def test_basename_outranks_directory():
+    """Test that a file name match ranks above a directory name match."""
+    results = FuzzyPathIndex(PATHS).search("utils", limit=None, threshold=60)
+    paths = [path for path, _ in results]
+    assert paths.index("docs/utils.md") < paths.index("ra_aid/utils/pattern_matcher.py")
+    scores = dict(results)
+    assert scores["ra_aid/utils/pattern_matcher.py"] == 90
+
+
+def test_threshold_and_limit():
+    """Test that results respect the threshold and limit."""
+    index = FuzzyPathIndex(PATHS)
+    assert index.search("mian", threshold=99) == []
+    assert len(index.search("py", limit=2)) == 2
+    assert index.search("") == []
+    assert index.search("py", limit=0) == []
+    with pytest.raises(ValueError):
+        index.search("py", limit=-1)
+
+
+def test_limit_matches_full_ranking():
+    """Test that the early cut-off returns the head of the full ranking."""
+    paths = [f"pkg{i % 7}/utils/mod_{i}.py" for i in range(500)] + ["utils.py"]
+    index = FuzzyPathIndex(sorted(paths))
+    for query in ("utils", "mod_12", "pkg3"):
+        assert index.search(query, limit=5) == index.search(query, limit=None)[:5]
+
+
+def test_path_queries_score_full_path():
+    """Test that queries spanning directories match across components."""
+    results = FuzzyPathIndex(PATHS).search("tools/fuzzy", limit=1)
+    assert results[0][0] == "ra_aid/tools/fuzzy_find.py"
+
+
+def test_index_reused_until_listing_changes():
+    """Test that the cached index is rebuilt only when the listing changes."""
+    first = get_fuzzy_index("repo", PATHS)
+    assert get_fuzzy_index("repo", list(PATHS)) is first
+    assert get_fuzzy_index("other", PATHS) is not first
+
+    changed = get_fuzzy_index("repo", PATHS + ["new.py"])
+    assert changed is not first
+    assert changed.search("new.py")[0] == ("new.py", 100)
@@ -0,0 +1,188 @@
+"""Tests for the pure-Python git index reader."""
+
+import struct
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from ra_aid.file_index import get_file_index_stats, reset_file_indexes
+from ra_aid.file_listing import get_all_project_files, is_git_repo
+from ra_aid.git_index import (
+    GitIndexError,
+    UnsupportedIndexError,
+    list_tracked_files,
+    locate_repository,
+    read_index_entries,
+)
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+FILES = [
+    "README.md",
+    "src/main.py",
+    "src/utils.py",
+    "src/deeply/nested/module.py",
+    "docs/with space.md",
+    "docs/café.md",
+]
+
+
+def git(repo, *args):
+    """Run a git command in the repository."""
+    return subprocess.run(
+        ["git", *args], cwd=repo, env=GIT_ENV, capture_output=True, check=True
+    )
+
+
+def git_ls_files(directory):
+    """List tracked files the way git does."""
+    output = subprocess.run(
+        ["git", "ls-files", "-z"], cwd=directory, capture_output=True, check=True
+    ).stdout
+    return [p for p in output.decode("utf-8", "surrogateescape").split("\0") if p]
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """Create a git repository with staged files."""
+    subprocess.run(["git", "init"], cwd=tmp_path, capture_output=True)
+    for file_path in FILES:
+        full_path = tmp_path / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(f"Content of {file_path}")
+    git(tmp_path, "add", ".")
+    return tmp_path
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_index_versions_match_git(git_repo, version):
+    """Test that every supported index version lists the same files as git."""
+    git(git_repo, "update-index", "--index-version", str(version))
+    assert list_tracked_files(str(git_repo)) == git_ls_files(git_repo)
+
+
+def test_extended_flags(git_repo):
+    """Test entries carrying extended flags (intent-to-add) in a v3 index."""
+    (git_repo / "later.py").write_text("pass")
+    git(git_repo, "add", "--intent-to-add", "later.py")
+    assert "later.py" in list_tracked_files(str(git_repo))
+    assert list_tracked_files(str(git_repo)) == git_ls_files(git_repo)
+
+
+def test_split_index(git_repo):
+    """Test that split indexes are merged with their shared base."""
+    git(git_repo, "update-index", "--split-index")
+    (git_repo / "new.txt").write_text("new")
+    git(git_repo, "add", "new.txt")
+    git(git_repo, "rm", "--cached", "-q", "src/utils.py")
+    (git_repo / "README.md").write_text("changed")
+    git(git_repo, "add", "README.md")
+
+    assert list(git_repo.glob(".git/sharedindex.*"))
+    assert list_tracked_files(str(git_repo)) == git_ls_files(git_repo)
+
+
+def test_untracked_cache_extension_is_skipped(git_repo):
+    """Test that an index carrying the untracked cache is still readable."""
+    git(git_repo, "commit", "-m", "Initial commit")
+    git(git_repo, "update-index", "--untracked-cache")
+    git(git_repo, "status")
+    assert list_tracked_files(str(git_repo)) == git_ls_files(git_repo)
+
+
+def test_subdirectory_is_relative(git_repo):
+    """Test that listing a subdirectory mirrors git ls-files run inside it."""
+    assert list_tracked_files(str(git_repo / "src")) == git_ls_files(git_repo / "src")
+
+
+def test_empty_repository(tmp_path):
+    """Test a repository without an index file."""
+    subprocess.run(["git", "init"], cwd=tmp_path, capture_output=True)
+    assert list_tracked_files(str(tmp_path)) == []
+
+
+def test_not_a_repository(tmp_path):
+    """Test that directories outside a working tree are reported."""
+    assert locate_repository(str(tmp_path)) is None
+    assert list_tracked_files(str(tmp_path)) is None
+
+
+def test_unsupported_version(git_repo):
+    """Test that unknown index versions are rejected for fallback."""
+    index_path = git_repo / ".git" / "index"
+    data = bytearray(index_path.read_bytes())
+    struct.pack_into(">I", data, 4, 5)
+    index_path.write_bytes(bytes(data))
+
+    with pytest.raises(UnsupportedIndexError):
+        read_index_entries(str(git_repo / ".git"))
+
+
+def test_corrupt_index(git_repo):
+    """Test that garbage index files raise GitIndexError."""
+    (git_repo / ".git" / "index").write_bytes(b"not an index at all, just bytes here")
+    with pytest.raises(GitIndexError):
+        read_index_entries(str(git_repo / ".git"))
+
+
+@pytest.fixture
+def index_backend(mock_config_repository):
+    """Select the index file backend for file listing."""
+    mock_config_repository.set("file_listing_backend", "index")
+    reset_file_indexes()
+    yield
+    reset_file_indexes()
+
+
+def test_index_backend_lists_without_git_ls_files(git_repo, index_backend):
+    """Test that the index backend never forks git ls-files for tracked files."""
+    real_run = subprocess.run
+    commands = []
+
+    def tracking_run(args, *run_args, **kwargs):
+        commands.append(args)
+        return real_run(args, *run_args, **kwargs)
+
+    with patch("subprocess.run", side_effect=tracking_run):
+        assert is_git_repo(str(git_repo)) is True
+        files = get_all_project_files(str(git_repo))
+
+    assert files == sorted(git_ls_files(git_repo))
+    assert ["git", "ls-files", "-z"] not in commands
+    assert ["git", "rev-parse", "--git-dir"] not in commands
+    assert get_file_index_stats(str(git_repo))["rebuilds"] == 1
+
+
+def test_index_backend_falls_back_to_git(git_repo, index_backend):
+    """Test that unsupported index formats fall back to git ls-files."""
+    with patch(
+        "ra_aid.file_index.list_tracked_files",
+        side_effect=UnsupportedIndexError("sparse"),
+    ):
+        files = get_all_project_files(str(git_repo))
+
+    assert files == sorted(git_ls_files(git_repo))
+
+
+def test_unmerged_paths_listed_once(git_repo):
+    """Test that conflicted paths with several stages are listed once."""
+    git(git_repo, "commit", "-m", "Initial commit")
+    git(git_repo, "checkout", "-q", "-b", "other")
+    (git_repo / "README.md").write_text("other")
+    git(git_repo, "commit", "-am", "Other change")
+    git(git_repo, "checkout", "-q", "-")
+    (git_repo / "README.md").write_text("mine")
+    git(git_repo, "commit", "-am", "My change")
+    subprocess.run(["git", "merge", "other"], cwd=git_repo, env=GIT_ENV, capture_output=True)
+
+    entries = read_index_entries(str(git_repo / ".git"))
+    stages = [stage for path, stage in entries if path == "README.md"]
+    assert stages == [1, 2, 3]
+    # git ls-files repeats a path per stage; the reader lists it once
+    assert list_tracked_files(str(git_repo)) == list(dict.fromkeys(git_ls_files(git_repo)))
@@ -0,0 +1,97 @@
+"""Tests for the line-offset index used to read windows of large files."""
+
+import pytest
+
+from ra_aid import line_index
+from ra_aid.line_index import STRIDE, count_lines, read_line_window, reset_line_indexes
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    reset_line_indexes()
+    yield
+    reset_line_indexes()
+
+
+def lines(count, end="\n"):
+    return "".join(f"line {i}{end}" for i in range(1, count + 1))
+
+
+@pytest.mark.parametrize(
+    "count", [1, STRIDE - 1, STRIDE, STRIDE + 1, 3 * STRIDE, 3 * STRIDE + 5]
+)
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_windows_match_readlines(tmp_path, count, trailing_newline):
+    content = lines(count)
+    if not trailing_newline:
+        content = content[:-1]
+    path = tmp_path / "f.txt"
+    path.write_text(content)
+    expected = content.splitlines(keepends=True)
+
+    assert count_lines(str(path)) == count
+    for start in (1, 2, STRIDE, STRIDE + 1, count):
+        for size in (1, 3, STRIDE + 2):
+            window = read_line_window(str(path), start, start + size - 1)
+            assert window.text == "".join(expected[start - 1 : start + size - 1])
+            assert window.total_lines == count
+
+
+def test_window_bounds_and_cursor(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text(lines(10))
+
+    window = read_line_window(str(path), 3, None, max_lines=4)
+    assert (window.start_line, window.end_line) == (3, 6)
+    assert window.next_start_line == 7
+
+    window = read_line_window(str(path), 8, 50)
+    assert (window.start_line, window.end_line) == (8, 10)
+    assert window.next_start_line is None
+
+    window = read_line_window(str(path), 20, 30)
+    assert window.text == ""
+    assert window.end_line < window.start_line
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    window = read_line_window(str(path))
+    assert window.text == ""
+    assert window.total_lines == 0
+    assert window.next_start_line is None
+
+
+def test_crlf_is_translated(tmp_path):
+    path = tmp_path / "dos.txt"
+    path.write_bytes(b"a\r\nb\r\nc\r\n")
+    assert read_line_window(str(path), 2, 2).text == "b\n"
+
+
+def test_utf16_falls_back_to_decoding(tmp_path):
+    path = tmp_path / "wide.txt"
+    path.write_text(lines(5), encoding="utf-16")
+    window = read_line_window(str(path), 2, 3, encoding="utf-16")
+    assert window.text == "line 2\nline 3\n"
+    assert window.total_lines == 5
+
+
+def test_index_is_reused_until_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "f.txt"
+    path.write_text(lines(200))
+    builds = []
+    original = line_index.LineIndex.build.__func__
+    monkeypatch.setattr(
+        line_index.LineIndex,
+        "build",
+        classmethod(lambda cls, mm: builds.append(1) or original(cls, mm)),
+    )
+
+    read_line_window(str(path), 1, 10)
+    read_line_window(str(path), 150, 160)
+    assert len(builds) == 1
+
+    path.write_text(lines(300))
+    assert read_line_window(str(path), 299, 300).text == "line 299\nline 300\n"
+    assert len(builds) == 2
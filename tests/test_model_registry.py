@@ -0,0 +1,112 @@
+"""Tests for the memoized model registry."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from ra_aid.model_registry import (
+    MODEL_INFO_FORMAT_VERSION,
+    ModelRegistry,
+    _litellm_version,
+    normalize_model_name,
+)
+from ra_aid.models_params import DEFAULT_BASE_LATENCY
+
+
+@pytest.fixture
+def params():
+    return {
+        "anthropic": {
+            "claude2": {"token_limit": 100000, "latency_coefficient": 30},
+            "claude-3-7-sonnet-20250219": {"token_limit": 200000, "supports_thinking": True},
+        },
+        "openai": {"gpt-4": {"token_limit": 8192}},
+    }
+
+
+def test_normalize_model_name():
+    assert normalize_model_name("Claude-2") == "claude2"
+
+
+def test_model_config_exact_and_normalized(params):
+    """Test that exact names are preferred and normalized names are found."""
+    registry = ModelRegistry()
+
+    assert registry.model_config("anthropic", "claude-2", params)["token_limit"] == 100000
+    assert registry.model_config("anthropic", "claude37sonnet20250219", params)["supports_thinking"]
+    assert registry.model_config("openai", "gpt-4", params) is params["openai"]["gpt-4"]
+    assert registry.model_config("openai", "gpt-5", params) == {}
+    assert registry.model_config("unknown", "gpt-4", params) == {}
+    assert registry.model_config("openai", None, params) == {}
+
+
+def test_model_config_follows_table_changes(params):
+    """Test that replaced or extended provider tables are re-indexed."""
+    registry = ModelRegistry()
+    assert registry.model_config("openai", "gpt4o", params) == {}
+
+    params["openai"]["gpt-4o"] = {"token_limit": 128000}
+    assert registry.model_config("openai", "gpt4o", params)["token_limit"] == 128000
+
+    params["openai"] = {"o-1": {"token_limit": 200000}}
+    assert registry.model_config("openai", "o1", params)["token_limit"] == 200000
+    assert registry.model_config("openai", "gpt4o", params) == {}
+
+
+def test_model_info_is_cached_per_loader():
+    """Test that each model is looked up once per loader, failures included."""
+    registry = ModelRegistry()
+    loader = MagicMock(side_effect=lambda model: {"max_input_tokens": 1000, "model": model})
+    failing = MagicMock(side_effect=Exception("not found"))
+
+    assert registry.model_info("openai/gpt-4", loader=loader)["model"] == "openai/gpt-4"
+    assert registry.model_info("openai/gpt-4", loader=loader)["max_input_tokens"] == 1000
+    assert registry.model_info("openai/gpt-4", loader=failing) is None
+    assert registry.model_info("openai/gpt-4", loader=failing) is None
+
+    loader.assert_called_once_with("openai/gpt-4")
+    failing.assert_called_once_with("openai/gpt-4")
+
+    registry.model_info("gpt-4", "openai", loader)
+    loader.assert_called_with(model="gpt-4", custom_llm_provider="openai")
+
+
+def test_token_limit_prefers_litellm(params):
+    registry = ModelRegistry()
+    known = MagicMock(return_value={"max_input_tokens": 150000})
+    unknown = MagicMock(side_effect=Exception("not found"))
+
+    assert registry.token_limit("anthropic", "claude-2", params, known) == 150000
+    known.assert_called_once_with("anthropic/claude-2")
+    assert registry.token_limit("anthropic", "claude-2", params, unknown) == 100000
+    assert registry.token_limit("anthropic", "claude-9", params, unknown) is None
+
+
+def test_latency_coefficient_and_costs(params):
+    registry = ModelRegistry()
+    loader = MagicMock(return_value={"input_cost_per_token": 3e-6, "output_cost_per_token": None})
+
+    assert registry.latency_coefficient("anthropic", "claude-2", params) == 30
+    assert registry.latency_coefficient("openai", "gpt-4", params) == DEFAULT_BASE_LATENCY
+    assert registry.model_costs("claude-2", "anthropic", loader) == (3e-6, 0.0)
+    assert registry.model_costs("claude-2", "anthropic", MagicMock(return_value=None)) is None
+
+
+def test_load_ignores_other_litellm_versions(tmp_path):
+    """Test that persisted model info is only used with the litellm version that produced it."""
+    path = tmp_path / "model_info.json"
+    data = {
+        "version": MODEL_INFO_FORMAT_VERSION,
+        "litellm_version": _litellm_version(),
+        "models": [[None, "openai/gpt-4", {"max_input_tokens": 8192}], ["x", "y", None]],
+    }
+    path.write_text(json.dumps(data))
+    assert ModelRegistry(str(path)).load()
+
+    data["litellm_version"] = "0.0.0-other"
+    path.write_text(json.dumps(data))
+    assert not ModelRegistry(str(path)).load()
+
+    path.write_text("not json")
+    assert not ModelRegistry(str(path)).load()
@@ -77,5 +77,23 @@ def test_non_git_directory_with_excluded_dirs():
         assert files == ["file1.txt"]
 
 
+def test_non_git_directory_honors_ignore_files():
+    """Test that .gitignore and .aiderignore are applied outside git repos."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        (root / ".gitignore").write_text("node_modules/\n")
+        (root / "node_modules" / "pkg").mkdir(parents=True)
+        (root / "node_modules" / "pkg" / "index.js").write_text("test content")
+        (root / "app").mkdir()
+        (root / "app" / ".aiderignore").write_text("*.tmp\n")
+        (root / "app" / "main.py").write_text("test content")
+        (root / "app" / "scratch.tmp").write_text("test content")
+
+        files, count = get_file_listing(temp_dir)
+
+        assert count == 1
+        assert files == [os.path.join("app", "main.py")]
+
+
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__])
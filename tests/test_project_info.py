@@ -1,11 +1,14 @@
 """Tests for project info functionality."""
 
 import os
+import signal
 import subprocess
+from unittest.mock import patch
 
 import pytest
 
-from ra_aid.project_info import ProjectInfo, get_project_info
+from ra_aid.file_listing import get_all_project_files
+from ra_aid.project_info import ProjectInfo, format_project_info, get_project_info
 from ra_aid.project_state import DirectoryAccessError, DirectoryNotFoundError
 
 
@@ -74,7 +77,69 @@ def test_file_limit(sample_git_repo):
     """Test file listing with limit."""
     info = get_project_info(str(sample_git_repo), file_limit=2)
     assert len(info.files) == 2
+    # Not counted past the limit until the file index is warm
+    assert info.total_files == 2
+    assert info.more_files is True
+
+    get_all_project_files(str(sample_git_repo))
+    info = get_project_info(str(sample_git_repo), file_limit=2)
+    assert len(info.files) == 2
     assert info.total_files == 5  # Total should still be 5
+    assert info.more_files is False
+
+
+def test_file_limit_stops_reading_git_listing(sample_git_repo):
+    """Test that a cold git repository is streamed only up to the limit."""
+    # More listing output than a pipe holds, so git cannot finish on its own
+    many = sample_git_repo / "untracked"
+    many.mkdir()
+    for i in range(2000):
+        (many / f"generated_file_with_a_long_name_{i:05d}.txt").write_text("")
+    processes = []
+    real_popen = subprocess.Popen
+
+    def tracking_popen(args, *popen_args, **kwargs):
+        process = real_popen(args, *popen_args, **kwargs)
+        if args[:2] == ["git", "ls-files"]:
+            processes.append(process)
+        return process
+
+    with patch("ra_aid.file_listing.subprocess.Popen", side_effect=tracking_popen), patch(
+        "ra_aid.project_info.get_all_project_files",
+        side_effect=AssertionError("full listing"),
+    ):
+        info = get_project_info(str(sample_git_repo), file_limit=1)
+
+    assert len(info.files) == 1
+    assert info.more_files is True
+    assert len(processes) == 1
+    # git was stopped before it finished writing its listing
+    assert processes[0].returncode == -signal.SIGKILL
+
+
+def test_file_limit_keeps_first_files_sorted(sample_git_repo):
+    """Test that the limited listing is the start of the sorted listing."""
+    info = get_project_info(str(sample_git_repo), file_limit=3)
+    assert info.files == ["README.md", "docs/index.html", "src/main.py"]
+    assert info.more_files is True
+
+
+def test_file_limit_outside_git(tmp_path):
+    """Test that non-git trees are only read one file past the limit."""
+    for name in ["e.txt", "d.txt", "c.txt", "b.txt", "a.txt"]:
+        (tmp_path / name).write_text(name)
+
+    info = get_project_info(str(tmp_path), file_limit=2)
+    assert info.files == sorted(info.files)
+    assert len(info.files) == 2
+    assert info.total_files == 2
+    assert info.more_files is True
+    assert "Total Files: 2+" in format_project_info(info)
+
+    info = get_project_info(str(tmp_path), file_limit=5)
+    assert info.files == ["a.txt", "b.txt", "c.txt", "d.txt", "e.txt"]
+    assert info.total_files == 5
+    assert info.more_files is False
 
 
 def test_nonexistent_directory():
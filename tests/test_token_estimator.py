@@ -0,0 +1,93 @@
+"""Tests for token estimates calibrated from provider usage."""
+
+import json
+
+import pytest
+
+from ra_aid.token_estimator import (
+    DEFAULT_BYTES_PER_TOKEN,
+    MIN_OBSERVATIONS,
+    RatioStats,
+    TokenEstimator,
+    content_bytes,
+)
+
+
+def test_content_bytes():
+    """Test sizing strings, message-like objects and list content."""
+
+    class Message:
+        def __init__(self, content):
+            self.content = content
+
+    assert content_bytes(None) == 0
+    assert content_bytes("") == 0
+    assert content_bytes("🚀") == 4
+    assert content_bytes(Message("test message")) == 12
+    assert content_bytes(Message([{"type": "text"}])) == len(str([{"type": "text"}]))
+
+
+def test_ratio_stats_matches_mean_and_variance():
+    """Test that the running statistics equal the plain mean and variance at first."""
+    stats = RatioStats()
+    for ratio in (3.0, 4.0, 5.0):
+        stats.observe(ratio)
+    assert stats.mean == pytest.approx(4.0)
+    assert stats.variance == pytest.approx(2 / 3)
+
+
+def test_uses_default_until_calibrated():
+    """Test that estimates keep the default ratio until enough observations."""
+    estimator = TokenEstimator()
+    assert estimator.estimate(0) == 0
+    assert estimator.estimate(11) == 5
+    assert isinstance(estimator.estimate(11), int)
+    for _ in range(MIN_OBSERVATIONS - 1):
+        estimator.observe("model-a", 40000, 10000)
+    assert estimator.bytes_per_token("model-a") == DEFAULT_BYTES_PER_TOKEN
+
+    estimator.observe("model-a", 40000, 10000)
+    assert estimator.bytes_per_token("model-a") == pytest.approx(4.0)
+    assert estimator.estimate(4000, "model-a") == 1000
+    # Other models are unaffected
+    assert estimator.estimate(4000, "model-b") == 2000
+    assert estimator.estimate(4000) == 2000
+
+
+def test_variance_makes_estimates_conservative():
+    """Test that noisy observations lower the ratio used, raising estimates."""
+    estimator = TokenEstimator()
+    for tokens in (8000, 10000, 12000, 8000, 10000, 12000):
+        estimator.observe("model-a", 40000, tokens)
+    [stats] = estimator.stats()
+    assert stats["observations"] == 6
+    assert stats["bytes_per_token"] < stats["mean_bytes_per_token"]
+    assert stats["bytes_per_token"] == pytest.approx(
+        stats["mean_bytes_per_token"] - stats["stddev_bytes_per_token"], abs=0.002
+    )
+
+
+def test_ignores_unusable_observations():
+    """Test that tiny prompts, missing models and implausible ratios are ignored."""
+    estimator = TokenEstimator()
+    estimator.observe(None, 40000, 10000)
+    estimator.observe("model-a", 100, 50)
+    estimator.observe("model-a", 40000, 0)
+    estimator.observe("model-a", 40000, 100)
+    assert estimator.stats() == []
+
+
+def test_persists_ratios(tmp_path):
+    """Test that learned ratios are saved and loaded again."""
+    path = str(tmp_path / "token_estimates.json")
+    estimator = TokenEstimator(path)
+    for _ in range(MIN_OBSERVATIONS):
+        estimator.observe("model-a", 30000, 10000)
+    estimator.save()
+
+    restored = TokenEstimator(path)
+    assert restored.bytes_per_token("model-a") == pytest.approx(3.0)
+
+    with open(path, "w") as f:
+        json.dump({"version": 0, "models": {}}, f)
+    assert not TokenEstimator(path).load()
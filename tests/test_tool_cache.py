@@ -0,0 +1,169 @@
+"""Tests for the session-scoped cache of read-only tool results."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from ra_aid.tool_cache import (
+    ToolResultCache,
+    cached_tool_result,
+    get_tool_cache,
+    get_tool_cache_stats,
+    invalidate_tool_caches,
+    invalidates_tool_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_output():
+    with patch("ra_aid.tool_cache._record_cache_hit") as record, patch(
+        "ra_aid.console.formatting.cpm"
+    ):
+        yield record
+
+
+def counting_tool(results=None):
+    calls = []
+
+    @cached_tool_result("read_tool", path_params=["path"])
+    def read_tool(path: str, *, limit: int = 10, tags=None):
+        calls.append((path, limit, tags))
+        if results:
+            return results.pop(0)
+        return {"content": f"{path}:{limit}", "success": True}
+
+    return read_tool, calls
+
+
+def test_identical_calls_reuse_result(no_output):
+    read_tool, calls = counting_tool()
+    first = read_tool("a.txt")
+    second = read_tool("./a.txt", limit=10)
+    assert first == second
+    assert len(calls) == 1
+    assert get_tool_cache_stats()["hits"] == 1
+    assert get_tool_cache_stats()["misses"] == 1
+    assert get_tool_cache_stats()["hit_rate"] == 0.5
+    no_output.assert_called_once()
+    assert no_output.call_args[0][0] == "read_tool"
+
+
+def test_different_arguments_miss():
+    read_tool, calls = counting_tool()
+    read_tool("a.txt")
+    read_tool("a.txt", limit=5)
+    read_tool("a.txt", tags=["x"])
+    read_tool("b.txt")
+    assert len(calls) == 4
+
+
+def test_cached_results_are_copies():
+    read_tool, calls = counting_tool()
+    read_tool("a.txt")["content"] = "mutated"
+    assert read_tool("a.txt")["content"] == "a.txt:10"
+
+
+def test_failed_results_are_not_cached():
+    read_tool, calls = counting_tool(
+        [{"success": False}, {"error": "boom"}, {"content": "ok"}, {"content": "unused"}]
+    )
+    assert read_tool("a.txt") == {"success": False}
+    assert read_tool("a.txt") == {"error": "boom"}
+    assert read_tool("a.txt") == {"content": "ok"}
+    assert read_tool("a.txt") == {"content": "ok"}
+    assert len(calls) == 3
+
+
+def test_exceptions_are_not_cached():
+    attempts = []
+
+    @cached_tool_result("flaky")
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("transient")
+        return "ok"
+
+    with pytest.raises(OSError):
+        flaky()
+    assert flaky() == "ok"
+    assert flaky() == "ok"
+    assert len(attempts) == 2
+
+
+def test_file_changes_outside_tools_miss(tmp_path):
+    target = tmp_path / "a.txt"
+    target.write_text("one")
+    read_tool, calls = counting_tool()
+    read_tool(str(target))
+    read_tool(str(target))
+    target.write_text("one two")
+    read_tool(str(target))
+    assert len(calls) == 2
+
+
+def test_write_tools_invalidate():
+    read_tool, calls = counting_tool()
+
+    @invalidates_tool_cache
+    def write_tool():
+        raise RuntimeError("partial write")
+
+    read_tool("a.txt")
+    with pytest.raises(RuntimeError):
+        write_tool()
+    read_tool("a.txt")
+    assert len(calls) == 2
+    assert get_tool_cache_stats()["invalidations"] == 1
+
+
+def test_result_computed_across_invalidation_is_dropped():
+    cache = ToolResultCache()
+    generation = cache.generation
+    cache.invalidate()
+    cache.put("tool", "key", "stale", generation)
+    assert cache.get("tool", "key") == (False, None)
+
+
+def test_lru_eviction():
+    cache = ToolResultCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put("tool", key, key, cache.generation)
+    cache.get("tool", "a")
+    cache.put("tool", "c", "c", cache.generation)
+    assert cache.get("tool", "a") == (True, "a")
+    assert cache.get("tool", "b") == (False, None)
+
+
+def test_directories_have_separate_caches():
+    with patch("ra_aid.tool_cache.os.getcwd", return_value="/repo/a"):
+        first = get_tool_cache()
+    with patch("ra_aid.tool_cache.os.getcwd", return_value="/repo/b"):
+        second = get_tool_cache()
+    assert first is not second
+    first.put("tool", "key", 1, first.generation)
+    second.put("tool", "key", 2, second.generation)
+    invalidate_tool_caches()
+    assert len(first) == len(second) == 0
+
+
+def test_threads_share_cache_without_session_context():
+    """Test that worker threads, which do not inherit contextvars, use the same cache."""
+    caches = []
+    thread = threading.Thread(target=lambda: caches.append(get_tool_cache()))
+    thread.start()
+    thread.join()
+    assert caches == [get_tool_cache()]
+
+
+def test_concurrent_calls():
+    read_tool, calls = counting_tool()
+    threads = [threading.Thread(target=read_tool, args=("a.txt",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = get_tool_cache_stats()
+    assert stats["hits"] + stats["misses"] == 8
+    assert len(calls) == stats["misses"]